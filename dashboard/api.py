@@ -0,0 +1,249 @@
+"""
+只读分析 HTTP 接口
+
+告警、Notebook 等外部工具原本直接打开 SQLite 文件重算面板上的数字，这里把同样的聚合结果以 HTTP 提供：
+- 查询与面板共用 queries.py 和只读连接池（含按 data_version 失效的结果缓存），数字与页面一致
+- 响应为 JSON 或 Arrow IPC 流（?format=arrow 或 Accept: application/vnd.apache.arrow.stream，需要 pyarrow）
+- ETag 由数据库版本 + 当天日期 + 请求内容组成，客户端带 If-None-Match 轮询时，数据没变直接返回 304，不执行查询
+
+接口:
+    GET /health
+    GET /risk                                   今日风控摘要
+    GET /prices?category=&min_deviation=&min_volume=&sort=deviation|volume|liquidity|updated
+                                                活跃市场最新价格
+    GET /signals?since=&status=&level=&limit=&cursor=
+                                                信号历史，按 (created_at, id) 倒序分页；
+                                                下一页游标在响应头 X-Next-Cursor，原样作为 cursor 传回
+    GET /daily/pnl|opportunities|signals?since=  每日汇总（daily_* 汇总表）
+
+用法:
+    python dashboard/api.py --host 127.0.0.1 --port 8502
+"""
+import argparse
+import hashlib
+import json
+import secrets
+from datetime import date, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+import queries as q
+from db import ReadOnlyPool, resolve_db_path
+from snapshot import load_risk
+
+try:
+    import pyarrow as pa
+except ImportError:  # Streamlit 自带 pyarrow，单独部署接口时可不装，只提供 JSON
+    pa = None
+
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+JSON_TYPE = 'application/json; charset=utf-8'
+
+DEFAULT_DAYS = 30
+SIGNAL_PAGE_SIZE = 100
+MAX_SIGNAL_PAGE_SIZE = 1000
+
+SORT_OPTIONS = {
+    'deviation': '偏离度 ↓',
+    'volume': '交易量 ↓',
+    'liquidity': '流动性 ↓',
+    'updated': '最新更新',
+}
+
+DAILY_QUERIES = {
+    'pnl': q.DAILY_PNL,
+    'opportunities': q.DAILY_OPPORTUNITIES,
+    'signals': q.DAILY_SIGNALS,
+}
+
+# data_version 只在同一连接内可比，进程重启后会从头计数，ETag 带上进程标识避免误判 304
+INSTANCE = secrets.token_hex(4)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _number(params, name, default, cast=float):
+    value = _param(params, name)
+    if value is None:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise BadRequest(f'{name} 不是有效数字: {value}')
+
+
+def _since(params):
+    value = _param(params, 'since')
+    if value is None:
+        return (date.today() - timedelta(days=DEFAULT_DAYS)).isoformat()
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise BadRequest(f'since 应为 YYYY-MM-DD: {value}')
+
+
+def risk(pool, params):
+    return pd.DataFrame([load_risk(pool)]), {}
+
+
+def prices(pool, params):
+    sort = _param(params, 'sort', 'deviation')
+    if sort not in SORT_OPTIONS:
+        raise BadRequest(f'sort 只能是 {", ".join(SORT_OPTIONS)}')
+    return pool.query(q.active_markets_sql(SORT_OPTIONS[sort]), {
+        'category': _param(params, 'category'),
+        'min_deviation': _number(params, 'min_deviation', 0.0),
+        'min_volume': _number(params, 'min_volume', 0.0),
+    }), {}
+
+
+def signals(pool, params):
+    limit = _number(params, 'limit', SIGNAL_PAGE_SIZE, int)
+    if not 1 <= limit <= MAX_SIGNAL_PAGE_SIZE:
+        raise BadRequest(f'limit 取值 1~{MAX_SIGNAL_PAGE_SIZE}')
+    status, level = _param(params, 'status'), _param(params, 'level')
+    sql = q.signal_list_sql(status, level)
+    args = {'start_date': _since(params), 'status': status, 'level': level, 'limit': limit}
+
+    cursor = _param(params, 'cursor')
+    if cursor:
+        created, _, row_id = cursor.rpartition(',')
+        if not created or not row_id.isdigit():
+            raise BadRequest(f'无效的 cursor: {cursor}')
+        df = pool.query(sql.format(rows=q.SIGNAL_PAGE_ROWS), {
+            **args, 'cursor_created': created, 'cursor_id': int(row_id),
+        })
+    else:
+        df = pool.query(sql.format(rows=q.FEED_NEW_ROWS.format(id='s.id')), {**args, 'after_id': 0})
+
+    headers = {}
+    if len(df) == limit:
+        last = df.iloc[-1]
+        headers['X-Next-Cursor'] = f"{last['创建时间']},{int(last['id'])}"
+    return df, headers
+
+
+def daily(name):
+    def handler(pool, params):
+        return pool.query(DAILY_QUERIES[name], (_since(params),)), {}
+    return handler
+
+
+ROUTES = {
+    '/risk': risk,
+    '/prices': prices,
+    '/signals': signals,
+    **{f'/daily/{name}': daily(name) for name in DAILY_QUERIES},
+}
+
+
+def to_json(df):
+    return df.to_json(orient='records', force_ascii=False, date_format='iso').encode('utf-8')
+
+
+def to_arrow(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = 'PolymarketDashboardAPI/1.0'
+    pool = None
+
+    def _send(self, status, body=b'', content_type=JSON_TYPE, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'))
+
+    def _wants_arrow(self, params):
+        fmt = _param(params, 'format')
+        if fmt is not None:
+            if fmt not in ('json', 'arrow'):
+                raise BadRequest('format 只能是 json 或 arrow')
+            return fmt == 'arrow'
+        return ARROW_TYPE in self.headers.get('Accept', '')
+
+    def _etag(self, target, arrow):
+        """数据库版本 + 日期（今日类接口跨天即变）+ 请求路径参数 + 格式"""
+        digest = hashlib.sha1(f'{target}|{arrow}'.encode('utf-8')).hexdigest()[:12]
+        return f'"{INSTANCE}-{self.pool.data_version()}-{date.today():%Y%m%d}-{digest}"'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        params = parse_qs(url.query)
+
+        if path == '/health':
+            return self._send(HTTPStatus.OK, b'{"status":"ok"}')
+
+        handler = ROUTES.get(path)
+        if handler is None:
+            return self._error(HTTPStatus.NOT_FOUND, f'未知接口: {path}，可用: {", ".join(sorted(ROUTES))}')
+
+        try:
+            arrow = self._wants_arrow(params)
+            if arrow and pa is None:
+                return self._error(HTTPStatus.NOT_ACCEPTABLE, '未安装 pyarrow，只能返回 JSON')
+
+            etag = self._etag(self.path, arrow)
+            cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+            if etag in self.headers.get('If-None-Match', ''):
+                return self._send(HTTPStatus.NOT_MODIFIED, headers=cache_headers)
+
+            df, headers = handler(self.pool, params)
+            body = to_arrow(df) if arrow else to_json(df)
+            self._send(HTTPStatus.OK, body, ARROW_TYPE if arrow else JSON_TYPE, {**cache_headers, **headers})
+        except BadRequest as e:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+        except Exception as e:
+            self._error(HTTPStatus.INTERNAL_SERVER_ERROR, f'{type(e).__name__}: {e}')
+
+    do_HEAD = do_GET
+
+
+def make_server(host, port, db_path=None):
+    handler = type('Handler', (ApiHandler,), {'pool': ReadOnlyPool(db_path or resolve_db_path())})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dashboard 只读分析接口')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--db', help='数据库路径，默认与 Dashboard 相同（DB_PATH）')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.db)
+    print(f'📡 只读分析接口: http://{args.host}:{args.port}  (数据库 {server.RequestHandlerClass.pool.path})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
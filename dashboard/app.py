@@ -1,7 +1,12 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-from datetime import datetime, timedelta
+
+import queries as q
+import snapshot
+from change_feed import refresh_interval
+from db import query, query_stats
+from styling import (
+    LEVEL_ROW, OVERVIEW_DEVIATION_BANDS, STATUS_TEXT, band_css, category_css, style_table,
+)
 
 st.set_page_config(
     page_title="Polymarket 交易监控",
@@ -49,16 +54,6 @@ st.markdown("""
 
 st.title("🤖 Polymarket 套利交易监控面板")
 
-# 数据库连接
-@st.cache_resource
-def get_connection():
-    return sqlite3.connect('../data/trading_bot.db', check_same_thread=False)
-
-def refresh_connection():
-    return sqlite3.connect('../data/trading_bot.db', check_same_thread=False)
-
-conn = refresh_connection()
-
 # 侧边栏导航
 def render_sidebar():
     st.sidebar.title("📍 导航")
@@ -67,54 +62,44 @@ def render_sidebar():
     st.sidebar.page_link("pages/2_signals.py", label="🎯 交易信号")
     st.sidebar.page_link("pages/3_analytics.py", label="📉 数据分析")
     st.sidebar.page_link("pages/4_risk.py", label="⚠️ 风控状态")
+    st.sidebar.page_link("pages/6_diagnostics.py", label="🩺 查询诊断")
     
     st.sidebar.divider()
-    st.sidebar.metric("⏰ 最后刷新", datetime.now().strftime("%H:%M:%S"))
+    try:
+        st.sidebar.metric("⏰ 最后刷新", snapshot.current().refreshed_at.strftime("%H:%M:%S"))
+    except Exception:
+        st.sidebar.metric("⏰ 最后刷新", "N/A")
     
     # 运行模式
     try:
-        mode_df = pd.read_sql_query(
-            "SELECT COUNT(*) as count FROM signals LIMIT 1", conn
-        )
+        query(q.DB_HEALTH)
         st.sidebar.success("✅ 数据库连接正常")
     except:
         st.sidebar.error("❌ 数据库连接失败")
     
+    with st.sidebar.expander("⏱️ 查询耗时"):
+        stats_df = query_stats()
+        if not stats_df.empty:
+            st.dataframe(
+                stats_df[['name', 'count', 'avg_ms', 'p95_ms', 'last_rows']],
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.caption("暂无查询记录")
+    
     if st.sidebar.button("🔄 刷新数据"):
+        snapshot.get_worker().refresh()
         st.rerun()
+    
+    return refresh_interval()
 
-render_sidebar()
+auto_refresh = render_sidebar()
 
-# 获取风控数据
+# 获取风控数据（来自所有会话共享的后台快照，见 snapshot.py）
 def get_risk_data():
     try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # 今日盈亏
-        pnl_df = pd.read_sql_query(f"""
-            SELECT COALESCE(SUM(pnl), 0) as pnl, COUNT(*) as trades
-            FROM trades 
-            WHERE DATE(created_at) = '{today}'
-        """, conn)
-        
-        # 今日信号数
-        signals_df = pd.read_sql_query(f"""
-            SELECT COUNT(*) as count 
-            FROM signals 
-            WHERE DATE(created_at) = '{today}' AND status IN ('confirmed', 'executed')
-        """, conn)
-        
-        # 待确认信号
-        pending_df = pd.read_sql_query(
-            "SELECT COUNT(*) as count FROM signals WHERE status = 'pending'", conn
-        )
-        
-        return {
-            'today_pnl': pnl_df['pnl'].iloc[0] or 0,
-            'today_trades': pnl_df['trades'].iloc[0] or 0,
-            'today_signals': signals_df['count'].iloc[0] or 0,
-            'pending_signals': pending_df['count'].iloc[0] or 0,
-        }
+        return snapshot.current().risk
     except Exception as e:
         st.error(f"获取风控数据失败: {e}")
         return {
@@ -156,129 +141,51 @@ if risk_data['today_pnl'] <= -50:  # 5% 限额
 
 st.divider()
 
-# 最新套利机会
-st.subheader("🔥 最新套利机会")
-
-try:
-    opportunities_df = pd.read_sql_query("""
-        SELECT 
-            m.question as 事件,
-            m.category as 分类,
-            ao.yes_price as Yes价格,
-            ao.no_price as No价格,
-            ao.total_price as 价格总和,
-            ROUND(ao.deviation_percent, 2) as 偏离度,
-            ao.detected_at as 检测时间,
-            CASE 
-                WHEN ao.deviation_percent >= 5 THEN 'RISKY'
-                WHEN ao.deviation_percent >= 3 THEN 'AGGRESSIVE'
-                ELSE 'CONSERVATIVE'
-            END as 等级
-        FROM arbitrage_opportunities ao
-        JOIN markets m ON ao.market_id = m.id
-        WHERE ao.status = 'open'
-        ORDER BY ao.detected_at DESC
-        LIMIT 5
-    """, conn)
+# 实时表读共享快照，开启自动刷新时按间隔局部重跑（只读内存，不查库）
+@st.fragment(run_every=auto_refresh)
+def render_live_tables():
+    # 最新套利机会
+    st.subheader("🔥 最新套利机会")
     
-    if not opportunities_df.empty:
-        # 高亮显示
-        def highlight_level(row):
-            level = row['等级']
-            if level == 'RISKY':
-                return ['background-color: #ffebee'] * len(row)
-            elif level == 'AGGRESSIVE':
-                return ['background-color: #fff3e0'] * len(row)
-            else:
-                return ['background-color: #e3f2fd'] * len(row)
+    try:
+        opportunities_df = snapshot.current().opportunities.drop(columns=['id'])
         
-        styled_df = opportunities_df.style.apply(highlight_level, axis=1)
-        st.dataframe(styled_df, use_container_width=True, hide_index=True)
-    else:
-        st.info("暂无活跃套利机会，等待下一次市场检查...")
-except Exception as e:
-    st.error(f"加载套利机会失败: {e}")
-
-# 最近信号
-st.subheader("📢 最近交易信号")
-
-try:
-    signals_df = pd.read_sql_query("""
-        SELECT 
-            s.id,
-            m.question as 事件,
-            s.signal_type as 类型,
-            ROUND(s.confidence * 100, 0) as 置信度,
-            s.suggested_amount as 建议金额,
-            s.status as 状态,
-            s.level as 等级,
-            s.expiry_minutes as 有效期,
-            s.created_at as 创建时间
-        FROM signals s
-        JOIN markets m ON s.market_id = m.id
-        ORDER BY s.created_at DESC
-        LIMIT 10
-    """, conn)
+        if not opportunities_df.empty:
+            # 按等级整行高亮
+            styled_df = style_table(
+                opportunities_df,
+                row_by=('等级', category_css(LEVEL_ROW, default=LEVEL_ROW['CONSERVATIVE'])),
+            )
+            st.dataframe(styled_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("暂无活跃套利机会，等待下一次市场检查...")
+    except Exception as e:
+        st.error(f"加载套利机会失败: {e}")
+    
+    # 最近信号
+    st.subheader("📢 最近交易信号")
     
-    if not signals_df.empty:
-        # 状态颜色映射
-        def color_status(val):
-            colors = {
-                'pending': 'color: #ff9800; font-weight: bold',
-                'confirmed': 'color: #4caf50; font-weight: bold',
-                'rejected': 'color: #f44336',
-                'executed': 'color: #2196f3; font-weight: bold',
-                'expired': 'color: #9e9e9e',
-            }
-            return colors.get(val, '')
+    try:
+        signals_df = snapshot.current().signals
         
-        styled_df = signals_df.style.applymap(color_status, subset=['状态'])
-        st.dataframe(styled_df, use_container_width=True, hide_index=True)
-    else:
-        st.info("暂无交易信号")
-except Exception as e:
-    st.error(f"加载信号失败: {e}")
+        if not signals_df.empty:
+            styled_df = style_table(signals_df, {'状态': category_css(STATUS_TEXT)})
+            st.dataframe(styled_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("暂无交易信号")
+    except Exception as e:
+        st.error(f"加载信号失败: {e}")
+
+render_live_tables()
 
 # 活跃市场速览
 st.subheader("📊 活跃市场速览")
 
 try:
-    markets_df = pd.read_sql_query("""
-        SELECT 
-            m.question as 事件,
-            m.category as 分类,
-            ROUND(p.yes_price, 3) as Yes价格,
-            ROUND(p.no_price, 3) as No价格,
-            ROUND(p.yes_price + p.no_price, 3) as 总和,
-            ROUND((1 - (p.yes_price + p.no_price)) * 100, 2) as 偏离度,
-            ROUND(p.volume_24h, 0) as 交易量
-        FROM markets m
-        LEFT JOIN (
-            SELECT market_id, yes_price, no_price, volume_24h
-            FROM price_snapshots
-            WHERE (market_id, timestamp) IN (
-                SELECT market_id, MAX(timestamp)
-                FROM price_snapshots
-                GROUP BY market_id
-            )
-        ) p ON m.id = p.market_id
-        WHERE m.active = 1 AND m.resolved = 0
-        ORDER BY p.volume_24h DESC
-        LIMIT 10
-    """, conn)
+    markets_df = snapshot.current().overview_markets
     
     if not markets_df.empty:
-        def highlight_deviation(val):
-            if pd.isna(val):
-                return ''
-            val = float(val)
-            if val > 1.5:
-                return 'background-color: #ff6b6b; color: white; font-weight: bold'
-            elif val > 1.0:
-                return 'background-color: #ffd93d'
-            return ''
-        
-        styled_df = markets_df.style.applymap(highlight_deviation, subset=['偏离度'])
+        styled_df = style_table(markets_df, {'偏离度': band_css(OVERVIEW_DEVIATION_BANDS, strict=True)})
         st.dataframe(styled_df, use_container_width=True, hide_index=True)
     else:
         st.info("暂无市场数据")
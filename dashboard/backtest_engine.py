@@ -0,0 +1,318 @@
+"""
+向量化回测引擎（NumPy），语义与 src/services/execution/backtestEngine.ts 一致
+
+- 开仓：ArbitrageStrategy.detectOpportunity（偏离度 >= minGap 且不低于 WAIT 线）
+- 平仓：VirtualExecutor.checkPosition 的三条规则（偏离部分回归 / 完全回归 / 持仓超时）
+- 风控：SimpleRiskManager 的日亏损、日交易数（按 UTC 日期、在平仓时计数）和单笔限额
+
+逐点模拟被拆成两步：
+1. 对所有候选开仓点，按市场在后续价格窗口里一次性向量化查找平仓点和平仓盈亏
+2. 按时间顺序只遍历被接受的候选，用平仓事件堆维护当日风控计数；
+   当日触发限额后，剩余候选直接跳到下一天，循环次数约等于成交笔数 + 天数
+
+对拍脚本见 scripts/backtest_parity.py。
+"""
+import heapq
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+DAY_MS = 86_400_000
+HOUR_MS = 3_600_000
+
+EXIT_REASONS = np.array(['', 'PARTIAL_CLOSE', 'FULL_CLOSE', 'TIMEOUT', 'MANUAL'], dtype=object)
+PARTIAL, FULL, TIMEOUT, MANUAL = 1, 2, 3, 4
+
+# 查找平仓点时，每轮参与比较的 (候选数 × 窗口宽度) 上限
+WINDOW_BUDGET = 4_000_000
+MAX_WINDOW = 1024
+
+PRICE_COLUMNS = ['timestamp', 'marketId', 'marketName', 'yesPrice', 'noPrice']
+
+
+@dataclass(frozen=True)
+class BacktestParams:
+    """默认值与 defaultConfig / ArbitrageStrategy / SignalGenerator 中的常量一致"""
+    initial_capital: float = 1000.0
+    min_arbitrage_gap: float = 0.015
+    wait_below: float = 0.02
+    estimated_fee: float = 0.005
+    base_amount: float = 200.0
+    partial_close_at: float = 0.5
+    full_close_at: float = 0.005
+    max_hold_hours: float = 24.0
+    max_daily_loss: float = 0.05
+    max_single_trade: float = 0.20
+    max_daily_trades: int = 3
+
+    def to_dict(self):
+        return asdict(self)
+
+    def to_config(self):
+        """TS BacktestConfig 的形状（不含起止日期），写入报告目录的 config 列"""
+        config = {}
+        for field, path in CONFIG_FIELDS.items():
+            *parents, key = path
+            target = config
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = getattr(self, field)
+        return config
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """从 TS BacktestConfig（报告中的 config）读取，缺少的项用默认值"""
+        values = {}
+        for field, path in CONFIG_FIELDS.items():
+            value = config
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is not None:
+                values[field] = value
+        return cls(**{**values, **overrides})
+
+
+# BacktestParams 字段 -> TS BacktestConfig 中的路径
+CONFIG_FIELDS = {
+    'initial_capital': ('initialCapital',),
+    'min_arbitrage_gap': ('minArbitrageGap',),
+    'partial_close_at': ('takeProfit', 'partialCloseAt'),
+    'full_close_at': ('takeProfit', 'fullCloseAt'),
+    'max_hold_hours': ('takeProfit', 'maxHoldHours'),
+    'max_daily_loss': ('risk', 'maxDailyLoss'),
+    'max_single_trade': ('risk', 'maxSingleTrade'),
+    'max_daily_trades': ('risk', 'maxDailyTrades'),
+}
+
+
+def to_epoch_ms(values):
+    """时间列转 epoch 毫秒（int64），数值列视为已是毫秒"""
+    if pd.api.types.is_numeric_dtype(values):
+        return np.asarray(values, dtype=np.int64)
+    times = pd.to_datetime(values, utc=True)
+    return times.dt.tz_localize(None).astype('datetime64[ms]').astype(np.int64).to_numpy()
+
+
+def prepare_prices(prices):
+    """
+    价格表（列同 HistoricalPrice：timestamp / marketId / marketName / yesPrice / noPrice）
+    按时间稳定排序，timestamp 可以是 epoch 毫秒或时间类型
+    """
+    df = prices[PRICE_COLUMNS].reset_index(drop=True)
+    t = to_epoch_ms(df['timestamp'])
+    order = np.argsort(t, kind='stable')
+    df = df.iloc[order].reset_index(drop=True)
+    df['timestamp'] = t[order]
+    return df
+
+
+def _suggested_amount(deviation, params):
+    """SignalGenerator.calculateSuggestedAmount，Math.round 为四舍五入（.5 向上）"""
+    expected_return = deviation - params.estimated_fee
+    multiplier = np.minimum(1 + expected_return * 10, 2)
+    amount = np.floor(params.base_amount * multiplier + 0.5)
+    # signal.suggested_amount || 200
+    return np.where(amount == 0, 200.0, amount)
+
+
+def _find_exits(start, end, entry_dev, entry_t, dev, t, params):
+    """
+    start / end 为各候选在其市场序列中的检查区间 [start, end)，
+    返回首个满足平仓规则的位置（无则 -1）和规则编号；规则按 checkPosition 的顺序判断
+    """
+    exit_pos = np.full(len(start), -1, dtype=np.int64)
+    reason = np.zeros(len(start), dtype=np.int8)
+    lo = start.copy()
+    pending = np.flatnonzero(lo < end)
+    width = 8
+
+    while pending.size:
+        rows = max(1, WINDOW_BUDGET // width)
+        unresolved = []
+        for chunk in np.array_split(pending, int(np.ceil(pending.size / rows))):
+            offsets = lo[chunk, None] + np.arange(width)
+            valid = offsets < end[chunk, None]
+            idx = np.minimum(offsets, len(dev) - 1)
+            current = dev[idx]
+            d0 = entry_dev[chunk, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                partial = (d0 - current) / d0 >= params.partial_close_at
+            full = current < params.full_close_at
+            timeout = (t[idx] - entry_t[chunk, None]) / HOUR_MS >= params.max_hold_hours
+            hit = valid & (partial | full | timeout)
+
+            found = hit.any(axis=1)
+            first = hit.argmax(axis=1)
+            rows_found = chunk[found]
+            pos = lo[rows_found] + first[found]
+            exit_pos[rows_found] = pos
+            hit_row = np.flatnonzero(found)
+            reason[rows_found] = np.select(
+                [partial[hit_row, first[found]], full[hit_row, first[found]]],
+                [PARTIAL, FULL],
+                default=TIMEOUT,
+            )
+
+            rest = chunk[~found]
+            lo[rest] += width
+            unresolved.append(rest[lo[rest] < end[rest]])
+
+        pending = np.concatenate(unresolved) if unresolved else pending[:0]
+        width = min(width * 2, MAX_WINDOW)
+
+    return exit_pos, reason
+
+
+def _select_trades(cand, exit_point, exit_pnl, day, params):
+    """
+    按时间遍历候选，复现 SimpleRiskManager：平仓时计数和累计亏损，日期变化时清零，
+    开仓前检查日亏损和日交易数；返回被接受的候选下标
+    """
+    loss_limit = params.initial_capital * params.max_daily_loss
+    cand_day = day[cand]
+    pending = []
+    accepted = []
+    current_day = None
+    daily_trades = 0
+    daily_loss = 0.0
+
+    k = 0
+    while k < len(cand):
+        point = cand[k]
+        while pending and pending[0][0] <= point:
+            closed_at, _, pnl = heapq.heappop(pending)
+            if day[closed_at] != current_day:
+                current_day, daily_trades, daily_loss = day[closed_at], 0, 0.0
+            daily_trades += 1
+            if pnl < 0:
+                daily_loss += abs(pnl)
+        if day[point] != current_day:
+            current_day, daily_trades, daily_loss = day[point], 0, 0.0
+
+        if daily_loss >= loss_limit or daily_trades >= params.max_daily_trades:
+            # 当天计数只增不减，剩余候选都会被拒绝
+            k = int(np.searchsorted(cand_day, current_day, side='right'))
+            continue
+
+        accepted.append(k)
+        if exit_point[k] >= 0:
+            heapq.heappush(pending, (int(exit_point[k]), len(accepted), float(exit_pnl[k])))
+        k += 1
+
+    return np.asarray(accepted, dtype=np.int64)
+
+
+def _summarize(trades, initial_capital):
+    """VirtualExecutor.generateReport：交易按开仓顺序，累加顺序与 TS 一致"""
+    pnl = trades['pnl'].to_numpy(dtype=float)
+    count = len(pnl)
+    total_pnl = float(np.cumsum(pnl)[-1]) if count else 0.0
+    wins = int((pnl > 0).sum())
+
+    max_drawdown = 0.0
+    if count:
+        exit_time = trades['exitTime'].to_numpy()
+        by_exit = np.argsort(exit_time, kind='stable')
+        cumulative = np.cumsum(pnl[by_exit])
+        upto = np.searchsorted(exit_time[by_exit], exit_time, side='right') - 1
+        capital = initial_capital + cumulative[upto]
+        peak = np.maximum.accumulate(np.maximum(capital, initial_capital))
+        max_drawdown = max(0.0, float(((peak - capital) / peak).max()))
+
+    returns = trades['pnlPercent'].to_numpy(dtype=float)
+    avg_return = float(np.cumsum(returns)[-1] / count) if count else 0.0
+    variance = float(np.cumsum((returns - avg_return) ** 2)[-1] / count) if count else 0.0
+    std_dev = variance ** 0.5
+
+    return {
+        'totalTrades': count,
+        'winningTrades': wins,
+        'losingTrades': count - wins,
+        'winRate': wins / count * 100 if count else 0.0,
+        'totalPnL': total_pnl,
+        'totalPnLPercent': total_pnl / initial_capital * 100,
+        'avgReturn': avg_return,
+        'maxDrawdown': max_drawdown * 100,
+        'sharpeRatio': avg_return / std_dev if std_dev > 0 else 0.0,
+    }
+
+
+def run_backtest(prices, params=None, prepared=False):
+    """
+    返回 (result, trades)：result 的字段与 BacktestResult 相同（不含 trades），
+    trades 的列与 VirtualTrade 相同，按开仓顺序排列
+    """
+    params = params or BacktestParams()
+    df = prices if prepared else prepare_prices(prices)
+    n = len(df)
+    if n == 0:
+        empty = pd.DataFrame(columns=['id', 'signalId', 'marketId', 'marketName', 'side', 'entryPrice',
+                                      'entryDeviation', 'amount', 'quantity', 'entryTime', 'exitPrice',
+                                      'exitTime', 'exitReason', 'pnl', 'pnlPercent', 'status'])
+        return _summarize(empty, params.initial_capital), empty
+
+    t = df['timestamp'].to_numpy(dtype=np.int64)
+    yes = df['yesPrice'].to_numpy(dtype=float)
+    no = df['noPrice'].to_numpy(dtype=float)
+    dev = 1 - (yes + no)
+    codes, _ = pd.factorize(df['marketId'])
+    day = t // DAY_MS
+
+    # 按市场分组、组内保持时间顺序的序列；rank 为每个点在序列中的位置
+    seq = np.lexsort((np.arange(n), codes))
+    rank = np.empty(n, dtype=np.int64)
+    rank[seq] = np.arange(n)
+    seq_codes = codes[seq]
+    seq_end = np.searchsorted(seq_codes, seq_codes, side='right')
+    dev_seq, t_seq = dev[seq], t[seq]
+
+    # 开仓候选：detectOpportunity 非空且建议不为 WAIT（百分比比较与 TS 一致）
+    is_candidate = ~(dev < params.min_arbitrage_gap) & ~(dev * 100 < params.wait_below * 100)
+    cand = np.flatnonzero(is_candidate)
+    buy_yes = yes[cand] < no[cand]
+    entry_price = np.where(buy_yes, yes[cand], no[cand])
+    entry_dev = dev[cand]
+
+    amount = _suggested_amount(entry_dev, params)
+    single_limit = params.initial_capital * params.max_single_trade
+    amount = np.where(amount <= single_limit, amount, single_limit)
+    quantity = amount / entry_price
+
+    # 新开的仓位从下一个同市场价格点开始检查
+    start = rank[cand] + 1
+    end = seq_end[rank[cand]]
+    exit_pos, reason = _find_exits(start, end, entry_dev, t[cand], dev_seq, t_seq, params)
+    exit_point = np.where(exit_pos >= 0, seq[np.maximum(exit_pos, 0)], -1)
+
+    # 回测结束仍未平仓的，按该市场最后一个价格点强制平仓
+    open_at_end = exit_pos < 0
+    exit_point = np.where(open_at_end, seq[end - 1], exit_point)
+    reason = np.where(open_at_end, MANUAL, reason)
+
+    exit_price = np.where(buy_yes, yes[exit_point], no[exit_point])
+    pnl = (exit_price - entry_price) * quantity
+
+    accepted = _select_trades(cand, np.where(open_at_end, -1, exit_point), pnl, day, params)
+
+    points = cand[accepted]
+    ids = np.arange(1, len(accepted) + 1)
+    trades = pd.DataFrame({
+        'id': ids,
+        'signalId': ids,
+        'marketId': df['marketId'].to_numpy()[points],
+        'marketName': df['marketName'].to_numpy()[points],
+        'side': np.where(buy_yes[accepted], 'YES', 'NO'),
+        'entryPrice': entry_price[accepted],
+        'entryDeviation': entry_dev[accepted],
+        'amount': amount[accepted],
+        'quantity': quantity[accepted],
+        'entryTime': pd.to_datetime(t[points], unit='ms', utc=True),
+        'exitPrice': exit_price[accepted],
+        'exitTime': pd.to_datetime(t[exit_point[accepted]], unit='ms', utc=True),
+        'exitReason': EXIT_REASONS[reason[accepted]],
+        'pnl': pnl[accepted],
+        'pnlPercent': pnl[accepted] / amount[accepted] * 100,
+        'status': 'CLOSED',
+    })
+    return _summarize(trades, params.initial_capital), trades
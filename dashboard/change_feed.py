@@ -0,0 +1,125 @@
+"""
+实时表增量拉取（change feed）
+
+信号、风控日志每次刷新不再全量重查：
+- 每个会话记住已见过的最大 id（高水位），之后只查 id 更大的新行
+- signals 的状态变化由触发器写入 change_log（见 scripts/schema.sql），
+  按 change_log 高水位取出变化的行，替换缓存中的旧版本
+  （总览的套利机会表由 snapshot.py 整表刷新，不走这里）
+- 合并结果缓存在 session_state，按 id 倒序保留最新 limit 行；筛选条件变化时整表重新加载
+"""
+import pandas as pd
+import streamlit as st
+
+import queries as q
+from db import query
+
+# 有状态变化需要跟踪的表
+TRACKED_TABLES = ('signals',)
+
+REFRESH_INTERVALS = {
+    '关闭': None,
+    '5 秒': 5,
+    '10 秒': 10,
+    '30 秒': 30,
+    '60 秒': 60,
+}
+
+
+class ChangeFeed:
+    """
+    单个实时查询的增量拉取
+
+    sql 为带 {rows} 占位、按 id 倒序、以 LIMIT :limit 结尾的语句（见 queries.py），
+    id_column 为 SQL 中的主键表达式（如 s.id），结果中的主键列名为 id。
+    """
+
+    def __init__(self, key, table, sql, id_column, params=None, limit=None):
+        self.key = f'change_feed:{key}'
+        self.table = table
+        self.params = dict(params or {})
+        self.limit = limit
+        self.new_sql = sql.format(rows=q.FEED_NEW_ROWS.format(id=id_column))
+        self.changed_sql = sql.format(rows=q.FEED_CHANGED_ROWS.format(id=id_column))
+        self.last_new = 0
+        self.last_changed = 0
+
+    @property
+    def tracked(self):
+        return self.table in TRACKED_TABLES
+
+    def _query(self, sql, **extra):
+        return query(sql, {
+            **self.params,
+            'table': self.table,
+            'limit': self.limit if self.limit is not None else -1,
+            **extra,
+        })
+
+    def _load(self):
+        # 先取变化日志高水位，再查数据：期间发生的变化下次会再拉一遍，不会漏
+        after_change = int(query(q.CHANGE_LOG_HWM)['id'].iloc[0]) if self.tracked else 0
+        df = self._query(self.new_sql, after_id=0)
+        return {
+            'params': self.params,
+            'df': df,
+            'after_id': int(df['id'].max()) if not df.empty else 0,
+            'after_change': after_change,
+        }
+
+    def _is_truncated(self, df):
+        return self.limit is not None and len(df) >= self.limit
+
+    def poll(self):
+        """返回最新结果；首次或筛选条件变化时全量加载，否则只拉取增量"""
+        state = st.session_state.get(self.key)
+        if state is None or state['params'] != self.params:
+            state = self._load()
+            st.session_state[self.key] = state
+            self.last_new, self.last_changed = len(state['df']), 0
+            return state['df']
+
+        changed_ids = []
+        after_change = state['after_change']
+        if self.tracked:
+            log = query(q.CHANGE_LOG_SINCE, {'table': self.table, 'after_change': after_change})
+            if not log.empty:
+                changed_ids = log['row_id'].tolist()
+                after_change = int(log['id'].max())
+
+        new_rows = self._query(self.new_sql, after_id=state['after_id'])
+        changed_rows = (
+            self._query(self.changed_sql, after_change=state['after_change'])
+            if changed_ids else new_rows.iloc[0:0]
+        )
+        self.last_new, self.last_changed = len(new_rows), len(changed_ids)
+
+        if new_rows.empty and not changed_ids:
+            return state['df']
+
+        cached = state['df']
+        # 变化行先从缓存中移除：不再满足筛选条件的（如 open -> closed）随之消失
+        merged = pd.concat(
+            [new_rows, changed_rows, cached[~cached['id'].isin(changed_ids)]],
+            ignore_index=True,
+        ).drop_duplicates(subset='id', keep='first').sort_values('id', ascending=False, kind='stable')
+        if self.limit is not None:
+            merged = merged.head(self.limit)
+
+        # 窗口被截断且有行移出时，窗口外的旧行可能应该补进来，直接重新加载
+        if self._is_truncated(cached) and not self._is_truncated(merged):
+            state = self._load()
+        else:
+            state.update({
+                'df': merged.reset_index(drop=True),
+                'after_id': max(state['after_id'], int(new_rows['id'].max()) if not new_rows.empty else 0),
+                'after_change': after_change,
+            })
+        st.session_state[self.key] = state
+        return state['df']
+
+
+def refresh_interval(key='auto_refresh'):
+    """侧边栏自动刷新开关，返回刷新间隔（秒），关闭时为 None"""
+    label = st.sidebar.selectbox('🔁 自动刷新', list(REFRESH_INTERVALS), key=key)
+    return REFRESH_INTERVALS[label]
@@ -0,0 +1,249 @@
+"""
+Dashboard 数据访问层
+
+所有页面通过这里读取数据库，不再各自 sqlite3.connect：
+- 进程内共享一个只读连接池（mode=ro + PRAGMA query_only），跨会话、跨页面复用
+- 只接受参数化 SQL，连接上的语句缓存可以直接复用编译好的语句
+- 每条查询经 profiler 登记耗时、行数、内存和查询计划，方便定位慢查询
+- 结果按 (SQL, 参数) 缓存，以 PRAGMA data_version 判断数据库是否被写入：
+  机器人一提交就失效，没有写入时重复查询不碰数据库；按 LRU 淘汰到内存上限
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from dotenv import load_dotenv
+
+from profiler import QueryProfiler, explain
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+load_dotenv(PROJECT_ROOT / '.env')
+
+POOL_SIZE = int(os.environ.get('DASHBOARD_POOL_SIZE', '4'))
+ACQUIRE_TIMEOUT = 10.0
+STATEMENT_CACHE_SIZE = 256
+CACHE_MAX_BYTES = int(float(os.environ.get('DASHBOARD_CACHE_MB', '64')) * 1024 * 1024)
+
+
+def resolve_db_path():
+    """与机器人共用 DB_PATH，相对路径按项目根目录解析"""
+    path = Path(os.environ.get('DB_PATH', './data/trading_bot.db'))
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    return path
+
+
+def cache_key(sql, params):
+    """(SQL, 参数) 的可哈希键；参数不可哈希时返回 None（不缓存）"""
+    items = tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params)
+    try:
+        hash(items)
+    except TypeError:
+        return None
+    return sql, items
+
+
+class QueryCache:
+    """
+    查询结果缓存：所有条目属于同一个数据库版本，版本变化时整体清空
+    按结果 DataFrame 的内存占用计量，超过 max_bytes 时淘汰最久未用的条目
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._sync(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, version, df):
+        """version 为执行查询前读到的版本，查询期间有写入时这条结果会在下次读取时随版本一起失效"""
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._sync(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+class ReadOnlyPool:
+    """固定上限的只读连接池，连接按需创建、用完归还"""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = Path(path)
+        self.size = size
+        self.stats = QueryProfiler()
+        self.cache = QueryCache()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            f'{self.path.as_uri()}?mode=ro',
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            timeout=ACQUIRE_TIMEOUT,
+        )
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            raise TimeoutError(f'等待数据库连接超时 ({ACQUIRE_TIMEOUT}s)')
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def data_version(self):
+        """
+        数据库版本：其他连接（机器人）每提交一次就会变化
+        PRAGMA data_version 的值只在同一连接内可比，这里固定用一条专用连接读取
+        """
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = self._open()
+            return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def query(self, sql, params=()):
+        key = cache_key(sql, params)
+        version = self.data_version() if key is not None else None
+        if key is not None:
+            cached = self.cache.get(key, version)
+            if cached is not None:
+                # 返回副本，调用方原地修改不会污染缓存
+                return cached.copy()
+
+        with self.connection() as conn:
+            start = time.perf_counter()
+            df = pd.read_sql_query(sql, conn, params=params)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # 查询计划每条语句只取一次，不计入耗时
+            plan = explain(conn, sql, params) if self.stats.needs_plan(sql) else None
+        self.stats.record(sql, elapsed_ms, df, plan)
+        if key is not None:
+            self.cache.put(key, version, df)
+            return df.copy()
+        return df
+
+
+@st.cache_resource
+def get_pool():
+    return ReadOnlyPool(resolve_db_path())
+
+
+def query(sql, params=()):
+    """执行参数化只读查询，返回 DataFrame"""
+    return get_pool().query(sql, params)
+
+
+def query_stats():
+    return get_pool().stats.to_frame()
+
+
+def cache_stats():
+    return get_pool().cache.stats()
+
+
+def data_version():
+    """当前数据库版本，可作为 st.cache_data 的缓存键参数"""
+    return get_pool().data_version()
+
+
+def profiler():
+    return get_pool().stats
+
+
+def day_range(day=None):
+    """某天的半开区间 [day, day+1)，对应 created_at >= ? AND created_at < ?"""
+    day = day or datetime.now().date()
+    return day.isoformat(), (day + timedelta(days=1)).isoformat()
@@ -1,24 +1,26 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-from datetime import datetime
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from datetime import datetime, timedelta, timezone
+
+import queries as q
+import snapshot
+from db import data_version, query
+from downsample import downsample_frame
+from styling import DEVIATION_BANDS, band_css, style_table
 
 st.set_page_config(page_title="市场监控", page_icon="📈", layout="wide")
 
 st.title("📈 市场监控")
 
-conn = sqlite3.connect('../data/trading_bot.db', check_same_thread=False)
-
 # 筛选条件
 st.sidebar.header("🔍 筛选条件")
 
 with st.sidebar:
     # 分类筛选
     try:
-        categories = pd.read_sql_query(
-            "SELECT DISTINCT category FROM markets WHERE category IS NOT NULL", conn
-        )['category'].tolist()
-        categories = ['全部'] + categories
+        categories = ['全部'] + snapshot.current().categories
     except:
         categories = ['全部']
     
@@ -35,59 +37,48 @@ with st.sidebar:
         "偏离度 ↓", "交易量 ↓", "流动性 ↓", "最新更新"
     ])
 
-# 市场数据查询
-@st.cache_data(ttl=60)
-def load_markets(category, min_deviation, min_volume, sort_by):
-    query = """
-        SELECT 
-            m.id,
-            m.question as 事件,
-            m.category as 分类,
-            ROUND(p.yes_price, 4) as Yes价格,
-            ROUND(p.no_price, 4) as No价格,
-            ROUND(p.yes_price + p.no_price, 4) as 价格总和,
-            ROUND((1 - (p.yes_price + p.no_price)) * 100, 2) as 偏离度,
-            p.yes_liquidity as Yes流动性,
-            p.no_liquidity as No流动性,
-            ROUND(p.volume_24h, 0) as 交易量,
-            p.timestamp as 更新时间,
-            m.resolution_time as 结算时间
-        FROM markets m
-        LEFT JOIN (
-            SELECT market_id, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h, timestamp
-            FROM price_snapshots
-            WHERE (market_id, timestamp) IN (
-                SELECT market_id, MAX(timestamp)
-                FROM price_snapshots
-                GROUP BY market_id
-            )
-        ) p ON m.id = p.market_id
-        WHERE m.active = 1 AND m.resolved = 0
-    """
-    
-    conditions = []
-    if category != "全部":
-        conditions.append(f"m.category = '{category}'")
-    if min_deviation > 0:
-        conditions.append(f"(1 - (p.yes_price + p.no_price)) * 100 >= {min_deviation}")
-    if min_volume > 0:
-        conditions.append(f"p.volume_24h >= {min_volume}")
-    
-    if conditions:
-        query += " AND " + " AND ".join(conditions)
-    
-    # 排序
-    sort_map = {
-        "偏离度 ↓": "偏离度 DESC",
-        "交易量 ↓": "交易量 DESC",
-        "流动性 ↓": "(Yes流动性 + No流动性) DESC",
-        "最新更新": "更新时间 DESC"
-    }
-    query += f" ORDER BY {sort_map.get(sort_by, '偏离度 DESC')}"
-    
-    return pd.read_sql_query(query, conn)
+# 市场数据：共享快照中的全部活跃市场，按筛选条件在内存中过滤排序
+try:
+    markets_df = snapshot.filter_markets(
+        snapshot.current().active_markets,
+        None if category == "全部" else category,
+        min_deviation,
+        min_volume,
+        sort_by,
+    )
+except Exception as e:
+    st.error(f"加载市场数据失败: {e}")
+    markets_df = pd.DataFrame()
+
+# 价格历史：按时间跨度选最细且不超过 HISTORY_MAX_BARS 根的 K 线周期，再用 LTTB 压到每条曲线 HISTORY_POINTS 个点
+HISTORY_SPANS = {'24小时': 1, '7天': 7, '30天': 30, '90天': 90, '全部': None}
+HISTORY_MAX_BARS = 20_000
+HISTORY_POINTS = 1_000
+HISTORY_SERIES = ['yes', 'no', 'deviation', 'max_deviation']
 
-markets_df = load_markets(category, min_deviation, min_volume, sort_by)
+def _bar_time(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+@st.cache_data(max_entries=32)
+def load_price_history(market_id, days, version):
+    """返回 (降采样后的长表, K 线周期, 读取的 K 线根数)；version 为数据库版本，有新 K 线写入才重新计算"""
+    end = datetime.now(timezone.utc)
+    if days is None:
+        span = query(q.MARKET_HISTORY_SPAN, (market_id,)).iloc[0]
+        if pd.isna(span['first_bar']):
+            return downsample_frame(pd.DataFrame(), 'time', HISTORY_SERIES, HISTORY_POINTS), None, 0
+        start = datetime.fromisoformat(span['first_bar']).replace(tzinfo=timezone.utc)
+    else:
+        start = end - timedelta(days=days)
+
+    interval = q.bar_interval((end - start).total_seconds(), HISTORY_MAX_BARS)
+    bars = query(q.PRICE_BARS, {
+        'interval': interval,
+        'market_id': market_id,
+        'start': _bar_time(start),
+        'end': _bar_time(end),
+    })
+    return downsample_frame(bars, 'time', HISTORY_SERIES, HISTORY_POINTS), interval, len(bars)
 
 # 统计信息
 col1, col2, col3, col4 = st.columns(4)
@@ -106,26 +97,12 @@ st.divider()
 
 # 显示市场表格
 if not markets_df.empty:
-    # 高亮偏离度
-    def highlight_deviation(val):
-        if pd.isna(val):
-            return ''
-        val = float(val)
-        if val >= 5:
-            return 'background-color: #ff6b6b; color: white; font-weight: bold'
-        elif val >= 3:
-            return 'background-color: #ff9800; color: white; font-weight: bold'
-        elif val >= 1.5:
-            return 'background-color: #ffd93d; font-weight: bold'
-        elif val >= 1:
-            return 'background-color: #ffeb3b'
-        return ''
-    
     # 选择显示的列
     display_cols = ['事件', '分类', 'Yes价格', 'No价格', '价格总和', '偏离度', '交易量', '更新时间']
     display_df = markets_df[display_cols].copy()
     
-    styled_df = display_df.style.applymap(highlight_deviation, subset=['偏离度'])
+    # 高亮偏离度
+    styled_df = style_table(display_df, {'偏离度': band_css(DEVIATION_BANDS)})
     
     st.dataframe(
         styled_df,
@@ -190,11 +167,44 @@ if not markets_df.empty:
             st.metric("估算收益", f"{estimated_return*100:.2f}%", f"基于 ${200} 投入 ≈ ${estimated_return*200:.2f}")
         else:
             st.info(f"⏸️ **无套利机会**：偏离度 {deviation:.2f}% < 1.5% 阈值")
+        
+        # 价格与偏离度历史
+        st.markdown("#### 📉 价格历史")
+        span_label = st.radio("时间范围", list(HISTORY_SPANS), index=1, horizontal=True)
+        try:
+            history, interval, bar_count = load_price_history(market_data['id'], HISTORY_SPANS[span_label], data_version())
+        except Exception as e:
+            st.error(f"读取价格历史失败: {e}")
+            history = None
+        
+        if history is not None and history.empty:
+            st.info("该时间范围内没有价格 K 线（机器人记录价格快照时自动生成）")
+        elif history is not None:
+            fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.6, 0.4], vertical_spacing=0.06)
+            traces = [
+                ('yes', 'Yes 价格', 1, None),
+                ('no', 'No 价格', 1, None),
+                ('deviation', '偏离度 (%)', 2, None),
+                ('max_deviation', '周期内最大偏离度 (%)', 2, 'dot'),
+            ]
+            for series, label, row, dash in traces:
+                points = history[history['series'] == series]
+                fig.add_trace(
+                    go.Scatter(x=points['time'], y=points['value'], mode='lines', name=label, line=dict(dash=dash)),
+                    row=row, col=1
+                )
+            fig.add_hline(y=1.5, line_dash='dash', line_color='red', annotation_text='套利阈值 1.5%', row=2, col=1)
+            fig.update_yaxes(title_text='价格 ($)', row=1, col=1)
+            fig.update_yaxes(title_text='偏离度 (%)', row=2, col=1)
+            fig.update_layout(height=500, hovermode='x unified', margin=dict(t=30))
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"{interval} K 线 {bar_count:,} 根，每条曲线降采样到最多 {HISTORY_POINTS:,} 个点（LTTB）")
             
 else:
     st.info("暂无符合条件的市场数据")
 
 # 底部刷新按钮
 if st.button("🔄 刷新数据"):
+    snapshot.get_worker().refresh()
     st.cache_data.clear()
     st.rerun()
@@ -1,14 +1,15 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
 from datetime import datetime, timedelta
 
+import queries as q
+from change_feed import ChangeFeed, refresh_interval
+from db import query
+from styling import LEVEL_BADGE, STATUS_BADGE, category_css, style_table
+
 st.set_page_config(page_title="交易信号", page_icon="🎯", layout="wide")
 
 st.title("🎯 交易信号历史")
 
-conn = sqlite3.connect('../data/trading_bot.db', check_same_thread=False)
-
 # 筛选条件
 st.sidebar.header("🔍 筛选")
 
@@ -16,6 +17,9 @@ with st.sidebar:
     status_filter = st.selectbox("状态", ["全部", "pending", "confirmed", "rejected", "executed", "expired"])
     level_filter = st.selectbox("信号等级", ["全部", "CONSERVATIVE", "AGGRESSIVE", "RISKY"])
     date_range = st.selectbox("时间范围", ["今天", "最近7天", "最近30天", "全部"])
+    page_size = st.selectbox("每页条数", [25, 50, 100, 200], index=1)
+
+auto_refresh = refresh_interval()
 
 # 计算日期范围
 date_map = {
@@ -29,16 +33,7 @@ start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 
 # 统计卡片
 try:
-    stats_query = f"""
-        SELECT 
-            status,
-            COUNT(*) as count,
-            AVG(confidence) as avg_confidence
-        FROM signals
-        WHERE DATE(created_at) >= '{start_date}'
-        GROUP BY status
-    """
-    stats_df = pd.read_sql_query(stats_query, conn)
+    stats_df = query(q.SIGNAL_STATUS_STATS, (start_date,))
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
@@ -55,118 +50,119 @@ except Exception as e:
 
 st.divider()
 
-# 信号列表
-try:
-    query = f"""
-        SELECT 
-            s.id,
-            m.question as 事件,
-            m.category as 分类,
-            s.signal_type as 类型,
-            ROUND(s.confidence * 100, 0) || '%' as 置信度,
-            s.suggested_amount as 建议金额,
-            s.reason as 原因,
-            s.status as 状态,
-            s.level as 等级,
-            s.expiry_minutes as 有效期,
-            s.created_at as 创建时间,
-            s.confirmed_at as 确认时间,
-            s.executed_at as 执行时间
-        FROM signals s
-        JOIN markets m ON s.market_id = m.id
-        WHERE DATE(s.created_at) >= '{start_date}'
-    """
-    
-    if status_filter != "全部":
-        query += f" AND s.status = '{status_filter}'"
-    if level_filter != "全部":
-        query += f" AND s.level = '{level_filter}'"
-    
-    query += " ORDER BY s.created_at DESC"
-    
-    signals_df = pd.read_sql_query(query, conn)
-    
-    if not signals_df.empty:
-        # 状态颜色映射
-        def color_status(val):
-            colors = {
-                'pending': 'background-color: #fff3e0; color: #e65100; font-weight: bold',
-                'confirmed': 'background-color: #e8f5e9; color: #2e7d32; font-weight: bold',
-                'rejected': 'background-color: #ffebee; color: #c62828',
-                'executed': 'background-color: #e3f2fd; color: #1565c0; font-weight: bold',
-                'expired': 'background-color: #f5f5f5; color: #616161',
-            }
-            return colors.get(val, '')
-        
-        def color_level(val):
-            colors = {
-                'CONSERVATIVE': 'background-color: #e3f2fd; color: #1565c0',
-                'AGGRESSIVE': 'background-color: #fff3e0; color: #ef6c00',
-                'RISKY': 'background-color: #ffebee; color: #c62828; font-weight: bold',
-            }
-            return colors.get(val, '')
-        
-        styled_df = signals_df.style\
-            .applymap(color_status, subset=['状态'])\
-            .applymap(color_level, subset=['等级'])
-        
-        st.dataframe(
-            styled_df,
-            use_container_width=True,
-            height=500,
-            column_config={
-                '事件': st.column_config.TextColumn(width='large'),
-                '建议金额': st.column_config.NumberColumn(format="$%d"),
-            }
-        )
-        
-        # 信号详情
-        st.divider()
-        st.subheader("📋 信号详情")
+# 信号列表：按 (created_at, id) 键集分页，每页开销只与页大小有关
+# 第一页走 change feed（只拉取新增和状态变化的信号），开启自动刷新时局部重跑
+list_params = {
+    'start_date': start_date,
+    'status': None if status_filter == "全部" else status_filter,
+    'level': None if level_filter == "全部" else level_filter,
+    'limit': page_size,
+}
+list_sql = q.signal_list_sql(list_params['status'], list_params['level'])
+
+# 翻页游标：每页最后一行的 (created_at, id)，筛选条件变化时回到第一页
+if st.session_state.get('signal_list_params') != list_params:
+    st.session_state['signal_list_params'] = list_params
+    st.session_state['signal_cursors'] = []
+
+def load_signal_page():
+    cursors = st.session_state['signal_cursors']
+    if not cursors:
+        return ChangeFeed('signal_list', 'signals', list_sql, 's.id', params=list_params, limit=page_size).poll()
+    cursor_created, cursor_id = cursors[-1]
+    return query(list_sql.format(rows=q.SIGNAL_PAGE_ROWS), {
+        **list_params,
+        'cursor_created': cursor_created,
+        'cursor_id': cursor_id,
+    })
+
+@st.fragment(run_every=auto_refresh)
+def render_signal_list():
+    try:
+        signals_df = load_signal_page()
+        cursors = st.session_state['signal_cursors']
+        page = len(cursors) + 1
         
-        selected_id = st.selectbox(
-            "选择信号ID查看详情",
-            signals_df['id'].tolist()
-        )
+        # 翻页
+        col1, col2, col3 = st.columns([1, 1, 4])
+        with col1:
+            if st.button("⬅️ 上一页", disabled=page == 1):
+                cursors.pop()
+                st.rerun(scope="fragment")
+        with col2:
+            if st.button("下一页 ➡️", disabled=len(signals_df) < page_size):
+                last = signals_df.iloc[-1]
+                cursors.append((last['创建时间'], int(last['id'])))
+                st.rerun(scope="fragment")
+        col3.caption(f"第 {page} 页，本页 {len(signals_df)} 条")
         
-        if selected_id:
-            signal = signals_df[signals_df['id'] == selected_id].iloc[0]
+        if not signals_df.empty:
+            styled_df = style_table(signals_df, {
+                '状态': category_css(STATUS_BADGE),
+                '等级': category_css(LEVEL_BADGE),
+            })
             
-            with st.container():
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.write(f"**事件**: {signal['事件']}")
-                    st.write(f"**类型**: {signal['类型']}")
-                    st.write(f"**分类**: {signal['分类']}")
-                
-                with col2:
-                    st.write(f"**置信度**: {signal['置信度']}")
-                    st.write(f"**建议金额**: ${signal['建议金额']}")
-                    st.write(f"**有效期**: {signal['有效期']}分钟")
-                
-                with col3:
-                    st.write(f"**状态**: {signal['状态']}")
-                    st.write(f"**等级**: {signal['等级']}")
-                    st.write(f"**创建时间**: {signal['创建时间']}")
-                
-                st.write(f"**原因**: {signal['原因']}")
+            st.dataframe(
+                styled_df,
+                use_container_width=True,
+                height=500,
+                column_config={
+                    '事件': st.column_config.TextColumn(width='large'),
+                    '建议金额': st.column_config.NumberColumn(format="$%d"),
+                }
+            )
+            
+            # 信号详情：按 id 单独查询
+            st.divider()
+            st.subheader("📋 信号详情")
+            
+            selected_id = st.selectbox(
+                "选择信号ID查看详情",
+                signals_df['id'].tolist()
+            )
+            
+            detail_df = query(q.SIGNAL_DETAIL, (int(selected_id),)) if selected_id else None
+            
+            if detail_df is not None and not detail_df.empty:
+                signal = detail_df.iloc[0]
                 
-                # 操作按钮（仅对pending信号）
-                if signal['状态'] == 'pending':
-                    st.warning("⏳ 此信号待确认")
-                    col1, col2 = st.columns(2)
+                with st.container():
+                    col1, col2, col3 = st.columns(3)
+                    
                     with col1:
-                        if st.button(f"✅ 确认执行 #{selected_id}"):
-                            st.success(f"信号 #{selected_id} 已确认！请在 Telegram 或 MetaMask 中执行")
+                        st.write(f"**事件**: {signal['事件']}")
+                        st.write(f"**类型**: {signal['类型']}")
+                        st.write(f"**分类**: {signal['分类']}")
+                    
                     with col2:
-                        if st.button(f"❌ 忽略 #{selected_id}"):
-                            st.info(f"信号 #{selected_id} 已忽略")
-    else:
-        st.info("暂无符合条件的信号")
+                        st.write(f"**置信度**: {signal['置信度']}")
+                        st.write(f"**建议金额**: ${signal['建议金额']}")
+                        st.write(f"**有效期**: {signal['有效期']}分钟")
+                    
+                    with col3:
+                        st.write(f"**状态**: {signal['状态']}")
+                        st.write(f"**等级**: {signal['等级']}")
+                        st.write(f"**创建时间**: {signal['创建时间']}")
+                    
+                    st.write(f"**原因**: {signal['原因']}")
+                    
+                    # 操作按钮（仅对pending信号）
+                    if signal['状态'] == 'pending':
+                        st.warning("⏳ 此信号待确认")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            if st.button(f"✅ 确认执行 #{selected_id}"):
+                                st.success(f"信号 #{selected_id} 已确认！请在 Telegram 或 MetaMask 中执行")
+                        with col2:
+                            if st.button(f"❌ 忽略 #{selected_id}"):
+                                st.info(f"信号 #{selected_id} 已忽略")
+        else:
+            st.info("暂无符合条件的信号")
         
-except Exception as e:
-    st.error(f"加载信号失败: {e}")
+    except Exception as e:
+        st.error(f"加载信号失败: {e}")
+
+render_signal_list()
 
 # 信号统计图表
 st.divider()
@@ -174,17 +170,7 @@ st.subheader("📊 信号统计")
 
 try:
     # 每日信号数
-    daily_query = f"""
-        SELECT 
-            DATE(created_at) as 日期,
-            COUNT(*) as 信号数,
-            SUM(CASE WHEN status = 'executed' THEN 1 ELSE 0 END) as 执行数
-        FROM signals
-        WHERE DATE(created_at) >= '{start_date}'
-        GROUP BY DATE(created_at)
-        ORDER BY 日期
-    """
-    daily_df = pd.read_sql_query(daily_query, conn)
+    daily_df = query(q.DAILY_SIGNALS, (start_date,))
     
     if not daily_df.empty:
         import plotly.graph_objects as go
@@ -1,15 +1,18 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
+import queries as q
+import risk_metrics
+from db import query
+
 st.set_page_config(page_title="数据分析", page_icon="📉", layout="wide")
 
 st.title("📉 数据分析")
 
-conn = sqlite3.connect('../data/trading_bot.db', check_same_thread=False)
+INITIAL_CAPITAL = 1000
 
 # 时间范围选择
 period = st.selectbox("时间范围", ["最近7天", "最近30天", "全部"])
@@ -19,17 +22,7 @@ start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 # 关键指标
 try:
     # 总盈亏
-    pnl_query = f"""
-        SELECT 
-            COALESCE(SUM(pnl), 0) as 总盈亏,
-            COUNT(*) as 总交易数,
-            AVG(pnl) as 平均盈亏,
-            MAX(pnl) as 最大盈利,
-            MIN(pnl) as 最大亏损
-        FROM trades
-        WHERE DATE(created_at) >= '{start_date}' AND status = 'settled'
-    """
-    pnl_df = pd.read_sql_query(pnl_query, conn)
+    pnl_df = query(q.PNL_SUMMARY, (start_date,))
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -41,15 +34,7 @@ try:
     col3.metric("📈 平均盈亏", f"${pnl_df['平均盈亏'].iloc[0] or 0:+.2f}")
     
     # 胜率
-    win_query = f"""
-        SELECT 
-            COUNT(CASE WHEN pnl > 0 THEN 1 END) as 盈利次数,
-            COUNT(CASE WHEN pnl < 0 THEN 1 END) as 亏损次数,
-            COUNT(*) as 总次数
-        FROM trades
-        WHERE DATE(created_at) >= '{start_date}' AND status = 'settled'
-    """
-    win_df = pd.read_sql_query(win_query, conn)
+    win_df = query(q.WIN_LOSS, (start_date,))
     
     if win_df['总次数'].iloc[0] > 0:
         win_rate = (win_df['盈利次数'].iloc[0] / win_df['总次数'].iloc[0]) * 100
@@ -65,16 +50,7 @@ st.divider()
 
 # 盈亏曲线
 try:
-    daily_pnl_query = f"""
-        SELECT 
-            DATE(created_at) as 日期,
-            COALESCE(SUM(pnl), 0) as 日盈亏
-        FROM trades
-        WHERE DATE(created_at) >= '{start_date}' AND status = 'settled'
-        GROUP BY DATE(created_at)
-        ORDER BY 日期
-    """
-    daily_pnl_df = pd.read_sql_query(daily_pnl_query, conn)
+    daily_pnl_df = query(q.DAILY_PNL, (start_date,))
     
     if not daily_pnl_df.empty:
         daily_pnl_df['累计盈亏'] = daily_pnl_df['日盈亏'].cumsum()
@@ -110,19 +86,7 @@ except Exception as e:
 st.subheader("🔍 套利机会分析")
 
 try:
-    opp_query = f"""
-        SELECT 
-            DATE(detected_at) as 日期,
-            COUNT(*) as 机会数,
-            AVG(deviation_percent) as 平均偏离度,
-            MAX(deviation_percent) as 最大偏离度,
-            SUM(CASE WHEN deviation_percent >= 3 THEN 1 ELSE 0 END) as 高价值机会
-        FROM arbitrage_opportunities
-        WHERE DATE(detected_at) >= '{start_date}'
-        GROUP BY DATE(detected_at)
-        ORDER BY 日期
-    """
-    opp_df = pd.read_sql_query(opp_query, conn)
+    opp_df = query(q.DAILY_OPPORTUNITIES, (start_date,))
     
     if not opp_df.empty:
         col1, col2 = st.columns(2)
@@ -167,18 +131,7 @@ except Exception as e:
 st.subheader("📊 信号质量分析")
 
 try:
-    signal_query = f"""
-        SELECT 
-            level as 等级,
-            status as 状态,
-            COUNT(*) as 数量,
-            AVG(confidence) as 平均置信度
-        FROM signals
-        WHERE DATE(created_at) >= '{start_date}'
-        GROUP BY level, status
-        ORDER BY level, status
-    """
-    signal_df = pd.read_sql_query(signal_query, conn)
+    signal_df = query(q.SIGNAL_LEVEL_STATUS, (start_date,))
     
     if not signal_df.empty:
         # 透视表
@@ -210,22 +163,41 @@ except Exception as e:
 st.subheader("⚠️ 风险指标")
 
 try:
-    # 简单回撤计算
     if not daily_pnl_df.empty and len(daily_pnl_df) > 1:
-        cumulative = daily_pnl_df['累计盈亏'].values
-        max_dd = 0
-        peak = cumulative[0]
+        # 无交易的日期按 0 盈亏补齐，日收益率才是连续的
+        daily_pnl = (
+            daily_pnl_df.assign(日期=pd.to_datetime(daily_pnl_df['日期']))
+            .set_index('日期')['日盈亏']
+            .asfreq('D', fill_value=0)
+        )
+        metrics = risk_metrics.summarize(daily_pnl.values, INITIAL_CAPITAL, periods_per_year=365)
         
-        for value in cumulative:
-            if value > peak:
-                peak = value
-            dd = (peak - value) / (1000 + peak) * 100  # 基于初始资金计算百分比
-            if dd > max_dd:
-                max_dd = dd
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("最大回撤", f"{metrics['max_drawdown']:.2f}%")
+        col2.metric("最长回撤期", f"{metrics['drawdown_duration']} 天")
+        col3.metric("夏普比率 (年化)", f"{metrics['sharpe']:.2f}")
+        col4.metric("索提诺比率 (年化)", f"{metrics['sortino']:.2f}")
+        col5.metric("盈利因子", f"{metrics['profit_factor']:.2f}")
         
-        col1, col2 = st.columns(2)
-        col1.metric("最大回撤", f"{max_dd:.2f}%")
-        col2.metric("夏普比率 (估算)", "N/A")  # 需要更完整数据计算
+        # 7日滚动波动率
+        returns = risk_metrics.period_returns(daily_pnl.values, INITIAL_CAPITAL)
+        volatility = risk_metrics.rolling_volatility(returns, 7, periods_per_year=365) * 100
+        if len(daily_pnl) >= 7:
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=daily_pnl.index,
+                y=volatility,
+                mode='lines',
+                name='滚动波动率',
+                line=dict(color='#ff9800', width=2),
+            ))
+            fig.update_layout(
+                title="7日滚动波动率 (年化)",
+                xaxis_title="日期",
+                yaxis_title="波动率 (%)",
+                showlegend=False
+            )
+            st.plotly_chart(fig, use_container_width=True)
         
 except Exception as e:
     st.error(f"计算风险指标失败: {e}")
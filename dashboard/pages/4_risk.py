@@ -1,13 +1,16 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-from datetime import datetime, timedelta
+
+import queries as q
+import snapshot
+from change_feed import ChangeFeed, refresh_interval
+from db import day_range, query
+from styling import RISK_LOG_TYPE, category_css, sign_css, style_table
 
 st.set_page_config(page_title="风控状态", page_icon="⚠️", layout="wide")
 
 st.title("⚠️ 风控状态监控")
 
-conn = sqlite3.connect('../data/trading_bot.db', check_same_thread=False)
+auto_refresh = refresh_interval()
 
 # 配置参数
 TOTAL_CAPITAL = 1000
@@ -21,16 +24,12 @@ st.subheader("📊 当前风控状态")
 col1, col2, col3 = st.columns(3)
 
 try:
-    today = datetime.now().strftime("%Y-%m-%d")
+    today = day_range()
+    # 头部指标来自共享快照（见 snapshot.py），不随查看人数重复查库
+    risk = snapshot.current().risk
     
     # 日亏损检查
-    loss_query = f"""
-        SELECT COALESCE(SUM(pnl), 0) as total_pnl
-        FROM trades
-        WHERE DATE(created_at) = '{today}'
-    """
-    loss_df = pd.read_sql_query(loss_query, conn)
-    current_pnl = loss_df['total_pnl'].iloc[0] or 0
+    current_pnl = risk['today_pnl']
     current_loss = abs(min(0, current_pnl))
     daily_loss_limit = TOTAL_CAPITAL * MAX_DAILY_LOSS
     daily_loss_pct = (current_loss / daily_loss_limit) * 100
@@ -54,13 +53,7 @@ try:
                    text=f"已使用 {daily_loss_pct:.1f}%")
     
     # 交易次数检查
-    trades_query = f"""
-        SELECT COUNT(*) as count
-        FROM signals
-        WHERE DATE(created_at) = '{today}' AND status IN ('confirmed', 'executed')
-    """
-    trades_df = pd.read_sql_query(trades_query, conn)
-    current_trades = trades_df['count'].iloc[0] or 0
+    current_trades = risk['today_signals']
     trades_pct = (current_trades / MAX_DAILY_TRADES) * 100
     
     with col2:
@@ -86,13 +79,7 @@ try:
         st.info(f"💡 建议单笔不超过 **${single_limit:.2f}**")
         
         # 当前敞口
-        exposure_query = f"""
-            SELECT COALESCE(SUM(amount), 0) as exposure
-            FROM trades
-            WHERE DATE(created_at) = '{today}' AND status IN ('pending', 'confirmed')
-        """
-        exposure_df = pd.read_sql_query(exposure_query, conn)
-        current_exposure = exposure_df['exposure'].iloc[0] or 0
+        current_exposure = risk['exposure']
         st.metric("当前敞口", f"${current_exposure:.2f}")
         
 except Exception as e:
@@ -100,73 +87,34 @@ except Exception as e:
 
 st.divider()
 
-# 风控日志
-st.subheader("📝 风控日志")
-
-try:
-    logs_query = """
-        SELECT 
-            created_at as 时间,
-            log_type as 类型,
-            message as 消息,
-            current_exposure as 当前暴露,
-            limit_value as 限制值
-        FROM risk_logs
-        ORDER BY created_at DESC
-        LIMIT 20
-    """
-    logs_df = pd.read_sql_query(logs_query, conn)
+# 风控日志（只拉取新增日志，开启自动刷新时局部重跑）
+@st.fragment(run_every=auto_refresh)
+def render_risk_logs():
+    st.subheader("📝 风控日志")
     
-    if not logs_df.empty:
-        def color_type(val):
-            if val == 'limit_warning':
-                return 'background-color: #ffebee; color: #c62828; font-weight: bold'
-            elif val == 'trade_blocked':
-                return 'background-color: #fff3e0; color: #e65100'
-            return ''
-        
-        styled_df = logs_df.style.applymap(color_type, subset=['类型'])
-        st.dataframe(styled_df, use_container_width=True, hide_index=True)
-    else:
-        st.info("暂无风控日志，系统运行正常")
+    try:
+        logs_df = ChangeFeed('risk_logs', 'risk_logs', q.RISK_LOGS, 'id', limit=20).poll().drop(columns=['id'])
         
-except Exception as e:
-    st.error(f"加载日志失败: {e}")
+        if not logs_df.empty:
+            styled_df = style_table(logs_df, {'类型': category_css(RISK_LOG_TYPE)})
+            st.dataframe(styled_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("暂无风控日志，系统运行正常")
+            
+    except Exception as e:
+        st.error(f"加载日志失败: {e}")
+
+render_risk_logs()
 
 # 今日交易记录
 st.divider()
 st.subheader("📋 今日交易记录")
 
 try:
-    today_trades_query = f"""
-        SELECT 
-            t.id,
-            m.question as 事件,
-            t.side as 方向,
-            t.amount as 金额,
-            t.price as 价格,
-            t.pnl as 盈亏,
-            t.status as 状态,
-            t.created_at as 时间
-        FROM trades t
-        JOIN markets m ON t.market_id = m.id
-        WHERE DATE(t.created_at) = '{today}'
-        ORDER BY t.created_at DESC
-    """
-    trades_df = pd.read_sql_query(today_trades_query, conn)
+    trades_df = query(q.TODAY_TRADES, today)
     
     if not trades_df.empty:
-        def color_pnl(val):
-            if pd.isna(val):
-                return ''
-            val = float(val)
-            if val > 0:
-                return 'color: #2e7d32; font-weight: bold'
-            elif val < 0:
-                return 'color: #c62828; font-weight: bold'
-            return ''
-        
-        styled_df = trades_df.style.applymap(color_pnl, subset=['盈亏'])
+        styled_df = style_table(trades_df, {'盈亏': sign_css()})
         st.dataframe(styled_df, use_container_width=True, hide_index=True)
         
         # 盈亏汇总
@@ -1,42 +1,310 @@
+import time
+
 import streamlit as st
-import json
-import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
+import backtest_engine
+import reports
+import risk_metrics
+import snapshot_replay
+from db import data_version, get_pool
+from styling import sign_css, style_table
+
 st.set_page_config(page_title="回测报告", page_icon="📈", layout="wide")
 
 st.title("📈 虚拟盘回测报告")
 
+# 交互式回测：在已记录的价格快照上直接运行向量化引擎，不经过 npm run backtest
+# version 为数据库版本：有新快照写入时重新读取，没有写入时一直命中缓存
+@st.cache_data(max_entries=4)
+def load_backtest_prices(start, end, version):
+    # 分块读取，区间再长也不会为每行构造 Python 对象
+    with get_pool().connection() as conn:
+        return snapshot_replay.load_prices(conn, start, end)
+
+with st.expander("⚡ 交互式回测（Python 引擎，基于已记录的价格快照）"):
+    defaults = backtest_engine.BacktestParams()
+    with st.form("interactive_backtest"):
+        col1, col2, col3, col4 = st.columns(4)
+        date_range = col1.date_input(
+            "回测区间",
+            value=(datetime.now().date() - timedelta(days=30), datetime.now().date())
+        )
+        initial_capital = col2.number_input("初始资金", min_value=100.0, value=defaults.initial_capital, step=100.0)
+        min_gap = col3.number_input("最小套利阈值 (%)", min_value=0.1, value=defaults.min_arbitrage_gap * 100, step=0.1)
+        max_hold_hours = col4.number_input("最长持仓 (小时)", min_value=0.5, value=defaults.max_hold_hours, step=1.0)
+
+        col1, col2, col3, col4 = st.columns(4)
+        partial_close_at = col1.slider("偏离回归比例平仓", 0.1, 1.0, defaults.partial_close_at, 0.05)
+        max_daily_trades = col2.number_input("每日最多交易", min_value=1, value=defaults.max_daily_trades, step=1)
+        max_daily_loss = col3.number_input("日亏损上限 (%)", min_value=0.5, value=defaults.max_daily_loss * 100, step=0.5)
+        max_single_trade = col4.number_input("单笔上限 (%)", min_value=1.0, value=defaults.max_single_trade * 100, step=1.0)
+        submitted = st.form_submit_button("▶️ 运行回测")
+
+    if submitted and len(date_range) == 2:
+        start_day, end_day = date_range
+        params = backtest_engine.BacktestParams(
+            initial_capital=initial_capital,
+            min_arbitrage_gap=min_gap / 100,
+            partial_close_at=partial_close_at,
+            max_hold_hours=max_hold_hours,
+            max_daily_loss=max_daily_loss / 100,
+            max_single_trade=max_single_trade / 100,
+            max_daily_trades=int(max_daily_trades),
+        )
+        try:
+            prices = load_backtest_prices(
+                start_day.isoformat(), (end_day + timedelta(days=1)).isoformat(), data_version()
+            )
+        except Exception as e:
+            st.error(f"读取价格快照失败: {e}")
+            prices = None
+
+        if prices is not None and prices.empty:
+            st.info("所选区间没有价格快照")
+        elif prices is not None:
+            started = time.perf_counter()
+            result, bt_trades = backtest_engine.run_backtest(prices, params, prepared=True)
+            elapsed = time.perf_counter() - started
+
+            st.caption(f"{len(prices):,} 个价格点，{prices['marketId'].nunique()} 个市场，用时 {elapsed:.2f}s")
+            col1, col2, col3, col4, col5 = st.columns(5)
+            col1.metric("总交易数", result['totalTrades'])
+            col2.metric("胜率", f"{result['winRate']:.2f}%")
+            col3.metric("总盈亏", f"${result['totalPnL']:.2f}", f"{result['totalPnLPercent']:.2f}%")
+            col4.metric("最大回撤", f"{result['maxDrawdown']:.2f}%")
+            col5.metric("夏普比率", f"{result['sharpeRatio']:.2f}")
+
+            if not bt_trades.empty:
+                import plotly.graph_objects as go
+
+                ordered = bt_trades.sort_values('exitTime', kind='stable')
+                equity = risk_metrics.equity_curve(ordered['pnl'].to_numpy(dtype=float), initial_capital)
+                fig = go.Figure(go.Scatter(
+                    x=[ordered['entryTime'].iloc[0]] + ordered['exitTime'].tolist(),
+                    y=equity,
+                    mode='lines',
+                    line=dict(color='#4d96ff'),
+                ))
+                fig.update_layout(title='资金曲线', xaxis_title='时间', yaxis_title='资金 ($)', height=350)
+                st.plotly_chart(fig, use_container_width=True)
+
+                st.dataframe(
+                    style_table(bt_trades[['id', 'marketName', 'side', 'entryPrice', 'exitPrice', 'pnl',
+                                           'pnlPercent', 'exitReason', 'entryTime', 'exitTime']], {'pnl': sign_css()}),
+                    use_container_width=True,
+                    hide_index=True,
+                    height=300,
+                    column_config={
+                        'pnl': st.column_config.NumberColumn('盈亏', format="$%.2f"),
+                        'pnlPercent': st.column_config.NumberColumn('收益率', format="%.2f%%"),
+                    }
+                )
+
+st.divider()
+
+# 交易明细只读取页面用到的列
+TRADE_COLUMNS = ['id', 'marketName', 'side', 'entryPrice', 'exitPrice', 'pnl', 'pnlPercent', 'exitReason', 'entryTime', 'exitTime']
+
 # 查找报告文件
 reports_dir = Path("../reports")
 if not reports_dir.exists():
     reports_dir = Path("./reports")
 
-if reports_dir.exists():
-    report_files = sorted(reports_dir.glob("backtest-*.json"), key=lambda x: x.stat().st_mtime, reverse=True)
+# 按文件修改时间缓存，目录更新后自动失效
+@st.cache_data(max_entries=4)
+def load_catalog(path, mtime):
+    return reports.load_catalog(path)
+
+@st.cache_data(max_entries=16)
+def load_equity_curves(path, mtime, names):
+    return reports.load_equity_curves(path, list(names))
+
+# 有报告目录时只查目录，否则退回扫描报告文件
+catalog_file = reports.catalog_path(reports_dir) if reports_dir.exists() else None
+catalog = load_catalog(str(catalog_file), catalog_file.stat().st_mtime) if catalog_file else None
+
+if catalog is not None and not catalog.empty:
+    report_files = reports.catalog_reports(reports_dir, catalog)
 else:
-    report_files = []
+    report_files = reports.find_reports(reports_dir) if reports_dir.exists() else []
+
+@st.cache_data(max_entries=4)
+def load_sweeps(path, mtime):
+    return reports.load_sweeps(path)
+
+@st.cache_data(max_entries=8)
+def load_sweep_runs(path, mtime, sweep_id):
+    return reports.load_sweep_runs(path, sweep_id)
+
+# 参数扫描：scripts/sweep_backtest.py 写入目录的批量运行
+sweeps = load_sweeps(str(catalog_file), catalog_file.stat().st_mtime) if catalog_file else None
+if sweeps is not None and not sweeps.empty:
+    import plotly.express as px
+    
+    st.header("🧪 参数扫描")
+    
+    sweep_info = sweeps.set_index('id')
+    sweep_id = st.selectbox(
+        "扫描",
+        sweep_info.index.tolist(),
+        format_func=lambda sid: f"{sid} · {sweep_info.at[sid, 'method']} · "
+                                f"{sweep_info.at[sid, 'finished']}/{sweep_info.at[sid, 'runs']} 次运行",
+    )
+    runs = load_sweep_runs(str(catalog_file), catalog_file.stat().st_mtime, sweep_id)
+    swept = [name for name in sweep_info.at[sweep_id, 'space'] if name in runs.columns]
+    
+    metric_labels = {
+        'total_pnl_percent': '收益率 (%)',
+        'sharpe_ratio': '夏普比率',
+        'max_drawdown': '最大回撤 (%)',
+    }
+    
+    if runs.empty or not swept:
+        st.info("该扫描还没有完成的运行")
+    elif len(swept) == 1:
+        param = swept[0]
+        line = runs.groupby(reports.sweep_axis(runs[param]))[list(metric_labels)].mean().reset_index()
+        cols = st.columns(len(metric_labels))
+        for col, (metric, label) in zip(cols, metric_labels.items()):
+            fig = px.line(line, x=param, y=metric, markers=True, title=label)
+            fig.update_layout(height=300, yaxis_title=None)
+            col.plotly_chart(fig, use_container_width=True)
+    else:
+        col1, col2, col3 = st.columns(3)
+        x_param = col1.selectbox("横轴参数", swept, index=0)
+        y_param = col2.selectbox("纵轴参数", [name for name in swept if name != x_param], index=0)
+        agg = col3.radio(
+            "其余参数", ['mean', 'best'], horizontal=True,
+            format_func={'mean': '取平均', 'best': '取最优'}.get,
+        )
+        
+        cols = st.columns(len(metric_labels))
+        for col, (metric, label) in zip(cols, metric_labels.items()):
+            grid = reports.sweep_grid(runs, x_param, y_param, metric, agg)
+            # 回撤越小越好，颜色方向反过来，让三张图都是“绿=好”
+            scale = 'RdYlGn_r' if metric in reports.SWEEP_LOWER_IS_BETTER else 'RdYlGn'
+            fig = px.imshow(
+                grid, text_auto='.2f', aspect='auto', origin='lower', color_continuous_scale=scale,
+                labels={'x': x_param, 'y': y_param, 'color': label}, title=label,
+            )
+            fig.update_xaxes(type='category')
+            fig.update_yaxes(type='category')
+            fig.update_layout(height=400)
+            col.plotly_chart(fig, use_container_width=True)
+    
+    if not runs.empty:
+        st.subheader("🏆 最优运行")
+        rank_by = st.selectbox("排序指标", list(metric_labels), format_func=metric_labels.get)
+        top = runs.sort_values(rank_by, ascending=rank_by in reports.SWEEP_LOWER_IS_BETTER, kind='stable').head(20)
+        st.dataframe(
+            top[swept + ['total_trades', 'win_rate', 'total_pnl', *metric_labels]].rename(columns={
+                'total_trades': '交易数',
+                'win_rate': '胜率 (%)',
+                'total_pnl': '总盈亏',
+                **metric_labels,
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+    
+    st.divider()
 
 if not report_files:
     st.warning("⚠️ 没有找到回测报告文件")
     st.info("请先运行回测：`npm run backtest`")
     st.stop()
 
+# 回测目录：所有运行的核心指标，支持筛选、排序和资金曲线对比
+if catalog is not None and not catalog.empty:
+    st.header("📚 回测目录")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    scenarios = sorted(catalog['scenario'].dropna().unique())
+    selected_scenarios = col1.multiselect("测试场景", scenarios, default=scenarios)
+    min_trades = col2.number_input("最少交易数", min_value=0, value=0, step=1)
+    sort_options = {
+        'created_at': '运行时间',
+        'total_pnl_percent': '总收益率',
+        'win_rate': '胜率',
+        'sharpe_ratio': '夏普比率',
+        'max_drawdown': '最大回撤',
+        'total_trades': '交易数',
+    }
+    sort_by = col3.selectbox("排序", list(sort_options), format_func=sort_options.get)
+    ascending = col4.checkbox("升序", value=False)
+    
+    filtered = catalog[
+        (catalog['scenario'].isin(selected_scenarios) | catalog['scenario'].isna())
+        & (catalog['total_trades'].fillna(0) >= min_trades)
+    ].sort_values(sort_by, ascending=ascending, kind='stable')
+    
+    st.dataframe(
+        filtered[['name', 'created_at', 'scenario', 'days', 'markets', 'min_arbitrage_gap',
+                  'total_trades', 'win_rate', 'total_pnl', 'total_pnl_percent',
+                  'max_drawdown', 'sharpe_ratio']].rename(columns={
+            'name': '报告',
+            'created_at': '运行时间',
+            'scenario': '场景',
+            'days': '天数',
+            'markets': '市场数',
+            'min_arbitrage_gap': '套利阈值',
+            'total_trades': '交易数',
+            'win_rate': '胜率 (%)',
+            'total_pnl': '总盈亏',
+            'total_pnl_percent': '收益率 (%)',
+            'max_drawdown': '最大回撤 (%)',
+            'sharpe_ratio': '夏普比率',
+        }),
+        use_container_width=True,
+        hide_index=True,
+        height=300
+    )
+    
+    # 资金曲线对比
+    compare = st.multiselect(
+        "对比资金曲线",
+        filtered['name'].tolist(),
+        default=filtered['name'].head(3).tolist()
+    )
+    if compare:
+        import plotly.graph_objects as go
+        
+        curves = load_equity_curves(str(catalog_file), catalog_file.stat().st_mtime, tuple(compare))
+        fig = go.Figure()
+        for name in compare:
+            if name in curves:
+                curve = curves[name]
+                fig.add_trace(go.Scatter(x=curve['time'], y=curve['equity'], mode='lines', name=name))
+        fig.update_layout(title='资金曲线对比', xaxis_title='时间', yaxis_title='资金 ($)', height=400)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    st.divider()
+
 # 选择报告
-selected_file = st.selectbox(
+selected_report = st.selectbox(
     "选择回测报告",
     report_files,
-    format_func=lambda x: f"{x.name} ({datetime.fromtimestamp(x.stat().st_mtime).strftime('%Y-%m-%d %H:%M')})"
+    format_func=lambda r: r.label
 )
 
-# 加载报告
-with open(selected_file, 'r') as f:
-    report = json.load(f)
+# 按报告版本缓存，报告重写后自动失效
+@st.cache_data(max_entries=16)
+def load_summary(name, version):
+    return reports.load_summary(next(r for r in report_files if r.name == name))
+
+@st.cache_data(max_entries=4)
+def load_trades(name, version):
+    return reports.load_trades(next(r for r in report_files if r.name == name), TRADE_COLUMNS)
 
-config = report.get('config', {})
-options = report.get('options', {})
-result = report.get('result', {})
+# 加载报告：列式报告只解析头部
+try:
+    config, options, result = load_summary(selected_report.name, selected_report.version)
+except FileNotFoundError:
+    st.error(f"报告文件已不存在: {selected_report.path}")
+    st.info("运行 `npm run reports:catalog` 重建报告目录")
+    st.stop()
 
 # 基本信息
 st.header("📊 测试概览")
@@ -93,45 +361,65 @@ def get_assessment(pnl_pct, win_rate, sharpe, max_dd):
 assessment, advice = get_assessment(total_pnl_pct, win_rate, sharpe, max_drawdown)
 st.info(f"**评估**: {assessment} - {advice}")
 
+trades_df = load_trades(selected_report.name, selected_report.version).copy()
+
+# 风险指标（按平仓时间排序的逐笔盈亏）
+if not trades_df.empty and 'pnl' in trades_df.columns:
+    st.header("📉 风险指标")
+    
+    ordered = trades_df.dropna(subset=['pnl'])
+    if 'exitTime' in ordered.columns:
+        ordered = ordered.sort_values('exitTime', kind='stable')
+    pnl_values = ordered['pnl'].to_numpy(dtype=float)
+    initial_capital = config.get('initialCapital', 1000)
+    metrics = risk_metrics.summarize(pnl_values, initial_capital)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("最长回撤期", f"{metrics['drawdown_duration']} 笔")
+    col2.metric("夏普比率 (逐笔)", f"{metrics['sharpe']:.2f}")
+    col3.metric("索提诺比率 (逐笔)", f"{metrics['sortino']:.2f}")
+    col4.metric("盈利因子", f"{metrics['profit_factor']:.2f}")
+    
+    equity = risk_metrics.equity_curve(pnl_values, initial_capital)
+    drawdown = risk_metrics.drawdown_series(equity) * 100
+    
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+    fig.add_trace(go.Scatter(y=equity, mode='lines', name='资金曲线', line=dict(color='#4d96ff')), row=1, col=1)
+    fig.add_trace(go.Scatter(y=-drawdown, mode='lines', name='回撤 (%)', fill='tozeroy', line=dict(color='#c62828')), row=2, col=1)
+    fig.update_layout(title='资金曲线与回撤', xaxis2_title='交易序号', showlegend=False, height=450)
+    st.plotly_chart(fig, use_container_width=True)
+
 st.divider()
 
 # 交易明细
-trades = result.get('trades', [])
-if trades:
-    st.header(f"📝 交易明细 ({len(trades)} 笔)")
-    
-    trades_df = pd.DataFrame(trades)
+if not trades_df.empty:
+    st.header(f"📝 交易明细 ({len(trades_df)} 笔)")
     
     # 格式化时间
     if 'entryTime' in trades_df.columns:
-        trades_df['entryTime'] = pd.to_datetime(trades_df['entryTime']).dt.strftime('%Y-%m-%d %H:%M')
+        trades_df['entryTime'] = trades_df['entryTime'].dt.strftime('%Y-%m-%d %H:%M')
     if 'exitTime' in trades_df.columns:
-        trades_df['exitTime'] = pd.to_datetime(trades_df['exitTime']).dt.strftime('%Y-%m-%d %H:%M')
+        trades_df['exitTime'] = trades_df['exitTime'].dt.strftime('%Y-%m-%d %H:%M')
     
     # 选择展示列
     display_cols = ['id', 'marketName', 'side', 'entryPrice', 'exitPrice', 'pnl', 'pnlPercent', 'exitReason']
     available_cols = [c for c in display_cols if c in trades_df.columns]
     
-    # 格式化数值
-    if 'pnl' in trades_df.columns:
-        trades_df['盈亏'] = trades_df['pnl'].apply(lambda x: f"${x:.2f}" if x is not None else "N/A")
-    if 'pnlPercent' in trades_df.columns:
-        trades_df['收益率'] = trades_df['pnlPercent'].apply(lambda x: f"{x:.2f}%" if x is not None else "N/A")
-    
-    # 高亮盈亏
-    def highlight_pnl(val):
-        if isinstance(val, str):
-            if val.startswith('$'):
-                num = float(val.replace('$', ''))
-                if num > 0:
-                    return 'color: #2e7d32; font-weight: bold'
-                elif num < 0:
-                    return 'color: #c62828; font-weight: bold'
-        return ''
-    
-    styled_df = trades_df[available_cols].style.applymap(highlight_pnl, subset=['pnl'] if 'pnl' in trades_df.columns else [])
-    
-    st.dataframe(styled_df, use_container_width=True, height=400)
+    # 高亮盈亏，数值格式交给 column_config
+    styled_df = style_table(trades_df[available_cols], {'pnl': sign_css()})
+    
+    st.dataframe(
+        styled_df,
+        use_container_width=True,
+        height=400,
+        column_config={
+            'pnl': st.column_config.NumberColumn('盈亏', format="$%.2f"),
+            'pnlPercent': st.column_config.NumberColumn('收益率', format="%.2f%%"),
+        }
+    )
     
     # 统计图表
     st.subheader("📊 收益分布")
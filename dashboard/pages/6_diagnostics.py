@@ -0,0 +1,125 @@
+import streamlit as st
+
+from db import cache_stats, get_pool, profiler, query_stats
+from styling import flag_css, style_table
+
+st.set_page_config(page_title="查询诊断", page_icon="🩺", layout="wide")
+
+st.title("🩺 Dashboard 查询诊断")
+st.caption("统计来自进程内共享的连接池，覆盖所有会话；每条语句保留最近 1000 次样本")
+
+stats_df = query_stats()
+
+# 查询结果缓存（按数据库版本失效，命中时不执行 SQL，也不计入下方耗时统计）
+cache = cache_stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("缓存命中率", f"{cache['hit_rate'] * 100:.1f}%", f"{cache['hits']} / {cache['hits'] + cache['misses']}", delta_color="off")
+col2.metric("缓存条目", cache['entries'])
+col3.metric("缓存内存", f"{cache['bytes'] / 1024 / 1024:.1f} / {cache['max_bytes'] / 1024 / 1024:.0f} MB")
+col4.metric("失效 / 淘汰", f"{cache['invalidations']} / {cache['evictions']}")
+
+if stats_df.empty:
+    st.info("暂无查询记录，先打开其他页面产生一些查询")
+    st.stop()
+
+# 概览
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("语句数", len(stats_df))
+col2.metric("总查询次数", int(stats_df['count'].sum()))
+col3.metric("累计耗时", f"{stats_df['total_ms'].sum() / 1000:.2f} s")
+col4.metric("全表扫描语句", int((stats_df['full_scan'] != '').sum()))
+
+st.divider()
+
+# 各语句分位数
+st.subheader("⏱️ 各查询耗时分位数")
+
+sort_options = {
+    'total_ms': '累计耗时',
+    'p95_ms': 'P95',
+    'p99_ms': 'P99',
+    'avg_bytes': '平均内存',
+    'count': '次数',
+}
+sort_by = st.selectbox("排序", list(sort_options), format_func=sort_options.get)
+display_df = stats_df.sort_values(sort_by, ascending=False)[[
+    'name', 'count', 'total_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms',
+    'avg_rows', 'avg_bytes', 'full_scan', 'last_at',
+]]
+
+st.dataframe(
+    style_table(display_df, {'full_scan': flag_css()}),
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        'name': st.column_config.TextColumn('查询', width='medium'),
+        'count': st.column_config.NumberColumn('次数'),
+        'total_ms': st.column_config.NumberColumn('累计 (ms)', format="%.1f"),
+        'p50_ms': st.column_config.NumberColumn('P50 (ms)', format="%.2f"),
+        'p95_ms': st.column_config.NumberColumn('P95 (ms)', format="%.2f"),
+        'p99_ms': st.column_config.NumberColumn('P99 (ms)', format="%.2f"),
+        'max_ms': st.column_config.NumberColumn('最大 (ms)', format="%.2f"),
+        'avg_rows': st.column_config.NumberColumn('平均行数', format="%.0f"),
+        'avg_bytes': st.column_config.NumberColumn('平均内存 (B)', format="%.0f"),
+        'full_scan': st.column_config.TextColumn('全表扫描'),
+        'last_at': st.column_config.DatetimeColumn('最近执行 (UTC)', format="HH:mm:ss"),
+    }
+)
+
+st.divider()
+
+# 单条语句详情
+st.subheader("🔍 查询详情")
+
+labels = {row.sql: f"{row.name} ({row.count} 次)" for row in stats_df.itertuples(index=False)}
+selected_sql = st.selectbox("选择查询", list(labels), format_func=labels.get)
+selected = stats_df[stats_df['sql'] == selected_sql].iloc[0]
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.write("**SQL**")
+    st.code(selected_sql, language='sql')
+
+    st.write("**EXPLAIN QUERY PLAN**")
+    plan = profiler().plan(selected_sql)
+    st.code('\n'.join(plan) or '（无）', language='text')
+    if selected['full_scan']:
+        st.error(f"🚨 全表扫描: {selected['full_scan']}，考虑加索引或改写查询条件")
+    else:
+        st.success("✅ 没有全表扫描")
+
+with col2:
+    samples = profiler().samples(selected_sql)
+    if not samples.empty:
+        import plotly.express as px
+
+        fig = px.histogram(
+            samples,
+            x='elapsed_ms',
+            nbins=30,
+            title='耗时分布',
+            labels={'elapsed_ms': '耗时 (ms)', 'count': '次数'}
+        )
+        for pct, color in (('p50_ms', 'green'), ('p95_ms', 'orange'), ('p99_ms', 'red')):
+            fig.add_vline(x=selected[pct], line_dash="dash", line_color=color, annotation_text=pct[:3].upper())
+        st.plotly_chart(fig, use_container_width=True)
+
+        fig = px.line(
+            samples.reset_index(),
+            x='index',
+            y='elapsed_ms',
+            title='最近样本耗时',
+            labels={'index': '样本序号', 'elapsed_ms': '耗时 (ms)'}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+st.divider()
+
+col1, col2 = st.columns(2)
+if col1.button("🗑️ 清空统计"):
+    profiler().reset()
+    st.rerun()
+if col2.button("🧹 清空查询缓存"):
+    get_pool().cache.clear()
+    st.rerun()
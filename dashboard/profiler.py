@@ -0,0 +1,168 @@
+"""
+查询性能剖析
+
+db.query 的每次调用都在这里登记：耗时、行数、结果占用内存，
+每条语句第一次执行时顺带跑一次 EXPLAIN QUERY PLAN，标记全表扫描。
+统计挂在进程级连接池上，所有会话共用，诊断页据此计算各查询的分位数。
+"""
+import re
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import queries as q
+
+# 每条语句保留的最近样本数
+SAMPLE_SIZE = 1000
+
+# SCAN t / SCAN t USING ... 中，只有不带 USING 的才是全表扫描
+FULL_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\S+)(?!.*\bUSING\b)')
+
+
+def normalize_sql(sql):
+    return ' '.join(sql.split())
+
+
+def _build_name_patterns():
+    """queries.py 中的 SQL 常量 -> 名称；模板中的 {占位} 视为通配"""
+    patterns = []
+    for name, value in vars(q).items():
+        if not name.isupper() or not isinstance(value, str) or 'SELECT' not in value.upper():
+            continue
+        parts = re.split(r'\{\w+\}', normalize_sql(value))
+        regex = '.*?'.join(re.escape(part) for part in parts)
+        # 模板更宽泛，放在精确语句之后匹配
+        patterns.append((len(parts) > 1, name, re.compile(regex, re.S)))
+    patterns.sort(key=lambda item: item[0])
+    return [(name, regex) for _, name, regex in patterns]
+
+
+_NAME_PATTERNS = _build_name_patterns()
+
+
+def query_name(sql):
+    """按 queries.py 的常量名识别语句，找不到时用 SQL 开头"""
+    text = normalize_sql(sql)
+    for name, regex in _NAME_PATTERNS:
+        if regex.fullmatch(text):
+            return name
+    return text[:60]
+
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN 的明细行，按缩进展示为树"""
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+
+def full_scans(plan):
+    """计划中的全表扫描表名"""
+    return [m.group(1) for line in plan if (m := FULL_SCAN_RE.match(line.strip()))]
+
+
+class QueryProfiler:
+    """按 SQL 文本累计耗时 / 行数 / 内存样本，并缓存查询计划"""
+
+    def __init__(self, sample_size=SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _entry(self, key):
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = self._stats[key] = {
+                'name': query_name(key),
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'last_ms': 0.0,
+                'last_rows': 0,
+                'last_at': 0.0,
+                'samples': deque(maxlen=self.sample_size),
+                'plan': None,
+                'full_scans': [],
+            }
+        return entry
+
+    def needs_plan(self, sql):
+        with self._lock:
+            entry = self._stats.get(normalize_sql(sql))
+            return entry is None or entry['plan'] is None
+
+    def record(self, sql, elapsed_ms, df, plan=None):
+        key = normalize_sql(sql)
+        rows = len(df)
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            entry = self._entry(key)
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['last_ms'] = elapsed_ms
+            entry['last_rows'] = rows
+            entry['last_at'] = time.time()
+            entry['samples'].append((elapsed_ms, rows, size))
+            if plan is not None:
+                entry['plan'] = plan
+                entry['full_scans'] = full_scans(plan)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def plan(self, sql):
+        with self._lock:
+            entry = self._stats.get(normalize_sql(sql))
+            return list(entry['plan'] or []) if entry else []
+
+    def samples(self, sql):
+        """某条语句的最近样本：elapsed_ms / rows / bytes"""
+        with self._lock:
+            entry = self._stats.get(normalize_sql(sql))
+            data = list(entry['samples']) if entry else []
+        return pd.DataFrame(data, columns=['elapsed_ms', 'rows', 'bytes'])
+
+    def to_frame(self):
+        with self._lock:
+            snapshot = [
+                (sql, {k: v for k, v in entry.items() if k != 'samples'}, np.array(entry['samples'], dtype=float))
+                for sql, entry in self._stats.items()
+            ]
+
+        rows = []
+        for sql, entry, samples in snapshot:
+            elapsed = samples[:, 0] if samples.size else np.zeros(1)
+            p50, p95, p99 = np.percentile(elapsed, [50, 95, 99])
+            rows.append({
+                'name': entry['name'],
+                'sql': sql,
+                'count': entry['count'],
+                'total_ms': entry['total_ms'],
+                'avg_ms': entry['total_ms'] / entry['count'],
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': entry['max_ms'],
+                'last_ms': entry['last_ms'],
+                'last_rows': entry['last_rows'],
+                'avg_rows': samples[:, 1].mean() if samples.size else 0.0,
+                'avg_bytes': samples[:, 2].mean() if samples.size else 0.0,
+                'full_scan': ', '.join(entry['full_scans']),
+                'last_at': pd.to_datetime(entry['last_at'], unit='s'),
+            })
+
+        columns = ['name', 'sql', 'count', 'total_ms', 'avg_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms',
+                   'last_ms', 'last_rows', 'avg_rows', 'avg_bytes', 'full_scan', 'last_at']
+        df = pd.DataFrame(rows, columns=columns)
+        if not df.empty:
+            df = df.sort_values('total_ms', ascending=False)
+        return df
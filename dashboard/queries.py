@@ -0,0 +1,384 @@
+"""
+Dashboard 使用的全部 SQL
+
+统一使用 ? / :name 占位符，语句文本固定不变，连接上的语句缓存才能命中。
+可选筛选条件写成 (:x IS NULL OR ...) 形式，而不是拼接字符串。
+时间条件写成半开区间 col >= ? AND col < ?，不要包 DATE()，否则用不上索引。
+按天的统计读 daily_* 汇总表（触发器维护），行数与天数成正比，而不是与历史记录数成正比。
+实时表的查询带 {rows} 占位，由 change_feed 填入新增行 / 变化行条件，按 id 倒序增量拉取。
+"""
+
+DB_HEALTH = "SELECT COUNT(*) as count FROM signals LIMIT 1"
+
+# ---------- 总览 / 风控 ----------
+
+TODAY_PNL = """
+    SELECT COALESCE(SUM(total_pnl), 0) as pnl, COALESCE(SUM(trades), 0) as trades
+    FROM daily_pnl
+    WHERE day >= ? AND day < ?
+"""
+
+TODAY_EXECUTED_SIGNALS = """
+    SELECT COALESCE(SUM(signals), 0) as count
+    FROM daily_signal_counts
+    WHERE day >= ? AND day < ? AND status IN ('confirmed', 'executed')
+"""
+
+PENDING_SIGNAL_COUNT = "SELECT COUNT(*) as count FROM signals WHERE status = 'pending'"
+
+TODAY_EXPOSURE = """
+    SELECT COALESCE(SUM(amount), 0) as exposure
+    FROM trades
+    WHERE created_at >= ? AND created_at < ? AND status IN ('pending', 'confirmed')
+"""
+
+# 实时表参数: limit（-1 表示不限），{rows} 见下方 change feed
+OPEN_OPPORTUNITIES = """
+    SELECT
+        ao.id,
+        m.question as 事件,
+        m.category as 分类,
+        ao.yes_price as Yes价格,
+        ao.no_price as No价格,
+        ao.total_price as 价格总和,
+        ROUND(ao.deviation_percent, 2) as 偏离度,
+        ao.detected_at as 检测时间,
+        CASE
+            WHEN ao.deviation_percent >= 5 THEN 'RISKY'
+            WHEN ao.deviation_percent >= 3 THEN 'AGGRESSIVE'
+            ELSE 'CONSERVATIVE'
+        END as 等级
+    FROM arbitrage_opportunities ao
+    JOIN markets m ON ao.market_id = m.id
+    WHERE ao.status = 'open' AND {rows}
+    ORDER BY ao.id DESC
+    LIMIT :limit
+"""
+
+RECENT_SIGNALS = """
+    SELECT
+        s.id,
+        m.question as 事件,
+        s.signal_type as 类型,
+        ROUND(s.confidence * 100, 0) as 置信度,
+        s.suggested_amount as 建议金额,
+        s.status as 状态,
+        s.level as 等级,
+        s.expiry_minutes as 有效期,
+        s.created_at as 创建时间
+    FROM signals s
+    JOIN markets m ON s.market_id = m.id
+    WHERE {rows}
+    ORDER BY s.id DESC
+    LIMIT :limit
+"""
+
+MARKETS_OVERVIEW = """
+    SELECT
+        m.question as 事件,
+        m.category as 分类,
+        ROUND(p.yes_price, 3) as Yes价格,
+        ROUND(p.no_price, 3) as No价格,
+        ROUND(p.yes_price + p.no_price, 3) as 总和,
+        ROUND((1 - (p.yes_price + p.no_price)) * 100, 2) as 偏离度,
+        ROUND(p.volume_24h, 0) as 交易量
+    FROM markets m
+    LEFT JOIN latest_prices p ON m.id = p.market_id
+    WHERE m.active = 1 AND m.resolved = 0
+    ORDER BY p.volume_24h DESC
+    LIMIT ?
+"""
+
+RISK_LOGS = """
+    SELECT
+        id,
+        created_at as 时间,
+        log_type as 类型,
+        message as 消息,
+        current_exposure as 当前暴露,
+        limit_value as 限制值
+    FROM risk_logs
+    WHERE {rows}
+    ORDER BY id DESC
+    LIMIT :limit
+"""
+
+TODAY_TRADES = """
+    SELECT
+        t.id,
+        m.question as 事件,
+        t.side as 方向,
+        t.amount as 金额,
+        t.price as 价格,
+        t.pnl as 盈亏,
+        t.status as 状态,
+        t.created_at as 时间
+    FROM trades t
+    JOIN markets m ON t.market_id = m.id
+    WHERE t.created_at >= ? AND t.created_at < ?
+    ORDER BY t.created_at DESC
+"""
+
+# ---------- 市场监控 ----------
+
+MARKET_CATEGORIES = "SELECT DISTINCT category FROM markets WHERE category IS NOT NULL"
+
+# 最新价格来自 latest_prices（每市场一行），与快照历史长度无关
+# 参数: category (None 表示全部), min_deviation, min_volume
+ACTIVE_MARKETS = """
+    SELECT
+        m.id,
+        m.question as 事件,
+        m.category as 分类,
+        ROUND(p.yes_price, 4) as Yes价格,
+        ROUND(p.no_price, 4) as No价格,
+        ROUND(p.yes_price + p.no_price, 4) as 价格总和,
+        ROUND((1 - (p.yes_price + p.no_price)) * 100, 2) as 偏离度,
+        p.yes_liquidity as Yes流动性,
+        p.no_liquidity as No流动性,
+        ROUND(p.volume_24h, 0) as 交易量,
+        p.timestamp as 更新时间,
+        m.resolution_time as 结算时间
+    FROM markets m
+    LEFT JOIN latest_prices p ON m.id = p.market_id
+    WHERE m.active = 1 AND m.resolved = 0
+      AND (:category IS NULL OR m.category = :category)
+      AND (:min_deviation <= 0 OR (1 - (p.yes_price + p.no_price)) * 100 >= :min_deviation)
+      AND (:min_volume <= 0 OR p.volume_24h >= :min_volume)
+    ORDER BY {order}
+"""
+
+ACTIVE_MARKETS_ORDER = {
+    "偏离度 ↓": "偏离度 DESC",
+    "交易量 ↓": "交易量 DESC",
+    "流动性 ↓": "(Yes流动性 + No流动性) DESC",
+    "最新更新": "更新时间 DESC",
+}
+
+
+def active_markets_sql(sort_by):
+    """排序列只能来自白名单，每种排序对应一条固定语句"""
+    return ACTIVE_MARKETS.format(order=ACTIVE_MARKETS_ORDER.get(sort_by, "偏离度 DESC"))
+
+
+# ---------- 价格历史 ----------
+# 读 price_bars（触发器维护的 K 线），按主键 (interval, market_id, bucket) 范围扫描，不碰原始快照
+
+# 周期 -> 秒数，与 price_bar_intervals 一致，由细到粗
+BAR_INTERVALS = {'1m': 60, '5m': 300, '1h': 3600, '1d': 86400}
+
+MARKET_HISTORY_SPAN = """
+    SELECT MIN(bucket) as first_bar, MAX(bucket) as last_bar
+    FROM price_bars
+    WHERE interval = '1d' AND market_id = ?
+"""
+
+# 偏离度以百分比返回：收盘偏离度和周期内最大偏离度（保留尖峰）
+PRICE_BARS = """
+    SELECT
+        bucket as time,
+        yes_close as yes,
+        no_close as no,
+        (1 - total_close) * 100 as deviation,
+        max_deviation * 100 as max_deviation
+    FROM price_bars
+    WHERE interval = :interval AND market_id = :market_id
+      AND bucket >= :start AND bucket < :end
+    ORDER BY bucket
+"""
+
+
+def bar_interval(span_seconds, max_bars):
+    """K 线根数不超过 max_bars 的最细周期，都超过时用最粗的"""
+    for interval, seconds in BAR_INTERVALS.items():
+        if span_seconds / seconds <= max_bars:
+            return interval
+    return list(BAR_INTERVALS)[-1]
+
+
+# ---------- Change feed ----------
+# 新增行：id 大于会话已见过的最大 id；变化行：change_log 中序号大于高水位的行（触发器写入）
+
+FEED_NEW_ROWS = "{id} > :after_id"
+
+FEED_CHANGED_ROWS = "{id} IN (SELECT row_id FROM change_log WHERE table_name = :table AND id > :after_change)"
+
+CHANGE_LOG_HWM = "SELECT COALESCE(MAX(id), 0) as id FROM change_log"
+
+CHANGE_LOG_SINCE = """
+    SELECT id, row_id
+    FROM change_log
+    WHERE table_name = :table AND id > :after_change
+    ORDER BY id
+"""
+
+
+# ---------- 交易信号 ----------
+
+SIGNAL_STATUS_STATS = """
+    SELECT
+        status,
+        SUM(signals) as count,
+        SUM(confidence_sum) / NULLIF(SUM(signals), 0) as avg_confidence
+    FROM daily_signal_counts
+    WHERE day >= ?
+    GROUP BY status
+    HAVING SUM(signals) > 0
+"""
+
+# 信号列表按 (created_at, id) 倒序分页
+# 参数: start_date, status, level（只在对应筛选启用时出现）, limit
+# {filters} 由 signal_list_sql 填入；{rows} 为翻页游标条件或 change feed 条件
+SIGNAL_LIST = """
+    SELECT
+        s.id,
+        m.question as 事件,
+        m.category as 分类,
+        s.signal_type as 类型,
+        ROUND(s.confidence * 100, 0) || '%' as 置信度,
+        s.suggested_amount as 建议金额,
+        s.status as 状态,
+        s.level as 等级,
+        s.expiry_minutes as 有效期,
+        s.created_at as 创建时间
+    FROM signals s
+    JOIN markets m ON s.market_id = m.id
+    WHERE s.created_at >= :start_date{filters}
+      AND {rows}
+    ORDER BY s.created_at DESC, s.id DESC
+    LIMIT :limit
+"""
+
+SIGNAL_LIST_FILTERS = {
+    'status': " AND s.status = :status",
+    'level': " AND s.level = :level",
+}
+
+# 下一页：严格排在上一页最后一行 (created_at, id) 之后，走索引范围扫描，与翻到第几页无关
+SIGNAL_PAGE_ROWS = "(s.created_at, s.id) < (:cursor_created, :cursor_id)"
+
+
+def signal_list_sql(status=None, level=None):
+    """
+    筛选条件启用时才加入对应谓词，而不是 (:x IS NULL OR ...)，
+    这样 status / level 上的索引可用；每种组合对应一条固定语句
+    """
+    filters = ''.join(SIGNAL_LIST_FILTERS[name] for name, value in (('status', status), ('level', level)) if value)
+    return SIGNAL_LIST.format(filters=filters, rows='{rows}')
+
+
+SIGNAL_DETAIL = """
+    SELECT
+        s.id,
+        m.question as 事件,
+        m.category as 分类,
+        s.signal_type as 类型,
+        ROUND(s.confidence * 100, 0) || '%' as 置信度,
+        s.suggested_amount as 建议金额,
+        s.reason as 原因,
+        s.status as 状态,
+        s.level as 等级,
+        s.expiry_minutes as 有效期,
+        s.created_at as 创建时间,
+        s.confirmed_at as 确认时间,
+        s.executed_at as 执行时间
+    FROM signals s
+    JOIN markets m ON s.market_id = m.id
+    WHERE s.id = ?
+"""
+
+DAILY_SIGNALS = """
+    SELECT
+        day as 日期,
+        SUM(signals) as 信号数,
+        SUM(CASE WHEN status = 'executed' THEN signals ELSE 0 END) as 执行数
+    FROM daily_signal_counts
+    WHERE day >= ?
+    GROUP BY day
+    HAVING SUM(signals) > 0
+    ORDER BY 日期
+"""
+
+# ---------- 数据分析（daily_* 汇总表） ----------
+
+PNL_SUMMARY = """
+    SELECT
+        COALESCE(SUM(total_pnl), 0) as 总盈亏,
+        COALESCE(SUM(trades), 0) as 总交易数,
+        SUM(total_pnl) / NULLIF(SUM(trades), 0) as 平均盈亏,
+        MAX(max_pnl) as 最大盈利,
+        MIN(min_pnl) as 最大亏损
+    FROM daily_pnl
+    WHERE day >= ?
+"""
+
+WIN_LOSS = """
+    SELECT
+        COALESCE(SUM(wins), 0) as 盈利次数,
+        COALESCE(SUM(losses), 0) as 亏损次数,
+        COALESCE(SUM(trades), 0) as 总次数
+    FROM daily_pnl
+    WHERE day >= ?
+"""
+
+DAILY_PNL = """
+    SELECT
+        day as 日期,
+        total_pnl as 日盈亏
+    FROM daily_pnl
+    WHERE day >= ?
+    ORDER BY 日期
+"""
+
+DAILY_OPPORTUNITIES = """
+    SELECT
+        day as 日期,
+        opportunities as 机会数,
+        deviation_sum / opportunities as 平均偏离度,
+        max_deviation as 最大偏离度,
+        high_value as 高价值机会
+    FROM daily_opportunities
+    WHERE day >= ?
+    ORDER BY 日期
+"""
+
+SIGNAL_LEVEL_STATUS = """
+    SELECT
+        NULLIF(level, '') as 等级,
+        status as 状态,
+        SUM(signals) as 数量,
+        SUM(confidence_sum) / NULLIF(SUM(signals), 0) as 平均置信度
+    FROM daily_signal_counts
+    WHERE day >= ?
+    GROUP BY level, status
+    HAVING SUM(signals) > 0
+    ORDER BY level, status
+"""
+
+# ---------- 交互式回测 ----------
+
+# 价格快照按 (timestamp, id) 分块回放：每块从上一块最后一行之后开始，走 idx_price_snapshots_time 范围扫描，
+# 第一块游标取 (起始时间, 0)。列名与 HistoricalPrice 一致，多出的 id 用作下一块的游标
+BACKTEST_PRICE_CHUNK = """
+    SELECT
+        ps.id as id,
+        ps.timestamp as timestamp,
+        ps.market_id as marketId,
+        m.question as marketName,
+        ps.yes_price as yesPrice,
+        ps.no_price as noPrice
+    FROM price_snapshots ps
+    JOIN markets m ON ps.market_id = m.id
+    WHERE ps.timestamp < :end
+      AND (ps.timestamp, ps.id) > (:cursor_time, :cursor_id)
+    ORDER BY ps.timestamp, ps.id
+    LIMIT :rows
+"""
+
+# 与 BACKTEST_PRICE_CHUNK 同一范围的行数，用于预分配回放缓冲区
+BACKTEST_PRICE_COUNT = """
+    SELECT COUNT(*)
+    FROM price_snapshots ps
+    JOIN markets m ON ps.market_id = m.id
+    WHERE ps.timestamp >= :start AND ps.timestamp < :end
+"""
@@ -0,0 +1,273 @@
+"""
+回测报告读取
+
+支持两种格式：
+- 旧版 JSON 报告（backtest-*.json），需要整体解析
+- 列式报告（backtest-*.trades.bin），格式见 src/services/execution/columnarReport.ts：
+  先读头部拿到核心指标，交易明细按需只读取用到的列
+
+报告目录 catalog.db（见 src/services/execution/reportCatalog.ts）登记了所有报告的
+核心指标和资金曲线，列表、筛选和对比只查目录，不打开报告文件。
+"""
+import json
+import sqlite3
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+COLUMNAR_MAGIC = b'PMBT'
+COLUMNAR_SUFFIX = '.trades.bin'
+CATALOG_FILE = 'catalog.db'
+MISSING_CODE = 0xFFFFFFFF
+
+_DTYPES = {
+    'float64': np.dtype('<f8'),
+    'int32': np.dtype('<i4'),
+    'dict': np.dtype('<u4'),
+}
+
+# 以 epoch 毫秒存储的时间列
+TIME_COLUMNS = ('entryTime', 'exitTime')
+
+
+@dataclass
+class ReportFile:
+    name: str
+    json_path: Optional[Path] = None
+    columnar_path: Optional[Path] = None
+    created_at: Optional[str] = None
+
+    @property
+    def path(self):
+        return self.columnar_path or self.json_path
+
+    @property
+    def mtime(self):
+        return self.path.stat().st_mtime
+
+    @property
+    def version(self):
+        """缓存键：目录中的报告用登记时间，避免逐个 stat"""
+        return self.created_at or self.mtime
+
+    @property
+    def label(self):
+        fmt = '列式' if self.columnar_path else 'JSON'
+        if self.created_at:
+            created = datetime.fromisoformat(self.created_at.replace('Z', '+00:00')).astimezone()
+        else:
+            created = datetime.fromtimestamp(self.mtime)
+        return f"{self.name} [{fmt}] ({created.strftime('%Y-%m-%d %H:%M')})"
+
+
+def find_reports(reports_dir):
+    """同名的 JSON 与列式报告合并为一项，按修改时间倒序"""
+    reports = {}
+    for path in Path(reports_dir).glob('backtest-*.json'):
+        reports.setdefault(path.stem, ReportFile(path.stem)).json_path = path
+    for path in Path(reports_dir).glob(f'backtest-*{COLUMNAR_SUFFIX}'):
+        name = path.name[:-len(COLUMNAR_SUFFIX)]
+        reports.setdefault(name, ReportFile(name)).columnar_path = path
+    return sorted(reports.values(), key=lambda r: r.mtime, reverse=True)
+
+
+def _read_prefix(f):
+    prefix = f.read(8)
+    if len(prefix) < 8 or prefix[:4] != COLUMNAR_MAGIC:
+        raise ValueError('不是列式回测报告')
+    (header_length,) = struct.unpack('<I', prefix[4:])
+    header = json.loads(f.read(header_length).decode('utf-8'))
+    data_start = (8 + header_length + 7) // 8 * 8
+    return header, data_start
+
+
+def read_header(path):
+    """只读取列式报告头部（配置、选项、核心指标、列目录）"""
+    with open(path, 'rb') as f:
+        header, _ = _read_prefix(f)
+    return header
+
+
+def read_columns(path, names=None):
+    """按列读取交易明细，names 为空时读取全部列"""
+    with open(path, 'rb') as f:
+        header, data_start = _read_prefix(f)
+        rows = header['rows']
+        data = {}
+        for info in header['columns']:
+            if names is not None and info['name'] not in names:
+                continue
+            dtype = _DTYPES[info['type']]
+            f.seek(data_start + info['offset'])
+            values = np.fromfile(f, dtype=dtype, count=rows)
+
+            if info['type'] == 'dict':
+                dictionary = np.array(info.get('dictionary', []) + [None], dtype=object)
+                codes = np.where(values == MISSING_CODE, len(dictionary) - 1, values)
+                values = dictionary[codes]
+            elif info['name'] in TIME_COLUMNS:
+                values = pd.to_datetime(values, unit='ms', utc=True)
+            data[info['name']] = values
+
+    columns = [info['name'] for info in header['columns'] if names is None or info['name'] in names]
+    return pd.DataFrame(data, columns=columns)
+
+
+def load_summary(report):
+    """返回 (config, options, result)，result 不含交易明细"""
+    if report.columnar_path:
+        header = read_header(report.columnar_path)
+        return header.get('config', {}), header.get('options', {}), header.get('result', {})
+
+    with open(report.json_path, 'r') as f:
+        data = json.load(f)
+    result = dict(data.get('result', {}))
+    result.pop('trades', None)
+    return data.get('config', {}), data.get('options', {}), result
+
+
+def load_trades(report, columns=None):
+    """交易明细 DataFrame；列式报告只读取 columns 指定的列"""
+    if report.columnar_path:
+        return read_columns(report.columnar_path, columns)
+
+    with open(report.json_path, 'r') as f:
+        trades = json.load(f).get('result', {}).get('trades', [])
+    df = pd.DataFrame(trades)
+    for col in TIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], utc=True)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def catalog_path(reports_dir):
+    """报告目录文件路径，不存在时返回 None"""
+    path = Path(reports_dir) / CATALOG_FILE
+    return path if path.exists() else None
+
+
+def _connect_catalog(path):
+    return sqlite3.connect(f'{Path(path).resolve().as_uri()}?mode=ro', uri=True)
+
+
+def _has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f'PRAGMA table_info({table})'))
+
+
+def load_catalog(path):
+    """目录中有报告文件的运行（不含资金曲线和参数扫描），按登记时间倒序"""
+    conn = _connect_catalog(path)
+    try:
+        # 早期目录没有 sweep_id 列，由 TS 端下次写入时补齐
+        where = 'WHERE sweep_id IS NULL' if _has_column(conn, 'reports', 'sweep_id') else ''
+        return pd.read_sql_query(f"""
+            SELECT name, created_at, json_path, columnar_path, scenario, days, markets,
+                   initial_capital, min_arbitrage_gap, total_trades, winning_trades, losing_trades,
+                   win_rate, total_pnl, total_pnl_percent, avg_return, max_drawdown, sharpe_ratio
+            FROM reports
+            {where}
+            ORDER BY created_at DESC
+        """, conn)
+    finally:
+        conn.close()
+
+
+def load_sweeps(path):
+    """参数扫描列表（scripts/sweep_backtest.py 写入），含已完成的运行数，按时间倒序"""
+    conn = _connect_catalog(path)
+    try:
+        if not _has_column(conn, 'sweeps', 'id'):
+            return pd.DataFrame(columns=['id', 'created_at', 'source', 'method', 'space', 'runs', 'finished'])
+        df = pd.read_sql_query("""
+            SELECT s.id, s.created_at, s.source, s.method, s.space, s.runs,
+                   (SELECT COUNT(*) FROM reports r WHERE r.sweep_id = s.id) as finished
+            FROM sweeps s
+            ORDER BY s.created_at DESC
+        """, conn)
+    finally:
+        conn.close()
+    df['space'] = df['space'].map(json.loads)
+    return df
+
+
+def load_sweep_runs(path, sweep_id):
+    """某次扫描的全部运行：参数展开为列，附核心指标"""
+    conn = _connect_catalog(path)
+    try:
+        df = pd.read_sql_query("""
+            SELECT name, params, total_trades, win_rate, total_pnl, total_pnl_percent,
+                   avg_return, max_drawdown, sharpe_ratio
+            FROM reports
+            WHERE sweep_id = ?
+            ORDER BY name
+        """, conn, params=(sweep_id,))
+    finally:
+        conn.close()
+    params = pd.DataFrame([json.loads(p) for p in df.pop('params')], index=df.index)
+    return pd.concat([params, df], axis=1)
+
+
+def catalog_reports(reports_dir, catalog):
+    """把目录行转换为 ReportFile，路径相对报告目录解析"""
+    def resolve(value):
+        if value is None or pd.isna(value):
+            return None
+        return Path(reports_dir) / value
+
+    return [
+        ReportFile(row.name, resolve(row.json_path), resolve(row.columnar_path), row.created_at)
+        for row in catalog.itertuples(index=False)
+    ]
+
+
+def load_equity_curves(path, names):
+    """选中报告的资金曲线：{name: DataFrame(time, equity)}"""
+    if not names:
+        return {}
+    placeholders = ','.join('?' * len(names))
+    conn = _connect_catalog(path)
+    try:
+        rows = conn.execute(
+            f'SELECT name, points FROM report_equity WHERE name IN ({placeholders})', list(names)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    curves = {}
+    for name, points in rows:
+        data = np.asarray(json.loads(points), dtype=float).reshape(-1, 2)
+        curves[name] = pd.DataFrame({
+            'time': pd.to_datetime(data[:, 0], unit='ms', utc=True),
+            'equity': data[:, 1],
+        })
+    return curves
+
+
+# 热力图一个轴最多的格子数，随机搜索的连续取值按区间分箱
+SWEEP_MAX_BINS = 10
+
+# 指标越小越好的方向，用于“最优”聚合
+SWEEP_LOWER_IS_BETTER = {'max_drawdown'}
+
+
+def sweep_axis(values):
+    """参数轴：取值不多时原样使用，否则等宽分箱，返回按区间中点标注的值"""
+    if values.nunique() <= SWEEP_MAX_BINS:
+        return values
+    bins = pd.cut(values, SWEEP_MAX_BINS)
+    return bins.map(lambda interval: round(interval.mid, 6)).astype(float)
+
+
+def sweep_grid(runs, x, y, metric, agg='mean'):
+    """两个参数上的指标矩阵（行 y，列 x），其余参数按 agg（mean / best）聚合"""
+    if agg == 'best':
+        agg = 'min' if metric in SWEEP_LOWER_IS_BETTER else 'max'
+    frame = pd.DataFrame({'x': sweep_axis(runs[x]), 'y': sweep_axis(runs[y]), 'value': runs[metric]})
+    return frame.pivot_table(index='y', columns='x', values='value', aggfunc=agg).sort_index().sort_index(axis=1)
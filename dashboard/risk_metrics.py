@@ -0,0 +1,120 @@
+"""
+风险指标（NumPy 向量化实现）
+
+输入既可以是逐笔交易盈亏，也可以是每日盈亏；所有函数都是 O(n) 的数组运算，
+几十万笔交易也不需要 Python 循环。
+"""
+import numpy as np
+
+
+def equity_curve(pnl, initial_capital):
+    """资金曲线，首元素为初始资金"""
+    pnl = np.asarray(pnl, dtype=float)
+    return np.concatenate(([initial_capital], initial_capital + np.cumsum(pnl)))
+
+
+def period_returns(pnl, initial_capital):
+    """每期收益率 = 当期盈亏 / 期初资金"""
+    equity = equity_curve(pnl, initial_capital)
+    start = equity[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(start != 0, np.diff(equity) / start, 0.0)
+
+
+def drawdown_series(equity):
+    """每个点相对此前峰值的回撤比例（0 ~ 1）"""
+    equity = np.asarray(equity, dtype=float)
+    if equity.size == 0:
+        return equity
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(peak > 0, (peak - equity) / peak, 0.0)
+
+
+def max_drawdown(equity):
+    """最大回撤（%）"""
+    dd = drawdown_series(equity)
+    return float(dd.max() * 100) if dd.size else 0.0
+
+
+def drawdown_duration(equity):
+    """最长水下持续期数（资金低于此前峰值的连续期数）"""
+    equity = np.asarray(equity, dtype=float)
+    if equity.size == 0:
+        return 0
+    underwater = equity < np.maximum.accumulate(equity)
+    if not underwater.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], underwater.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+def sharpe_ratio(returns, periods_per_year=None):
+    """夏普比率（无风险利率按 0），给出 periods_per_year 时年化"""
+    returns = np.asarray(returns, dtype=float)
+    if returns.size < 2:
+        return 0.0
+    std = returns.std(ddof=1)
+    if std == 0:
+        return 0.0
+    ratio = returns.mean() / std
+    return float(ratio * np.sqrt(periods_per_year)) if periods_per_year else float(ratio)
+
+
+def sortino_ratio(returns, periods_per_year=None, target=0.0):
+    """索提诺比率：只用低于目标收益的部分计算下行波动"""
+    returns = np.asarray(returns, dtype=float)
+    if returns.size < 2:
+        return 0.0
+    downside = np.minimum(returns - target, 0.0)
+    downside_dev = np.sqrt(np.mean(downside ** 2))
+    if downside_dev == 0:
+        return 0.0
+    ratio = (returns.mean() - target) / downside_dev
+    return float(ratio * np.sqrt(periods_per_year)) if periods_per_year else float(ratio)
+
+
+def rolling_volatility(returns, window, periods_per_year=None):
+    """滚动标准差（样本标准差），前 window-1 个位置为 NaN；用前缀和实现，O(n)"""
+    returns = np.asarray(returns, dtype=float)
+    out = np.full(returns.shape, np.nan)
+    if window < 2 or returns.size < window:
+        return out
+
+    csum = np.concatenate(([0.0], np.cumsum(returns)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(returns ** 2)))
+    win_sum = csum[window:] - csum[:-window]
+    win_sum_sq = csum_sq[window:] - csum_sq[:-window]
+    var = (win_sum_sq - win_sum ** 2 / window) / (window - 1)
+    vol = np.sqrt(np.maximum(var, 0.0))
+    if periods_per_year:
+        vol = vol * np.sqrt(periods_per_year)
+    out[window - 1:] = vol
+    return out
+
+
+def profit_factor(pnl):
+    """盈利因子 = 总盈利 / 总亏损；没有亏损时返回 inf（没有盈利也没有亏损返回 0）"""
+    pnl = np.asarray(pnl, dtype=float)
+    gross_profit = pnl[pnl > 0].sum()
+    gross_loss = -pnl[pnl < 0].sum()
+    if gross_loss == 0:
+        return float('inf') if gross_profit > 0 else 0.0
+    return float(gross_profit / gross_loss)
+
+
+def summarize(pnl, initial_capital, periods_per_year=None):
+    """常用指标汇总，pnl 为按时间排序的逐笔或逐日盈亏"""
+    pnl = np.asarray(pnl, dtype=float)
+    equity = equity_curve(pnl, initial_capital)
+    returns = period_returns(pnl, initial_capital)
+    return {
+        'total_pnl': float(pnl.sum()),
+        'max_drawdown': max_drawdown(equity),
+        'drawdown_duration': drawdown_duration(equity),
+        'sharpe': sharpe_ratio(returns, periods_per_year),
+        'sortino': sortino_ratio(returns, periods_per_year),
+        'profit_factor': profit_factor(pnl),
+    }
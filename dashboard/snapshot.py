@@ -0,0 +1,168 @@
+"""
+全局数据快照（所有会话共享）
+
+总览的风控摘要、待确认信号、最新套利机会和活跃市场表，每个浏览器会话原本各自重查一遍，
+N 个人看面板就是 N 倍的数据库负载。这里改为进程内一个后台线程按固定间隔刷新一份快照：
+- 线程经 st.cache_resource 只创建一次，所有会话、所有页面共用
+- 页面只读内存中的快照，数据库负载与在线人数无关
+- 快照整体替换（不可变对象），读取方无需加锁；刷新失败时保留上一份快照并记录错误
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+
+import queries as q
+from db import day_range, get_pool
+
+SNAPSHOT_INTERVAL = float(os.environ.get('DASHBOARD_SNAPSHOT_INTERVAL', '5'))
+# 首次读取时等待第一份快照的最长时间
+FIRST_SNAPSHOT_TIMEOUT = 10.0
+
+OPPORTUNITY_ROWS = 5
+SIGNAL_ROWS = 10
+OVERVIEW_MARKETS = 10
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    refreshed_at: datetime
+    # today_pnl / today_trades / today_signals / pending_signals / exposure
+    risk: dict
+    opportunities: pd.DataFrame
+    signals: pd.DataFrame
+    overview_markets: pd.DataFrame
+    # 全部活跃市场（未筛选，按偏离度倒序），市场监控页在内存中筛选排序
+    active_markets: pd.DataFrame
+    categories: list = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+def _scalar(df, column):
+    value = df[column].iloc[0]
+    return 0 if pd.isna(value) else value
+
+
+def load_risk(pool):
+    """今日风控摘要，总览 / 风控页和 api.py 共用"""
+    today = day_range()
+    pnl = pool.query(q.TODAY_PNL, today)
+    return {
+        'today_pnl': _scalar(pnl, 'pnl'),
+        'today_trades': _scalar(pnl, 'trades'),
+        'today_signals': _scalar(pool.query(q.TODAY_EXECUTED_SIGNALS, today), 'count'),
+        'pending_signals': _scalar(pool.query(q.PENDING_SIGNAL_COUNT), 'count'),
+        'exposure': _scalar(pool.query(q.TODAY_EXPOSURE, today), 'exposure'),
+    }
+
+
+def load_snapshot(pool):
+    """一次读取所有头部数据；实时表复用 change feed 语句，不带增量条件"""
+    start = time.perf_counter()
+    risk = load_risk(pool)
+    all_rows = {'after_id': 0}
+    opportunities = pool.query(
+        q.OPEN_OPPORTUNITIES.format(rows=q.FEED_NEW_ROWS.format(id='ao.id')),
+        {**all_rows, 'table': 'arbitrage_opportunities', 'limit': OPPORTUNITY_ROWS},
+    )
+    signals = pool.query(
+        q.RECENT_SIGNALS.format(rows=q.FEED_NEW_ROWS.format(id='s.id')),
+        {**all_rows, 'table': 'signals', 'limit': SIGNAL_ROWS},
+    )
+    return Snapshot(
+        refreshed_at=datetime.now(),
+        risk=risk,
+        opportunities=opportunities,
+        signals=signals,
+        overview_markets=pool.query(q.MARKETS_OVERVIEW, (OVERVIEW_MARKETS,)),
+        active_markets=pool.query(
+            q.active_markets_sql('偏离度 ↓'),
+            {'category': None, 'min_deviation': 0, 'min_volume': 0},
+        ),
+        categories=pool.query(q.MARKET_CATEGORIES)['category'].tolist(),
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+class SnapshotWorker(threading.Thread):
+    """按 interval 秒刷新快照的后台线程（daemon，随进程退出）"""
+
+    def __init__(self, pool, interval=SNAPSHOT_INTERVAL):
+        super().__init__(name='dashboard-snapshot', daemon=True)
+        self.pool = pool
+        self.interval = interval
+        self.error = None
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+
+    def refresh(self):
+        """立即刷新一次；与后台刷新串行，失败时保留旧快照"""
+        with self._refresh_lock:
+            try:
+                self._snapshot = load_snapshot(self.pool)
+                self.error = None
+            except Exception as e:
+                self.error = e
+            finally:
+                self._ready.set()
+        return self._snapshot
+
+    def run(self):
+        while not self._stopping.is_set():
+            self.refresh()
+            self._stopping.wait(self.interval)
+
+    def stop(self):
+        self._stopping.set()
+
+    def get(self) -> Snapshot:
+        """当前快照；进程刚启动时等待第一次刷新完成"""
+        self._ready.wait(FIRST_SNAPSHOT_TIMEOUT)
+        if self._snapshot is None:
+            raise RuntimeError(f'数据快照尚未就绪: {self.error or "刷新超时"}')
+        return self._snapshot
+
+    @property
+    def age(self) -> Optional[float]:
+        """快照距今秒数"""
+        if self._snapshot is None:
+            return None
+        return (datetime.now() - self._snapshot.refreshed_at).total_seconds()
+
+
+@st.cache_resource
+def get_worker():
+    worker = SnapshotWorker(get_pool())
+    worker.start()
+    return worker
+
+
+def current():
+    """所有会话共享的最新快照"""
+    return get_worker().get()
+
+
+def filter_markets(markets, category, min_deviation, min_volume, sort_by):
+    """在快照的活跃市场表上实现 ACTIVE_MARKETS 的筛选和排序（空值排在最后，与 SQLite 的 DESC 一致）"""
+    mask = pd.Series(True, index=markets.index)
+    if category is not None:
+        mask &= markets['分类'] == category
+    if min_deviation > 0:
+        mask &= markets['偏离度'] >= min_deviation
+    if min_volume > 0:
+        mask &= markets['交易量'] >= min_volume
+    filtered = markets[mask]
+
+    if sort_by == '流动性 ↓':
+        key = filtered['Yes流动性'] + filtered['No流动性']
+    else:
+        key = filtered[{'交易量 ↓': '交易量', '最新更新': '更新时间'}.get(sort_by, '偏离度')]
+    order = key.sort_values(ascending=False, na_position='last', kind='stable').index
+    return filtered.loc[order].reset_index(drop=True)
@@ -0,0 +1,119 @@
+"""
+价格快照分块回放（Python 引擎用）
+
+按 (timestamp, id) 键集分页从 price_snapshots 顺序读取一段时间内所有市场的快照，
+每块最多 chunk_size 行，游标只依赖上一块的最后一行，读取第几块都是一次索引范围扫描：
+- iter_price_chunks：逐块产出，内存只与块大小有关
+- load_prices：逐块拷入预分配的缓冲区，得到 backtest_engine.run_backtest(prepared=True) 可直接使用的紧凑表，
+  timestamp 为 epoch 毫秒 int64、marketId / marketName 为 category，每行约 30 字节，
+  不会像一次性 read_sql_query 那样先为整段区间的每一行构造 Python 对象；
+  整段区间的紧凑表仍要常驻内存，Python 引擎需要一次拿到全部价格
+
+查询与 src/services/execution/snapshotReplay.ts 相同，两个引擎回放的价格点和顺序一致。
+"""
+import numpy as np
+import pandas as pd
+
+import queries as q
+from backtest_engine import PRICE_COLUMNS, to_epoch_ms
+
+CHUNK_ROWS = 50_000
+
+
+def _empty_prices():
+    return pd.DataFrame({
+        'timestamp': np.empty(0, dtype=np.int64),
+        'marketId': pd.Categorical([]),
+        'marketName': pd.Categorical([]),
+        'yesPrice': np.empty(0, dtype=float),
+        'noPrice': np.empty(0, dtype=float),
+    })
+
+
+def iter_price_chunks(conn, start, end, chunk_size=CHUNK_ROWS):
+    """
+    按时间顺序逐块产出 [start, end) 内的价格快照，start / end 与 timestamp 列同为 UTC 文本
+    每块的列同 PRICE_COLUMNS，timestamp 已转为 epoch 毫秒
+    """
+    cursor_time, cursor_id = start, 0
+    while True:
+        rows = conn.execute(q.BACKTEST_PRICE_CHUNK, {
+            'end': end,
+            'cursor_time': cursor_time,
+            'cursor_id': cursor_id,
+            'rows': chunk_size,
+        }).fetchall()
+        if not rows:
+            return
+
+        ids, times, market_ids, names, yes, no = zip(*rows)
+        cursor_time, cursor_id = times[-1], ids[-1]
+        yield pd.DataFrame({
+            'timestamp': to_epoch_ms(pd.Series(times)),
+            'marketId': pd.Categorical(market_ids),
+            'marketName': pd.Categorical(names),
+            'yesPrice': np.array(yes, dtype=float),
+            'noPrice': np.array(no, dtype=float),
+        })
+
+        if len(rows) < chunk_size:
+            return
+
+
+def _grow(buffers, size):
+    """把各列缓冲区扩到至少 size 行（按倍数扩，已有数据保留）"""
+    capacity = max(size, 2 * len(buffers['timestamp']))
+    return {name: np.concatenate([buf, np.empty(capacity - len(buf), dtype=buf.dtype)])
+            for name, buf in buffers.items()}
+
+
+def load_prices(conn, start, end, chunk_size=CHUNK_ROWS):
+    """
+    [start, end) 内全部价格快照，已按时间排序，可直接交给 run_backtest(..., prepared=True)
+
+    按 COUNT(*) 预分配各列的 NumPy 缓冲区，逐块拷入后即释放该块，峰值内存约为结果本身加一块，
+    不会同时持有全部块和拼接结果两份。Python 引擎仍需要整段区间的紧凑表常驻内存（约 30 字节/行），
+    区间过大时只能缩短区间；只有 TS 引擎（snapshotReplay.ts）是真正的流式回放。
+    """
+    total = conn.execute(q.BACKTEST_PRICE_COUNT, {'start': start, 'end': end}).fetchone()[0]
+    buffers = {
+        'timestamp': np.empty(total, dtype=np.int64),
+        'marketId': np.empty(total, dtype=np.int32),
+        'marketName': np.empty(total, dtype=np.int32),
+        'yesPrice': np.empty(total, dtype=float),
+        'noPrice': np.empty(total, dtype=float),
+    }
+    # 类别按首次出现的顺序编号
+    categories = {'marketId': {}, 'marketName': {}}
+    size = 0
+
+    for chunk in iter_price_chunks(conn, start, end, chunk_size):
+        rows = len(chunk)
+        # 计数之后又有新快照写入时按倍数扩容
+        if size + rows > len(buffers['timestamp']):
+            buffers = _grow(buffers, size + rows)
+        window = slice(size, size + rows)
+        buffers['timestamp'][window] = chunk['timestamp'].to_numpy()
+        buffers['yesPrice'][window] = chunk['yesPrice'].to_numpy()
+        buffers['noPrice'][window] = chunk['noPrice'].to_numpy()
+        for name, index in categories.items():
+            column = chunk[name].cat
+            mapping = np.array([index.setdefault(value, len(index)) for value in column.categories], dtype=np.int32)
+            buffers[name][window] = mapping[column.codes]
+        size += rows
+        del chunk
+
+    if size == 0:
+        return _empty_prices()
+
+    prices = pd.DataFrame({
+        'timestamp': buffers['timestamp'][:size],
+        'marketId': pd.Categorical.from_codes(buffers['marketId'][:size], categories=list(categories['marketId'])),
+        'marketName': pd.Categorical.from_codes(buffers['marketName'][:size], categories=list(categories['marketName'])),
+        'yesPrice': buffers['yesPrice'][:size],
+        'noPrice': buffers['noPrice'][:size],
+    }, copy=False)
+    # 文本时间格式不统一（带不带毫秒 / 时区）时按毫秒值再稳定排序一次，保持与 prepare_prices 相同的顺序
+    if not np.all(np.diff(prices['timestamp'].to_numpy()) >= 0):
+        prices = prices.iloc[np.argsort(prices['timestamp'].to_numpy(), kind='stable')].reset_index(drop=True)
+    return prices[PRICE_COLUMNS]
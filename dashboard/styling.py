@@ -0,0 +1,117 @@
+"""
+表格样式（按列向量化）
+
+Styler.applymap 对每个单元格调用一次 Python 函数，表格一大就拖慢渲染，新版 pandas 中也已弃用。
+这里按整列计算 CSS：类别列用 Series.map 查表，数值列用 np.select 分段，
+再通过 Styler.apply 一次性返回整列（或整表）的样式。
+"""
+import numpy as np
+import pandas as pd
+
+POSITIVE_CSS = 'color: #2e7d32; font-weight: bold'
+NEGATIVE_CSS = 'color: #c62828; font-weight: bold'
+
+# 信号状态（文字色，总览页）
+STATUS_TEXT = {
+    'pending': 'color: #ff9800; font-weight: bold',
+    'confirmed': 'color: #4caf50; font-weight: bold',
+    'rejected': 'color: #f44336',
+    'executed': 'color: #2196f3; font-weight: bold',
+    'expired': 'color: #9e9e9e',
+}
+
+# 信号状态（底色，信号页）
+STATUS_BADGE = {
+    'pending': 'background-color: #fff3e0; color: #e65100; font-weight: bold',
+    'confirmed': 'background-color: #e8f5e9; color: #2e7d32; font-weight: bold',
+    'rejected': 'background-color: #ffebee; color: #c62828',
+    'executed': 'background-color: #e3f2fd; color: #1565c0; font-weight: bold',
+    'expired': 'background-color: #f5f5f5; color: #616161',
+}
+
+LEVEL_BADGE = {
+    'CONSERVATIVE': 'background-color: #e3f2fd; color: #1565c0',
+    'AGGRESSIVE': 'background-color: #fff3e0; color: #ef6c00',
+    'RISKY': 'background-color: #ffebee; color: #c62828; font-weight: bold',
+}
+
+# 套利机会整行底色，未知等级按保守处理
+LEVEL_ROW = {
+    'RISKY': 'background-color: #ffebee',
+    'AGGRESSIVE': 'background-color: #fff3e0',
+    'CONSERVATIVE': 'background-color: #e3f2fd',
+}
+
+RISK_LOG_TYPE = {
+    'limit_warning': 'background-color: #ffebee; color: #c62828; font-weight: bold',
+    'trade_blocked': 'background-color: #fff3e0; color: #e65100',
+}
+
+# 偏离度分段（阈值从高到低，取第一个满足的）
+DEVIATION_BANDS = [
+    (5, 'background-color: #ff6b6b; color: white; font-weight: bold'),
+    (3, 'background-color: #ff9800; color: white; font-weight: bold'),
+    (1.5, 'background-color: #ffd93d; font-weight: bold'),
+    (1, 'background-color: #ffeb3b'),
+]
+
+# 总览页只区分高 / 中两档，且为严格大于
+OVERVIEW_DEVIATION_BANDS = [
+    (1.5, 'background-color: #ff6b6b; color: white; font-weight: bold'),
+    (1.0, 'background-color: #ffd93d'),
+]
+
+
+def category_css(palette, default=''):
+    """类别列：按值查表"""
+    def style(col):
+        return col.map(palette).fillna(default).to_numpy()
+    return style
+
+
+def band_css(bands, strict=False):
+    """数值列：bands 为按阈值降序的 (threshold, css)，NaN 不着色"""
+    def style(col):
+        values = pd.to_numeric(col, errors='coerce').to_numpy(dtype=float)
+        conditions = [values > t if strict else values >= t for t, _ in bands]
+        return np.select(conditions, [css for _, css in bands], default='')
+    return style
+
+
+def sign_css(positive=POSITIVE_CSS, negative=NEGATIVE_CSS):
+    """数值列：正数 / 负数分别着色"""
+    def style(col):
+        values = pd.to_numeric(col, errors='coerce').to_numpy(dtype=float)
+        return np.select([values > 0, values < 0], [positive, negative], default='')
+    return style
+
+
+def flag_css(css=NEGATIVE_CSS):
+    """文本列：非空值着色（如诊断页的全表扫描标记）"""
+    def style(col):
+        return np.where(col.fillna('').astype(str).to_numpy() != '', css, '')
+    return style
+
+
+def style_table(df, columns=None, row_by=None):
+    """
+    columns: {列名: 样式函数}，样式函数接收整列 Series，返回等长的 CSS 数组
+    row_by: (列名, 样式函数)，按该列的样式给整行着色
+    """
+    styler = df.style
+    for name, style in (columns or {}).items():
+        if name in df.columns:
+            styler = styler.apply(style, subset=[name], axis=0)
+
+    if row_by and row_by[0] in df.columns:
+        name, style = row_by
+        row_css = np.asarray(style(df[name]), dtype=object)
+        styler = styler.apply(
+            lambda frame: pd.DataFrame(
+                np.repeat(row_css[:, None], frame.shape[1], axis=1),
+                index=frame.index,
+                columns=frame.columns,
+            ),
+            axis=None,
+        )
+    return styler
@@ -0,0 +1,148 @@
+"""
+TS / Python 回测引擎对拍
+
+对每个场景用 `npx tsx src/backtest.ts --dump-prices=...` 跑一次 TS 回测，
+再用 dashboard/backtest_engine.py 在同一份价格数据上回测，逐项比较核心指标和每笔交易。
+任一场景不一致时退出码为 1。
+
+用法:
+    python scripts/backtest_parity.py                      # 跑全部内置场景
+    python scripts/backtest_parity.py --scenario RANDOM --days 30 --markets 10
+    python scripts/backtest_parity.py --report reports/x.json --prices reports/x.prices.csv
+"""
+import argparse
+import json
+import math
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'dashboard'))
+
+from backtest_engine import BacktestParams, run_backtest  # noqa: E402
+
+# (场景, 天数, 市场数)
+SCENARIOS = [
+    ('QUICK_RETURN', 1, 1),
+    ('SLOW_RETURN', 1, 1),
+    ('NO_RETURN', 1, 1),
+    ('WORSEN', 1, 1),
+    ('RANDOM', 7, 3),
+    ('RANDOM', 30, 5),
+]
+
+SUMMARY_FIELDS = [
+    'totalTrades', 'winningTrades', 'losingTrades', 'winRate', 'totalPnL',
+    'totalPnLPercent', 'avgReturn', 'maxDrawdown', 'sharpeRatio',
+]
+EXACT_TRADE_FIELDS = ['id', 'marketId', 'side', 'exitReason', 'entryTime', 'exitTime']
+FLOAT_TRADE_FIELDS = ['entryPrice', 'exitPrice', 'amount', 'quantity', 'pnl', 'pnlPercent']
+
+# 累加顺序不同（如最大回撤）带来的浮点误差
+REL_TOL = 1e-9
+ABS_TOL = 1e-9
+
+
+def run_ts(scenario, days, markets, workdir):
+    name = f'{scenario.lower()}-{days}d-{markets}m'
+    report = workdir / f'backtest-{name}.json'
+    prices = workdir / f'{name}.prices.csv'
+    subprocess.run(
+        ['npx', 'tsx', 'src/backtest.ts', f'--scenario={scenario}', f'--days={days}', f'--markets={markets}',
+         f'--output={report}', '--format=json', f'--dump-prices={prices}'],
+        cwd=PROJECT_ROOT, check=True, stdout=subprocess.DEVNULL,
+    )
+    return name, report, prices
+
+
+def load_ts_report(path):
+    data = json.loads(Path(path).read_text(encoding='utf-8'))
+    result = data['result']
+    trades = pd.DataFrame(result.pop('trades'))
+    for col in ('entryTime', 'exitTime'):
+        if col in trades.columns:
+            trades[col] = pd.to_datetime(trades[col], utc=True)
+    return data.get('config', {}), result, trades
+
+
+def compare(ts_result, ts_trades, py_result, py_trades):
+    """返回不一致项的描述列表，空列表表示一致"""
+    problems = []
+    for field in SUMMARY_FIELDS:
+        a, b = ts_result.get(field, 0), py_result[field]
+        if not math.isclose(a, b, rel_tol=REL_TOL, abs_tol=ABS_TOL):
+            problems.append(f'{field}: TS={a} Python={b}')
+
+    if len(ts_trades) != len(py_trades):
+        problems.append(f'交易笔数: TS={len(ts_trades)} Python={len(py_trades)}')
+        return problems
+
+    for field in EXACT_TRADE_FIELDS:
+        if field not in ts_trades.columns:
+            continue
+        diff = np.flatnonzero(ts_trades[field].to_numpy() != py_trades[field].to_numpy())
+        if diff.size:
+            i = diff[0]
+            problems.append(f'交易 #{i + 1} {field}: TS={ts_trades[field].iloc[i]} Python={py_trades[field].iloc[i]}'
+                            f'（共 {diff.size} 笔不一致）')
+
+    for field in FLOAT_TRADE_FIELDS:
+        if field not in ts_trades.columns:
+            continue
+        a = ts_trades[field].to_numpy(dtype=float)
+        b = py_trades[field].to_numpy(dtype=float)
+        diff = np.flatnonzero(~np.isclose(a, b, rtol=REL_TOL, atol=ABS_TOL))
+        if diff.size:
+            i = diff[0]
+            problems.append(f'交易 #{i + 1} {field}: TS={a[i]} Python={b[i]}（共 {diff.size} 笔不一致）')
+    return problems
+
+
+def check(name, report_path, prices_path):
+    config, ts_result, ts_trades = load_ts_report(report_path)
+    params = BacktestParams.from_config(config)
+    prices = pd.read_csv(prices_path, dtype={'marketId': str, 'marketName': str})
+    py_result, py_trades = run_backtest(prices, params)
+
+    problems = compare(ts_result, ts_trades, py_result, py_trades)
+    status = '✅' if not problems else '❌'
+    print(f"{status} {name}: {len(prices):,} 个价格点，{ts_result.get('totalTrades', 0)} 笔交易")
+    for problem in problems:
+        print(f'    {problem}')
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TS / Python 回测引擎对拍')
+    parser.add_argument('--scenario', help='只跑指定场景（QUICK_RETURN / SLOW_RETURN / NO_RETURN / WORSEN / RANDOM）')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--markets', type=int, default=3)
+    parser.add_argument('--report', help='已有的 TS JSON 报告（与 --prices 一起使用，不再运行 TS）')
+    parser.add_argument('--prices', help='该报告对应的 --dump-prices 价格 CSV')
+    parser.add_argument('--keep', help='保留 TS 报告和价格数据的目录（默认用临时目录）')
+    args = parser.parse_args()
+
+    if args.report or args.prices:
+        if not (args.report and args.prices):
+            parser.error('--report 和 --prices 需要同时指定')
+        sys.exit(0 if check(Path(args.report).stem, args.report, args.prices) else 1)
+
+    scenarios = [(args.scenario, args.days, args.markets)] if args.scenario else SCENARIOS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.keep or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        results = [check(*run_ts(scenario, days, markets, workdir)) for scenario, days, markets in scenarios]
+
+    passed = sum(results)
+    print(f'\n{passed}/{len(results)} 个场景一致')
+    sys.exit(0 if passed == len(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""
+Dashboard / 风控查询基准测试
+
+对 dashboard/queries.py 中各页面实际执行的语句（含 change feed 增量和翻页变体）
+以及 RiskManager 的日亏损 / 日交易数检查逐条计时，结果写成 JSON，便于不同版本之间对比。
+页面 5（回测报告）读报告文件、页面 6（诊断）只读内存统计，都不查数据库，不在此列。
+
+用法:
+    python scripts/gen_large_db.py --scale medium --output data/bench_medium.db
+    python scripts/bench_dashboard.py --db data/bench_medium.db --output bench/medium.json --label v1.2
+    python scripts/bench_dashboard.py --db data/bench_medium.db --compare bench/medium.json
+
+查询走与 Dashboard 相同的只读连接 + pandas.read_sql_query，计时包含结果物化。
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'dashboard'))
+
+import queries as q  # noqa: E402
+from profiler import explain, full_scans  # noqa: E402
+
+TABLES = [
+    'markets', 'price_snapshots', 'latest_prices', 'arbitrage_opportunities', 'signals', 'trades',
+    'risk_logs', 'change_log', 'daily_pnl', 'daily_opportunities', 'daily_signal_counts', 'price_bars',
+]
+
+# 与 src/services/risk/riskManager.ts 中的语句一致
+RISK_DAILY_LOSS = """
+      SELECT COALESCE(SUM(pnl), 0) as total_pnl
+      FROM trades
+      WHERE created_at >= ? AND created_at < ?
+"""
+
+RISK_DAILY_TRADES = """
+      SELECT COUNT(*) as count
+      FROM signals
+      WHERE status IN ('confirmed', 'executed') AND created_at >= ? AND created_at < ?
+"""
+
+# 翻页基准取第几页的游标
+PAGE_DEPTH = 20
+PAGE_SIZE = 50
+# 增量拉取基准：模拟上次轮询后新增的行数
+FEED_NEW_ROWS = 20
+# 价格历史基准的时间范围（天），K 线根数上限与 pages/1_markets.py 一致
+HISTORY_DAYS = (1, 7, 30, 90)
+HISTORY_MAX_BARS = 20_000
+
+
+def open_readonly(path):
+    conn = sqlite3.connect(f'{Path(path).resolve().as_uri()}?mode=ro', uri=True)
+    conn.execute('PRAGMA query_only = ON')
+    return conn
+
+
+def scalar(conn, sql, params=()):
+    row = conn.execute(sql, params).fetchone()
+    return row[0] if row else None
+
+
+def bench_params(conn):
+    """根据库中实际数据挑选参数：最近一天、翻页游标、详情 id、增量高水位"""
+    latest = scalar(conn, 'SELECT MAX(created_at) FROM signals') or datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    today = datetime.fromisoformat(latest).date()
+    start_7d = (today - timedelta(days=7)).isoformat()
+    start_30d = (today - timedelta(days=30)).isoformat()
+
+    cursor = conn.execute(
+        'SELECT created_at, id FROM signals WHERE created_at >= ? '
+        'ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?',
+        (start_7d, PAGE_DEPTH * PAGE_SIZE - 1),
+    ).fetchone() or (latest, 0)
+
+    return {
+        'today': (today.isoformat(), (today + timedelta(days=1)).isoformat()),
+        'start_7d': start_7d,
+        'start_30d': start_30d,
+        'cursor': cursor,
+        'signal_id': scalar(conn, 'SELECT MAX(id) FROM signals') or 0,
+        'max_ids': {
+            table: scalar(conn, f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+            for table in ('signals', 'risk_logs')
+        },
+        'change_hwm': scalar(conn, q.CHANGE_LOG_HWM),
+        'history_market': scalar(conn, 'SELECT market_id FROM latest_prices ORDER BY timestamp DESC LIMIT 1') or '',
+        'history_end': latest,
+    }
+
+
+def history_cases(params):
+    """市场详情的价格历史：各时间范围按页面规则选 K 线周期"""
+    end = datetime.fromisoformat(params['history_end'])
+    cases = [('1_markets', 'MARKET_HISTORY_SPAN', q.MARKET_HISTORY_SPAN, (params['history_market'],))]
+    for days in HISTORY_DAYS:
+        interval = q.bar_interval(days * 86400, HISTORY_MAX_BARS)
+        cases.append(('1_markets', f'PRICE_BARS[{days}d {interval}]', q.PRICE_BARS, {
+            'interval': interval,
+            'market_id': params['history_market'],
+            'start': (end - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S'),
+            'end': end.strftime('%Y-%m-%d %H:%M:%S'),
+        }))
+    return cases
+
+
+def feed_cases(page, name, table, sql, id_column, limit, params):
+    """ChangeFeed 的三种语句：首次全量、增量新行、变化行"""
+    after_id = max(0, params['max_ids'][table] - FEED_NEW_ROWS)
+    after_change = max(0, params['change_hwm'] - FEED_NEW_ROWS)
+    base = {'table': table, 'limit': limit}
+    new_sql = sql.format(rows=q.FEED_NEW_ROWS.format(id=id_column))
+    changed_sql = sql.format(rows=q.FEED_CHANGED_ROWS.format(id=id_column))
+    return [
+        (page, f'{name}[load]', new_sql, {**base, 'after_id': 0}),
+        (page, f'{name}[poll]', new_sql, {**base, 'after_id': after_id}),
+        (page, f'{name}[changed]', changed_sql, {**base, 'after_change': after_change}),
+    ]
+
+
+def build_cases(params):
+    """(页面, 名称, SQL, 参数)，参数与页面默认筛选一致"""
+    today = params['today']
+    cursor_created, cursor_id = params['cursor']
+    list_params = {'start_date': params['start_7d'], 'limit': PAGE_SIZE}
+    filtered_params = {**list_params, 'status': 'confirmed', 'level': 'CONSERVATIVE'}
+    market_filters = {'category': None, 'min_deviation': 0.0, 'min_volume': 0.0}
+
+    cases = [
+        ('app', 'DB_HEALTH', q.DB_HEALTH, ()),
+        ('app', 'TODAY_PNL', q.TODAY_PNL, today),
+        ('app', 'TODAY_EXECUTED_SIGNALS', q.TODAY_EXECUTED_SIGNALS, today),
+        ('app', 'PENDING_SIGNAL_COUNT', q.PENDING_SIGNAL_COUNT, ()),
+        # 总览的套利机会由共享快照整表读取（snapshot.load_snapshot）
+        ('app', 'OPEN_OPPORTUNITIES[snapshot]', q.OPEN_OPPORTUNITIES.format(rows=q.FEED_NEW_ROWS.format(id='ao.id')),
+         {'table': 'arbitrage_opportunities', 'limit': 5, 'after_id': 0}),
+        *feed_cases('app', 'RECENT_SIGNALS', 'signals', q.RECENT_SIGNALS, 's.id', 10, params),
+        ('app', 'MARKETS_OVERVIEW', q.MARKETS_OVERVIEW, (10,)),
+        ('app', 'CHANGE_LOG_HWM', q.CHANGE_LOG_HWM, ()),
+        ('app', 'CHANGE_LOG_SINCE', q.CHANGE_LOG_SINCE,
+         {'table': 'signals', 'after_change': max(0, params['change_hwm'] - FEED_NEW_ROWS)}),
+
+        ('1_markets', 'MARKET_CATEGORIES', q.MARKET_CATEGORIES, ()),
+        *[
+            ('1_markets', f'ACTIVE_MARKETS[{sort_by}]', q.active_markets_sql(sort_by), market_filters)
+            for sort_by in q.ACTIVE_MARKETS_ORDER
+        ],
+        ('1_markets', 'ACTIVE_MARKETS[filtered]', q.active_markets_sql('偏离度 ↓'),
+         {'category': 'Crypto', 'min_deviation': 1.0, 'min_volume': 1000.0}),
+        *history_cases(params),
+
+        ('2_signals', 'SIGNAL_STATUS_STATS', q.SIGNAL_STATUS_STATS, (params['start_7d'],)),
+        ('2_signals', 'SIGNAL_LIST[first]',
+         q.signal_list_sql().format(rows=q.FEED_NEW_ROWS.format(id='s.id')), {**list_params, 'after_id': 0}),
+        ('2_signals', f'SIGNAL_LIST[page {PAGE_DEPTH + 1}]', q.signal_list_sql().format(rows=q.SIGNAL_PAGE_ROWS),
+         {**list_params, 'cursor_created': cursor_created, 'cursor_id': cursor_id}),
+        ('2_signals', 'SIGNAL_LIST[status+level]',
+         q.signal_list_sql('confirmed', 'CONSERVATIVE').format(rows=q.FEED_NEW_ROWS.format(id='s.id')),
+         {**filtered_params, 'after_id': 0}),
+        ('2_signals', 'SIGNAL_DETAIL', q.SIGNAL_DETAIL, (params['signal_id'],)),
+        ('2_signals', 'DAILY_SIGNALS', q.DAILY_SIGNALS, (params['start_30d'],)),
+
+        ('3_analytics', 'PNL_SUMMARY', q.PNL_SUMMARY, (params['start_30d'],)),
+        ('3_analytics', 'WIN_LOSS', q.WIN_LOSS, (params['start_30d'],)),
+        ('3_analytics', 'DAILY_PNL', q.DAILY_PNL, (params['start_30d'],)),
+        ('3_analytics', 'DAILY_OPPORTUNITIES', q.DAILY_OPPORTUNITIES, (params['start_30d'],)),
+        ('3_analytics', 'SIGNAL_LEVEL_STATUS', q.SIGNAL_LEVEL_STATUS, (params['start_30d'],)),
+
+        ('4_risk', 'TODAY_EXPOSURE', q.TODAY_EXPOSURE, today),
+        *feed_cases('4_risk', 'RISK_LOGS', 'risk_logs', q.RISK_LOGS, 'id', 20, params),
+        ('4_risk', 'TODAY_TRADES', q.TODAY_TRADES, today),
+
+        ('risk_manager', 'checkDailyLossLimit', RISK_DAILY_LOSS, today),
+        ('risk_manager', 'checkDailyTradeCount', RISK_DAILY_TRADES, today),
+    ]
+    return cases
+
+
+def run_case(conn, sql, params, repeat, warmup):
+    for _ in range(warmup):
+        pd.read_sql_query(sql, conn, params=params)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = pd.read_sql_query(sql, conn, params=params)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    plan = explain(conn, sql, params)
+    elapsed = np.array(timings)
+    return {
+        'p50_ms': float(np.percentile(elapsed, 50)),
+        'p95_ms': float(np.percentile(elapsed, 95)),
+        'min_ms': float(elapsed.min()),
+        'max_ms': float(elapsed.max()),
+        'rows': len(df),
+        'bytes': int(df.memory_usage(deep=True).sum()),
+        'full_scan': full_scans(plan),
+        'plan': plan,
+    }
+
+
+def run(db_path, repeat, warmup, only=None):
+    conn = open_readonly(db_path)
+    params = bench_params(conn)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    results = []
+    for page, name, sql, case_params in build_cases(params):
+        if only and only not in name:
+            continue
+        result = run_case(conn, sql, case_params, repeat, warmup)
+        results.append({'page': page, 'name': name, **result})
+        flag = f"  🚨 SCAN {', '.join(result['full_scan'])}" if result['full_scan'] else ''
+        print(f"{page:<13} {name:<36} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms"
+              f"  {result['rows']:>6} 行{flag}")
+
+    report = {
+        'db': str(db_path),
+        'db_size_bytes': Path(db_path).stat().st_size,
+        'row_counts': {
+            table: scalar(conn, f'SELECT COUNT(*) FROM {table}') for table in TABLES if table in existing
+        },
+        'sqlite_version': sqlite3.sqlite_version,
+        'python_version': platform.python_version(),
+        'pandas_version': pd.__version__,
+        'repeat': repeat,
+        'warmup': warmup,
+        'results': results,
+    }
+    conn.close()
+    return report
+
+
+def compare(old, new):
+    """按名称对比两次结果的 p50 / p95"""
+    old_results = {r['name']: r for r in old['results']}
+    print(f"\n对比 {old.get('label') or old['created_at']} -> {new.get('label') or new['created_at']}")
+    print(f"{'查询':<36} {'旧 p50':>10} {'新 p50':>10} {'倍数':>7} {'旧 p95':>10} {'新 p95':>10}")
+    for result in new['results']:
+        before = old_results.get(result['name'])
+        if before is None:
+            print(f"{result['name']:<36} {'-':>10} {result['p50_ms']:>10.2f}")
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('inf')
+        marker = '  ⚠️' if ratio > 1.2 else ''
+        print(f"{result['name']:<36} {before['p50_ms']:>10.2f} {result['p50_ms']:>10.2f} {ratio:>6.2f}x"
+              f" {before['p95_ms']:>10.2f} {result['p95_ms']:>10.2f}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dashboard / 风控查询基准测试')
+    parser.add_argument('--db', default='data/bench.db', help='数据库路径（scripts/gen_large_db.py 生成）')
+    parser.add_argument('--repeat', type=int, default=20, help='每条查询计时次数')
+    parser.add_argument('--warmup', type=int, default=2, help='预热次数（不计时）')
+    parser.add_argument('--only', help='只跑名称包含该字符串的查询')
+    parser.add_argument('--label', help='结果标签，如版本号或提交')
+    parser.add_argument('--output', help='结果 JSON 路径')
+    parser.add_argument('--compare', help='与之前的结果 JSON 对比')
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        parser.error(f'数据库不存在: {args.db}')
+
+    report = run(args.db, args.repeat, args.warmup, args.only)
+    report['label'] = args.label
+    report['created_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    total = sum(r['p50_ms'] for r in report['results'])
+    scans = [r['name'] for r in report['results'] if r['full_scan']]
+    print(f"\n{len(report['results'])} 条查询，p50 合计 {total:.1f} ms，全表扫描 {len(scans)} 条")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f'结果已保存: {output}')
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding='utf-8')), report)
+
+
+if __name__ == '__main__':
+    main()
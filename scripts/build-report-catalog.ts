@@ -0,0 +1,98 @@
+import { existsSync, readdirSync, readFileSync, statSync } from 'fs';
+import { join, resolve } from 'path';
+import { decodeColumnarReport } from '../src/services/execution/columnarReport';
+import {
+  CATALOG_FILE,
+  CatalogEntry,
+  equityCurve,
+  openCatalog,
+  upsertCatalogEntry,
+} from '../src/services/execution/reportCatalog';
+
+/**
+ * 扫描报告目录，把已有的回测报告登记到 catalog.db，并清理文件已删除的条目
+ *
+ * 使用方式:
+ * npm run reports:catalog              # 默认 ./reports
+ * npm run reports:catalog -- ./my-reports
+ */
+
+const reportsDir = resolve(process.argv[2] || './reports');
+if (!existsSync(reportsDir)) {
+  console.error(`❌ 报告目录不存在: ${reportsDir}`);
+  process.exit(1);
+}
+
+const COLUMNAR_SUFFIX = '.trades.bin';
+
+// 同名的 JSON 与列式报告合并为一项
+const found = new Map<string, { jsonPath?: string; columnarPath?: string }>();
+for (const file of readdirSync(reportsDir)) {
+  if (!file.startsWith('backtest-')) continue;
+  if (file.endsWith(COLUMNAR_SUFFIX)) {
+    const name = file.slice(0, -COLUMNAR_SUFFIX.length);
+    found.set(name, { ...found.get(name), columnarPath: join(reportsDir, file) });
+  } else if (file.endsWith('.json')) {
+    const name = file.slice(0, -'.json'.length);
+    found.set(name, { ...found.get(name), jsonPath: join(reportsDir, file) });
+  }
+}
+
+function loadEntry(name: string, files: { jsonPath?: string; columnarPath?: string }): CatalogEntry {
+  let header: Record<string, any>;
+  let exitTimes: number[];
+  let pnl: number[];
+
+  if (files.columnarPath) {
+    // 列式报告只需解码两列
+    const decoded = decodeColumnarReport(readFileSync(files.columnarPath), ['exitTime', 'pnl']);
+    header = decoded.header;
+    exitTimes = decoded.columns.exitTime as number[];
+    pnl = decoded.columns.pnl as number[];
+  } else {
+    const report = JSON.parse(readFileSync(files.jsonPath!, 'utf-8'));
+    const { trades = [], ...result } = report.result || {};
+    header = { ...report, result };
+    exitTimes = trades.map((t: any) => (t.exitTime ? Date.parse(t.exitTime) : NaN));
+    pnl = trades.map((t: any) => (t.pnl ?? NaN));
+  }
+
+  const config = header.config || {};
+  const initialCapital = config.initialCapital ?? 1000;
+  const startTime = config.startDate ? Date.parse(config.startDate) : Math.min(...exitTimes.filter(Number.isFinite));
+  const createdAt = header.createdAt || statSync((files.columnarPath || files.jsonPath)!).mtime.toISOString();
+
+  return {
+    name,
+    createdAt,
+    jsonPath: files.jsonPath,
+    columnarPath: files.columnarPath,
+    config,
+    options: header.options || {},
+    result: header.result,
+    equity: equityCurve(exitTimes, pnl, initialCapital, startTime),
+  };
+}
+
+const catalogPath = join(reportsDir, CATALOG_FILE);
+const db = openCatalog(catalogPath);
+
+let registered = 0;
+for (const [name, files] of found) {
+  try {
+    upsertCatalogEntry(db, catalogPath, loadEntry(name, files));
+    registered++;
+  } catch (error) {
+    console.warn(`⚠️ 跳过 ${name}: ${(error as Error).message}`);
+  }
+}
+
+// 清理已删除的报告（report_equity 通过外键级联删除）；参数扫描的运行没有报告文件，保留
+const stale = (db.prepare('SELECT name FROM reports WHERE sweep_id IS NULL').all() as { name: string }[])
+  .filter(row => !found.has(row.name));
+const remove = db.prepare('DELETE FROM reports WHERE name = ?');
+db.transaction(() => stale.forEach(row => remove.run(row.name)))();
+
+console.log(`✅ 已登记 ${registered} 份报告，清理 ${stale.length} 条失效记录: ${catalogPath}`);
+
+db.close();
@@ -0,0 +1,346 @@
+"""
+生成大体量的合成数据库（表结构与 scripts/schema.sql 一致），用于压测 Dashboard 和风控查询
+
+用法:
+    python scripts/gen_large_db.py --scale small  --output data/bench_small.db
+    python scripts/gen_large_db.py --scale large  --output data/bench_large.db
+    python scripts/gen_large_db.py --markets 5000 --snapshots 50000000 --signals 1000000 --trades 1000000
+
+时间分布:
+- 价格快照按轮询周期生成：每一轮所有市场各一条，价格为随机游走，偶尔出现套利偏离
+- 信号、交易、套利机会、风控日志按日内活跃度加权（美东白天更密集），时间越近越多
+- 行按时间顺序写入，id 与时间同序，与机器人实际写入一致
+
+写入时先去掉触发器和索引，全部写完后重新执行 schema.sql 建索引 / 触发器，
+再用 rebuild-rollups.sql 生成每日汇总表和价格 K 线。
+"""
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+SCHEMA_PATH = SCRIPTS_DIR / 'schema.sql'
+REBUILD_ROLLUPS_PATH = SCRIPTS_DIR / 'rebuild-rollups.sql'
+
+SCALES = {
+    'small': {'markets': 200, 'snapshots': 200_000, 'opportunities': 20_000, 'signals': 10_000, 'trades': 10_000, 'risk_logs': 2_000},
+    'medium': {'markets': 1_000, 'snapshots': 5_000_000, 'opportunities': 400_000, 'signals': 200_000, 'trades': 200_000, 'risk_logs': 20_000},
+    'large': {'markets': 5_000, 'snapshots': 50_000_000, 'opportunities': 2_000_000, 'signals': 1_000_000, 'trades': 1_000_000, 'risk_logs': 100_000},
+}
+
+CATEGORIES = ['Politics', 'Crypto', 'Sports', 'Economics', 'Science', 'Pop Culture', 'World']
+CATEGORY_WEIGHTS = [0.3, 0.25, 0.2, 0.1, 0.05, 0.05, 0.05]
+
+# UTC 小时的相对活跃度（美东白天 = UTC 13~23 点最活跃）
+HOURLY_ACTIVITY = np.array([
+    3, 2, 2, 1, 1, 1, 1, 1, 2, 2, 3, 4,
+    5, 7, 8, 9, 9, 9, 8, 8, 7, 6, 5, 4,
+], dtype=float)
+
+BATCH_SIZE = 200_000
+
+
+def sql_time(column):
+    """epoch 秒 -> SQLite datetime('now') 同格式的文本，由 SQLite 在 C 里转换"""
+    return f"datetime({column}, 'unixepoch')"
+
+
+def event_times(rng, n, start, end, growth=1.5):
+    """
+    n 个事件时间（epoch 秒，升序）：按天线性增长（最后一天是第一天的 growth 倍），
+    日内按 HOURLY_ACTIVITY 加权
+    """
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    days = max(1, int((end - start) // 86400))
+    day_weights = np.linspace(1.0, growth, days)
+    day = rng.choice(days, size=n, p=day_weights / day_weights.sum())
+    hour = rng.choice(24, size=n, p=HOURLY_ACTIVITY / HOURLY_ACTIVITY.sum())
+    seconds = start + day * 86400 + hour * 3600 + rng.integers(0, 3600, size=n)
+    return np.sort(np.minimum(seconds, end - 1)).astype(np.int64)
+
+
+def drop_triggers_and_indexes(conn):
+    for kind in ('trigger', 'index'):
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = ? AND name NOT LIKE 'sqlite_%'", (kind,)
+        )]
+        for name in names:
+            conn.execute(f'DROP {kind.upper()} {name}')
+
+
+def insert_batches(conn, sql, columns, total, label):
+    """columns 为等长数组，分批 executemany 写入"""
+    started = time.perf_counter()
+    for offset in range(0, total, BATCH_SIZE):
+        batch = [col[offset:offset + BATCH_SIZE].tolist() for col in columns]
+        conn.executemany(sql, zip(*batch))
+    print(f'  {label}: {total:,} 行，{time.perf_counter() - started:.1f}s')
+
+
+def gen_markets(conn, rng, n, start, end):
+    ids = [f'0x{i:064x}' for i in range(1, n + 1)]
+    created = rng.integers(start - 30 * 86400, end - 86400, size=n)
+    resolution = created + rng.integers(7, 180, size=n) * 86400
+    resolved = (resolution < end) & (rng.random(n) < 0.9)
+    active = ~resolved & (rng.random(n) < 0.95)
+    categories = rng.choice(CATEGORIES, size=n, p=CATEGORY_WEIGHTS)
+
+    conn.executemany(
+        f"""INSERT INTO markets (id, slug, question, category, created_at, resolution_time, resolved, active)
+            VALUES (?, ?, ?, ?, {sql_time('?')}, {sql_time('?')}, ?, ?)""",
+        zip(
+            ids,
+            [f'synthetic-market-{i}' for i in range(1, n + 1)],
+            [f'Synthetic market #{i}: will the event resolve YES?' for i in range(1, n + 1)],
+            categories.tolist(),
+            created.tolist(),
+            resolution.tolist(),
+            resolved.astype(int).tolist(),
+            active.astype(int).tolist(),
+        ),
+    )
+    print(f'  markets: {n:,} 行')
+    return ids
+
+
+def gen_price_snapshots(conn, rng, market_ids, total, start, end):
+    """每轮所有市场各一条快照，价格随机游走，约 1% 的快照出现套利偏离"""
+    n = len(market_ids)
+    rounds = -(-total // n)
+    interval = (end - start) / rounds
+    market_ids = np.array(market_ids, dtype=object)
+
+    yes = rng.uniform(0.1, 0.9, size=n)
+    liquidity = rng.lognormal(8, 1, size=(n, 2))
+    volume = rng.lognormal(9, 1.5, size=n)
+
+    sql = f"""INSERT INTO price_snapshots (market_id, timestamp, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h)
+              VALUES (?, {sql_time('?')}, ?, ?, ?, ?, ?)"""
+    rounds_per_batch = max(1, BATCH_SIZE // n)
+    written = 0
+    started = time.perf_counter()
+
+    for first in range(0, rounds, rounds_per_batch):
+        count = min(rounds_per_batch, rounds - first)
+        yes_rows, no_rows, ts_rows, liq_rows, vol_rows = [], [], [], [], []
+        for r in range(first, first + count):
+            yes = np.clip(yes + rng.normal(0, 0.01, size=n), 0.01, 0.99)
+            spread = rng.normal(0.003, 0.004, size=n)
+            spikes = rng.random(n) < 0.01
+            spread[spikes] = -rng.uniform(0.015, 0.08, size=spikes.sum())
+            liquidity = liquidity * rng.lognormal(0, 0.02, size=(n, 2))
+            volume = volume * rng.lognormal(0, 0.03, size=n)
+
+            yes_rows.append(yes)
+            no_rows.append(np.clip(1 - yes + spread, 0.01, 0.99))
+            ts_rows.append(np.full(n, int(start + r * interval)) + rng.integers(0, max(1, int(interval)), size=n))
+            liq_rows.append(liquidity)
+            vol_rows.append(volume)
+
+        rows = min(count * n, total - written)
+        liq = np.concatenate(liq_rows)[:rows]
+        columns = [
+            np.tile(market_ids, count)[:rows],
+            np.concatenate(ts_rows)[:rows],
+            np.round(np.concatenate(yes_rows)[:rows], 4),
+            np.round(np.concatenate(no_rows)[:rows], 4),
+            np.round(liq[:, 0], 2),
+            np.round(liq[:, 1], 2),
+            np.round(np.concatenate(vol_rows)[:rows], 2),
+        ]
+        conn.executemany(sql, zip(*[col.tolist() for col in columns]))
+        written += rows
+        if (first // rounds_per_batch) % 25 == 0:
+            print(f'    price_snapshots: {written:,} / {total:,}')
+
+    print(f'  price_snapshots: {written:,} 行，{time.perf_counter() - started:.1f}s')
+
+
+def gen_opportunities(conn, rng, market_ids, total, start, end):
+    detected = event_times(rng, total, start, end)
+    deviation_pct = np.round(1.5 + rng.exponential(1.2, size=total), 2)
+    total_price = 1 - deviation_pct / 100
+    yes = total_price * rng.uniform(0.2, 0.8, size=total)
+    # 最近两小时内的机会仍为 open
+    status = np.where(detected >= end - 2 * 3600, 'open', 'closed')
+
+    insert_batches(
+        conn,
+        f"""INSERT INTO arbitrage_opportunities (market_id, detected_at, yes_price, no_price, total_price, deviation, deviation_percent, status)
+            VALUES (?, {sql_time('?')}, ?, ?, ?, ?, ?, ?)""",
+        [
+            rng.choice(np.array(market_ids, dtype=object), size=total),
+            detected,
+            np.round(yes, 4),
+            np.round(total_price - yes, 4),
+            np.round(total_price, 4),
+            np.round(deviation_pct / 100, 4),
+            deviation_pct,
+            status,
+        ],
+        total,
+        'arbitrage_opportunities',
+    )
+    return deviation_pct
+
+
+def gen_signals(conn, rng, market_ids, total, opportunities, start, end):
+    created = event_times(rng, total, start, end)
+    deviation = 1.5 + rng.exponential(1.2, size=total)
+    level = np.select([deviation >= 5, deviation >= 3], ['RISKY', 'AGGRESSIVE'], default='CONSERVATIVE')
+    expiry = np.select([deviation >= 5, deviation >= 3], [10, 5], default=3)
+
+    # 还在有效期内的是 pending，其余按比例落到终态
+    final = rng.choice(['expired', 'rejected', 'confirmed', 'executed'], size=total, p=[0.5, 0.2, 0.1, 0.2])
+    status = np.where(created + expiry * 60 > end, 'pending', final)
+    confirmed_at = np.where(np.isin(status, ['confirmed', 'executed']), created + rng.integers(10, 120, size=total), -1)
+    executed_at = np.where(status == 'executed', confirmed_at + rng.integers(10, 300, size=total), -1)
+
+    opportunity_id = rng.integers(1, opportunities + 1, size=total) if opportunities else np.zeros(total, dtype=int)
+    confidence = np.round(np.clip(0.5 + deviation / 20 + rng.normal(0, 0.05, size=total), 0.5, 0.99), 2)
+
+    insert_batches(
+        conn,
+        f"""INSERT INTO signals (market_id, opportunity_id, signal_type, confidence, reason, trigger_price,
+                                 suggested_amount, status, level, expiry_minutes, created_at, confirmed_at, executed_at)
+            VALUES (?, NULLIF(?, 0), ?, ?, ?, ?, ?, ?, ?, ?, {sql_time('?')},
+                    {sql_time('NULLIF(?, -1)')}, {sql_time('NULLIF(?, -1)')})""",
+        [
+            rng.choice(np.array(market_ids, dtype=object), size=total),
+            opportunity_id,
+            rng.choice(['ARBITRAGE', 'BUY_YES', 'BUY_NO'], size=total, p=[0.8, 0.1, 0.1]),
+            confidence,
+            np.char.add('价格总和偏离 ', np.char.add(np.round(deviation, 2).astype(str), '%')),
+            np.round(rng.uniform(0.05, 0.95, size=total), 4),
+            np.round(np.clip(deviation * 30, 20, 200), 0),
+            status,
+            level,
+            expiry,
+            created,
+            confirmed_at,
+            executed_at,
+        ],
+        total,
+        'signals',
+    )
+    return created
+
+
+def gen_trades(conn, rng, market_ids, total, signal_times, end):
+    n_signals = len(signal_times)
+    signal_id = np.sort(rng.integers(1, n_signals + 1, size=total)) if n_signals else np.zeros(total, dtype=int)
+    created = (
+        signal_times[signal_id - 1] + rng.integers(30, 600, size=total)
+        if n_signals else np.sort(rng.integers(end - 30 * 86400, end, size=total))
+    )
+    created = np.minimum(created, end - 1)
+    amount = np.round(rng.uniform(20, 200, size=total), 2)
+    price = np.round(rng.uniform(0.05, 0.95, size=total), 4)
+
+    # 一天以前的交易都已结算
+    status = np.where(created < end - 86400, 'settled', rng.choice(['pending', 'confirmed', 'settled'], size=total))
+    pnl = np.where(status == 'settled', np.round(amount * rng.normal(0.01, 0.05, size=total), 2), np.nan)
+    settled_at = np.where(status == 'settled', created + rng.integers(3600, 2 * 86400, size=total), -1)
+
+    insert_batches(
+        conn,
+        f"""INSERT INTO trades (signal_id, market_id, side, amount, price, quantity, gas_fee, pnl, status, created_at, settled_at)
+            VALUES (NULLIF(?, 0), ?, ?, ?, ?, ?, ?, ?, ?, {sql_time('?')}, {sql_time('NULLIF(?, -1)')})""",
+        [
+            signal_id,
+            rng.choice(np.array(market_ids, dtype=object), size=total),
+            rng.choice(['YES', 'NO'], size=total),
+            amount,
+            price,
+            np.round(amount / price, 4),
+            np.round(rng.uniform(0.01, 0.5, size=total), 4),
+            np.where(np.isnan(pnl), None, pnl),
+            status,
+            created,
+            settled_at,
+        ],
+        total,
+        'trades',
+    )
+
+
+def gen_risk_logs(conn, rng, total, start, end):
+    created = event_times(rng, total, start, end)
+    log_type = rng.choice(['limit_warning', 'trade_blocked', 'info'], size=total, p=[0.3, 0.2, 0.5])
+    exposure = np.round(rng.uniform(0, 60, size=total), 2)
+
+    insert_batches(
+        conn,
+        f"""INSERT INTO risk_logs (log_type, message, current_exposure, limit_value, created_at)
+            VALUES (?, ?, ?, ?, {sql_time('?')})""",
+        [
+            log_type,
+            np.char.add('日亏损 ', exposure.astype(str)),
+            exposure,
+            np.full(total, 50.0),
+            created,
+        ],
+        total,
+        'risk_logs',
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成压测数据库')
+    parser.add_argument('--output', default='data/bench.db', help='输出路径（已存在会覆盖）')
+    parser.add_argument('--scale', choices=list(SCALES), default='small', help='预设规模')
+    for name in SCALES['small']:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, help=f'{name} 行数（覆盖预设）')
+    parser.add_argument('--days', type=int, default=90, help='数据覆盖的天数，截止到当前时间')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    volumes = {name: getattr(args, name) or default for name, default in SCALES[args.scale].items()}
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{output}{suffix}').unlink(missing_ok=True)
+
+    rng = np.random.default_rng(args.seed)
+    end = int(time.time())
+    start = end - args.days * 86400
+
+    print(f'生成 {output}: ' + ', '.join(f'{k}={v:,}' for k, v in volumes.items()))
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(output, isolation_level=None)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -262144')
+    conn.executescript(SCHEMA_PATH.read_text(encoding='utf-8'))
+    drop_triggers_and_indexes(conn)
+
+    conn.execute('BEGIN')
+    market_ids = gen_markets(conn, rng, volumes['markets'], start, end)
+    gen_price_snapshots(conn, rng, market_ids, volumes['snapshots'], start, end)
+    gen_opportunities(conn, rng, market_ids, volumes['opportunities'], start, end)
+    signal_times = gen_signals(conn, rng, market_ids, volumes['signals'], volumes['opportunities'], start, end)
+    gen_trades(conn, rng, market_ids, volumes['trades'], signal_times, end)
+    gen_risk_logs(conn, rng, volumes['risk_logs'], start, end)
+    conn.execute('COMMIT')
+
+    print('建索引、触发器和派生表...')
+    step = time.perf_counter()
+    conn.executescript(SCHEMA_PATH.read_text(encoding='utf-8'))
+    conn.executescript(REBUILD_ROLLUPS_PATH.read_text(encoding='utf-8'))
+    conn.execute('ANALYZE')
+    print(f'  完成，{time.perf_counter() - step:.1f}s')
+
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.close()
+
+    size_mb = output.stat().st_size / 1024 / 1024
+    print(f'✅ 完成: {output} ({size_mb:,.0f} MB)，用时 {time.perf_counter() - started:.0f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import Database from 'better-sqlite3';
 import * as fs from 'fs';
 import * as path from 'path';
+import { migrate } from '../src/database/migrate';
 
 // 确保数据目录存在
 const dataDir = path.join(__dirname, '..', 'data');
@@ -13,17 +14,8 @@ const db = new Database(dbPath);
 
 console.log(`Initializing database at: ${dbPath}`);
 
-// 读取并执行 schema
-const schemaPath = path.join(__dirname, 'schema.sql');
-const schema = fs.readFileSync(schemaPath, 'utf-8');
-
-// 分割多个 SQL 语句并执行
-const statements = schema.split(';').filter(s => s.trim());
-for (const statement of statements) {
-  if (statement.trim()) {
-    db.exec(statement + ';');
-  }
-}
+// 执行 schema（对已有数据库同样适用，会补齐缺失的列和索引）
+migrate(db, path.join(__dirname, 'schema.sql'));
 
 console.log('Database initialized successfully!');
 console.log('Tables created:');
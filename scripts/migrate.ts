@@ -0,0 +1,26 @@
+import Database from 'better-sqlite3';
+import { defaultConfig } from '../src/config';
+import { migrate } from '../src/database/migrate';
+
+// 升级已有数据库：补齐新列、索引、触发器和派生表
+const dbPath = defaultConfig.database.path;
+const db = new Database(dbPath);
+db.pragma('journal_mode = WAL');
+
+console.log(`Migrating database at: ${dbPath}`);
+
+const applied = migrate(db);
+if (applied.length > 0) {
+  console.log('Upgraded:');
+  applied.forEach(column => console.log(`  - ${column}`));
+}
+
+const indexes = db.prepare("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'idx_%'").all();
+console.log('Indexes:');
+indexes.forEach((index: any) => {
+  console.log(`  - ${index.name}`);
+});
+
+console.log('Database migrated successfully!');
+
+db.close();
@@ -0,0 +1,33 @@
+import { MockFeedServer } from '../src/services/data/mockFeedServer';
+
+// 本地模拟行情源：PRICE_STREAM_URL=ws://127.0.0.1:<port> npm run dev 即可离线联调推送模式
+function option(name: string, fallback: number): number {
+  const arg = process.argv.slice(2).find(item => item.startsWith(`--${name}=`));
+  return arg ? Number(arg.split('=')[1]) : fallback;
+}
+
+async function main() {
+  const server = new MockFeedServer({
+    port: option('port', 8765),
+    rate: option('rate', 1000),
+    deviationProbability: option('deviation', 0.01),
+  });
+  const port = await server.start();
+  console.log(`📡 模拟行情源: ws://127.0.0.1:${port}（每个连接 ${server.options.rate} 条/秒，偏离概率 ${server.options.deviationProbability}）`);
+
+  let lastSent = 0;
+  setInterval(() => {
+    console.log(`  连接 ${server.clientCount} 个，过去 10s 发送 ${server.sent - lastSent} 条更新`);
+    lastSent = server.sent;
+  }, 10_000);
+
+  process.on('SIGINT', async () => {
+    await server.stop();
+    process.exit(0);
+  });
+}
+
+main().catch(error => {
+  console.error('❌ 启动模拟行情源失败:', error);
+  process.exit(1);
+});
@@ -0,0 +1,91 @@
+-- 从原始表全量重建每日汇总表和价格 K 线（回填历史数据、修复汇总偏差时使用）
+-- 与 schema.sql 中的汇总触发器口径一致
+
+DELETE FROM daily_pnl;
+INSERT INTO daily_pnl (day, total_pnl, trades, wins, losses, max_pnl, min_pnl)
+SELECT
+    DATE(created_at),
+    COALESCE(SUM(pnl), 0),
+    COUNT(*),
+    SUM(COALESCE(pnl, 0) > 0),
+    SUM(COALESCE(pnl, 0) < 0),
+    MAX(pnl),
+    MIN(pnl)
+FROM trades
+WHERE status = 'settled'
+GROUP BY DATE(created_at);
+
+DELETE FROM daily_opportunities;
+INSERT INTO daily_opportunities (day, opportunities, deviation_sum, max_deviation, high_value)
+SELECT
+    DATE(detected_at),
+    COUNT(*),
+    SUM(deviation_percent),
+    MAX(deviation_percent),
+    SUM(deviation_percent >= 3)
+FROM arbitrage_opportunities
+GROUP BY DATE(detected_at);
+
+DELETE FROM daily_signal_counts;
+INSERT INTO daily_signal_counts (day, level, status, signals, confidence_sum)
+SELECT
+    DATE(created_at),
+    COALESCE(level, ''),
+    status,
+    COUNT(*),
+    SUM(confidence)
+FROM signals
+GROUP BY DATE(created_at), COALESCE(level, ''), status;
+
+-- K 线只重建原始快照仍完整覆盖的部分：保留策略按 UTC 整天清理快照，
+-- 从剩余最早快照所在的那一天起重建，更早的 K 线（快照已清理）保持不变
+-- 重建与触发器走同一个 upsert，按主键顺序逐行回放快照（比窗口函数逐周期排序快得多）
+DELETE FROM price_bars
+WHERE bucket >= (
+    SELECT datetime(CAST(strftime('%s', MIN(timestamp)) AS INTEGER) / 86400 * 86400, 'unixepoch')
+    FROM price_snapshots
+);
+INSERT INTO price_bars (
+    interval, market_id, bucket, open_time, close_time,
+    yes_open, yes_high, yes_low, yes_close,
+    no_open, no_high, no_low, no_close,
+    total_open, total_high, total_low, total_close,
+    min_deviation, max_deviation, volume_24h, snapshots
+)
+SELECT
+    i.interval,
+    ps.market_id,
+    datetime(CAST(strftime('%s', ps.timestamp) AS INTEGER) / i.seconds * i.seconds, 'unixepoch'),
+    ps.timestamp,
+    ps.timestamp,
+    ps.yes_price, ps.yes_price, ps.yes_price, ps.yes_price,
+    ps.no_price, ps.no_price, ps.no_price, ps.no_price,
+    ps.yes_price + ps.no_price, ps.yes_price + ps.no_price,
+    ps.yes_price + ps.no_price, ps.yes_price + ps.no_price,
+    1 - (ps.yes_price + ps.no_price),
+    1 - (ps.yes_price + ps.no_price),
+    ps.volume_24h,
+    1
+FROM price_bar_intervals i
+CROSS JOIN price_snapshots ps
+WHERE true
+ORDER BY i.interval, ps.market_id, ps.timestamp, ps.id
+ON CONFLICT(interval, market_id, bucket) DO UPDATE SET
+    yes_open = CASE WHEN excluded.open_time < open_time THEN excluded.yes_open ELSE yes_open END,
+    no_open = CASE WHEN excluded.open_time < open_time THEN excluded.no_open ELSE no_open END,
+    total_open = CASE WHEN excluded.open_time < open_time THEN excluded.total_open ELSE total_open END,
+    yes_close = CASE WHEN excluded.close_time >= close_time THEN excluded.yes_close ELSE yes_close END,
+    no_close = CASE WHEN excluded.close_time >= close_time THEN excluded.no_close ELSE no_close END,
+    total_close = CASE WHEN excluded.close_time >= close_time THEN excluded.total_close ELSE total_close END,
+    volume_24h = CASE WHEN excluded.close_time >= close_time THEN excluded.volume_24h ELSE volume_24h END,
+    yes_high = MAX(yes_high, excluded.yes_high),
+    yes_low = MIN(yes_low, excluded.yes_low),
+    no_high = MAX(no_high, excluded.no_high),
+    no_low = MIN(no_low, excluded.no_low),
+    total_high = MAX(total_high, excluded.total_high),
+    total_low = MIN(total_low, excluded.total_low),
+    min_deviation = MIN(min_deviation, excluded.min_deviation),
+    max_deviation = MAX(max_deviation, excluded.max_deviation),
+    open_time = MIN(open_time, excluded.open_time),
+    close_time = MAX(close_time, excluded.close_time),
+    snapshots = snapshots + 1;
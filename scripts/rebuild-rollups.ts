@@ -0,0 +1,22 @@
+import Database from 'better-sqlite3';
+import { defaultConfig } from '../src/config';
+import { rebuildRollups, ROLLUP_TABLES } from '../src/database/rollups';
+
+// 全量重建每日汇总表（回填历史数据后执行）
+const dbPath = defaultConfig.database.path;
+const db = new Database(dbPath);
+db.pragma('journal_mode = WAL');
+
+console.log(`Rebuilding rollups at: ${dbPath}`);
+
+const started = Date.now();
+rebuildRollups(db);
+
+for (const table of ROLLUP_TABLES) {
+  const row = db.prepare(`SELECT COUNT(*) as count FROM ${table}`).get() as { count: number };
+  console.log(`  - ${table}: ${row.count} rows`);
+}
+
+console.log(`Rollups rebuilt in ${Date.now() - started}ms`);
+
+db.close();
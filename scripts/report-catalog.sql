@@ -0,0 +1,49 @@
+-- 回测报告目录 reports/catalog.db 的表结构
+-- src/services/execution/reportCatalog.ts 和 scripts/sweep_backtest.py 共用；
+-- 已有目录打开时按这里的定义补齐缺少的列，新加的列须可为空
+
+CREATE TABLE IF NOT EXISTS reports (
+  name TEXT PRIMARY KEY,
+  created_at TEXT NOT NULL,
+  json_path TEXT,
+  columnar_path TEXT,
+  scenario TEXT,
+  days INTEGER,
+  markets INTEGER,
+  initial_capital REAL,
+  min_arbitrage_gap REAL,
+  start_date TEXT,
+  end_date TEXT,
+  total_trades INTEGER,
+  winning_trades INTEGER,
+  losing_trades INTEGER,
+  win_rate REAL,
+  total_pnl REAL,
+  total_pnl_percent REAL,
+  avg_return REAL,
+  max_drawdown REAL,
+  sharpe_ratio REAL,
+  config TEXT,
+  options TEXT,
+  sweep_id TEXT,
+  params TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at);
+CREATE INDEX IF NOT EXISTS idx_reports_sweep ON reports(sweep_id);
+
+-- 参数扫描：space 为各参数的取值列表 / 范围（JSON）
+CREATE TABLE IF NOT EXISTS sweeps (
+  id TEXT PRIMARY KEY,
+  created_at TEXT NOT NULL,
+  source TEXT,
+  method TEXT,
+  space TEXT,
+  runs INTEGER
+);
+
+-- 资金曲线 JSON: [[epoch_ms, equity], ...]
+CREATE TABLE IF NOT EXISTS report_equity (
+  name TEXT PRIMARY KEY REFERENCES reports(name) ON DELETE CASCADE,
+  points TEXT NOT NULL
+);
@@ -0,0 +1,29 @@
+import Database from 'better-sqlite3';
+import { defaultConfig } from '../src/config';
+import { applyRetention } from '../src/database/retention';
+
+// 手动执行价格快照 / K 线保留策略（机器人每天凌晨也会自动执行）
+const dbPath = defaultConfig.database.path;
+const db = new Database(dbPath);
+db.pragma('journal_mode = WAL');
+
+const policy = defaultConfig.retention;
+console.log(`Applying retention at: ${dbPath}`);
+console.log(`  - snapshots: ${policy.snapshotDays > 0 ? `${policy.snapshotDays} days` : 'keep all'}`);
+console.log(`  - archive: ${policy.archivePath || '(delete)'}`);
+
+const started = Date.now();
+const result = applyRetention(db, policy);
+
+if (result.cutoff) {
+  console.log(`Snapshots before ${result.cutoff}: ${result.deleted} removed, ${result.archived} archived`);
+}
+for (const [interval, count] of Object.entries(result.bars)) {
+  console.log(`  - price_bars ${interval}: ${count} removed`);
+}
+
+// 大量删除后更新查询规划器的统计信息
+db.pragma('optimize');
+console.log(`Retention applied in ${Date.now() - started}ms`);
+
+db.close();
@@ -24,6 +24,59 @@ CREATE TABLE IF NOT EXISTS price_snapshots (
     FOREIGN KEY (market_id) REFERENCES markets(id)
 );
 
+-- 最新价格表（每个市场一行，由触发器随 price_snapshots 写入维护）
+CREATE TABLE IF NOT EXISTS latest_prices (
+    market_id TEXT PRIMARY KEY,
+    snapshot_id INTEGER NOT NULL,
+    timestamp DATETIME NOT NULL,
+    yes_price REAL NOT NULL,
+    no_price REAL NOT NULL,
+    yes_liquidity REAL,
+    no_liquidity REAL,
+    volume_24h REAL,
+    FOREIGN KEY (market_id) REFERENCES markets(id)
+);
+
+-- 价格 K 线（由下方触发器随 price_snapshots 写入维护，npm run db:rebuild-rollups 可重建）
+-- bucket 为周期起点（UTC，YYYY-MM-DD HH:MM:SS）；total = yes + no，deviation = 1 - total
+-- open / close 取周期内最早 / 最晚的快照，时间相同时按写入顺序
+CREATE TABLE IF NOT EXISTS price_bar_intervals (
+    interval TEXT PRIMARY KEY,
+    seconds INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO price_bar_intervals (interval, seconds) VALUES
+    ('1m', 60),
+    ('5m', 300),
+    ('1h', 3600),
+    ('1d', 86400);
+
+CREATE TABLE IF NOT EXISTS price_bars (
+    interval TEXT NOT NULL,
+    market_id TEXT NOT NULL,
+    bucket DATETIME NOT NULL,
+    open_time DATETIME NOT NULL,
+    close_time DATETIME NOT NULL,
+    yes_open REAL NOT NULL,
+    yes_high REAL NOT NULL,
+    yes_low REAL NOT NULL,
+    yes_close REAL NOT NULL,
+    no_open REAL NOT NULL,
+    no_high REAL NOT NULL,
+    no_low REAL NOT NULL,
+    no_close REAL NOT NULL,
+    total_open REAL NOT NULL,
+    total_high REAL NOT NULL,
+    total_low REAL NOT NULL,
+    total_close REAL NOT NULL,
+    min_deviation REAL NOT NULL,
+    max_deviation REAL NOT NULL,
+    volume_24h REAL,
+    snapshots INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (interval, market_id, bucket),
+    FOREIGN KEY (market_id) REFERENCES markets(id)
+);
+
 -- 套利机会表
 CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -49,6 +102,8 @@ CREATE TABLE IF NOT EXISTS signals (
     trigger_price REAL,
     suggested_amount REAL,
     status TEXT DEFAULT 'pending',
+    level TEXT,
+    expiry_minutes INTEGER,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     confirmed_at DATETIME,
     executed_at DATETIME,
@@ -85,8 +140,228 @@ CREATE TABLE IF NOT EXISTS risk_logs (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 每日汇总表（由下方触发器增量维护，npm run db:rebuild-rollups 可全量重建）
+-- 日期按 DATE(created_at) / DATE(detected_at) 计算
+CREATE TABLE IF NOT EXISTS daily_pnl (
+    day TEXT PRIMARY KEY,
+    total_pnl REAL NOT NULL DEFAULT 0,
+    trades INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    max_pnl REAL,
+    min_pnl REAL
+);
+
+CREATE TABLE IF NOT EXISTS daily_opportunities (
+    day TEXT PRIMARY KEY,
+    opportunities INTEGER NOT NULL DEFAULT 0,
+    deviation_sum REAL NOT NULL DEFAULT 0,
+    max_deviation REAL,
+    high_value INTEGER NOT NULL DEFAULT 0
+);
+
+-- level 为空的信号记为 ''
+CREATE TABLE IF NOT EXISTS daily_signal_counts (
+    day TEXT NOT NULL,
+    level TEXT NOT NULL,
+    status TEXT NOT NULL,
+    signals INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, level, status)
+);
+
+-- 行变化日志：Dashboard 增量拉取用，每行只保留最近一次变化（REPLACE 会分配新的 id）
+CREATE TABLE IF NOT EXISTS change_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    changed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (table_name, row_id)
+);
+
 -- 创建索引
 CREATE INDEX IF NOT EXISTS idx_price_snapshots_market_time ON price_snapshots(market_id, timestamp);
+-- 全市场按时间回放（回测分块读取）：索引项隐含 rowid，按 (timestamp, id) 有序，游标续读不需要排序
+CREATE INDEX IF NOT EXISTS idx_price_snapshots_time ON price_snapshots(timestamp);
 CREATE INDEX IF NOT EXISTS idx_signals_status ON signals(status);
 CREATE INDEX IF NOT EXISTS idx_trades_status ON trades(status);
 CREATE INDEX IF NOT EXISTS idx_opportunities_status ON arbitrage_opportunities(status);
+
+-- 时间范围查询索引（查询条件写成 col >= ? AND col < ?，不要包 DATE()）
+CREATE INDEX IF NOT EXISTS idx_signals_created ON signals(created_at);
+CREATE INDEX IF NOT EXISTS idx_signals_status_created ON signals(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_signals_level_created ON signals(level, created_at);
+CREATE INDEX IF NOT EXISTS idx_trades_created ON trades(created_at);
+CREATE INDEX IF NOT EXISTS idx_trades_status_created ON trades(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_opportunities_detected ON arbitrage_opportunities(detected_at);
+CREATE INDEX IF NOT EXISTS idx_opportunities_status_detected ON arbitrage_opportunities(status, detected_at);
+CREATE INDEX IF NOT EXISTS idx_risk_logs_created ON risk_logs(created_at);
+
+-- 写入价格快照时同步更新最新价格
+CREATE TRIGGER IF NOT EXISTS trg_price_snapshots_latest
+AFTER INSERT ON price_snapshots
+BEGIN
+    INSERT INTO latest_prices (market_id, snapshot_id, timestamp, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h)
+    VALUES (NEW.market_id, NEW.id, NEW.timestamp, NEW.yes_price, NEW.no_price, NEW.yes_liquidity, NEW.no_liquidity, NEW.volume_24h)
+    ON CONFLICT(market_id) DO UPDATE SET
+        snapshot_id = excluded.snapshot_id,
+        timestamp = excluded.timestamp,
+        yes_price = excluded.yes_price,
+        no_price = excluded.no_price,
+        yes_liquidity = excluded.yes_liquidity,
+        no_liquidity = excluded.no_liquidity,
+        volume_24h = excluded.volume_24h
+    WHERE excluded.timestamp >= latest_prices.timestamp;
+END;
+
+-- 写入价格快照时同步更新各周期 K 线
+CREATE TRIGGER IF NOT EXISTS trg_price_snapshots_bars
+AFTER INSERT ON price_snapshots
+BEGIN
+    INSERT INTO price_bars (
+        interval, market_id, bucket, open_time, close_time,
+        yes_open, yes_high, yes_low, yes_close,
+        no_open, no_high, no_low, no_close,
+        total_open, total_high, total_low, total_close,
+        min_deviation, max_deviation, volume_24h, snapshots
+    )
+    SELECT
+        i.interval,
+        NEW.market_id,
+        datetime(CAST(strftime('%s', NEW.timestamp) AS INTEGER) / i.seconds * i.seconds, 'unixepoch'),
+        NEW.timestamp,
+        NEW.timestamp,
+        NEW.yes_price, NEW.yes_price, NEW.yes_price, NEW.yes_price,
+        NEW.no_price, NEW.no_price, NEW.no_price, NEW.no_price,
+        NEW.yes_price + NEW.no_price, NEW.yes_price + NEW.no_price,
+        NEW.yes_price + NEW.no_price, NEW.yes_price + NEW.no_price,
+        1 - (NEW.yes_price + NEW.no_price),
+        1 - (NEW.yes_price + NEW.no_price),
+        NEW.volume_24h,
+        1
+    FROM price_bar_intervals i
+    WHERE true
+    ON CONFLICT(interval, market_id, bucket) DO UPDATE SET
+        yes_open = CASE WHEN excluded.open_time < open_time THEN excluded.yes_open ELSE yes_open END,
+        no_open = CASE WHEN excluded.open_time < open_time THEN excluded.no_open ELSE no_open END,
+        total_open = CASE WHEN excluded.open_time < open_time THEN excluded.total_open ELSE total_open END,
+        yes_close = CASE WHEN excluded.close_time >= close_time THEN excluded.yes_close ELSE yes_close END,
+        no_close = CASE WHEN excluded.close_time >= close_time THEN excluded.no_close ELSE no_close END,
+        total_close = CASE WHEN excluded.close_time >= close_time THEN excluded.total_close ELSE total_close END,
+        volume_24h = CASE WHEN excluded.close_time >= close_time THEN excluded.volume_24h ELSE volume_24h END,
+        yes_high = MAX(yes_high, excluded.yes_high),
+        yes_low = MIN(yes_low, excluded.yes_low),
+        no_high = MAX(no_high, excluded.no_high),
+        no_low = MIN(no_low, excluded.no_low),
+        total_high = MAX(total_high, excluded.total_high),
+        total_low = MIN(total_low, excluded.total_low),
+        min_deviation = MIN(min_deviation, excluded.min_deviation),
+        max_deviation = MAX(max_deviation, excluded.max_deviation),
+        open_time = MIN(open_time, excluded.open_time),
+        close_time = MAX(close_time, excluded.close_time),
+        snapshots = snapshots + 1;
+END;
+
+-- 交易结算时累计当日盈亏（交易按创建日期归属）
+CREATE TRIGGER IF NOT EXISTS trg_trades_settled
+AFTER UPDATE OF status ON trades
+WHEN NEW.status = 'settled' AND OLD.status IS NOT 'settled'
+BEGIN
+    INSERT INTO daily_pnl (day, total_pnl, trades, wins, losses, max_pnl, min_pnl)
+    VALUES (DATE(NEW.created_at), COALESCE(NEW.pnl, 0), 1, COALESCE(NEW.pnl, 0) > 0, COALESCE(NEW.pnl, 0) < 0, NEW.pnl, NEW.pnl)
+    ON CONFLICT(day) DO UPDATE SET
+        total_pnl = total_pnl + excluded.total_pnl,
+        trades = trades + 1,
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        max_pnl = MAX(COALESCE(max_pnl, excluded.max_pnl), COALESCE(excluded.max_pnl, max_pnl)),
+        min_pnl = MIN(COALESCE(min_pnl, excluded.min_pnl), COALESCE(excluded.min_pnl, min_pnl));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_trades_insert_settled
+AFTER INSERT ON trades
+WHEN NEW.status = 'settled'
+BEGIN
+    INSERT INTO daily_pnl (day, total_pnl, trades, wins, losses, max_pnl, min_pnl)
+    VALUES (DATE(NEW.created_at), COALESCE(NEW.pnl, 0), 1, COALESCE(NEW.pnl, 0) > 0, COALESCE(NEW.pnl, 0) < 0, NEW.pnl, NEW.pnl)
+    ON CONFLICT(day) DO UPDATE SET
+        total_pnl = total_pnl + excluded.total_pnl,
+        trades = trades + 1,
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        max_pnl = MAX(COALESCE(max_pnl, excluded.max_pnl), COALESCE(excluded.max_pnl, max_pnl)),
+        min_pnl = MIN(COALESCE(min_pnl, excluded.min_pnl), COALESCE(excluded.min_pnl, min_pnl));
+END;
+
+-- 已结算交易改盈亏（重新结算、先按 settled 写入后补盈亏）或撤销结算：很少发生，按原始记录重算当天
+CREATE TRIGGER IF NOT EXISTS trg_trades_settled_correction
+AFTER UPDATE OF pnl, status ON trades
+WHEN OLD.status = 'settled' AND (NEW.status IS NOT 'settled' OR OLD.pnl IS NOT NEW.pnl)
+BEGIN
+    DELETE FROM daily_pnl WHERE day = DATE(OLD.created_at);
+
+    INSERT INTO daily_pnl (day, total_pnl, trades, wins, losses, max_pnl, min_pnl)
+    SELECT
+        DATE(OLD.created_at),
+        COALESCE(SUM(pnl), 0),
+        COUNT(*),
+        SUM(COALESCE(pnl, 0) > 0),
+        SUM(COALESCE(pnl, 0) < 0),
+        MAX(pnl),
+        MIN(pnl)
+    FROM trades
+    WHERE status = 'settled'
+      AND created_at >= DATE(OLD.created_at) AND created_at < DATE(OLD.created_at, '+1 day')
+    HAVING COUNT(*) > 0;
+END;
+
+-- 新套利机会计入当日统计
+CREATE TRIGGER IF NOT EXISTS trg_opportunities_daily
+AFTER INSERT ON arbitrage_opportunities
+BEGIN
+    INSERT INTO daily_opportunities (day, opportunities, deviation_sum, max_deviation, high_value)
+    VALUES (DATE(NEW.detected_at), 1, NEW.deviation_percent, NEW.deviation_percent, NEW.deviation_percent >= 3)
+    ON CONFLICT(day) DO UPDATE SET
+        opportunities = opportunities + 1,
+        deviation_sum = deviation_sum + excluded.deviation_sum,
+        max_deviation = MAX(COALESCE(max_deviation, excluded.max_deviation), excluded.max_deviation),
+        high_value = high_value + excluded.high_value;
+END;
+
+-- 信号新增 / 状态变化（包括批量过期）时调整 等级×状态 计数
+CREATE TRIGGER IF NOT EXISTS trg_signals_daily_insert
+AFTER INSERT ON signals
+BEGIN
+    INSERT INTO daily_signal_counts (day, level, status, signals, confidence_sum)
+    VALUES (DATE(NEW.created_at), COALESCE(NEW.level, ''), NEW.status, 1, NEW.confidence)
+    ON CONFLICT(day, level, status) DO UPDATE SET
+        signals = signals + 1,
+        confidence_sum = confidence_sum + excluded.confidence_sum;
+END;
+
+-- 计数减到 0 的组合删除，与全量重建一致
+CREATE TRIGGER IF NOT EXISTS trg_signals_daily_status
+AFTER UPDATE OF status ON signals
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    UPDATE daily_signal_counts
+    SET signals = signals - 1, confidence_sum = confidence_sum - OLD.confidence
+    WHERE day = DATE(OLD.created_at) AND level = COALESCE(OLD.level, '') AND status = OLD.status;
+
+    DELETE FROM daily_signal_counts
+    WHERE day = DATE(OLD.created_at) AND level = COALESCE(OLD.level, '') AND status = OLD.status AND signals <= 0;
+
+    INSERT INTO daily_signal_counts (day, level, status, signals, confidence_sum)
+    VALUES (DATE(NEW.created_at), COALESCE(NEW.level, ''), NEW.status, 1, NEW.confidence)
+    ON CONFLICT(day, level, status) DO UPDATE SET
+        signals = signals + 1,
+        confidence_sum = confidence_sum + excluded.confidence_sum;
+END;
+
+-- 状态变化记入 change_log（新增行按 id 高水位拉取，不需要记录）
+CREATE TRIGGER IF NOT EXISTS trg_signals_change_log
+AFTER UPDATE OF status ON signals
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    INSERT OR REPLACE INTO change_log (table_name, row_id) VALUES ('signals', NEW.id);
+END;
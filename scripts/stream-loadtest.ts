@@ -0,0 +1,100 @@
+import Database from 'better-sqlite3';
+import { migrate } from '../src/database/migrate';
+import { MarketRepository } from '../src/database/repositories/market';
+import { PriceRepository } from '../src/database/repositories/price';
+import { OpportunityRepository, SignalRepository } from '../src/database/repositories/signal';
+import { MockFeedServer } from '../src/services/data/mockFeedServer';
+import { PriceStream } from '../src/services/data/priceStream';
+import { StreamIngestor } from '../src/services/data/streamIngestor';
+import { ArbitrageStrategy } from '../src/services/strategy/arbitrage';
+import { OpportunityPipeline } from '../src/services/strategy/opportunityPipeline';
+import { SignalGenerator } from '../src/services/strategy/signalGenerator';
+import { Market } from '../src/types';
+
+// 推送模式压测：模拟行情源 → PriceStream → StreamIngestor → 内存数据库（或 --db=PATH 指定的文件），全程离线
+function option(name: string, fallback: string): string {
+  const arg = process.argv.slice(2).find(item => item.startsWith(`--${name}=`));
+  return arg ? arg.slice(name.length + 3) : fallback;
+}
+
+const MARKETS = Number(option('markets', '2000'));
+const RATE = Number(option('rate', '5000'));
+const SECONDS = Number(option('seconds', '20'));
+const DB_PATH = option('db', ':memory:');
+
+async function main() {
+  const database = new Database(DB_PATH);
+  database.pragma('journal_mode = WAL');
+  migrate(database);
+
+  const markets: Market[] = Array.from({ length: MARKETS }, (_, i) => ({
+    id: `loadtest-${i}`,
+    slug: `loadtest-${i}`,
+    question: `Load test market #${i}`,
+    resolved: false,
+    active: true,
+  }));
+  new MarketRepository(database).upsertMany(markets);
+
+  const allowAll = { allowed: true, current: 0, limit: Infinity };
+  const riskManager = {
+    checkSingleTradeLimit: () => ({ allowed: true, limit: Infinity }),
+    getRiskSummary: () => ({ dailyLoss: allowAll, tradeCount: allowAll }),
+  };
+  const ingestor = new StreamIngestor({
+    pipeline: new OpportunityPipeline({
+      arbitrageStrategy: new ArbitrageStrategy(),
+      signalGenerator: new SignalGenerator(),
+      riskManager,
+      opportunityRepo: new OpportunityRepository(database),
+      signalRepo: new SignalRepository(database),
+      mode: 'SIMULATION',
+    }),
+    priceRepo: new PriceRepository(database),
+    riskManager,
+  });
+  ingestor.setMarkets(markets);
+
+  const server = new MockFeedServer({ rate: RATE });
+  const port = await server.start();
+  const stream = new PriceStream({ url: `ws://127.0.0.1:${port}` });
+  stream.on('prices', updates => ingestor.handle(updates));
+  stream.subscribe(markets.map(market => market.id));
+
+  console.log(`⏱️ 压测 ${SECONDS}s：${MARKETS} 个市场，${RATE} 条/秒，数据库 ${DB_PATH}`);
+  // 信号日志会刷屏，压测期间只输出统计
+  const log = console.log;
+  console.log = () => {};
+
+  ingestor.start();
+  stream.start();
+  const totals = { updates: 0, snapshots: 0, signals: 0 };
+  let maxLag = 0;
+  const report = setInterval(() => {
+    const stats = ingestor.takeStats();
+    totals.updates += stats.updates;
+    totals.snapshots += stats.snapshots;
+    totals.signals += stats.signals;
+    maxLag = Math.max(maxLag, stats.maxLagMs);
+    const avgLag = stats.lagSamples ? stats.totalLagMs / stats.lagSamples : 0;
+    log(`  ${stats.updates} 条/秒 | 落库快照 ${stats.snapshots} | 信号 ${stats.signals} | 延迟 avg ${avgLag.toFixed(1)}ms max ${stats.maxLagMs}ms`);
+  }, 1000);
+
+  await new Promise(resolve => setTimeout(resolve, SECONDS * 1000));
+
+  clearInterval(report);
+  stream.stop();
+  await server.stop();
+  ingestor.stop();
+  console.log = log;
+
+  const stored = database.prepare('SELECT COUNT(*) as count FROM price_snapshots').get() as { count: number };
+  console.log(`\n✅ 发送 ${server.sent} 条，处理 ${totals.updates} 条（${(totals.updates / SECONDS).toFixed(0)} 条/秒），最大延迟 ${maxLag}ms`);
+  console.log(`   快照 ${stored.count} 行，信号 ${totals.signals} 个`);
+  database.close();
+}
+
+main().catch(error => {
+  console.error('❌ 压测失败:', error);
+  process.exit(1);
+});
@@ -0,0 +1,294 @@
+"""
+回测参数扫描（多进程）
+
+在同一份价格数据上，用 dashboard/backtest_engine.py 对参数网格或随机采样逐组回测，
+由进程池并行执行，每完成一组就写入报告目录 catalog.db（reports 表 sweep_id / params 列），
+Dashboard 回测页的「参数扫描」区按 PnL / 夏普 / 回撤画热力图，扫描进行中刷新即可看到进度。
+
+参数名与 TS BacktestConfig 一致：
+    minArbitrageGap, partialCloseAt, fullCloseAt, maxHoldHours,
+    maxDailyLoss, maxSingleTrade, maxDailyTrades, initialCapital
+取值写法：
+    name=a,b,c        取值列表（网格 / 随机选择）
+    name=lo:hi:step   网格范围（含端点）
+    name=lo:hi        随机搜索的均匀分布范围（maxDailyTrades 取整数）
+
+用法:
+    python scripts/sweep_backtest.py --prices reports/x.prices.csv \\
+        --param minArbitrageGap=0.01,0.015,0.02,0.03 --param maxHoldHours=6,12,24
+    python scripts/sweep_backtest.py --db data/trading_bot.db --days 30 --method random --samples 200 \\
+        --param minArbitrageGap=0.01:0.04 --param partialCloseAt=0.3:0.9 --param maxDailyTrades=1:10
+"""
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'dashboard'))
+
+import snapshot_replay  # noqa: E402
+from backtest_engine import CONFIG_FIELDS, BacktestParams, prepare_prices, run_backtest  # noqa: E402
+
+# 可扫描的参数：TS 配置名 -> BacktestParams 字段
+SWEEP_PARAMS = {path[-1]: field for field, path in CONFIG_FIELDS.items()}
+INTEGER_PARAMS = {'maxDailyTrades'}
+
+CATALOG_FILE = 'catalog.db'
+EQUITY_POINTS = 500
+
+# 目录表结构，与 src/services/execution/reportCatalog.ts 共用
+CATALOG_SCHEMA_PATH = PROJECT_ROOT / 'scripts' / 'report-catalog.sql'
+
+UPSERT_REPORT = """
+    INSERT INTO reports (
+      name, created_at, scenario, days, markets, initial_capital, min_arbitrage_gap, start_date, end_date,
+      total_trades, winning_trades, losing_trades, win_rate, total_pnl, total_pnl_percent,
+      avg_return, max_drawdown, sharpe_ratio, config, options, sweep_id, params
+    ) VALUES (
+      :name, :created_at, :scenario, :days, :markets, :initial_capital, :min_arbitrage_gap, :start_date, :end_date,
+      :totalTrades, :winningTrades, :losingTrades, :winRate, :totalPnL, :totalPnLPercent,
+      :avgReturn, :maxDrawdown, :sharpeRatio, :config, :options, :sweep_id, :params
+    )
+    ON CONFLICT(name) DO UPDATE SET
+      created_at = excluded.created_at,
+      total_trades = excluded.total_trades,
+      winning_trades = excluded.winning_trades,
+      losing_trades = excluded.losing_trades,
+      win_rate = excluded.win_rate,
+      total_pnl = excluded.total_pnl,
+      total_pnl_percent = excluded.total_pnl_percent,
+      avg_return = excluded.avg_return,
+      max_drawdown = excluded.max_drawdown,
+      sharpe_ratio = excluded.sharpe_ratio,
+      config = excluded.config,
+      options = excluded.options,
+      params = excluded.params
+"""
+
+UPSERT_EQUITY = """
+    INSERT INTO report_equity (name, points) VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET points = excluded.points
+"""
+
+
+def iso_now():
+    """与 JS Date.toISOString 相同的格式"""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def iso_ms(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+# ---------- 参数空间 ----------
+
+def parse_param(spec):
+    """name=a,b,c | name=lo:hi:step | name=lo:hi -> (name, {'values': [...]} | {'range': [lo, hi]})"""
+    name, _, value = spec.partition('=')
+    if name not in SWEEP_PARAMS:
+        raise ValueError(f'未知参数 {name}，可选: {", ".join(SWEEP_PARAMS)}')
+    cast = int if name in INTEGER_PARAMS else float
+
+    if ':' in value:
+        parts = [float(v) for v in value.split(':')]
+        if len(parts) == 3:
+            lo, hi, step = parts
+            values = np.arange(lo, hi + step / 2, step)
+            return name, {'values': [cast(round(v, 10)) for v in values]}
+        if len(parts) == 2:
+            return name, {'range': parts}
+        raise ValueError(f'无法解析取值范围: {spec}')
+    return name, {'values': [cast(v) for v in value.split(',') if v]}
+
+
+def grid(space):
+    names = list(space)
+    for name in names:
+        if 'values' not in space[name]:
+            raise ValueError(f'网格搜索需要取值列表或 lo:hi:step，{name} 只给了范围')
+    for combo in itertools.product(*(space[name]['values'] for name in names)):
+        yield dict(zip(names, combo))
+
+
+def random_samples(space, samples, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(samples):
+        combo = {}
+        for name, spec in space.items():
+            if 'values' in spec:
+                combo[name] = spec['values'][rng.integers(len(spec['values']))]
+            elif name in INTEGER_PARAMS:
+                combo[name] = int(rng.integers(int(spec['range'][0]), int(spec['range'][1]) + 1))
+            else:
+                combo[name] = float(rng.uniform(*spec['range']))
+        yield combo
+
+
+# ---------- 价格数据 ----------
+
+def load_prices(args):
+    if args.prices:
+        return prepare_prices(pd.read_csv(args.prices, dtype={'marketId': str, 'marketName': str})), Path(args.prices).name
+
+    end = datetime.fromisoformat(args.end) if args.end else datetime.now(timezone.utc).replace(tzinfo=None)
+    start = datetime.fromisoformat(args.start) if args.start else end - timedelta(days=args.days)
+    conn = sqlite3.connect(f'{Path(args.db).resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        prices = snapshot_replay.load_prices(conn, start.isoformat(' '), end.isoformat(' '))
+    finally:
+        conn.close()
+    return prices, f'{Path(args.db).name} {start:%Y-%m-%d}~{end:%Y-%m-%d}'
+
+
+# ---------- 进程池 ----------
+
+_PRICES = None
+
+
+def _init_worker(prices):
+    global _PRICES
+    _PRICES = prices
+
+
+def equity_points(trades, initial_capital, start_time, max_points=EQUITY_POINTS):
+    """与 reportCatalog.ts 的 equityCurve 相同：按平仓时间累计，超过 max_points 时等间隔抽样"""
+    ordered = trades.sort_values('exitTime', kind='stable')
+    times = ((ordered['exitTime'] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)).to_numpy()
+    equity = initial_capital + np.cumsum(ordered['pnl'].to_numpy(dtype=float))
+    points = [[int(start_time), float(initial_capital)]] + [[int(t), float(e)] for t, e in zip(times, equity)]
+    if len(points) <= max_points:
+        return points
+    step = (len(points) - 1) / (max_points - 1)
+    return [points[int(np.floor(k * step + 0.5))] for k in range(max_points)]
+
+
+def run_one(index, combo, base):
+    params = replace(base, **{SWEEP_PARAMS[name]: value for name, value in combo.items()})
+    result, trades = run_backtest(_PRICES, params, prepared=True)
+    equity = equity_points(trades, params.initial_capital, _PRICES['timestamp'].iloc[0])
+    return index, combo, params.to_config(), result, equity
+
+
+# ---------- 报告目录 ----------
+
+def add_missing_columns(conn, schema):
+    """早期目录缺少的列：在内存库里按 schema 建一份，与已有的表逐列对比后补齐"""
+    declared = sqlite3.connect(':memory:')
+    declared.executescript(schema)
+    tables = [row[0] for row in declared.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    for table in tables:
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        if not existing:
+            continue
+        for _, name, kind, *_ in declared.execute(f'PRAGMA table_info({table})'):
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {kind}')
+    declared.close()
+
+
+def open_catalog(path):
+    schema = CATALOG_SCHEMA_PATH.read_text(encoding='utf-8')
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute('PRAGMA foreign_keys = ON')
+    add_missing_columns(conn, schema)
+    conn.executescript(schema)
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回测参数扫描（多进程）')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--prices', help='价格 CSV（npm run backtest -- --dump-prices=... 导出）')
+    source.add_argument('--db', help='机器人数据库，回测其中记录的 price_snapshots')
+    parser.add_argument('--days', type=int, default=30, help='--db 时回测最近 N 天')
+    parser.add_argument('--start', help='--db 时的起始时间（UTC，ISO 格式）')
+    parser.add_argument('--end', help='--db 时的结束时间（UTC，ISO 格式）')
+    parser.add_argument('--param', action='append', default=[], help='扫描参数，可重复，见模块说明')
+    parser.add_argument('--method', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=100, help='随机搜索的组数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数')
+    parser.add_argument('--reports-dir', default='reports', help='catalog.db 所在目录')
+    args = parser.parse_args()
+
+    if not args.param:
+        parser.error('至少指定一个 --param')
+    try:
+        space = dict(parse_param(spec) for spec in args.param)
+        combos = list(grid(space) if args.method == 'grid' else random_samples(space, args.samples, args.seed))
+    except ValueError as e:
+        parser.error(str(e))
+
+    prices, source_label = load_prices(args)
+    if prices.empty:
+        print('❌ 没有价格数据')
+        sys.exit(1)
+
+    t = prices['timestamp'].to_numpy()
+    start_date, end_date = iso_ms(t[0]), iso_ms(t[-1])
+    markets = int(prices['marketId'].nunique())
+    days = max(1, int(round((t[-1] - t[0]) / 86_400_000)))
+
+    reports_dir = Path(args.reports_dir)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    catalog_path = reports_dir / CATALOG_FILE
+    conn = open_catalog(catalog_path)
+
+    sweep_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+    conn.execute(
+        'INSERT INTO sweeps (id, created_at, source, method, space, runs) VALUES (?, ?, ?, ?, ?, ?)',
+        (sweep_id, iso_now(), source_label, args.method, json.dumps(space), len(combos)),
+    )
+    conn.commit()
+
+    print(f'🧪 参数扫描 {sweep_id}: {len(combos)} 组参数，{len(prices):,} 个价格点，{markets} 个市场，{args.workers} 个进程')
+    options = {'scenario': 'SWEEP', 'source': source_label, 'days': days, 'markets': markets, 'sweep': sweep_id}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(prices,)) as pool:
+        futures = [pool.submit(run_one, i, combo, BacktestParams()) for i, combo in enumerate(combos, start=1)]
+        for done, future in enumerate(as_completed(futures), start=1):
+            index, combo, config, result, equity = future.result()
+            name = f'sweep-{sweep_id}-{index:04d}'
+            config = {**config, 'startDate': start_date, 'endDate': end_date}
+            conn.execute(UPSERT_REPORT, {
+                **result,
+                'name': name,
+                'created_at': iso_now(),
+                'scenario': 'SWEEP',
+                'days': days,
+                'markets': markets,
+                'initial_capital': config['initialCapital'],
+                'min_arbitrage_gap': config['minArbitrageGap'],
+                'start_date': start_date,
+                'end_date': end_date,
+                'config': json.dumps(config),
+                'options': json.dumps(options),
+                'sweep_id': sweep_id,
+                'params': json.dumps(combo),
+            })
+            conn.execute(UPSERT_EQUITY, (name, json.dumps(equity)))
+            conn.commit()
+
+            values = ' '.join(f'{k}={v:g}' for k, v in combo.items())
+            print(f"[{done}/{len(combos)}] {values} → 收益 {result['totalPnLPercent']:.2f}% "
+                  f"夏普 {result['sharpeRatio']:.2f} 回撤 {result['maxDrawdown']:.2f}% ({result['totalTrades']} 笔)")
+
+    conn.close()
+    print(f'✅ 完成，用时 {time.perf_counter() - started:.1f}s，结果已写入 {catalog_path}')
+
+
+if __name__ == '__main__':
+    main()
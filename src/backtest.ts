@@ -1,7 +1,13 @@
 import 'dotenv/config';
-import { BacktestEngine, BacktestConfig } from './services/execution/backtestEngine';
+import { BacktestEngine, BacktestConfig, HistoricalPrice } from './services/execution/backtestEngine';
+import { BacktestResult } from './services/execution/virtualExecutor';
 import { MockDataGenerator } from './services/execution/mockDataGenerator';
-import { writeFileSync, existsSync, mkdirSync } from 'fs';
+import { columnarPathFor, writeColumnarReport } from './services/execution/columnarReport';
+import { defaultConfig } from './config';
+import { catalogPathFor, recordReport, reportNameFor, tradeEquityCurve } from './services/execution/reportCatalog';
+import { readSnapshotChunks, SnapshotReplayOptions } from './services/execution/snapshotReplay';
+import Database from 'better-sqlite3';
+import { writeFileSync, appendFileSync, existsSync, mkdirSync } from 'fs';
 import { join, dirname, isAbsolute } from 'path';
 
 /**
@@ -10,14 +16,20 @@ import { join, dirname, isAbsolute } from 'path';
  * 使用方式:
  * npm run backtest           # 默认7天数据
  * npm run backtest -- --days=14 --scenario=QUICK_RETURN
+ * npm run backtest -- --scenario=REPLAY --days=30   # 回放数据库中记录的价格快照
  * npm run backtest -- --help
  */
 
 interface BacktestOptions {
   days: number;
-  scenario?: 'QUICK_RETURN' | 'SLOW_RETURN' | 'NO_RETURN' | 'WORSEN' | 'RANDOM';
+  scenario?: 'QUICK_RETURN' | 'SLOW_RETURN' | 'NO_RETURN' | 'WORSEN' | 'RANDOM' | 'REPLAY';
   markets: number;
+  start?: string;
+  end?: string;
+  chunkSize?: number;
   output: string;
+  format: 'json' | 'columnar' | 'both';
+  dumpPrices?: string;
 }
 
 function parseArgs(): BacktestOptions {
@@ -27,6 +39,7 @@ function parseArgs(): BacktestOptions {
     scenario: 'RANDOM',
     markets: 3,
     output: './backtest-report.json',
+    format: 'both',
   };
 
   for (const arg of args) {
@@ -38,14 +51,23 @@ function parseArgs(): BacktestOptions {
 
 选项:
   --days=N          回测天数 (默认: 7)
-  --scenario=TYPE   测试场景: QUICK_RETURN, SLOW_RETURN, NO_RETURN, WORSEN, RANDOM (默认: RANDOM)
+  --scenario=TYPE   测试场景: QUICK_RETURN, SLOW_RETURN, NO_RETURN, WORSEN, RANDOM, REPLAY (默认: RANDOM)
+                    REPLAY 分块回放数据库（DB_PATH）中记录的 price_snapshots
   --markets=N       模拟市场数量 (默认: 3)
+  --start=DATE      REPLAY 起始时间（UTC，默认: 结束时间前 --days 天）
+  --end=DATE        REPLAY 结束时间（UTC，不含，默认: 当前时间）
+  --chunk-size=N    REPLAY 每次读取的快照行数 (默认: 50000)
   --output=PATH     报告输出路径 (默认: ./backtest-report.json)
+  --format=TYPE     报告格式: json, columnar, both (默认: both)
+                    columnar 额外写出 <output>.trades.bin（JSON 头部 + 列式交易数据）
+  --dump-prices=PATH 把本次使用的价格数据写成 CSV，供 Python 引擎对拍
+                    （scripts/backtest_parity.py）
   --help, -h        显示帮助
 
 示例:
   npm run backtest -- --days=14 --scenario=QUICK_RETURN
   npm run backtest -- --markets=5 --days=30
+  npm run backtest -- --scenario=REPLAY --start=2024-01-01 --end=2024-02-01
 `);
       process.exit(0);
     }
@@ -58,17 +80,74 @@ function parseArgs(): BacktestOptions {
       options.markets = parseInt(arg.split('=')[1]);
     } else if (arg.startsWith('--output=')) {
       options.output = arg.split('=')[1];
+    } else if (arg.startsWith('--format=')) {
+      options.format = arg.split('=')[1] as BacktestOptions['format'];
+    } else if (arg.startsWith('--dump-prices=')) {
+      options.dumpPrices = arg.split('=')[1];
+    } else if (arg.startsWith('--start=')) {
+      options.start = arg.split('=')[1];
+    } else if (arg.startsWith('--end=')) {
+      options.end = arg.split('=')[1];
+    } else if (arg.startsWith('--chunk-size=')) {
+      options.chunkSize = parseInt(arg.split('=')[1]);
     }
   }
 
   return options;
 }
 
+/**
+ * 价格数据写成 CSV（timestamp 为 epoch 毫秒），列名与 HistoricalPrice 一致，逐块追加
+ */
+function writePriceCsv(path: string, chunks: Iterable<HistoricalPrice[]>): number {
+  const dir = dirname(path);
+  if (!existsSync(dir)) {
+    mkdirSync(dir, { recursive: true });
+  }
+  writeFileSync(path, 'timestamp,marketId,marketName,yesPrice,noPrice\n');
+  let count = 0;
+  for (const chunk of chunks) {
+    const lines = chunk.map(p =>
+      [p.timestamp.getTime(), JSON.stringify(p.marketId), JSON.stringify(p.marketName), p.yesPrice, p.noPrice].join(',')
+    );
+    appendFileSync(path, lines.join('\n') + '\n');
+    count += chunk.length;
+  }
+  return count;
+}
+
+/**
+ * 回放区间：--start / --end，缺省时为截至现在的 --days 天
+ */
+function replayRange(options: BacktestOptions): SnapshotReplayOptions {
+  const endTime = options.end ? new Date(options.end) : new Date();
+  const startTime = options.start
+    ? new Date(options.start)
+    : new Date(endTime.getTime() - options.days * 24 * 60 * 60 * 1000);
+  return { startTime, endTime, chunkSize: options.chunkSize };
+}
+
+/**
+ * 透传价格块，同时记录出现过的市场
+ */
+function* trackMarkets(chunks: Iterable<HistoricalPrice[]>, seen: Set<string>): Generator<HistoricalPrice[]> {
+  for (const chunk of chunks) {
+    for (const p of chunk) {
+      seen.add(p.marketId);
+    }
+    yield chunk;
+  }
+}
+
 async function runBacktest() {
   const options = parseArgs();
 
   console.log('🔄 Polymarket 虚拟盘回测');
   console.log('========================================');
+  if (options.scenario === 'REPLAY') {
+    return runReplay(options);
+  }
+
   console.log(`回测天数: ${options.days}`);
   console.log(`测试场景: ${options.scenario}`);
   console.log(`市场数量: ${options.markets}`);
@@ -95,18 +174,69 @@ async function runBacktest() {
 
   console.log(`📊 生成价格数据: ${priceData.length} 个点\n`);
 
+  if (options.dumpPrices) {
+    writePriceCsv(options.dumpPrices, [priceData]);
+    console.log(`✅ 价格数据已保存: ${options.dumpPrices}\n`);
+  }
+
   // 配置回测
-  const config: BacktestConfig = {
-    initialCapital: 1000,
-    startDate: new Date(Date.now() - options.days * 24 * 60 * 60 * 1000),
-    endDate: new Date(),
-    minArbitrageGap: 0.015,
-  };
+  const config = backtestConfig(new Date(Date.now() - options.days * 24 * 60 * 60 * 1000), new Date());
 
   // 运行回测
   const engine = new BacktestEngine(config);
   const result = await engine.runBacktest(priceData);
 
+  saveReport(options, config, result);
+}
+
+/**
+ * 回放数据库中记录的价格快照：分块读取并逐块送入回测引擎，整段区间不会同时留在内存里
+ */
+async function runReplay(options: BacktestOptions) {
+  const range = replayRange(options);
+  console.log(`回放区间: ${range.startTime.toISOString()} ~ ${range.endTime.toISOString()}`);
+  console.log(`数据库: ${defaultConfig.database.path}`);
+  console.log('========================================\n');
+
+  const database = new Database(defaultConfig.database.path, { readonly: true, fileMustExist: true });
+  try {
+    if (options.dumpPrices) {
+      const count = writePriceCsv(options.dumpPrices, readSnapshotChunks(database, range));
+      console.log(`✅ 价格数据已保存: ${options.dumpPrices}（${count} 个点）\n`);
+    }
+
+    const config = backtestConfig(range.startTime, range.endTime);
+    const markets = new Set<string>();
+    const engine = new BacktestEngine(config);
+    const result = await engine.runBacktestStream(trackMarkets(readSnapshotChunks(database, range), markets));
+
+    options.markets = markets.size;
+    options.days = Math.ceil((range.endTime.getTime() - range.startTime.getTime()) / (24 * 60 * 60 * 1000));
+    saveReport(options, config, result);
+  } finally {
+    database.close();
+  }
+}
+
+function backtestConfig(startDate: Date, endDate: Date): BacktestConfig {
+  return {
+    initialCapital: 1000,
+    startDate,
+    endDate,
+    minArbitrageGap: defaultConfig.strategy.thresholds.minArbitrageGap,
+    takeProfit: { ...defaultConfig.strategy.takeProfit },
+    risk: {
+      maxDailyLoss: defaultConfig.risk.maxDailyLoss,
+      maxSingleTrade: defaultConfig.risk.maxSingleTrade,
+      maxDailyTrades: defaultConfig.risk.maxDailyTrades,
+    },
+  };
+}
+
+/**
+ * 保存报告、登记到报告目录并打印评估
+ */
+function saveReport(options: BacktestOptions, config: BacktestConfig, result: BacktestResult) {
   // 确保报告目录存在
   const reportDir = dirname(options.output);
   if (!existsSync(reportDir)) {
@@ -115,24 +245,56 @@ async function runBacktest() {
   
   // 保存报告
   const reportPath = isAbsolute(options.output) ? options.output : join(process.cwd(), options.output);
-  writeFileSync(reportPath, JSON.stringify({
-    config: {
-      ...config,
-      startDate: config.startDate.toISOString(),
-      endDate: config.endDate.toISOString(),
-    },
-    options,
-    result: {
-      ...result,
-      trades: result.trades.map(t => ({
-        ...t,
-        entryTime: t.entryTime.toISOString(),
-        exitTime: t.exitTime?.toISOString(),
-      })),
-    },
-  }, null, 2));
+  const reportConfig = {
+    ...config,
+    startDate: config.startDate.toISOString(),
+    endDate: config.endDate.toISOString(),
+  };
+  const createdAt = new Date().toISOString();
+  const { trades, ...headline } = result;
+  let columnarPath: string | undefined;
+
+  if (options.format !== 'columnar') {
+    writeFileSync(reportPath, JSON.stringify({
+      config: reportConfig,
+      options,
+      result: {
+        ...result,
+        trades: result.trades.map(t => ({
+          ...t,
+          entryTime: t.entryTime.toISOString(),
+          exitTime: t.exitTime?.toISOString(),
+        })),
+      },
+    }, null, 2));
+    console.log(`\n✅ 回测报告已保存: ${reportPath}`);
+  }
 
-  console.log(`\n✅ 回测报告已保存: ${reportPath}`);
+  if (options.format !== 'json') {
+    // 头部只放核心指标，交易明细按列存储
+    columnarPath = columnarPathFor(reportPath);
+    writeColumnarReport(columnarPath, {
+      createdAt,
+      config: reportConfig,
+      options,
+      result: headline,
+    }, trades);
+    console.log(`✅ 列式报告已保存: ${columnarPath}`);
+  }
+
+  // 登记到报告目录，Dashboard 据此列出和对比所有回测
+  const catalogPath = catalogPathFor(reportPath);
+  recordReport(catalogPath, {
+    name: reportNameFor(reportPath),
+    createdAt,
+    jsonPath: options.format !== 'columnar' ? reportPath : undefined,
+    columnarPath,
+    config: reportConfig,
+    options,
+    result: headline,
+    equity: tradeEquityCurve(trades, config.initialCapital, config.startDate.getTime()),
+  });
+  console.log(`✅ 已登记到报告目录: ${catalogPath}`);
 
   // 简单评估
   console.log('\n📈 策略评估:');
@@ -9,6 +9,41 @@ export const defaultConfig: BotConfig = {
   database: {
     path: process.env.DB_PATH || './data/trading_bot.db',
   },
+  polymarket: {
+    baseUrl: 'https://gamma-api.polymarket.com',
+    pageSize: 100,
+    // 全量扫描所有活跃市场（0 为不限）
+    maxMarkets: parseInt(process.env.POLYMARKET_MAX_MARKETS || '0'),
+    concurrency: parseInt(process.env.POLYMARKET_CONCURRENCY || '16'),
+    timeoutMs: parseInt(process.env.POLYMARKET_TIMEOUT_MS || '10000'),
+  },
+  snapshots: {
+    // yes / no 价格相对上次写入变动超过该值才写快照（小于最小报价单位 0.001，任何一跳都会写）
+    epsilon: parseFloat(process.env.PRICE_SNAPSHOT_EPSILON || '0.0005'),
+    // 价格没变时最长多久写一次快照（分钟）
+    heartbeatMinutes: parseInt(process.env.PRICE_SNAPSHOT_HEARTBEAT_MINUTES || '30'),
+  },
+  stream: {
+    // 推送行情源地址（ws:// 或 wss://），为空则只用轮询
+    url: process.env.PRICE_STREAM_URL || '',
+    // 合并后的快照落库间隔
+    flushIntervalMs: parseInt(process.env.PRICE_STREAM_FLUSH_MS || '1000'),
+    // 超过该时长没有推送视为断流，轮询接管价格抓取
+    staleMs: parseInt(process.env.PRICE_STREAM_STALE_MS || '30000'),
+  },
+  retention: {
+    // 原始价格快照保留天数（0 为不清理），更早的按 UTC 整天移入归档库
+    snapshotDays: parseInt(process.env.SNAPSHOT_RETENTION_DAYS || '30'),
+    // 归档库路径，设为空字符串则直接删除
+    archivePath: process.env.SNAPSHOT_ARCHIVE_PATH ?? './data/snapshots_archive.db',
+    // 各周期 K 线保留天数（0 为永久保留）
+    barDays: {
+      '1m': 90,
+      '5m': 365,
+      '1h': 0,
+      '1d': 0,
+    },
+  },
   risk: {
     maxDailyLoss: 0.05,
     maxSingleTrade: 0.20,
@@ -0,0 +1,173 @@
+import Database from 'better-sqlite3';
+import { migrate } from '../migrate';
+import { prepared } from '../statements';
+import { MarketRepository } from '../repositories/market';
+import { PriceRepository } from '../repositories/price';
+import { SignalRepository } from '../repositories/signal';
+import { Market, PriceSnapshot, Signal } from '../../types';
+
+function market(id: string, overrides: Partial<Market> = {}): Market {
+  return {
+    id,
+    slug: id,
+    question: `Market ${id}`,
+    category: 'Crypto',
+    created_at: new Date('2024-03-01T00:00:00Z'),
+    resolved: false,
+    active: true,
+    ...overrides,
+  };
+}
+
+function snapshot(marketId: string, yes: number, no: number): PriceSnapshot {
+  return { market_id: marketId, yes_price: yes, no_price: no, yes_liquidity: 100, no_liquidity: 100, volume_24h: 1000 };
+}
+
+function signal(marketId: string): Signal {
+  return {
+    market_id: marketId,
+    signal_type: 'ARBITRAGE',
+    confidence: 0.8,
+    reason: 'test',
+    trigger_price: 0.97,
+    suggested_amount: 50,
+    status: 'pending',
+    level: 'CONSERVATIVE',
+    expiry_minutes: 3,
+  } as Signal;
+}
+
+describe('repositories', () => {
+  let database: Database.Database;
+
+  beforeEach(() => {
+    database = new Database(':memory:');
+    migrate(database);
+  });
+
+  afterEach(() => {
+    database.close();
+  });
+
+  test('should prepare each statement once per connection', () => {
+    const sql = 'SELECT COUNT(*) as count FROM markets';
+    expect(prepared(database, sql)).toBe(prepared(database, sql));
+
+    const other = new Database(':memory:');
+    migrate(other);
+    expect(prepared(other, sql)).not.toBe(prepared(database, sql));
+    other.close();
+  });
+
+  test('should upsert markets in bulk and skip unchanged rows', () => {
+    const repo = new MarketRepository(database);
+    const markets = ['a', 'b', 'c'].map(id => market(id));
+
+    expect(repo.upsertMany(markets)).toBe(3);
+    expect(repo.upsertMany(markets)).toBe(0);
+    expect(repo.upsertMany([market('b', { question: 'Renamed' }), market('c'), market('d')])).toBe(2);
+
+    expect(repo.findById('b')?.question).toBe('Renamed');
+    expect(repo.findActive()).toHaveLength(4);
+  });
+
+  test('should store a missing or invalid date as NULL', () => {
+    const repo = new MarketRepository(database);
+    repo.upsert(market('a', { created_at: new Date('not a date') }));
+    expect(database.prepare("SELECT created_at FROM markets WHERE id = 'a'").get()).toEqual({ created_at: null });
+  });
+
+  test('should insert a cycle of snapshots in one transaction with one timestamp', () => {
+    new MarketRepository(database).upsertMany([market('a'), market('b')]);
+    const repo = new PriceRepository(database);
+
+    const count = repo.insertSnapshots(
+      [snapshot('a', 0.48, 0.5), snapshot('b', 0.3, 0.68)],
+      new Date('2024-03-01T10:00:30.500Z')
+    );
+
+    expect(count).toBe(2);
+    expect(database.prepare('SELECT DISTINCT timestamp FROM price_snapshots').all()).toEqual([
+      { timestamp: '2024-03-01 10:00:30' },
+    ]);
+    // K 线触发器照常维护
+    expect(database.prepare("SELECT COUNT(*) as count FROM price_bars WHERE interval = '1m'").get()).toEqual({ count: 2 });
+  });
+
+  test('should keep the newest snapshot in latest_prices when snapshots arrive out of order', () => {
+    new MarketRepository(database).upsertMany([market('a')]);
+    const repo = new PriceRepository(database);
+
+    repo.create(snapshot('a', 0.5, 0.48), new Date('2024-03-01T10:05:00Z'));
+    repo.create(snapshot('a', 0.3, 0.68), new Date('2024-03-01T10:00:00Z'));
+
+    expect(repo.findLatestAll()).toEqual([
+      expect.objectContaining({ market_id: 'a', yes_price: 0.5, timestamp: new Date('2024-03-01T10:05:00Z') }),
+    ]);
+  });
+
+  test('should find snapshots in a time range stored as SQLite UTC text', () => {
+    new MarketRepository(database).upsertMany([market('a')]);
+    const repo = new PriceRepository(database);
+    for (const minute of [0, 5, 10, 15]) {
+      repo.create(snapshot('a', 0.4 + minute / 100, 0.5), new Date(Date.UTC(2024, 2, 1, 10, minute)));
+    }
+
+    const found = repo.findByTimeRange('a', new Date('2024-03-01T10:05:00Z'), new Date('2024-03-01T10:10:00Z'));
+    expect(found.map(row => row.timestamp)).toEqual(['2024-03-01 10:05:00', '2024-03-01 10:10:00']);
+  });
+
+  test('should backfill latest_prices from the newest snapshot of each market', () => {
+    new MarketRepository(database).upsertMany([market('a'), market('b')]);
+    const repo = new PriceRepository(database);
+    // 写入顺序与时间顺序不同，回填只能按 timestamp 取最新一行
+    repo.create(snapshot('a', 0.5, 0.48), new Date('2024-03-01T10:05:00Z'));
+    repo.create(snapshot('a', 0.3, 0.68), new Date('2024-03-01T10:00:00Z'));
+    repo.create(snapshot('b', 0.2, 0.78), new Date('2024-03-01T09:00:00Z'));
+    repo.create(snapshot('b', 0.25, 0.73), new Date('2024-03-01T09:30:00Z'));
+
+    // 模拟升级前的旧库：没有最新价格表，迁移时新建并回填
+    database.exec('DROP TRIGGER trg_price_snapshots_latest; DROP TABLE latest_prices');
+    expect(migrate(database)).toContain('latest_prices');
+
+    const latest = repo.findLatestAll().sort((x, y) => x.market_id.localeCompare(y.market_id));
+    expect(latest.map(row => [row.market_id, row.yes_price, row.timestamp.toISOString()])).toEqual([
+      ['a', 0.5, '2024-03-01T10:05:00.000Z'],
+      ['b', 0.25, '2024-03-01T09:30:00.000Z'],
+    ]);
+    // snapshot_id 指向的正是取到的那一行
+    expect(database.prepare(`
+      SELECT COUNT(*) as count FROM latest_prices lp
+      JOIN price_snapshots ps ON ps.id = lp.snapshot_id AND ps.timestamp = lp.timestamp AND ps.yes_price = lp.yes_price
+    `).get()).toEqual({ count: 2 });
+
+    // 表已存在时迁移不再回填
+    database.exec('DELETE FROM latest_prices');
+    expect(migrate(database)).not.toContain('latest_prices');
+    expect(repo.findLatestAll()).toEqual([]);
+  });
+
+  test('should roll back the whole batch when one row fails', () => {
+    new MarketRepository(database).upsertMany([market('a')]);
+    const repo = new PriceRepository(database);
+
+    expect(() => repo.insertSnapshots([snapshot('a', 0.48, 0.5), { ...snapshot('a', 0.5, 0.5), yes_price: null as any }]))
+      .toThrow();
+    expect(database.prepare('SELECT COUNT(*) as count FROM price_snapshots').get()).toEqual({ count: 0 });
+  });
+
+  test('should update signal status with and without a timestamp column', () => {
+    new MarketRepository(database).upsertMany([market('a')]);
+    const repo = new SignalRepository(database);
+    const confirmed = repo.create(signal('a'));
+    const rejected = repo.create(signal('a'));
+
+    repo.updateStatus(confirmed, 'confirmed');
+    repo.updateStatus(rejected, 'rejected');
+
+    expect(repo.findById(confirmed)).toMatchObject({ status: 'confirmed' });
+    expect((repo.findById(confirmed) as any).confirmed_at).not.toBeNull();
+    expect(repo.findById(rejected)).toMatchObject({ status: 'rejected', confirmed_at: null });
+    expect(repo.findPending()).toHaveLength(0);
+  });
+});
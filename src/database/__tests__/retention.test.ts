@@ -0,0 +1,155 @@
+import Database from 'better-sqlite3';
+import { mkdtempSync } from 'fs';
+import { tmpdir } from 'os';
+import { join } from 'path';
+import { migrate } from '../migrate';
+import { rebuildRollups } from '../rollups';
+import { applyRetention, RetentionPolicy, retentionCutoff } from '../retention';
+
+interface BarRow {
+  interval: string;
+  bucket: string;
+  open_time: string;
+  close_time: string;
+  yes_open: number;
+  yes_high: number;
+  yes_low: number;
+  yes_close: number;
+  total_close: number;
+  min_deviation: number;
+  max_deviation: number;
+  volume_24h: number;
+  snapshots: number;
+}
+
+function insertSnapshot(database: Database.Database, timestamp: string, yes: number, no: number, volume = 100): void {
+  database
+    .prepare('INSERT INTO price_snapshots (market_id, timestamp, yes_price, no_price, volume_24h) VALUES (?, ?, ?, ?, ?)')
+    .run('m1', timestamp, yes, no, volume);
+}
+
+function bars(database: Database.Database, interval: string): BarRow[] {
+  return database
+    .prepare('SELECT * FROM price_bars WHERE interval = ? ORDER BY bucket')
+    .all(interval) as BarRow[];
+}
+
+function policy(overrides: Partial<RetentionPolicy> = {}): RetentionPolicy {
+  return {
+    snapshotDays: 30,
+    archivePath: '',
+    barDays: { '1m': 0, '5m': 0, '1h': 0, '1d': 0 },
+    ...overrides,
+  };
+}
+
+describe('price bars and retention', () => {
+  let database: Database.Database;
+
+  beforeEach(() => {
+    database = new Database(':memory:');
+    migrate(database);
+    database.exec("INSERT INTO markets (id, slug, question) VALUES ('m1', 'm1', 'Market 1')");
+  });
+
+  afterEach(() => {
+    database.close();
+  });
+
+  test('should maintain OHLC bars on insert, even when snapshots arrive out of order', () => {
+    insertSnapshot(database, '2024-03-01 10:00:30', 0.50, 0.48, 100);
+    insertSnapshot(database, '2024-03-01 10:00:50', 0.55, 0.40, 300);
+    insertSnapshot(database, '2024-03-01 10:00:10', 0.45, 0.50, 200);
+    insertSnapshot(database, '2024-03-01 10:07:00', 0.52, 0.47, 400);
+
+    const minute = bars(database, '1m');
+    expect(minute).toHaveLength(2);
+    expect(minute[0]).toMatchObject({
+      bucket: '2024-03-01 10:00:00',
+      open_time: '2024-03-01 10:00:10',
+      close_time: '2024-03-01 10:00:50',
+      yes_open: 0.45,
+      yes_high: 0.55,
+      yes_low: 0.45,
+      yes_close: 0.55,
+      volume_24h: 300,
+      snapshots: 3,
+    });
+    expect(minute[0].total_close).toBeCloseTo(0.95);
+    expect(minute[0].min_deviation).toBeCloseTo(0.02);
+    expect(minute[0].max_deviation).toBeCloseTo(0.05);
+
+    const fiveMinutes = bars(database, '5m');
+    expect(fiveMinutes.map(bar => [bar.bucket, bar.snapshots])).toEqual([
+      ['2024-03-01 10:00:00', 3],
+      ['2024-03-01 10:05:00', 1],
+    ]);
+    expect(bars(database, '1h')[0]).toMatchObject({ bucket: '2024-03-01 10:00:00', snapshots: 4, yes_close: 0.52 });
+    expect(bars(database, '1d')[0]).toMatchObject({ bucket: '2024-03-01 00:00:00', snapshots: 4 });
+  });
+
+  test('should rebuild the same bars from raw snapshots', () => {
+    for (let i = 0; i < 50; i++) {
+      const second = (i * 37) % 3600;
+      const time = `2024-03-01 10:${String(Math.floor(second / 60)).padStart(2, '0')}:${String(second % 60).padStart(2, '0')}`;
+      insertSnapshot(database, time, 0.4 + (i % 7) / 100, 0.5 - (i % 5) / 100, i);
+    }
+    const maintained = database.prepare('SELECT * FROM price_bars ORDER BY interval, bucket').all();
+
+    rebuildRollups(database);
+
+    expect(database.prepare('SELECT * FROM price_bars ORDER BY interval, bucket').all()).toEqual(maintained);
+  });
+
+  test('should cut off at a UTC day boundary', () => {
+    expect(retentionCutoff(new Date('2024-03-31T15:20:00Z'), 30)).toBe('2024-03-01 00:00:00');
+    expect(retentionCutoff(new Date('2024-03-31T00:00:00Z'), 1)).toBe('2024-03-30 00:00:00');
+  });
+
+  test('should archive and delete old snapshots while keeping their bars', () => {
+    insertSnapshot(database, '2024-02-15 12:00:00', 0.50, 0.48);
+    insertSnapshot(database, '2024-02-29 23:59:59', 0.51, 0.47);
+    insertSnapshot(database, '2024-03-01 00:00:00', 0.52, 0.46);
+    insertSnapshot(database, '2024-03-30 08:00:00', 0.53, 0.45);
+    const dailyBars = bars(database, '1d');
+
+    const archivePath = join(mkdtempSync(join(tmpdir(), 'retention-')), 'archive.db');
+    const result = applyRetention(database, policy({ archivePath }), new Date('2024-03-31T15:20:00Z'), 1);
+
+    expect(result).toMatchObject({ cutoff: '2024-03-01 00:00:00', archived: 2, deleted: 2 });
+    const remaining = database.prepare('SELECT timestamp FROM price_snapshots ORDER BY timestamp').all();
+    expect(remaining).toEqual([{ timestamp: '2024-03-01 00:00:00' }, { timestamp: '2024-03-30 08:00:00' }]);
+    expect(bars(database, '1d')).toEqual(dailyBars);
+
+    // 归档库带着市场信息，可以直接回放
+    const archive = new Database(archivePath, { readonly: true });
+    const archived = archive.prepare(`
+      SELECT ps.timestamp, m.question FROM price_snapshots ps JOIN markets m ON ps.market_id = m.id ORDER BY ps.timestamp
+    `).all();
+    archive.close();
+    expect(archived).toEqual([
+      { timestamp: '2024-02-15 12:00:00', question: 'Market 1' },
+      { timestamp: '2024-02-29 23:59:59', question: 'Market 1' },
+    ]);
+
+    // 重建 K 线不会丢掉已清理快照的那部分
+    rebuildRollups(database);
+    expect(bars(database, '1d')).toEqual(dailyBars);
+  });
+
+  test('should drop expired bars per interval and keep snapshots when disabled', () => {
+    insertSnapshot(database, '2024-01-10 12:00:00', 0.50, 0.48);
+    insertSnapshot(database, '2024-03-30 12:00:00', 0.51, 0.47);
+
+    const result = applyRetention(
+      database,
+      policy({ snapshotDays: 0, barDays: { '1m': 7, '5m': 0, '1h': 0, '1d': 0 } }),
+      new Date('2024-03-31T00:00:00Z')
+    );
+
+    expect(result).toMatchObject({ cutoff: null, deleted: 0, bars: { '1m': 1 } });
+    expect(database.prepare('SELECT COUNT(*) as count FROM price_snapshots').get()).toEqual({ count: 2 });
+    expect(bars(database, '1m').map(bar => bar.bucket)).toEqual(['2024-03-30 12:00:00']);
+    expect(bars(database, '5m')).toHaveLength(2);
+  });
+});
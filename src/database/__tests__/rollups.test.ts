@@ -0,0 +1,130 @@
+import Database from 'better-sqlite3';
+import { migrate } from '../migrate';
+import { rebuildRollups } from '../rollups';
+import { MarketRepository } from '../repositories/market';
+import { OpportunityRepository, SignalRepository, TradeRepository } from '../repositories/signal';
+import { ArbitrageStrategy } from '../../services/strategy/arbitrage';
+import { Market, Signal, Trade } from '../../types';
+
+// 浮点累加的顺序不同（触发器逐行加减 / 重建一次求和），比较前统一舍入
+const ROLLUP_QUERIES = {
+  daily_pnl: 'SELECT day, ROUND(total_pnl, 9) AS total_pnl, trades, wins, losses, max_pnl, min_pnl FROM daily_pnl ORDER BY day',
+  daily_opportunities: `
+    SELECT day, opportunities, ROUND(deviation_sum, 9) AS deviation_sum, ROUND(max_deviation, 9) AS max_deviation, high_value
+    FROM daily_opportunities ORDER BY day
+  `,
+  daily_signal_counts: `
+    SELECT day, level, status, signals, ROUND(confidence_sum, 9) AS confidence_sum
+    FROM daily_signal_counts ORDER BY day, level, status
+  `,
+};
+
+function market(id: string): Market {
+  return { id, slug: id, question: `Market ${id}`, resolved: false, active: true };
+}
+
+function signal(marketId: string, confidence: number, level: Signal['level']): Signal {
+  return {
+    market_id: marketId,
+    signal_type: 'ARBITRAGE',
+    confidence,
+    reason: 'test',
+    trigger_price: 0.97,
+    suggested_amount: 50,
+    status: 'pending',
+    level,
+    expiry_minutes: 3,
+  } as Signal;
+}
+
+function trade(marketId: string, status: Trade['status'] = 'pending'): Trade {
+  return { market_id: marketId, side: 'YES', amount: 50, price: 0.48, quantity: 104, status };
+}
+
+describe('daily rollups', () => {
+  let database: Database.Database;
+  let signals: SignalRepository;
+  let trades: TradeRepository;
+  let opportunities: OpportunityRepository;
+
+  function rollups(): Record<string, unknown[]> {
+    return Object.fromEntries(
+      Object.entries(ROLLUP_QUERIES).map(([table, sql]) => [table, database.prepare(sql).all()])
+    );
+  }
+
+  beforeEach(() => {
+    database = new Database(':memory:');
+    migrate(database);
+    new MarketRepository(database).upsertMany([market('a'), market('b')]);
+    signals = new SignalRepository(database);
+    trades = new TradeRepository(database);
+    opportunities = new OpportunityRepository(database);
+  });
+
+  afterEach(() => {
+    database.close();
+  });
+
+  test('should maintain the same rollups as a full rebuild', () => {
+    const strategy = new ArbitrageStrategy();
+    for (const [marketId, yes, no] of [['a', 0.48, 0.48], ['a', 0.49, 0.49], ['b', 0.45, 0.48]] as const) {
+      opportunities.create(strategy.detectOpportunity(marketId, marketId, yes, no)!);
+    }
+
+    const executed = signals.create(signal('a', 0.1, 'CONSERVATIVE'));
+    const confirmed = signals.create(signal('a', 0.2, 'CONSERVATIVE'));
+    const rejected = signals.create(signal('b', 0.7, 'RISKY'));
+    signals.create(signal('b', 0.3, 'AGGRESSIVE'));
+    signals.updateStatus(executed, 'confirmed');
+    signals.updateStatus(executed, 'executed');
+    signals.updateStatus(confirmed, 'confirmed');
+    signals.updateStatus(rejected, 'rejected');
+
+    const win = trades.create(trade('a'));
+    const resettled = trades.create(trade('a'));
+    const insertedSettled = trades.create(trade('b', 'settled'));
+    trades.create(trade('b'));
+    trades.updatePnl(win, 5);
+    trades.updatePnl(resettled, -3);
+    // 重新结算：改成新的盈亏
+    trades.updatePnl(resettled, 4);
+    // 以 settled 写入后补记盈亏
+    trades.updatePnl(insertedSettled, -1.5);
+
+    const maintained = rollups();
+    rebuildRollups(database);
+
+    expect(rollups()).toEqual(maintained);
+    expect(maintained.daily_pnl).toEqual([
+      expect.objectContaining({ total_pnl: 7.5, trades: 3, wins: 2, losses: 1, max_pnl: 5, min_pnl: -1.5 }),
+    ]);
+    expect(maintained.daily_opportunities).toEqual([expect.objectContaining({ opportunities: 3, high_value: 2 })]);
+  });
+
+  test('should drop signal count rows that reach zero', () => {
+    const id = signals.create(signal('a', 0.8, 'STANDARD'));
+    signals.updateStatus(id, 'confirmed');
+    signals.updateStatus(id, 'executed');
+
+    expect(database.prepare('SELECT status, signals FROM daily_signal_counts').all()).toEqual([
+      { status: 'executed', signals: 1 },
+    ]);
+  });
+
+  test('should recompute the day when a settled trade is reopened', () => {
+    const first = trades.create(trade('a'));
+    const second = trades.create(trade('a'));
+    trades.updatePnl(first, 2);
+    trades.updatePnl(second, -6);
+
+    database.prepare("UPDATE trades SET status = 'pending', pnl = NULL, settled_at = NULL WHERE id = ?").run(second);
+
+    const maintained = rollups();
+    rebuildRollups(database);
+    expect(rollups()).toEqual(maintained);
+    expect(maintained.daily_pnl).toEqual([
+      expect.objectContaining({ total_pnl: 2, trades: 1, wins: 1, losses: 0, max_pnl: 2, min_pnl: 2 }),
+    ]);
+  });
+});
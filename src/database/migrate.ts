@@ -0,0 +1,75 @@
+import Database from 'better-sqlite3';
+import * as fs from 'fs';
+import * as path from 'path';
+import { rebuildRollups, ROLLUP_TABLES } from './rollups';
+
+export const SCHEMA_PATH = path.join(__dirname, '..', '..', 'scripts', 'schema.sql');
+
+/**
+ * 旧库缺少的列（CREATE TABLE IF NOT EXISTS 不会给已有表加列）
+ */
+const COLUMN_UPGRADES: { table: string; column: string; definition: string }[] = [
+  { table: 'signals', column: 'level', definition: 'TEXT' },
+  { table: 'signals', column: 'expiry_minutes', definition: 'INTEGER' },
+];
+
+/**
+ * 用历史快照回填最新价格表（每个市场按 timestamp 取最新一行）
+ * 之后由 schema.sql 中的触发器随快照写入维护
+ */
+const BACKFILL_LATEST_PRICES = `
+  INSERT OR IGNORE INTO latest_prices (market_id, snapshot_id, timestamp, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h)
+  SELECT market_id, id, MAX(timestamp), yes_price, no_price, yes_liquidity, no_liquidity, volume_24h
+  FROM price_snapshots
+  GROUP BY market_id
+`;
+
+function tableExists(database: Database.Database, table: string): boolean {
+  const row = database
+    .prepare("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?")
+    .get(table);
+  return row !== undefined;
+}
+
+function columnExists(database: Database.Database, table: string, column: string): boolean {
+  const columns = database.prepare(`PRAGMA table_info(${table})`).all() as { name: string }[];
+  return columns.some(c => c.name === column);
+}
+
+/**
+ * 把数据库升级到当前 schema：补齐缺失列，再执行 schema.sql（表、索引、触发器均为 IF NOT EXISTS）
+ * 汇总表或最新价格表是新建的话，用已有数据回填一次
+ * 可重复执行
+ */
+export function migrate(database: Database.Database, schemaPath: string = SCHEMA_PATH): string[] {
+  const applied: string[] = [];
+  const schema = fs.readFileSync(schemaPath, 'utf-8');
+
+  const run = database.transaction(() => {
+    const missingRollups = ROLLUP_TABLES.some(table => !tableExists(database, table));
+    const missingLatestPrices = !tableExists(database, 'latest_prices');
+
+    for (const upgrade of COLUMN_UPGRADES) {
+      if (tableExists(database, upgrade.table) && !columnExists(database, upgrade.table, upgrade.column)) {
+        database.exec(`ALTER TABLE ${upgrade.table} ADD COLUMN ${upgrade.column} ${upgrade.definition}`);
+        applied.push(`${upgrade.table}.${upgrade.column}`);
+      }
+    }
+    database.exec(schema);
+
+    if (missingLatestPrices) {
+      database.exec(BACKFILL_LATEST_PRICES);
+      applied.push('latest_prices');
+    }
+    if (missingRollups) {
+      rebuildRollups(database);
+      applied.push(...ROLLUP_TABLES);
+    }
+  });
+  run();
+
+  // 新建索引后更新统计信息，让查询规划器选中它们
+  database.pragma('optimize');
+
+  return applied;
+}
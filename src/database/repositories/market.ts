@@ -1,34 +1,71 @@
+import Database from 'better-sqlite3';
 import { db } from '../connection';
+import { prepared } from '../statements';
 import { Market } from '../../types';
 
+// 已存在的市场只在字段有变化时才写入，每轮全量扫描时未变化的市场不产生 WAL 写入
+const UPSERT_MARKET = `
+  INSERT INTO markets (id, slug, question, category, created_at, resolution_time, resolved, active)
+  VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+  ON CONFLICT(id) DO UPDATE SET
+    slug = excluded.slug,
+    question = excluded.question,
+    category = excluded.category,
+    created_at = excluded.created_at,
+    resolution_time = excluded.resolution_time,
+    resolved = excluded.resolved,
+    active = excluded.active
+  WHERE markets.slug IS NOT excluded.slug
+    OR markets.question IS NOT excluded.question
+    OR markets.category IS NOT excluded.category
+    OR markets.created_at IS NOT excluded.created_at
+    OR markets.resolution_time IS NOT excluded.resolution_time
+    OR markets.resolved IS NOT excluded.resolved
+    OR markets.active IS NOT excluded.active
+`;
+
+function isoOrNull(date?: Date): string | null {
+  return date && !isNaN(date.getTime()) ? date.toISOString() : null;
+}
+
 export class MarketRepository {
-  private database = db.getConnection();
+  constructor(private database: Database.Database = db.getConnection()) {}
 
   create(market: Market): void {
-    const stmt = this.database.prepare(`
-      INSERT OR REPLACE INTO markets (id, slug, question, category, created_at, resolution_time, resolved, active)
-      VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    `);
-    stmt.run(
+    this.upsert(market);
+  }
+
+  /** 写入或更新单个市场，返回是否有实际变化 */
+  upsert(market: Market): boolean {
+    return prepared(this.database, UPSERT_MARKET).run(
       market.id,
       market.slug,
       market.question,
-      market.category,
-      market.created_at?.toISOString(),
-      market.resolution_time?.toISOString(),
+      market.category ?? null,
+      isoOrNull(market.created_at),
+      isoOrNull(market.resolution_time),
       market.resolved ? 1 : 0,
       market.active ? 1 : 0
-    );
+    ).changes > 0;
+  }
+
+  /** 在一个事务中批量写入，返回有变化的市场数 */
+  upsertMany(markets: readonly Market[]): number {
+    return this.database.transaction((items: readonly Market[]) => {
+      let changed = 0;
+      for (const market of items) {
+        if (this.upsert(market)) changed++;
+      }
+      return changed;
+    })(markets);
   }
 
   findActive(): Market[] {
-    const stmt = this.database.prepare('SELECT * FROM markets WHERE active = 1 AND resolved = 0');
-    return stmt.all() as Market[];
+    return prepared(this.database, 'SELECT * FROM markets WHERE active = 1 AND resolved = 0').all() as Market[];
   }
 
   findById(id: string): Market | null {
-    const stmt = this.database.prepare('SELECT * FROM markets WHERE id = ?');
-    const result = stmt.get(id);
+    const result = prepared(this.database, 'SELECT * FROM markets WHERE id = ?').get(id);
     return result ? (result as Market) : null;
   }
 }
@@ -1,40 +1,71 @@
+import Database from 'better-sqlite3';
 import { db } from '../connection';
+import { parseSqliteTime, prepared, toSqliteTime } from '../statements';
 import { PriceSnapshot } from '../../types';
 
+const INSERT_SNAPSHOT = `
+  INSERT INTO price_snapshots (market_id, timestamp, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h)
+  VALUES (?, ?, ?, ?, ?, ?, ?)
+`;
+
 export class PriceRepository {
-  private database = db.getConnection();
-
-  create(snapshot: PriceSnapshot): void {
-    const stmt = this.database.prepare(`
-      INSERT INTO price_snapshots (market_id, timestamp, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h)
-      VALUES (?, datetime('now'), ?, ?, ?, ?, ?)
-    `);
-    stmt.run(
-      snapshot.market_id,
-      snapshot.yes_price,
-      snapshot.no_price,
-      snapshot.yes_liquidity,
-      snapshot.no_liquidity,
-      snapshot.volume_24h
-    );
+  constructor(private database: Database.Database = db.getConnection()) {}
+
+  create(snapshot: PriceSnapshot, timestamp: Date = new Date()): void {
+    this.insert(snapshot, toSqliteTime(timestamp));
+  }
+
+  /**
+   * 一轮检查的所有快照在一个事务中写入，共用同一个时间戳
+   * （K 线触发器随每行更新，事务只在结束时提交一次）
+   */
+  insertSnapshots(snapshots: readonly PriceSnapshot[], timestamp: Date = new Date()): number {
+    const time = toSqliteTime(timestamp);
+    return this.database.transaction((items: readonly PriceSnapshot[]) => {
+      for (const snapshot of items) {
+        this.insert(snapshot, time);
+      }
+      return items.length;
+    })(snapshots);
   }
 
   findLatestByMarket(marketId: string, limit: number = 100): PriceSnapshot[] {
-    const stmt = this.database.prepare(`
+    return prepared(this.database, `
       SELECT * FROM price_snapshots 
       WHERE market_id = ? 
       ORDER BY timestamp DESC 
       LIMIT ?
-    `);
-    return stmt.all(marketId, limit) as PriceSnapshot[];
+    `).all(marketId, limit) as PriceSnapshot[];
+  }
+
+  /**
+   * 每个市场最近写入的快照（读 latest_prices，每市场一行），重启时恢复内存状态用
+   */
+  findLatestAll(): Array<PriceSnapshot & { timestamp: Date }> {
+    const rows = prepared(this.database, `
+      SELECT market_id, timestamp, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h
+      FROM latest_prices
+    `).all() as Array<PriceSnapshot & { timestamp: string }>;
+    return rows.map(row => ({ ...row, timestamp: parseSqliteTime(row.timestamp) }));
   }
 
   findByTimeRange(marketId: string, startTime: Date, endTime: Date): PriceSnapshot[] {
-    const stmt = this.database.prepare(`
+    return prepared(this.database, `
       SELECT * FROM price_snapshots 
       WHERE market_id = ? AND timestamp BETWEEN ? AND ?
       ORDER BY timestamp ASC
-    `);
-    return stmt.all(marketId, startTime.toISOString(), endTime.toISOString()) as PriceSnapshot[];
+    `).all(marketId, toSqliteTime(startTime), toSqliteTime(endTime)) as PriceSnapshot[];
+  }
+
+  private insert(snapshot: PriceSnapshot, time: string): void {
+    prepared(this.database, INSERT_SNAPSHOT).run(
+      snapshot.market_id,
+      time,
+      snapshot.yes_price,
+      snapshot.no_price,
+      snapshot.yes_liquidity,
+      snapshot.no_liquidity,
+      snapshot.volume_24h
+    );
   }
 }
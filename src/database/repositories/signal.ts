@@ -1,16 +1,22 @@
 import Database from 'better-sqlite3';
 import { db } from '../connection';
+import { prepared } from '../statements';
 import { ArbitrageOpportunity, Signal, Trade } from '../../types';
 
+// 状态变化时同时记录的时间列
+const STATUS_TIME_COLUMN: Partial<Record<Signal['status'], string>> = {
+  confirmed: 'confirmed_at',
+  executed: 'executed_at',
+};
+
 export class SignalRepository {
-  private database = db.getConnection();
+  constructor(private database: Database.Database = db.getConnection()) {}
 
   create(signal: Signal): number {
-    const stmt = this.database.prepare(`
+    const result = prepared(this.database, `
       INSERT INTO signals (market_id, opportunity_id, signal_type, confidence, reason, trigger_price, suggested_amount, status, level, expiry_minutes)
       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    `);
-    const result = stmt.run(
+    `).run(
       signal.market_id,
       signal.opportunity_id,
       signal.signal_type,
@@ -26,50 +32,47 @@ export class SignalRepository {
   }
 
   findById(id: number): Signal | null {
-    const stmt = this.database.prepare('SELECT * FROM signals WHERE id = ?');
-    const result = stmt.get(id);
+    const result = prepared(this.database, 'SELECT * FROM signals WHERE id = ?').get(id);
     return result ? (result as Signal) : null;
   }
 
   findPending(): Signal[] {
-    const stmt = this.database.prepare(`
+    return prepared(this.database, `
       SELECT * FROM signals 
       WHERE status = 'pending' 
       ORDER BY created_at DESC
-    `);
-    return stmt.all() as Signal[];
+    `).all() as Signal[];
   }
 
   updateStatus(id: number, status: Signal['status']): void {
-    const stmt = this.database.prepare(`
+    // 只有 confirmed / executed 有对应的时间列，其他状态只改 status
+    const column = STATUS_TIME_COLUMN[status];
+    prepared(this.database, `
       UPDATE signals 
-      SET status = ?, ${status === 'confirmed' ? 'confirmed_at' : status === 'executed' ? 'executed_at' : ''} = datetime('now')
+      SET status = ?${column ? `, ${column} = datetime('now')` : ''}
       WHERE id = ?
-    `);
-    stmt.run(status, id);
+    `).run(status, id);
   }
 
   expireOldSignals(): number {
-    const stmt = this.database.prepare(`
+    const result = prepared(this.database, `
       UPDATE signals 
       SET status = 'expired'
       WHERE status = 'pending' 
       AND datetime(created_at, '+' || expiry_minutes || ' minutes') < datetime('now')
-    `);
-    const result = stmt.run();
+    `).run();
     return result.changes;
   }
 }
 
 export class TradeRepository {
-  private database = db.getConnection();
+  constructor(private database: Database.Database = db.getConnection()) {}
 
   create(trade: Trade): number {
-    const stmt = this.database.prepare(`
+    const result = prepared(this.database, `
       INSERT INTO trades (signal_id, market_id, side, amount, price, quantity, status)
       VALUES (?, ?, ?, ?, ?, ?, ?)
-    `);
-    const result = stmt.run(
+    `).run(
       trade.signal_id,
       trade.market_id,
       trade.side,
@@ -82,30 +85,27 @@ export class TradeRepository {
   }
 
   findBySignalId(signalId: number): Trade | null {
-    const stmt = this.database.prepare('SELECT * FROM trades WHERE signal_id = ?');
-    const result = stmt.get(signalId);
+    const result = prepared(this.database, 'SELECT * FROM trades WHERE signal_id = ?').get(signalId);
     return result ? (result as Trade) : null;
   }
 
   updatePnl(id: number, pnl: number): void {
-    const stmt = this.database.prepare(`
+    prepared(this.database, `
       UPDATE trades SET pnl = ?, status = 'settled', settled_at = datetime('now')
       WHERE id = ?
-    `);
-    stmt.run(pnl, id);
+    `).run(pnl, id);
   }
 }
 
 export class OpportunityRepository {
-  private database = db.getConnection();
+  constructor(private database: Database.Database = db.getConnection()) {}
 
   create(opportunity: ArbitrageOpportunity): number {
-    const stmt = this.database.prepare(`
+    const result = prepared(this.database, `
       INSERT INTO arbitrage_opportunities 
       (market_id, yes_price, no_price, total_price, deviation, deviation_percent, status)
       VALUES (?, ?, ?, ?, ?, ?, 'open')
-    `);
-    const result = stmt.run(
+    `).run(
       opportunity.marketId,
       opportunity.yesPrice,
       opportunity.noPrice,
@@ -117,7 +117,6 @@ export class OpportunityRepository {
   }
 
   findById(id: number): any {
-    const stmt = this.database.prepare('SELECT * FROM arbitrage_opportunities WHERE id = ?');
-    return stmt.get(id);
+    return prepared(this.database, 'SELECT * FROM arbitrage_opportunities WHERE id = ?').get(id);
   }
 }
@@ -0,0 +1,123 @@
+import Database from 'better-sqlite3';
+import { BotConfig } from '../types';
+
+export type RetentionPolicy = BotConfig['retention'];
+
+export interface RetentionResult {
+  /** 原始快照的清理界限（UTC 整天），早于它的快照已移除 */
+  cutoff: string | null;
+  archived: number;
+  deleted: number;
+  /** 各周期删除的 K 线数 */
+  bars: Record<string, number>;
+}
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/** 每个事务最多移除的快照行数，避免长时间占住写锁 */
+export const RETENTION_BATCH_SIZE = 10_000;
+
+// 归档库只保留回放需要的表，可直接作为 DB_PATH 给 npm run backtest -- --scenario=REPLAY 使用
+const ARCHIVE_SCHEMA = `
+  CREATE TABLE IF NOT EXISTS archive.markets (
+    id TEXT PRIMARY KEY,
+    slug TEXT NOT NULL,
+    question TEXT NOT NULL,
+    category TEXT,
+    created_at DATETIME,
+    resolution_time DATETIME,
+    resolved BOOLEAN DEFAULT 0,
+    active BOOLEAN DEFAULT 1,
+    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+  );
+  CREATE TABLE IF NOT EXISTS archive.price_snapshots (
+    id INTEGER PRIMARY KEY,
+    market_id TEXT NOT NULL,
+    timestamp DATETIME,
+    yes_price REAL NOT NULL,
+    no_price REAL NOT NULL,
+    yes_liquidity REAL,
+    no_liquidity REAL,
+    volume_24h REAL
+  );
+  CREATE INDEX IF NOT EXISTS archive.idx_price_snapshots_time ON price_snapshots(timestamp);
+`;
+
+/**
+ * 快照清理界限：now 前 days 天所在 UTC 日的零点
+ * 按整天清理，K 线重建（rebuild-rollups.sql）时剩余快照总能完整覆盖所在的每个周期
+ */
+export function retentionCutoff(now: Date, days: number): string {
+  const day = Math.floor((now.getTime() - days * DAY_MS) / DAY_MS) * DAY_MS;
+  return new Date(day).toISOString().slice(0, 19).replace('T', ' ');
+}
+
+/**
+ * 执行保留策略：
+ * 1. 早于界限的原始快照分批移除（配置了 archivePath 时先复制到归档库，连同相关市场）
+ * 2. 各周期 K 线按 barDays 删除过期部分
+ * K 线由触发器随快照写入维护，移除快照不影响已有 K 线
+ */
+export function applyRetention(
+  database: Database.Database,
+  policy: RetentionPolicy,
+  now: Date = new Date(),
+  batchSize: number = RETENTION_BATCH_SIZE
+): RetentionResult {
+  const result: RetentionResult = { cutoff: null, archived: 0, deleted: 0, bars: {} };
+
+  if (policy.snapshotDays > 0) {
+    const cutoff = retentionCutoff(now, policy.snapshotDays);
+    result.cutoff = cutoff;
+
+    const archive = policy.archivePath !== '';
+    if (archive) {
+      database.prepare('ATTACH DATABASE ? AS archive').run(policy.archivePath);
+      database.exec(ARCHIVE_SCHEMA);
+    }
+
+    try {
+      // 每批取最早的 batchSize 行（走 idx_price_snapshots_time），归档和删除在同一事务里
+      const batch = `SELECT id FROM price_snapshots WHERE timestamp < @cutoff ORDER BY timestamp, id LIMIT @batchSize`;
+      const archiveMarkets = archive ? database.prepare(`
+        INSERT OR REPLACE INTO archive.markets
+        SELECT * FROM markets
+        WHERE id IN (SELECT DISTINCT market_id FROM price_snapshots WHERE id IN (${batch}))
+      `) : null;
+      const archiveSnapshots = archive ? database.prepare(`
+        INSERT OR IGNORE INTO archive.price_snapshots
+        SELECT id, market_id, timestamp, yes_price, no_price, yes_liquidity, no_liquidity, volume_24h
+        FROM price_snapshots
+        WHERE id IN (${batch})
+      `) : null;
+      const remove = database.prepare(`DELETE FROM price_snapshots WHERE id IN (${batch})`);
+
+      const runBatch = database.transaction(() => {
+        archiveMarkets?.run({ cutoff, batchSize });
+        const archived = archiveSnapshots?.run({ cutoff, batchSize }).changes ?? 0;
+        const deleted = remove.run({ cutoff, batchSize }).changes;
+        return { archived, deleted };
+      });
+
+      while (true) {
+        const { archived, deleted } = runBatch();
+        result.archived += archived;
+        result.deleted += deleted;
+        if (deleted < batchSize) break;
+      }
+    } finally {
+      if (archive) {
+        database.exec('DETACH DATABASE archive');
+      }
+    }
+  }
+
+  const removeBars = database.prepare('DELETE FROM price_bars WHERE interval = ? AND bucket < ?');
+  for (const [interval, days] of Object.entries(policy.barDays)) {
+    if (days > 0) {
+      result.bars[interval] = removeBars.run(interval, retentionCutoff(now, days)).changes;
+    }
+  }
+
+  return result;
+}
@@ -0,0 +1,19 @@
+import Database from 'better-sqlite3';
+import * as fs from 'fs';
+import * as path from 'path';
+
+export const ROLLUP_TABLES = ['daily_pnl', 'daily_opportunities', 'daily_signal_counts', 'price_bars'];
+
+export const REBUILD_ROLLUPS_PATH = path.join(__dirname, '..', '..', 'scripts', 'rebuild-rollups.sql');
+
+/**
+ * 从 trades / arbitrage_opportunities / signals 全量重建每日汇总表，从 price_snapshots 重建 K 线
+ * 平时由 schema.sql 中的触发器增量维护，这里用于回填和纠偏
+ */
+export function rebuildRollups(database: Database.Database, sqlPath: string = REBUILD_ROLLUPS_PATH): void {
+  const sql = fs.readFileSync(sqlPath, 'utf-8');
+  const run = database.transaction(() => {
+    database.exec(sql);
+  });
+  run();
+}
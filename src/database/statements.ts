@@ -0,0 +1,39 @@
+import Database from 'better-sqlite3';
+
+/**
+ * 预编译语句缓存：按连接 + SQL 文本缓存，每条语句在每个连接上只 prepare 一次
+ * 仓库类共用同一连接时也共用缓存；连接关闭后随 WeakMap 一起回收
+ */
+const caches = new WeakMap<Database.Database, Map<string, Database.Statement>>();
+
+export function prepared(database: Database.Database, sql: string): Database.Statement {
+  let cache = caches.get(database);
+  if (!cache) {
+    cache = new Map();
+    caches.set(database, cache);
+  }
+
+  let stmt = cache.get(sql);
+  if (!stmt) {
+    stmt = database.prepare(sql);
+    cache.set(sql, stmt);
+  }
+  return stmt;
+}
+
+/**
+ * Date 转成 SQLite datetime('now') 的格式（UTC，YYYY-MM-DD HH:MM:SS），与 timestamp 列按文本比较
+ */
+export function toSqliteTime(date: Date): string {
+  return date.toISOString().slice(0, 19).replace('T', ' ');
+}
+
+/**
+ * 解析 timestamp 列：不带时区的按 UTC，带 Z / 偏移量的原样解析
+ */
+export function parseSqliteTime(value: string): Date {
+  if (/(Z|[+-]\d{2}:?\d{2})$/i.test(value)) {
+    return new Date(value);
+  }
+  return new Date(value.replace(' ', 'T') + 'Z');
+}
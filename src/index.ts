@@ -8,7 +8,14 @@ import { TelegramBotService } from './bot';
 import { MarketRepository } from './database/repositories/market';
 import { PriceRepository } from './database/repositories/price';
 import { SignalRepository, OpportunityRepository } from './database/repositories/signal';
+import { db } from './database/connection';
+import { applyRetention } from './database/retention';
 import { defaultConfig } from './config';
+import { MarketStateStore } from './services/data/marketState';
+import { PriceStream } from './services/data/priceStream';
+import { StreamIngestor } from './services/data/streamIngestor';
+import { OpportunityNotification, OpportunityPipeline } from './services/strategy/opportunityPipeline';
+import { PriceSnapshot, Signal } from './types';
 
 async function main() {
   console.log('🚀 启动 Polymarket 交易机器人...');
@@ -23,6 +30,18 @@ async function main() {
   const priceRepo = new PriceRepository();
   const signalRepo = new SignalRepository();
   const opportunityRepo = new OpportunityRepository();
+  const database = db.getConnection();
+  // 市场最新价格常驻内存，快照只在价格变动或到心跳间隔时写入；从 latest_prices 恢复上次写入的状态
+  const marketState = new MarketStateStore();
+  marketState.seed(priceRepo.findLatestAll());
+  const pipeline = new OpportunityPipeline({
+    arbitrageStrategy,
+    signalGenerator,
+    riskManager,
+    opportunityRepo,
+    signalRepo,
+    mode: defaultConfig.mode,
+  });
 
   // 初始化 Telegram Bot
   let bot: TelegramBotService | null = null;
@@ -32,14 +51,21 @@ async function main() {
       defaultConfig.telegram.allowedChatId
     );
     
+    // 状态变化同步给风控计数（同一连接的写入风控自己发现不了）
+    const updateSignalStatus = (signalId: number, status: Signal['status']) => {
+      const signal = signalRepo.findById(signalId);
+      signalRepo.updateStatus(signalId, status);
+      if (signal) riskManager.recordSignalStatus(signal, status);
+    };
+
     // 设置确认回调
     bot.setConfirmCallback(async (signalId) => {
-      signalRepo.updateStatus(signalId, 'confirmed');
+      updateSignalStatus(signalId, 'confirmed');
       console.log(`✅ 信号 #${signalId} 已确认`);
     });
     
     bot.setRejectCallback(async (signalId) => {
-      signalRepo.updateStatus(signalId, 'rejected');
+      updateSignalStatus(signalId, 'rejected');
       console.log(`❌ 信号 #${signalId} 已拒绝`);
     });
     
@@ -48,6 +74,43 @@ async function main() {
     console.warn('⚠️ Telegram Bot 未配置，将只记录信号不推送');
   }
 
+  // 推送行情（配置了 PRICE_STREAM_URL 时启用）：每条更新到达即检测，断流时由轮询接管
+  let stream: PriceStream | null = null;
+  let ingestor: StreamIngestor | null = null;
+  if (defaultConfig.stream.url) {
+    ingestor = new StreamIngestor({
+      pipeline,
+      priceRepo,
+      riskManager,
+      flushIntervalMs: defaultConfig.stream.flushIntervalMs,
+      store: marketState,
+      onSignal: async ({ signal, opportunity }) => {
+        await bot?.sendArbitrageSignal(signal, opportunity);
+      },
+    });
+    stream = new PriceStream({ url: defaultConfig.stream.url, staleMs: defaultConfig.stream.staleMs });
+    stream.on('prices', updates => {
+      try {
+        ingestor!.handle(updates);
+      } catch (error) {
+        console.error('❌ 处理推送行情失败:', error);
+      }
+    });
+    stream.on('open', () => console.log(`📡 行情流已连接: ${defaultConfig.stream.url}`));
+    stream.on('close', () => console.warn('⚠️ 行情流断开，轮询接管价格抓取，等待重连...'));
+    stream.on('error', error => console.error('❌ 行情流错误:', error.message));
+    ingestor.start();
+    stream.start();
+
+    // 每分钟输出推送吞吐量
+    setInterval(() => {
+      const stats = ingestor!.takeStats();
+      if (stats.updates === 0) return;
+      const avgLag = stats.lagSamples ? stats.totalLagMs / stats.lagSamples : 0;
+      console.log(`📡 推送 ${stats.updates} 条（${(stats.updates / 60).toFixed(0)} 条/秒），落库 ${stats.snapshots} 条，信号 ${stats.signals} 个，延迟 avg ${avgLag.toFixed(0)}ms / max ${stats.maxLagMs}ms`);
+    }, 60_000);
+  }
+
   console.log('✅ 服务初始化完成');
 
   // 信号过期检查任务（每分钟）
@@ -58,6 +121,17 @@ async function main() {
     }
   });
 
+  // 价格快照 / K 线保留策略（每天凌晨）
+  cron.schedule('30 3 * * *', () => {
+    try {
+      const result = applyRetention(db.getConnection(), defaultConfig.retention);
+      const bars = Object.values(result.bars).reduce((sum, count) => sum + count, 0);
+      console.log(`🧹 清理 ${result.cutoff ?? '-'} 之前的快照 ${result.deleted} 条（归档 ${result.archived} 条），过期 K 线 ${bars} 条`);
+    } catch (error) {
+      console.error('❌ 执行保留策略失败:', error);
+    }
+  });
+
   // 主检查循环（每5分钟）
   const checkMarkets = async () => {
     const now = new Date().toISOString();
@@ -80,66 +154,71 @@ async function main() {
     console.log(`💰 风控状态: 日亏损 ${riskSummary.dailyLoss.current.toFixed(2)}/${riskSummary.dailyLoss.limit.toFixed(2)}; 交易次数 ${riskSummary.tradeCount.current}/${riskSummary.tradeCount.limit}`);
 
     // 获取活跃市场
-    const markets = await polymarket.getActiveMarkets();
+    const { markets, complete } = await polymarket.getActiveMarkets();
     console.log(`📊 获取到 ${markets.length} 个活跃市场`);
-
-    // 保存市场信息
-    for (const market of markets) {
-      marketRepo.create(market);
+    // 列表不完整时只更新取到的市场，不据此移除内存状态或退订，等下一轮完整列表
+    if (complete) {
+      marketState.retain(markets.map(market => market.id));
+    } else {
+      console.warn('⚠️ 市场列表翻页中断，本轮不移除未出现的市场');
     }
 
-    // 检查每个市场的套利机会
-    let opportunityCount = 0;
-    for (const market of markets.slice(0, 20)) {
-      const prices = await polymarket.getMarketPrices(market.id);
-      if (!prices) continue;
-
-      // 保存价格快照
-      priceRepo.create(prices);
-
-      // 检测套利机会
-      const opportunity = arbitrageStrategy.detectOpportunity(
-        market.id,
-        market.question,
-        prices.yes_price,
-        prices.no_price
-      );
-
-      if (opportunity && opportunity.recommendation !== 'WAIT') {
-        opportunityCount++;
-        console.log(`🎯 [${opportunity.level}] ${market.question}`);
-        console.log(`   偏离度: ${opportunity.deviationPercent.toFixed(2)}% | 建议: ${opportunity.recommendation} | 有效期: ${opportunity.expiryMinutes}分钟`);
-
-        // 检查单笔限额
-        const amountCheck = riskManager.checkSingleTradeLimit(
-          opportunity.expectedReturn * 1000  // 估算金额
-        );
-        if (!amountCheck.allowed) {
-          console.warn(`   ⚠️ 超过单笔限额`);
-          continue;
-        }
-
-        // 保存机会记录
-        const opportunityId = opportunityRepo.create(opportunity);
-
-        // 生成信号
-        const { signal } = signalGenerator.generateFromArbitrage(market.id, opportunity);
-        signal.opportunity_id = opportunityId;
-        
-        // 保存信号
-        const signalId = signalRepo.create(signal);
-        
-        // 推送 Telegram
-        if (bot) {
-          const signalWithId = { ...signal, id: signalId };
-          await bot.sendArbitrageSignal(signalWithId, opportunity);
-        }
+    // 推送模式：更新订阅的市场列表；行情流正常时价格由推送负责，本轮只同步市场信息
+    if (stream && ingestor) {
+      database.transaction(() => marketRepo.upsertMany(markets))();
+      if (complete) {
+        ingestor.setMarkets(markets);
+        stream.subscribe(markets.map(market => market.id));
+      }
+      if (stream.isHealthy()) {
+        console.log(`[${new Date().toISOString()}] 行情流正常，跳过价格轮询\n`);
+        return;
+      }
+    }
 
-        // 模拟模式：记录但不执行
-        if (defaultConfig.mode === 'SIMULATION') {
-          console.log(`   [模拟] 信号 #${signalId} 已记录，等待确认`);
+    // 并发抓取所有市场的价格（keep-alive 连接池，并发上限见 POLYMARKET_CONCURRENCY）
+    const fetchStart = Date.now();
+    const priceList = await polymarket.getMarketPricesBatch(markets.map(market => market.id));
+    const fetched = priceList.filter(prices => prices !== null).length;
+    console.log(`💹 获取 ${fetched}/${markets.length} 个市场价格，耗时 ${((Date.now() - fetchStart) / 1000).toFixed(1)}s`);
+
+    // 本轮所有写入（市场、快照、机会、信号）在一个事务中提交，Telegram 推送等提交后再发
+    const notifications: OpportunityNotification[] = [];
+    let snapshots: PriceSnapshot[] = [];
+    const recordCycle = database.transaction(() => {
+      // 保存市场信息（未变化的市场不写入）
+      marketRepo.upsertMany(markets);
+
+      // 更新内存状态，只保存有变动的价格快照（本轮共用一个时间戳）
+      for (const prices of priceList) {
+        if (prices) marketState.apply(prices);
+      }
+      snapshots = marketState.collectDirty();
+      const written = priceRepo.insertSnapshots(snapshots);
+      console.log(`💾 写入价格快照 ${written}/${fetched} 条（其余价格未变）`);
+
+      // 检查每个市场的套利机会
+      let opportunityCount = 0;
+      for (const [index, market] of markets.entries()) {
+        if (!priceList[index]) continue;
+
+        const notification = pipeline.evaluate(market, marketState.get(market.id)!.prices);
+        if (notification) {
+          opportunityCount++;
+          notifications.push(notification);
         }
       }
+      return opportunityCount;
+    });
+    const opportunityCount = recordCycle();
+    // 事务提交后才标记为已写入，回滚时下一轮会重新写这些快照
+    marketState.markWritten(snapshots);
+
+    // 推送 Telegram
+    if (bot) {
+      for (const { signal, opportunity } of notifications) {
+        await bot.sendArbitrageSignal(signal, opportunity);
+      }
     }
 
     console.log(`[${new Date().toISOString()}] 市场检查完成，发现 ${opportunityCount} 个机会\n`);
@@ -151,7 +230,9 @@ async function main() {
   // 定时执行（每5分钟）
   cron.schedule('*/5 * * * *', checkMarkets);
 
-  console.log('🤖 机器人正在运行，每5分钟检查一次市场...');
+  console.log(stream
+    ? '🤖 机器人正在运行，实时监听推送行情（每5分钟同步市场列表，断流时轮询价格）...'
+    : '🤖 机器人正在运行，每5分钟检查一次市场...');
   console.log('💡 按 Ctrl+C 停止\n');
 }
 
@@ -0,0 +1,145 @@
+import http from 'http';
+import { AddressInfo } from 'net';
+import { HttpClient, HttpError, HttpTimeoutError, mapWithConcurrency } from '../httpClient';
+import { PolymarketAPI } from '../polymarket';
+
+const TOTAL_MARKETS = 250;
+
+/**
+ * 模拟 gamma API：/markets 按 offset 分页，/markets/:id 返回价格，/slow 永不响应，/missing 返回 404
+ * failMarketsFrom 之后（含）的分页返回 500；记录新建连接数和最大并发请求数
+ */
+function startServer(failMarketsFrom = Infinity) {
+  const stats = { connections: 0, inFlight: 0, maxInFlight: 0 };
+  const server = http.createServer((req, res) => {
+    const url = new URL(req.url ?? '/', 'http://localhost');
+    const reply = (body: unknown, status = 200) => {
+      res.writeHead(status, { 'Content-Type': 'application/json' });
+      res.end(JSON.stringify(body));
+    };
+
+    if (url.pathname === '/slow') return;
+    if (url.pathname === '/missing') return reply({ error: 'not found' }, 404);
+
+    stats.inFlight++;
+    stats.maxInFlight = Math.max(stats.maxInFlight, stats.inFlight);
+    setTimeout(() => {
+      stats.inFlight--;
+      if (url.pathname === '/markets') {
+        const offset = Number(url.searchParams.get('offset'));
+        const limit = Number(url.searchParams.get('limit'));
+        if (offset >= failMarketsFrom) return reply({ error: 'unavailable' }, 500);
+        const page = Array.from({ length: Math.max(0, Math.min(limit, TOTAL_MARKETS - offset)) }, (_, i) => ({
+          conditionId: `m${offset + i}`,
+          slug: `m${offset + i}`,
+          question: `Market ${offset + i}`,
+          active: true,
+          closed: false,
+        }));
+        return reply(page);
+      }
+      const id = url.pathname.split('/').pop();
+      if (id === 'm13') return reply({}, 500);
+      reply({ outcomes: [{ price: '0.48' }, { price: '0.50' }], volume24hr: 1000 });
+    }, 5);
+  });
+  server.on('connection', () => stats.connections++);
+  return new Promise<{ server: http.Server; baseUrl: string; stats: typeof stats }>(resolve => {
+    server.listen(0, '127.0.0.1', () => {
+      const { port } = server.address() as AddressInfo;
+      resolve({ server, baseUrl: `http://127.0.0.1:${port}`, stats });
+    });
+  });
+}
+
+describe('httpClient', () => {
+  let server: http.Server;
+  let baseUrl: string;
+  let stats: { connections: number; inFlight: number; maxInFlight: number };
+
+  beforeEach(async () => {
+    ({ server, baseUrl, stats } = await startServer());
+    jest.spyOn(console, 'error').mockImplementation(() => {});
+  });
+
+  afterEach(async () => {
+    jest.restoreAllMocks();
+    server.closeAllConnections();
+    await new Promise(resolve => server.close(resolve));
+  });
+
+  test('mapWithConcurrency should keep input order and cap the number of tasks in flight', async () => {
+    let inFlight = 0;
+    let maxInFlight = 0;
+    const results = await mapWithConcurrency([30, 5, 20, 1, 10, 2], 3, async (delay, index) => {
+      inFlight++;
+      maxInFlight = Math.max(maxInFlight, inFlight);
+      await new Promise(resolve => setTimeout(resolve, delay));
+      inFlight--;
+      return index;
+    });
+
+    expect(results).toEqual([0, 1, 2, 3, 4, 5]);
+    expect(maxInFlight).toBe(3);
+    await expect(mapWithConcurrency([], 4, async () => 1)).resolves.toEqual([]);
+  });
+
+  test('should reuse keep-alive connections', async () => {
+    const client = new HttpClient({ maxSockets: 4 });
+    for (let i = 0; i < 5; i++) {
+      await client.getJson(`${baseUrl}/markets/m${i}`);
+    }
+    expect(stats.connections).toBe(1);
+
+    await Promise.all(Array.from({ length: 20 }, (_, i) => client.getJson(`${baseUrl}/markets/m${i}`)));
+    expect(stats.connections).toBeLessThanOrEqual(4);
+    client.destroy();
+  });
+
+  test('should reject on non-2xx status and on timeout', async () => {
+    const client = new HttpClient({ timeoutMs: 50 });
+    await expect(client.getJson(`${baseUrl}/missing`)).rejects.toBeInstanceOf(HttpError);
+    await expect(client.getJson(`${baseUrl}/slow`)).rejects.toBeInstanceOf(HttpTimeoutError);
+    client.destroy();
+  });
+
+  test('should page through every active market and fetch prices concurrently', async () => {
+    const api = new PolymarketAPI({ baseUrl, pageSize: 100, maxMarkets: 0, concurrency: 8, timeoutMs: 1000 });
+
+    const { markets, complete } = await api.getActiveMarkets();
+    expect(complete).toBe(true);
+    expect(markets).toHaveLength(TOTAL_MARKETS);
+    expect(new Set(markets.map(market => market.id)).size).toBe(TOTAL_MARKETS);
+
+    stats.maxInFlight = 0;
+    const prices = await api.getMarketPricesBatch(markets.map(market => market.id));
+    expect(prices).toHaveLength(TOTAL_MARKETS);
+    expect(prices[13]).toBeNull();
+    expect(prices[0]).toMatchObject({ market_id: 'm0', yes_price: 0.48, no_price: 0.5, volume_24h: 1000 });
+    expect(prices[249]?.market_id).toBe('m249');
+    expect(stats.maxInFlight).toBeLessThanOrEqual(8);
+    expect(stats.maxInFlight).toBeGreaterThan(1);
+    api.close();
+  });
+
+  test('should stop at maxMarkets', async () => {
+    const api = new PolymarketAPI({ baseUrl, pageSize: 100, maxMarkets: 120, concurrency: 4, timeoutMs: 1000 });
+    const { markets, complete } = await api.getActiveMarkets();
+    expect(complete).toBe(true);
+    expect(markets.map(market => market.id)).toEqual(Array.from({ length: 120 }, (_, i) => `m${i}`));
+    api.close();
+  });
+
+  test('should mark the list incomplete when a later page fails', async () => {
+    const failing = await startServer(200);
+    const api = new PolymarketAPI({ baseUrl: failing.baseUrl, pageSize: 100, maxMarkets: 0, concurrency: 4, timeoutMs: 1000 });
+
+    const { markets, complete } = await api.getActiveMarkets();
+    expect(complete).toBe(false);
+    expect(markets.map(market => market.id)).toEqual(Array.from({ length: 200 }, (_, i) => `m${i}`));
+
+    api.close();
+    failing.server.closeAllConnections();
+    await new Promise(resolve => failing.server.close(resolve));
+  });
+});
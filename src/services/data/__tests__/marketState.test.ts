@@ -0,0 +1,118 @@
+import { MarketStateStore } from '../marketState';
+import { PriceSnapshot } from '../../../types';
+
+function prices(marketId: string, yes: number, no: number): PriceSnapshot {
+  return { market_id: marketId, yes_price: yes, no_price: no, yes_liquidity: 100, no_liquidity: 100, volume_24h: 1000 };
+}
+
+const MINUTE = 60_000;
+
+describe('MarketStateStore', () => {
+  let store: MarketStateStore;
+
+  beforeEach(() => {
+    store = new MarketStateStore({ epsilon: 0.0005, heartbeatMs: 30 * MINUTE });
+  });
+
+  /** 与 StreamIngestor.flush 相同的步骤：找出、写入、提交后标记 */
+  function takeDirty(now?: number, insert: (snapshots: PriceSnapshot[]) => void = () => {}): PriceSnapshot[] {
+    const snapshots = store.collectDirty(now);
+    insert(snapshots);
+    store.markWritten(snapshots, now);
+    return snapshots;
+  }
+
+  test('should write the first snapshot and then only price moves', () => {
+    store.apply(prices('a', 0.5, 0.5), 0);
+    expect(takeDirty(0)).toHaveLength(1);
+
+    // 价格没变、只有流动性变化：不写
+    store.apply({ ...prices('a', 0.5, 0.5), yes_liquidity: 200 }, MINUTE);
+    expect(takeDirty(MINUTE)).toHaveLength(0);
+
+    store.apply(prices('a', 0.501, 0.499), 2 * MINUTE);
+    expect(takeDirty(2 * MINUTE)).toEqual([prices('a', 0.501, 0.499)]);
+  });
+
+  test('should write unchanged prices once the heartbeat interval passes', () => {
+    store.apply(prices('a', 0.5, 0.5), 0);
+    takeDirty(0);
+
+    store.apply(prices('a', 0.5, 0.5), 29 * MINUTE);
+    expect(takeDirty(29 * MINUTE)).toHaveLength(0);
+    store.apply(prices('a', 0.5, 0.5), 30 * MINUTE);
+    expect(takeDirty(30 * MINUTE)).toHaveLength(1);
+  });
+
+  test('should emit the snapshots again when the insert fails', () => {
+    store.apply(prices('a', 0.5, 0.5), 0);
+    store.apply(prices('b', 0.3, 0.7), 0);
+
+    expect(() => takeDirty(0, () => { throw new Error('SQLITE_BUSY'); })).toThrow();
+    expect(takeDirty(1).map(item => item.market_id)).toEqual(['a', 'b']);
+    expect(takeDirty(2)).toHaveLength(0);
+    expect(store.takeStats().written).toBe(2);
+  });
+
+  test('should keep a market pending when a newer price arrives before the commit', () => {
+    store.apply(prices('a', 0.5, 0.5), 0);
+    const snapshots = store.collectDirty(0);
+    store.apply(prices('a', 0.52, 0.48), 1);
+    store.markWritten(snapshots, 0);
+
+    expect(store.get('a')?.written?.yes_price).toBe(0.5);
+    expect(takeDirty(2)).toEqual([prices('a', 0.52, 0.48)]);
+  });
+
+  test('should compare against the last written snapshot, not the last update', () => {
+    store.apply(prices('a', 0.5, 0.5), 0);
+    takeDirty(0);
+
+    // 每次只动 0.0003，累计超过 epsilon 后写入
+    store.apply(prices('a', 0.5003, 0.5), 1);
+    expect(takeDirty(1)).toHaveLength(0);
+    store.apply(prices('a', 0.5006, 0.5), 2);
+    expect(takeDirty(2)).toHaveLength(1);
+  });
+
+  test('should only check markets updated since the last flush', () => {
+    store.apply(prices('a', 0.5, 0.5), 0);
+    store.apply(prices('b', 0.3, 0.7), 0);
+    takeDirty(0);
+
+    store.apply(prices('b', 0.32, 0.68), MINUTE);
+    expect(takeDirty(60 * MINUTE).map(item => item.market_id)).toEqual(['b']);
+    expect(store.get('a')?.prices.yes_price).toBe(0.5);
+  });
+
+  test('should restore written state from stored snapshots', () => {
+    store.seed([{ ...prices('a', 0.5, 0.5), timestamp: new Date(0) }]);
+
+    store.apply(prices('a', 0.5, 0.5), MINUTE);
+    expect(takeDirty(MINUTE)).toHaveLength(0);
+    expect(store.takeStats()).toEqual({ markets: 1, updates: 1, written: 0 });
+  });
+
+  test('should track rolling deviation statistics', () => {
+    store.apply(prices('a', 0.5, 0.5));
+    store.apply(prices('a', 0.48, 0.48));
+    store.apply(prices('a', 0.5, 0.49));
+
+    const deviation = store.get('a')!.deviation;
+    expect(deviation.samples).toBe(3);
+    expect(deviation.last).toBeCloseTo(0.01);
+    expect(deviation.max).toBeCloseTo(0.04);
+    expect(deviation.mean).toBeGreaterThan(0);
+    expect(deviation.mean).toBeLessThan(0.04);
+    expect(deviation.std).toBeGreaterThan(0);
+  });
+
+  test('should drop markets that are no longer active', () => {
+    store.apply(prices('a', 0.5, 0.5));
+    store.apply(prices('b', 0.5, 0.5));
+    store.retain(['b']);
+
+    expect(store.size).toBe(1);
+    expect(takeDirty().map(item => item.market_id)).toEqual(['b']);
+  });
+});
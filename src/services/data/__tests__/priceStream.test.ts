@@ -0,0 +1,178 @@
+import Database from 'better-sqlite3';
+import { migrate } from '../../../database/migrate';
+import { MarketRepository } from '../../../database/repositories/market';
+import { PriceRepository } from '../../../database/repositories/price';
+import { OpportunityRepository, SignalRepository } from '../../../database/repositories/signal';
+import { ArbitrageStrategy } from '../../strategy/arbitrage';
+import { OpportunityPipeline } from '../../strategy/opportunityPipeline';
+import { SignalGenerator } from '../../strategy/signalGenerator';
+import { MockFeedServer } from '../mockFeedServer';
+import { parseFeedMessage, PriceStream, PriceUpdate } from '../priceStream';
+import { StreamIngestor } from '../streamIngestor';
+import { Market } from '../../../types';
+
+const allowAll = { allowed: true, current: 0, limit: Infinity };
+const riskManager = {
+  checkSingleTradeLimit: () => ({ allowed: true, limit: Infinity }),
+  getRiskSummary: () => ({ dailyLoss: allowAll, tradeCount: allowAll }),
+};
+
+function market(id: string): Market {
+  return { id, slug: id, question: `Market ${id}`, resolved: false, active: true };
+}
+
+function update(marketId: string, yes: number, no: number): PriceUpdate {
+  return { market_id: marketId, yes_price: yes, no_price: no, yes_liquidity: 100, no_liquidity: 100, volume_24h: 1000 };
+}
+
+function waitFor(condition: () => boolean, timeoutMs = 5000): Promise<void> {
+  const deadline = Date.now() + timeoutMs;
+  return new Promise((resolve, reject) => {
+    const check = () => {
+      if (condition()) return resolve();
+      if (Date.now() > deadline) return reject(new Error('timeout'));
+      setTimeout(check, 10);
+    };
+    check();
+  });
+}
+
+describe('parseFeedMessage', () => {
+  test('should keep valid updates and default missing liquidity', () => {
+    const updates = parseFeedMessage(JSON.stringify({
+      type: 'prices',
+      updates: [
+        { market_id: 'a', yes_price: 0.5, no_price: 0.48, ts: 1 },
+        { market_id: 'b', yes_price: 'x', no_price: 0.5 },
+      ],
+    }));
+    expect(updates).toEqual([
+      { market_id: 'a', yes_price: 0.5, no_price: 0.48, yes_liquidity: 0, no_liquidity: 0, volume_24h: 0, ts: 1 },
+    ]);
+    expect(parseFeedMessage('{"type":"heartbeat"}')).toEqual([]);
+  });
+});
+
+describe('StreamIngestor', () => {
+  let database: Database.Database;
+  let pipeline: OpportunityPipeline;
+  let ingestor: StreamIngestor;
+
+  beforeEach(() => {
+    database = new Database(':memory:');
+    migrate(database);
+    const markets = ['a', 'b'].map(market);
+    new MarketRepository(database).upsertMany(markets);
+    pipeline = new OpportunityPipeline({
+      arbitrageStrategy: new ArbitrageStrategy(),
+      signalGenerator: new SignalGenerator(),
+      riskManager,
+      opportunityRepo: new OpportunityRepository(database),
+      signalRepo: new SignalRepository(database),
+      mode: 'SIMULATION',
+    });
+    ingestor = new StreamIngestor({
+      pipeline,
+      priceRepo: new PriceRepository(database),
+      riskManager,
+    });
+    ingestor.setMarkets(markets);
+    jest.spyOn(console, 'log').mockImplementation(() => {});
+  });
+
+  afterEach(() => {
+    jest.restoreAllMocks();
+    database.close();
+  });
+
+  test('should coalesce updates to the latest snapshot per market', () => {
+    ingestor.handle([update('a', 0.5, 0.5), update('a', 0.51, 0.49), update('b', 0.3, 0.7), update('x', 0.5, 0.5)]);
+    expect(ingestor.flush()).toBe(2);
+
+    expect(database.prepare('SELECT market_id, yes_price FROM price_snapshots ORDER BY market_id').all()).toEqual([
+      { market_id: 'a', yes_price: 0.51 },
+      { market_id: 'b', yes_price: 0.3 },
+    ]);
+    expect(ingestor.takeStats()).toMatchObject({ updates: 4, ignored: 1, snapshots: 2 });
+  });
+
+  test('should signal once per market until the opportunity expires', () => {
+    const onSignal = jest.fn();
+    (ingestor as any).options.onSignal = onSignal;
+
+    ingestor.handle([update('a', 0.48, 0.48), update('a', 0.47, 0.47), update('b', 0.5, 0.5)]);
+    ingestor.handle([update('a', 0.46, 0.46)]);
+
+    expect(onSignal).toHaveBeenCalledTimes(1);
+    expect(database.prepare('SELECT COUNT(*) as count FROM signals').get()).toEqual({ count: 1 });
+    expect(ingestor.takeStats().signals).toBe(1);
+  });
+
+  test('should share the cooldown with the polling path', () => {
+    ingestor.handle([update('a', 0.48, 0.48)]);
+
+    // 断流时轮询走同一个 pipeline，不会再给 a 发一次
+    expect(pipeline.evaluate(market('a'), update('a', 0.47, 0.47))).toBeNull();
+    expect(pipeline.evaluate(market('a'), update('a', 0.47, 0.47), Date.now() + 60 * 60_000)).not.toBeNull();
+    expect(database.prepare('SELECT COUNT(*) as count FROM signals').get()).toEqual({ count: 2 });
+  });
+
+  test('should stop evaluating when the daily risk limit is reached', () => {
+    (ingestor as any).options.riskManager = {
+      getRiskSummary: () => ({ dailyLoss: { ...allowAll, allowed: false }, tradeCount: allowAll }),
+    };
+    ingestor.flush();
+
+    ingestor.handle([update('a', 0.48, 0.48)]);
+    expect(database.prepare('SELECT COUNT(*) as count FROM signals').get()).toEqual({ count: 0 });
+    // 快照照常记录
+    expect(ingestor.flush()).toBe(1);
+  });
+});
+
+describe('PriceStream', () => {
+  let server: MockFeedServer;
+  let stream: PriceStream;
+
+  afterEach(async () => {
+    stream?.stop();
+    await server?.stop();
+  });
+
+  test('should receive subscribed markets from the mock feed', async () => {
+    server = new MockFeedServer({ rate: 2000 });
+    const port = await server.start();
+    stream = new PriceStream({ url: `ws://127.0.0.1:${port}` });
+
+    const seen = new Set<string>();
+    stream.on('prices', (updates: PriceUpdate[]) => updates.forEach(item => seen.add(item.market_id)));
+    stream.subscribe(['a', 'b']);
+    stream.start();
+
+    await waitFor(() => seen.size === 2);
+    expect([...seen].sort()).toEqual(['a', 'b']);
+    expect(stream.isHealthy()).toBe(true);
+  });
+
+  test('should reconnect and resubscribe after the feed restarts', async () => {
+    server = new MockFeedServer({ rate: 500 });
+    const port = await server.start();
+    stream = new PriceStream({ url: `ws://127.0.0.1:${port}`, reconnectMinMs: 50, reconnectMaxMs: 200 });
+    stream.on('error', () => {});
+    let received = 0;
+    stream.on('prices', (updates: PriceUpdate[]) => { received += updates.length; });
+    stream.subscribe(['a']);
+    stream.start();
+    await waitFor(() => received > 0);
+
+    await server.stop();
+    await waitFor(() => !stream.connected);
+    expect(stream.isHealthy()).toBe(false);
+
+    server = new MockFeedServer({ port, rate: 500 });
+    await server.start();
+    received = 0;
+    await waitFor(() => received > 0);
+    expect(stream.connected).toBe(true);
+  });
+});
@@ -0,0 +1,127 @@
+import http from 'http';
+import https from 'https';
+
+/**
+ * 行情抓取用的 HTTP 层
+ *
+ * - keep-alive Agent：同一主机的请求复用 TCP/TLS 连接，全量扫描几千个市场不必每次握手
+ * - maxSockets 限制到单个主机的并发连接数，与 mapWithConcurrency 的并发上限配合
+ * - 每个请求有总超时（从发出到读完响应体），超时后销毁请求，不会卡住整轮检查
+ */
+
+export const DEFAULT_TIMEOUT_MS = 10_000;
+export const DEFAULT_MAX_SOCKETS = 16;
+
+export interface HttpClientOptions {
+  /** 单个请求的总超时（毫秒） */
+  timeoutMs?: number;
+  /** 每个主机的最大连接数 */
+  maxSockets?: number;
+}
+
+export class HttpError extends Error {
+  constructor(public readonly status: number, public readonly url: string) {
+    super(`HTTP ${status}: ${url}`);
+    this.name = 'HttpError';
+  }
+}
+
+export class HttpTimeoutError extends Error {
+  constructor(public readonly timeoutMs: number, public readonly url: string) {
+    super(`请求超时 (${timeoutMs}ms): ${url}`);
+    this.name = 'HttpTimeoutError';
+  }
+}
+
+export class HttpClient {
+  readonly timeoutMs: number;
+  private readonly httpAgent: http.Agent;
+  private readonly httpsAgent: https.Agent;
+
+  constructor(options: HttpClientOptions = {}) {
+    this.timeoutMs = options.timeoutMs ?? DEFAULT_TIMEOUT_MS;
+    const agentOptions = { keepAlive: true, maxSockets: options.maxSockets ?? DEFAULT_MAX_SOCKETS };
+    this.httpAgent = new http.Agent(agentOptions);
+    this.httpsAgent = new https.Agent(agentOptions);
+  }
+
+  /**
+   * GET 并解析 JSON；非 2xx 抛 HttpError，超时抛 HttpTimeoutError
+   */
+  getJson<T = unknown>(url: string): Promise<T> {
+    const target = new URL(url);
+    const secure = target.protocol === 'https:';
+    const transport = secure ? https : http;
+
+    return new Promise<T>((resolve, reject) => {
+      let timer: NodeJS.Timeout | undefined;
+      const finish = (error: Error | null, value?: T) => {
+        clearTimeout(timer);
+        if (error) reject(error);
+        else resolve(value as T);
+      };
+
+      const request = transport.get(
+        target,
+        { agent: secure ? this.httpsAgent : this.httpAgent, headers: { Accept: 'application/json' } },
+        response => {
+          const status = response.statusCode ?? 0;
+          if (status < 200 || status >= 300) {
+            // 读完响应体，连接才能回到 keep-alive 池
+            response.resume();
+            response.on('end', () => finish(new HttpError(status, url)));
+            return;
+          }
+
+          const chunks: Buffer[] = [];
+          response.on('data', (chunk: Buffer) => chunks.push(chunk));
+          response.on('error', error => finish(error));
+          response.on('end', () => {
+            try {
+              finish(null, JSON.parse(Buffer.concat(chunks).toString('utf8')) as T);
+            } catch (error) {
+              finish(error as Error);
+            }
+          });
+        }
+      );
+
+      timer = setTimeout(() => {
+        const error = new HttpTimeoutError(this.timeoutMs, url);
+        finish(error);
+        request.destroy(error);
+      }, this.timeoutMs);
+      request.on('error', error => finish(error));
+    });
+  }
+
+  /** 关闭所有空闲连接（进程退出或测试结束时调用） */
+  destroy(): void {
+    this.httpAgent.destroy();
+    this.httpsAgent.destroy();
+  }
+}
+
+/**
+ * 以最多 concurrency 个并发执行 fn，结果顺序与 items 一致
+ * fn 抛错会使整体 reject；需要容错的调用方在 fn 内部自行捕获
+ */
+export async function mapWithConcurrency<T, R>(
+  items: readonly T[],
+  concurrency: number,
+  fn: (item: T, index: number) => Promise<R>
+): Promise<R[]> {
+  const results = new Array<R>(items.length);
+  let next = 0;
+
+  const worker = async () => {
+    while (next < items.length) {
+      const index = next++;
+      results[index] = await fn(items[index], index);
+    }
+  };
+
+  const workers = Array.from({ length: Math.max(1, Math.min(concurrency, items.length)) }, worker);
+  await Promise.all(workers);
+  return results;
+}
@@ -0,0 +1,180 @@
+import { defaultConfig } from '../../config';
+import { PriceSnapshot } from '../../types';
+
+/**
+ * 进程内市场状态：每个市场的最新价格、最近一次写入的快照和偏离度滚动统计
+ *
+ * - 检测直接读内存中的最新价格
+ * - 快照只在 yes / no 价格相对上次写入的变动超过 epsilon，或距上次写入超过心跳间隔时才落库，
+ *   市场越平静写入越少；读快照历史时按「最后一个值延续到下一条」理解
+ * - 只有新价格到达过的市场才会被检查，没有行情的市场不会补写
+ */
+
+export interface MarketStateOptions {
+  /** yes / no 价格变动超过该值才写快照 */
+  epsilon?: number;
+  /** 价格没变时最长多久写一次快照（毫秒） */
+  heartbeatMs?: number;
+  /** 偏离度滚动统计的窗口（按 EWMA 近似，单位为更新次数） */
+  deviationWindow?: number;
+}
+
+export interface DeviationStats {
+  /** 最新偏离度（1 - yes - no） */
+  last: number;
+  mean: number;
+  std: number;
+  max: number;
+  samples: number;
+}
+
+export interface MarketState {
+  prices: PriceSnapshot;
+  updatedAt: number;
+  /** 最近一次落库的快照，未写入过为 null */
+  written: PriceSnapshot | null;
+  writtenAt: number;
+  deviation: DeviationStats;
+}
+
+export interface MarketStateStats {
+  markets: number;
+  /** 收到的价格更新数 */
+  updates: number;
+  /** 写入的快照数 */
+  written: number;
+}
+
+export class MarketStateStore {
+  private readonly epsilon: number;
+  private readonly heartbeatMs: number;
+  private readonly alpha: number;
+  private states = new Map<string, MarketState>();
+  /** 上次写入之后有新价格、尚未判断或尚未写入的市场 */
+  private touched = new Set<string>();
+  private counters = { updates: 0, written: 0 };
+
+  constructor(options: MarketStateOptions = {}) {
+    this.epsilon = options.epsilon ?? defaultConfig.snapshots.epsilon;
+    this.heartbeatMs = options.heartbeatMs ?? defaultConfig.snapshots.heartbeatMinutes * 60_000;
+    this.alpha = 2 / ((options.deviationWindow ?? 20) + 1);
+  }
+
+  get size(): number {
+    return this.states.size;
+  }
+
+  get(marketId: string): MarketState | undefined {
+    return this.states.get(marketId);
+  }
+
+  /**
+   * 用已落库的快照恢复状态（重启后第一轮不必把所有市场重写一遍）
+   */
+  seed(snapshots: ReadonlyArray<PriceSnapshot & { timestamp: Date }>): void {
+    for (const snapshot of snapshots) {
+      const time = snapshot.timestamp.getTime();
+      const { timestamp, ...prices } = snapshot;
+      const state = this.apply(prices, time);
+      state.written = prices;
+      state.writtenAt = time;
+      this.touched.delete(snapshot.market_id);
+    }
+    this.counters.updates = 0;
+  }
+
+  /** 记录一条最新价格并更新偏离度统计 */
+  apply(prices: PriceSnapshot, now: number = Date.now()): MarketState {
+    this.counters.updates++;
+    const deviation = 1 - prices.yes_price - prices.no_price;
+
+    let state = this.states.get(prices.market_id);
+    if (!state) {
+      state = {
+        prices,
+        updatedAt: now,
+        written: null,
+        writtenAt: 0,
+        deviation: { last: deviation, mean: deviation, std: 0, max: deviation, samples: 1 },
+      };
+      this.states.set(prices.market_id, state);
+    } else {
+      state.prices = prices;
+      state.updatedAt = now;
+      updateDeviation(state.deviation, deviation, this.alpha);
+    }
+    this.touched.add(prices.market_id);
+    return state;
+  }
+
+  /**
+   * 找出需要落库的快照：上次写入之后有新价格，且相对上次写入变动超过 epsilon 或已到心跳间隔
+   * 不改变写入状态，调用方在写入提交之后调用 markWritten；写入失败或回滚时下次照样返回这些快照
+   */
+  collectDirty(now: number = Date.now()): PriceSnapshot[] {
+    const dirty: PriceSnapshot[] = [];
+    for (const marketId of this.touched) {
+      const state = this.states.get(marketId)!;
+      if (this.needsWrite(state, now)) {
+        dirty.push(state.prices);
+      } else {
+        // 不需要写入的市场等下一条价格再判断
+        this.touched.delete(marketId);
+      }
+    }
+    return dirty;
+  }
+
+  /** collectDirty 返回的快照已提交 */
+  markWritten(snapshots: readonly PriceSnapshot[], now: number = Date.now()): void {
+    for (const snapshot of snapshots) {
+      const state = this.states.get(snapshot.market_id);
+      if (!state) continue;
+      state.written = snapshot;
+      state.writtenAt = now;
+      // 期间又有新价格时保留标记，下次再判断
+      if (state.prices === snapshot) {
+        this.touched.delete(snapshot.market_id);
+      }
+    }
+    this.counters.written += snapshots.length;
+  }
+
+  /** 只保留给定的市场（已结束 / 下架的市场从内存中移除） */
+  retain(marketIds: Iterable<string>): void {
+    const keep = new Set(marketIds);
+    for (const marketId of this.states.keys()) {
+      if (!keep.has(marketId)) {
+        this.states.delete(marketId);
+        this.touched.delete(marketId);
+      }
+    }
+  }
+
+  /** 返回并清零计数（用于定期输出写入量） */
+  takeStats(): MarketStateStats {
+    const stats = { markets: this.states.size, ...this.counters };
+    this.counters = { updates: 0, written: 0 };
+    return stats;
+  }
+
+  private needsWrite(state: MarketState, now: number): boolean {
+    const { written, prices } = state;
+    return written === null
+      || Math.abs(prices.yes_price - written.yes_price) > this.epsilon
+      || Math.abs(prices.no_price - written.no_price) > this.epsilon
+      || now - state.writtenAt >= this.heartbeatMs;
+  }
+}
+
+/** 指数加权的均值 / 方差 */
+function updateDeviation(stats: DeviationStats, value: number, alpha: number): void {
+  const diff = value - stats.mean;
+  const increment = alpha * diff;
+  stats.mean += increment;
+  const variance = (1 - alpha) * (stats.std ** 2 + diff * increment);
+  stats.std = Math.sqrt(variance);
+  stats.last = value;
+  stats.max = Math.max(stats.max, value);
+  stats.samples++;
+}
@@ -0,0 +1,147 @@
+import { AddressInfo } from 'net';
+import WebSocket, { WebSocketServer } from 'ws';
+import { PriceUpdate } from './priceStream';
+
+/**
+ * 本地模拟行情源：实现 priceStream.ts 的协议，离线联调和压测用
+ *
+ * 每个连接按订阅的市场独立生成随机游走价格，总速率为 rate 条/秒，每 tickMs 打包成一条消息发送。
+ * yes + no 平时围绕 1 小幅波动，每条更新以 deviationProbability 的概率出现 1.5%~6% 的偏离，
+ * 这样检测、信号、冷却、落库各环节都能被触发。
+ */
+
+export interface MockFeedOptions {
+  /** 监听端口，0 为随机 */
+  port?: number;
+  host?: string;
+  /** 每个连接每秒发送的更新数 */
+  rate?: number;
+  tickMs?: number;
+  deviationProbability?: number;
+}
+
+interface MarketState {
+  yes: number;
+}
+
+interface Subscriber {
+  markets: string[];
+  states: Map<string, MarketState>;
+  /** 累计的小数部分，低速率时不至于一直取整为 0 */
+  carry: number;
+}
+
+export class MockFeedServer {
+  readonly options: Required<MockFeedOptions>;
+  /** 已发送的更新数 */
+  sent = 0;
+  private server: WebSocketServer | null = null;
+  private subscribers = new Map<WebSocket, Subscriber>();
+  private timer: NodeJS.Timeout | undefined;
+
+  constructor(options: MockFeedOptions = {}) {
+    this.options = {
+      port: 0,
+      host: '127.0.0.1',
+      rate: 1000,
+      tickMs: 10,
+      deviationProbability: 0.01,
+      ...options,
+    };
+  }
+
+  /** 启动并返回实际监听的端口 */
+  start(): Promise<number> {
+    return new Promise((resolve, reject) => {
+      const server = new WebSocketServer({ port: this.options.port, host: this.options.host });
+      this.server = server;
+
+      server.on('connection', socket => {
+        this.subscribers.set(socket, { markets: [], states: new Map(), carry: 0 });
+        socket.on('message', data => this.onMessage(socket, data.toString()));
+        socket.on('close', () => this.subscribers.delete(socket));
+      });
+      server.once('error', reject);
+      server.once('listening', () => {
+        this.timer = setInterval(() => this.tick(), this.options.tickMs);
+        resolve((server.address() as AddressInfo).port);
+      });
+    });
+  }
+
+  stop(): Promise<void> {
+    clearInterval(this.timer);
+    const server = this.server;
+    this.server = null;
+    if (!server) return Promise.resolve();
+
+    for (const socket of server.clients) {
+      socket.terminate();
+    }
+    this.subscribers.clear();
+    return new Promise(resolve => server.close(() => resolve()));
+  }
+
+  get clientCount(): number {
+    return this.subscribers.size;
+  }
+
+  private onMessage(socket: WebSocket, data: string): void {
+    let message: any;
+    try {
+      message = JSON.parse(data);
+    } catch {
+      return;
+    }
+    const subscriber = this.subscribers.get(socket);
+    if (subscriber && message?.type === 'subscribe' && Array.isArray(message.markets)) {
+      subscriber.markets = message.markets.filter((id: unknown): id is string => typeof id === 'string');
+    }
+  }
+
+  private tick(): void {
+    const perTick = (this.options.rate * this.options.tickMs) / 1000;
+    const now = Date.now();
+
+    for (const [socket, subscriber] of this.subscribers) {
+      if (subscriber.markets.length === 0 || socket.readyState !== WebSocket.OPEN) continue;
+
+      subscriber.carry += perTick;
+      const count = Math.floor(subscriber.carry);
+      subscriber.carry -= count;
+      if (count === 0) continue;
+
+      const updates: PriceUpdate[] = [];
+      for (let i = 0; i < count; i++) {
+        const marketId = subscriber.markets[Math.floor(Math.random() * subscriber.markets.length)];
+        updates.push(this.nextPrice(subscriber, marketId, now));
+      }
+      socket.send(JSON.stringify({ type: 'prices', updates }));
+      this.sent += count;
+    }
+  }
+
+  private nextPrice(subscriber: Subscriber, marketId: string, now: number): PriceUpdate {
+    let state = subscriber.states.get(marketId);
+    if (!state) {
+      state = { yes: 0.2 + Math.random() * 0.6 };
+      subscriber.states.set(marketId, state);
+    }
+    state.yes = Math.min(0.95, Math.max(0.05, state.yes + (Math.random() - 0.5) * 0.004));
+
+    const deviation = Math.random() < this.options.deviationProbability
+      ? 0.015 + Math.random() * 0.045
+      : (Math.random() - 0.5) * 0.004;
+    const no = 1 - state.yes - deviation;
+
+    return {
+      market_id: marketId,
+      yes_price: Math.round(state.yes * 10000) / 10000,
+      no_price: Math.round(no * 10000) / 10000,
+      yes_liquidity: 1000 + Math.round(Math.random() * 9000),
+      no_liquidity: 1000 + Math.round(Math.random() * 9000),
+      volume_24h: 10_000 + Math.round(Math.random() * 90_000),
+      ts: now,
+    };
+  }
+}
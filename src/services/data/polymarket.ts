@@ -1,37 +1,61 @@
-import { Market, PriceSnapshot } from '../../types';
+import { BotConfig, Market, PriceSnapshot } from '../../types';
+import { defaultConfig } from '../../config';
+import { HttpClient, mapWithConcurrency } from './httpClient';
+
+export type PolymarketOptions = BotConfig['polymarket'];
+
+export interface ActiveMarkets {
+  markets: Market[];
+  /** 所有分页都取到了；为 false 时 markets 只是一部分 */
+  complete: boolean;
+}
 
 export class PolymarketAPI {
-  private baseUrl = 'https://gamma-api.polymarket.com';
+  private readonly options: PolymarketOptions;
+  private readonly client: HttpClient;
 
-  async getActiveMarkets(): Promise<Market[]> {
-    try {
-      const response = await fetch(`${this.baseUrl}/markets?active=true&closed=false&limit=100`);
-      if (!response.ok) throw new Error(`HTTP ${response.status}`);
-      
-      const data = await response.json();
-      return data.map((item: any): Market => ({
-        id: item.conditionId || item.id,
-        slug: item.slug,
-        question: item.question,
-        category: item.category,
-        created_at: new Date(item.createdAt),
-        resolution_time: item.resolutionTime ? new Date(item.resolutionTime) : undefined,
-        resolved: item.resolved || false,
-        active: item.active && !item.closed,
-      }));
-    } catch (error) {
-      console.error('Failed to fetch markets:', error);
-      return [];
+  constructor(options: Partial<PolymarketOptions> = {}) {
+    this.options = { ...defaultConfig.polymarket, ...options };
+    this.client = new HttpClient({ timeoutMs: this.options.timeoutMs, maxSockets: this.options.concurrency });
+  }
+
+  /**
+   * 按 offset 翻页取全部活跃市场，直到某页不满或达到 maxMarkets
+   * 翻页期间有市场关闭会导致后续页前移，按 id 去重
+   * 中途某页失败时返回已取到的部分并标记 complete: false，调用方不能把它当成完整列表
+   */
+  async getActiveMarkets(): Promise<ActiveMarkets> {
+    const { baseUrl, pageSize, maxMarkets } = this.options;
+    const markets = new Map<string, Market>();
+    let complete = true;
+
+    for (let offset = 0; maxMarkets <= 0 || offset < maxMarkets; offset += pageSize) {
+      let page: any[];
+      try {
+        page = await this.client.getJson<any[]>(
+          `${baseUrl}/markets?active=true&closed=false&limit=${pageSize}&offset=${offset}`
+        );
+      } catch (error) {
+        console.error(`Failed to fetch markets (offset ${offset}):`, error);
+        complete = false;
+        break;
+      }
+
+      for (const item of page) {
+        const market = this.toMarket(item);
+        markets.set(market.id, market);
+      }
+      if (page.length < pageSize) break;
     }
+
+    const result = [...markets.values()];
+    return { markets: maxMarkets > 0 ? result.slice(0, maxMarkets) : result, complete };
   }
 
   async getMarketPrices(marketId: string): Promise<PriceSnapshot | null> {
     try {
-      const response = await fetch(`${this.baseUrl}/markets/${marketId}`);
-      if (!response.ok) throw new Error(`HTTP ${response.status}`);
-      
-      const data = await response.json();
-      
+      const data = await this.client.getJson<any>(`${this.options.baseUrl}/markets/${marketId}`);
+
       return {
         market_id: marketId,
         yes_price: parseFloat(data.outcomes?.[0]?.price || 0),
@@ -45,4 +69,30 @@ export class PolymarketAPI {
       return null;
     }
   }
+
+  /**
+   * 并发获取多个市场的价格（最多 concurrency 个同时进行，复用 keep-alive 连接）
+   * 结果与 marketIds 一一对应，失败的为 null
+   */
+  getMarketPricesBatch(marketIds: readonly string[]): Promise<(PriceSnapshot | null)[]> {
+    return mapWithConcurrency(marketIds, this.options.concurrency, id => this.getMarketPrices(id));
+  }
+
+  /** 关闭 keep-alive 连接 */
+  close(): void {
+    this.client.destroy();
+  }
+
+  private toMarket(item: any): Market {
+    return {
+      id: item.conditionId || item.id,
+      slug: item.slug,
+      question: item.question,
+      category: item.category,
+      created_at: new Date(item.createdAt),
+      resolution_time: item.resolutionTime ? new Date(item.resolutionTime) : undefined,
+      resolved: item.resolved || false,
+      active: item.active && !item.closed,
+    };
+  }
 }
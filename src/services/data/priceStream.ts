@@ -0,0 +1,184 @@
+import { EventEmitter } from 'events';
+import WebSocket from 'ws';
+import { PriceSnapshot } from '../../types';
+
+/**
+ * 推送行情流客户端（WebSocket）
+ *
+ * 协议（mockFeedServer.ts 实现了同一协议，可离线联调和压测）：
+ *   客户端 → 服务端  {"type":"subscribe","markets":["<market_id>", ...]}   订阅集合整体替换
+ *   服务端 → 客户端  {"type":"prices","updates":[{"market_id","yes_price","no_price",
+ *                     "yes_liquidity"?,"no_liquidity"?,"volume_24h"?,"ts"?}, ...]}
+ * 其他格式的行情源通过 options.parse 转换成 PriceUpdate 列表即可接入。
+ *
+ * 断线后按指数退避重连并重新订阅；定时 ping，超过 staleMs 没有任何消息（含 pong）视为失效并断开重连。
+ *
+ * 事件：
+ *   'prices' (updates: PriceUpdate[])  一条消息中的全部更新
+ *   'open' / 'close'
+ *   'error' (error: Error)             没有监听者时输出到 console.error
+ */
+
+export interface PriceUpdate extends PriceSnapshot {
+  /** 行情源发出时间（epoch 毫秒），用于计算延迟 */
+  ts?: number;
+}
+
+export interface PriceStreamOptions {
+  url: string;
+  /** 首次重连等待（毫秒），之后每次翻倍 */
+  reconnectMinMs?: number;
+  reconnectMaxMs?: number;
+  /** 超过该时长没有消息视为失效 */
+  staleMs?: number;
+  parse?: (data: string) => PriceUpdate[];
+}
+
+export function parseFeedMessage(data: string): PriceUpdate[] {
+  const message = JSON.parse(data);
+  if (message?.type !== 'prices' || !Array.isArray(message.updates)) {
+    return [];
+  }
+  return message.updates
+    .filter((update: any) => typeof update?.market_id === 'string'
+      && Number.isFinite(update.yes_price) && Number.isFinite(update.no_price))
+    .map((update: any): PriceUpdate => ({
+      market_id: update.market_id,
+      yes_price: update.yes_price,
+      no_price: update.no_price,
+      yes_liquidity: update.yes_liquidity ?? 0,
+      no_liquidity: update.no_liquidity ?? 0,
+      volume_24h: update.volume_24h ?? 0,
+      ts: update.ts,
+    }));
+}
+
+export class PriceStream extends EventEmitter {
+  private readonly options: Required<PriceStreamOptions>;
+  private socket: WebSocket | null = null;
+  private markets: string[] = [];
+  private attempts = 0;
+  private stopped = true;
+  private lastMessageAt = 0;
+  private reconnectTimer: NodeJS.Timeout | undefined;
+  private heartbeatTimer: NodeJS.Timeout | undefined;
+
+  constructor(options: PriceStreamOptions) {
+    super();
+    this.options = {
+      reconnectMinMs: 1000,
+      reconnectMaxMs: 30_000,
+      staleMs: 30_000,
+      parse: parseFeedMessage,
+      ...options,
+    };
+  }
+
+  start(): void {
+    if (!this.stopped) return;
+    this.stopped = false;
+    this.connect();
+    this.heartbeatTimer = setInterval(() => this.heartbeat(), Math.max(100, this.options.staleMs / 3));
+  }
+
+  stop(): void {
+    this.stopped = true;
+    clearTimeout(this.reconnectTimer);
+    clearInterval(this.heartbeatTimer);
+    this.socket?.close();
+    this.socket = null;
+  }
+
+  /** 设置订阅的市场（整体替换），已连接时立即发送，重连后自动重发 */
+  subscribe(marketIds: readonly string[]): void {
+    this.markets = [...marketIds];
+    this.sendSubscribe();
+  }
+
+  get connected(): boolean {
+    return this.socket?.readyState === WebSocket.OPEN;
+  }
+
+  /** 已连接且最近 staleMs 内收到过消息；否则调用方应回退到轮询 */
+  isHealthy(now: number = Date.now()): boolean {
+    return this.connected && now - this.lastMessageAt < this.options.staleMs;
+  }
+
+  private connect(): void {
+    const socket = new WebSocket(this.options.url);
+    this.socket = socket;
+
+    socket.on('open', () => {
+      this.attempts = 0;
+      this.lastMessageAt = Date.now();
+      this.sendSubscribe();
+      this.emit('open');
+    });
+
+    socket.on('message', data => {
+      this.lastMessageAt = Date.now();
+      let updates: PriceUpdate[];
+      try {
+        updates = this.options.parse(data.toString());
+      } catch (error) {
+        this.fail(error as Error);
+        return;
+      }
+      if (updates.length > 0) {
+        this.emit('prices', updates);
+      }
+    });
+
+    socket.on('pong', () => {
+      this.lastMessageAt = Date.now();
+    });
+
+    // error 之后总会触发 close，重连统一在 close 里安排
+    socket.on('error', error => this.fail(error));
+
+    socket.on('close', () => {
+      if (this.socket === socket) {
+        this.socket = null;
+      }
+      this.emit('close');
+      if (!this.stopped) {
+        this.scheduleReconnect();
+      }
+    });
+  }
+
+  private scheduleReconnect(): void {
+    const delay = Math.min(this.options.reconnectMaxMs, this.options.reconnectMinMs * 2 ** this.attempts);
+    this.attempts++;
+    clearTimeout(this.reconnectTimer);
+    this.reconnectTimer = setTimeout(() => {
+      if (!this.stopped) this.connect();
+    }, delay);
+  }
+
+  private heartbeat(): void {
+    const socket = this.socket;
+    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+
+    if (Date.now() - this.lastMessageAt >= this.options.staleMs) {
+      // 连接假死：直接断开，close 事件里重连
+      socket.terminate();
+      return;
+    }
+    socket.ping();
+  }
+
+  private sendSubscribe(): void {
+    if (this.connected) {
+      this.socket!.send(JSON.stringify({ type: 'subscribe', markets: this.markets }));
+    }
+  }
+
+  private fail(error: Error): void {
+    if (this.listenerCount('error') > 0) {
+      this.emit('error', error);
+    } else {
+      console.error('❌ 行情流错误:', error.message);
+    }
+  }
+}
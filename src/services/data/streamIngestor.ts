@@ -0,0 +1,146 @@
+import { PriceRepository } from '../../database/repositories/price';
+import { RiskManager } from '../risk/riskManager';
+import { OpportunityNotification, OpportunityPipeline } from '../strategy/opportunityPipeline';
+import { Market } from '../../types';
+import { MarketStateStore } from './marketState';
+import { PriceUpdate } from './priceStream';
+
+/**
+ * 推送行情的处理：每条更新到达即做套利检测，快照合并后批量落库
+ *
+ * - 检测：每条更新都跑 OpportunityPipeline（同一市场在信号有效期内不重复发，冷却期与轮询共用）
+ * - 落库：价格记入 MarketStateStore，按间隔把变动超过 epsilon（或到心跳间隔）的市场的最新一条在一个事务中写入
+ *   （每秒几千条更新时逐条写入会把数据库拖垮，K 线仍按落库的快照维护）
+ * - 风控：日亏损 / 交易次数的判断每次落库时刷新一次，不在每条更新上查库
+ */
+
+export const DEFAULT_FLUSH_INTERVAL_MS = 1000;
+
+export interface StreamIngestorOptions {
+  pipeline: OpportunityPipeline;
+  priceRepo: PriceRepository;
+  riskManager: Pick<RiskManager, 'getRiskSummary'>;
+  flushIntervalMs?: number;
+  /** 与轮询共用的市场状态，未传入时新建 */
+  store?: MarketStateStore;
+  /** 产生信号时调用（Telegram 推送等），在信号写入之后 */
+  onSignal?: (notification: OpportunityNotification) => Promise<void> | void;
+}
+
+export interface StreamStats {
+  /** 收到的更新数 */
+  updates: number;
+  /** 不在订阅市场列表中而忽略的更新数 */
+  ignored: number;
+  /** 写入的快照数 */
+  snapshots: number;
+  signals: number;
+  /** 行情源发出到处理完成的延迟（毫秒），只统计带 ts 的更新 */
+  maxLagMs: number;
+  totalLagMs: number;
+  lagSamples: number;
+}
+
+function emptyStats(): StreamStats {
+  return { updates: 0, ignored: 0, snapshots: 0, signals: 0, maxLagMs: 0, totalLagMs: 0, lagSamples: 0 };
+}
+
+export class StreamIngestor {
+  private readonly flushIntervalMs: number;
+  private readonly store: MarketStateStore;
+  private markets = new Map<string, Market>();
+  private tradingAllowed = true;
+  private flushTimer: NodeJS.Timeout | undefined;
+  private stats = emptyStats();
+
+  constructor(private options: StreamIngestorOptions) {
+    this.flushIntervalMs = options.flushIntervalMs ?? DEFAULT_FLUSH_INTERVAL_MS;
+    this.store = options.store ?? new MarketStateStore();
+  }
+
+  start(): void {
+    this.refreshRisk();
+    this.flushTimer = setInterval(() => {
+      try {
+        this.flush();
+      } catch (error) {
+        console.error('❌ 写入行情快照失败:', error);
+      }
+    }, this.flushIntervalMs);
+  }
+
+  /** 停止定时落库并写入剩余的快照 */
+  stop(): void {
+    clearInterval(this.flushTimer);
+    this.flushTimer = undefined;
+    this.flush();
+  }
+
+  /** 更新市场列表（轮询取到的活跃市场），只处理列表内的市场 */
+  setMarkets(markets: readonly Market[]): void {
+    this.markets = new Map(markets.map(market => [market.id, market]));
+  }
+
+  handle(updates: readonly PriceUpdate[]): void {
+    const now = Date.now();
+    const notifications: OpportunityNotification[] = [];
+
+    for (const update of updates) {
+      this.stats.updates++;
+      const market = this.markets.get(update.market_id);
+      if (!market) {
+        this.stats.ignored++;
+        continue;
+      }
+      this.store.apply(update, now);
+
+      if (update.ts !== undefined) {
+        const lag = now - update.ts;
+        this.stats.maxLagMs = Math.max(this.stats.maxLagMs, lag);
+        this.stats.totalLagMs += lag;
+        this.stats.lagSamples++;
+      }
+
+      if (!this.tradingAllowed) {
+        continue;
+      }
+      const notification = this.options.pipeline.evaluate(market, update, now);
+      if (notification) {
+        this.stats.signals++;
+        notifications.push(notification);
+      }
+    }
+
+    for (const notification of notifications) {
+      Promise.resolve(this.options.onSignal?.(notification)).catch(error => {
+        console.error('❌ 推送信号失败:', error);
+      });
+    }
+  }
+
+  /** 把需要落库的快照在一个事务中写入，并刷新风控状态 */
+  flush(): number {
+    const now = Date.now();
+    let written = 0;
+    const snapshots = this.store.collectDirty(now);
+    if (snapshots.length > 0) {
+      written = this.options.priceRepo.insertSnapshots(snapshots);
+      this.store.markWritten(snapshots, now);
+      this.stats.snapshots += written;
+    }
+    this.refreshRisk();
+    return written;
+  }
+
+  /** 返回并清零统计（用于定期输出吞吐量） */
+  takeStats(): StreamStats {
+    const stats = this.stats;
+    this.stats = emptyStats();
+    return stats;
+  }
+
+  private refreshRisk(): void {
+    const summary = this.options.riskManager.getRiskSummary();
+    this.tradingAllowed = summary.dailyLoss.allowed && summary.tradeCount.allowed;
+  }
+}
@@ -0,0 +1,81 @@
+import {
+  columnarPathFor,
+  decodeColumnarReport,
+  encodeColumnarReport,
+} from '../columnarReport';
+import { VirtualTrade } from '../virtualExecutor';
+
+function makeTrade(id: number, overrides: Partial<VirtualTrade> = {}): VirtualTrade {
+  return {
+    id,
+    signalId: id,
+    marketId: `market-${id % 2}`,
+    marketName: `Market ${id % 2}`,
+    side: id % 2 === 0 ? 'YES' : 'NO',
+    entryPrice: 0.45,
+    entryDeviation: 0.03,
+    amount: 200,
+    quantity: 200 / 0.45,
+    entryTime: new Date('2024-02-08T10:00:00Z'),
+    exitPrice: 0.47,
+    exitTime: new Date('2024-02-08T11:00:00Z'),
+    exitReason: 'PARTIAL_CLOSE',
+    pnl: 8.89,
+    pnlPercent: 4.44,
+    status: 'CLOSED',
+    ...overrides,
+  };
+}
+
+describe('columnarReport', () => {
+  test('should round-trip headline metrics and trade columns', () => {
+    const trades = [
+      makeTrade(1),
+      makeTrade(2, { exitReason: 'TIMEOUT', pnl: -3.5 }),
+      makeTrade(3),
+    ];
+    const buffer = encodeColumnarReport({ result: { totalTrades: 3, totalPnL: 14.28 } }, trades);
+
+    const { header, columns } = decodeColumnarReport(buffer);
+
+    expect(header.rows).toBe(3);
+    expect((header.result as any).totalTrades).toBe(3);
+    expect(columns.id).toEqual([1, 2, 3]);
+    expect(columns.marketId).toEqual(['market-1', 'market-0', 'market-1']);
+    expect(columns.exitReason).toEqual(['PARTIAL_CLOSE', 'TIMEOUT', 'PARTIAL_CLOSE']);
+    expect(columns.pnl[1]).toBeCloseTo(-3.5);
+    expect(columns.entryTime[0]).toBe(Date.parse('2024-02-08T10:00:00Z'));
+  });
+
+  test('should encode missing values as NaN / null', () => {
+    const trade = makeTrade(1, { exitPrice: undefined, exitTime: undefined, exitReason: undefined, pnl: undefined });
+    const { columns } = decodeColumnarReport(encodeColumnarReport({}, [trade]));
+
+    expect(columns.exitPrice[0]).toBeNaN();
+    expect(columns.exitTime[0]).toBeNaN();
+    expect(columns.pnl[0]).toBeNaN();
+    expect(columns.exitReason[0]).toBeNull();
+  });
+
+  test('should only decode requested columns', () => {
+    const { columns } = decodeColumnarReport(
+      encodeColumnarReport({}, [makeTrade(1), makeTrade(2)]),
+      ['pnl', 'side']
+    );
+
+    expect(Object.keys(columns).sort()).toEqual(['pnl', 'side']);
+  });
+
+  test('should keep column offsets 8-byte aligned', () => {
+    const { header } = decodeColumnarReport(encodeColumnarReport({}, [makeTrade(1), makeTrade(2), makeTrade(3)]));
+
+    for (const column of header.columns) {
+      expect(column.offset % 8).toBe(0);
+    }
+  });
+
+  test('should derive columnar path from report path', () => {
+    expect(columnarPathFor('./reports/backtest-7days.json')).toBe('./reports/backtest-7days.trades.bin');
+    expect(columnarPathFor('./reports/run')).toBe('./reports/run.trades.bin');
+  });
+});
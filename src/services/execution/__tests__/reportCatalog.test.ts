@@ -0,0 +1,113 @@
+import Database from 'better-sqlite3';
+import { mkdtempSync } from 'fs';
+import { tmpdir } from 'os';
+import { join } from 'path';
+import {
+  catalogPathFor,
+  CatalogEntry,
+  equityCurve,
+  openCatalog,
+  reportNameFor,
+  upsertCatalogEntry,
+} from '../reportCatalog';
+
+function makeEntry(overrides: Partial<CatalogEntry> = {}): CatalogEntry {
+  return {
+    name: 'backtest-1',
+    createdAt: '2024-02-08T12:00:00.000Z',
+    jsonPath: '/tmp/reports/backtest-1.json',
+    columnarPath: '/tmp/reports/backtest-1.trades.bin',
+    config: { initialCapital: 1000, minArbitrageGap: 0.015 },
+    options: { days: 7, scenario: 'RANDOM', markets: 3 },
+    result: {
+      totalTrades: 2,
+      winningTrades: 1,
+      losingTrades: 1,
+      winRate: 50,
+      totalPnL: 5,
+      totalPnLPercent: 0.5,
+      avgReturn: 0.25,
+      maxDrawdown: 1,
+      sharpeRatio: 0.8,
+    },
+    equity: [[0, 1000], [1000, 1010], [2000, 1005]],
+    ...overrides,
+  };
+}
+
+describe('reportCatalog', () => {
+  test('should build equity curve ordered by exit time, skipping open trades', () => {
+    const curve = equityCurve([3000, NaN, 1000], [-5, 7, 10], 1000, 0);
+
+    expect(curve).toEqual([[0, 1000], [1000, 1010], [3000, 1005]]);
+  });
+
+  test('should downsample long equity curves and keep both ends', () => {
+    const times = Array.from({ length: 2000 }, (_, i) => i + 1);
+    const pnl = times.map(() => 1);
+    const curve = equityCurve(times, pnl, 1000, 0, 100);
+
+    expect(curve).toHaveLength(100);
+    expect(curve[0]).toEqual([0, 1000]);
+    expect(curve[99]).toEqual([2000, 3000]);
+  });
+
+  test('should upsert entries and store paths relative to the catalog', () => {
+    const catalogPath = '/tmp/reports/catalog.db';
+    const db = openCatalog(':memory:');
+
+    upsertCatalogEntry(db, catalogPath, makeEntry());
+    upsertCatalogEntry(db, catalogPath, makeEntry({ equity: [[0, 1000]], result: { ...makeEntry().result, totalPnL: 9 } }));
+
+    const rows = db.prepare('SELECT name, json_path, columnar_path, scenario, total_pnl FROM reports').all();
+    expect(rows).toEqual([{
+      name: 'backtest-1',
+      json_path: 'backtest-1.json',
+      columnar_path: 'backtest-1.trades.bin',
+      scenario: 'RANDOM',
+      total_pnl: 9,
+    }]);
+
+    const equity = db.prepare('SELECT points FROM report_equity WHERE name = ?').get('backtest-1') as { points: string };
+    expect(JSON.parse(equity.points)).toEqual([[0, 1000]]);
+
+    db.close();
+  });
+
+  test('should store sweep runs with their parameters', () => {
+    const db = openCatalog(':memory:');
+
+    upsertCatalogEntry(db, '/tmp/reports/catalog.db', makeEntry({
+      name: 'sweep-abc-0001',
+      jsonPath: undefined,
+      columnarPath: undefined,
+      sweepId: 'abc',
+      params: { minArbitrageGap: 0.02, maxHoldHours: 12 },
+    }));
+
+    const row = db.prepare('SELECT json_path, sweep_id, params FROM reports').get() as Record<string, any>;
+    expect(row.json_path).toBeNull();
+    expect(row.sweep_id).toBe('abc');
+    expect(JSON.parse(row.params)).toEqual({ minArbitrageGap: 0.02, maxHoldHours: 12 });
+
+    db.close();
+  });
+
+  test('should add sweep columns to catalogs created before sweeps existed', () => {
+    const catalogPath = join(mkdtempSync(join(tmpdir(), 'catalog-')), 'catalog.db');
+    const old = new Database(catalogPath);
+    old.exec('CREATE TABLE reports (name TEXT PRIMARY KEY, created_at TEXT NOT NULL, config TEXT, options TEXT)');
+    old.close();
+
+    const db = openCatalog(catalogPath);
+    const columns = (db.pragma('table_info(reports)') as { name: string }[]).map(c => c.name);
+    expect(columns).toEqual(expect.arrayContaining(['sweep_id', 'params']));
+    db.close();
+  });
+
+  test('should derive catalog path and report name from report path', () => {
+    expect(catalogPathFor('/tmp/reports/backtest-1.json')).toBe('/tmp/reports/catalog.db');
+    expect(reportNameFor('/tmp/reports/backtest-1.json')).toBe('backtest-1');
+    expect(reportNameFor('/tmp/reports/backtest-1.trades.bin')).toBe('backtest-1');
+  });
+});
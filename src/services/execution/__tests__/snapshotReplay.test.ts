@@ -0,0 +1,110 @@
+import Database from 'better-sqlite3';
+import { migrate } from '../../../database/migrate';
+import { parseSqliteTime, toSqliteTime } from '../../../database/statements';
+import { BacktestConfig, BacktestEngine } from '../backtestEngine';
+import { readSnapshotChunks } from '../snapshotReplay';
+
+const START = new Date('2024-03-01T00:00:00Z');
+const MINUTE = 60 * 1000;
+
+/**
+ * 两个市场每分钟一条快照，b 的快照与 a 同一秒写入（时间相同，按 id 排序）
+ * 每 30 分钟出现一次 3% 的偏离，随后逐步回归
+ */
+function seed(database: Database.Database, minutes: number): void {
+  database.exec(`
+    INSERT INTO markets (id, slug, question) VALUES ('a', 'a', 'Market A'), ('b', 'b', 'Market B');
+  `);
+  const insert = database.prepare(
+    'INSERT INTO price_snapshots (market_id, timestamp, yes_price, no_price) VALUES (?, ?, ?, ?)'
+  );
+  database.transaction(() => {
+    for (let i = 0; i < minutes; i++) {
+      const time = toSqliteTime(new Date(START.getTime() + i * MINUTE));
+      const gap = Math.max(0, 0.03 - (i % 30) * 0.005);
+      insert.run('a', time, 0.6, 0.4 - gap);
+      insert.run('b', time, 0.3 - gap / 2, 0.7);
+    }
+  })();
+}
+
+function config(): BacktestConfig {
+  return {
+    initialCapital: 1000,
+    startDate: START,
+    endDate: new Date(START.getTime() + 24 * 60 * MINUTE),
+    minArbitrageGap: 0.015,
+  };
+}
+
+describe('snapshotReplay', () => {
+  let database: Database.Database;
+
+  beforeEach(() => {
+    database = new Database(':memory:');
+    migrate(database);
+    seed(database, 200);
+    jest.spyOn(console, 'log').mockImplementation(() => {});
+  });
+
+  afterEach(() => {
+    database.close();
+    jest.restoreAllMocks();
+  });
+
+  test('should convert between Date and SQLite timestamps as UTC', () => {
+    expect(toSqliteTime(new Date('2024-03-01T08:05:09.123Z'))).toBe('2024-03-01 08:05:09');
+    expect(parseSqliteTime('2024-03-01 08:05:09').toISOString()).toBe('2024-03-01T08:05:09.000Z');
+    expect(parseSqliteTime('2024-03-01T08:05:09Z').toISOString()).toBe('2024-03-01T08:05:09.000Z');
+    expect(parseSqliteTime('2024-03-01T08:05:09+08:00').toISOString()).toBe('2024-03-01T00:05:09.000Z');
+  });
+
+  test('should stream the half-open range in time order across chunk boundaries', () => {
+    const chunks = [...readSnapshotChunks(database, {
+      startTime: new Date(START.getTime() + 10 * MINUTE),
+      endTime: new Date(START.getTime() + 20 * MINUTE),
+      chunkSize: 3,
+    })];
+
+    expect(chunks.every(chunk => chunk.length <= 3)).toBe(true);
+    const points = chunks.flat();
+    // 10 分钟 × 2 个市场，不含结束时刻
+    expect(points).toHaveLength(20);
+    expect(points[0].timestamp.getTime()).toBe(START.getTime() + 10 * MINUTE);
+    expect(points[19].timestamp.getTime()).toBe(START.getTime() + 19 * MINUTE);
+    // 同一时刻的两条快照按写入顺序，块边界落在两者之间也不会丢失或重复
+    expect(points.map(p => p.marketId)).toEqual(Array.from({ length: 20 }, (_, i) => (i % 2 === 0 ? 'a' : 'b')));
+    expect(points[1].marketName).toBe('Market B');
+  });
+
+  test('should return no chunks for an empty range', () => {
+    const chunks = [...readSnapshotChunks(database, {
+      startTime: new Date('2025-01-01T00:00:00Z'),
+      endTime: new Date('2025-02-01T00:00:00Z'),
+    })];
+    expect(chunks).toHaveLength(0);
+  });
+
+  test('should produce the same backtest as loading all prices at once', async () => {
+    const range = { startTime: START, endTime: new Date(START.getTime() + 24 * 60 * MINUTE) };
+    const all = [...readSnapshotChunks(database, range)].flat();
+
+    const expected = await new BacktestEngine(config()).runBacktest(all);
+    const streamed = await new BacktestEngine(config()).runBacktestStream(
+      readSnapshotChunks(database, { ...range, chunkSize: 7 })
+    );
+
+    expect(expected.totalTrades).toBeGreaterThan(0);
+    expect(streamed).toEqual(expected);
+  });
+
+  test('should reject chunks that are out of time order', async () => {
+    const [first, second] = [...readSnapshotChunks(database, {
+      startTime: START,
+      endTime: new Date(START.getTime() + 4 * MINUTE),
+      chunkSize: 4,
+    })];
+
+    await expect(new BacktestEngine(config()).runBacktestStream([second, first])).rejects.toThrow('未按时间排序');
+  });
+});
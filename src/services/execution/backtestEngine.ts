@@ -1,7 +1,8 @@
 import { ArbitrageStrategy } from '../strategy/arbitrage';
 import { SignalGenerator } from '../strategy/signalGenerator';
-import { VirtualExecutor, VirtualTrade, BacktestResult } from '../execution/virtualExecutor';
+import { VirtualExecutor, VirtualTrade, BacktestResult, TakeProfitConfig } from '../execution/virtualExecutor';
 import { Signal } from '../../types';
+import { defaultConfig } from '../../config';
 
 export interface HistoricalPrice {
   timestamp: Date;
@@ -11,11 +12,21 @@ export interface HistoricalPrice {
   noPrice: number;
 }
 
+export interface BacktestRiskConfig {
+  maxDailyLoss: number;
+  maxSingleTrade: number;
+  maxDailyTrades: number;
+}
+
 export interface BacktestConfig {
   initialCapital: number;
   startDate: Date;
   endDate: Date;
   minArbitrageGap: number;
+  /** 止盈 / 超时规则，默认 defaultConfig.strategy.takeProfit */
+  takeProfit?: TakeProfitConfig;
+  /** 每日风控限额，默认 defaultConfig.risk */
+  risk?: BacktestRiskConfig;
 }
 
 /**
@@ -91,36 +102,63 @@ export class BacktestEngine {
   
   private signals: Map<number, { signal: Signal; opportunity: any }> = new Map();
   private signalIdCounter = 1;
+  private lastPrices: Map<string, HistoricalPrice> = new Map();
 
   constructor(config: BacktestConfig) {
     this.config = config;
     this.strategy = new ArbitrageStrategy(config.minArbitrageGap);
     this.signalGenerator = new SignalGenerator();
-    this.executor = new VirtualExecutor(config.initialCapital);
-    this.riskManager = new SimpleRiskManager(config.initialCapital);
+    this.executor = new VirtualExecutor(config.initialCapital, config.takeProfit ?? defaultConfig.strategy.takeProfit);
+    const risk = config.risk ?? defaultConfig.risk;
+    this.riskManager = new SimpleRiskManager(
+      config.initialCapital,
+      risk.maxDailyLoss,
+      risk.maxSingleTrade,
+      risk.maxDailyTrades
+    );
   }
 
   /**
    * 运行回测
    */
   async runBacktest(priceData: HistoricalPrice[]): Promise<BacktestResult> {
-    console.log(`🔄 开始回测: ${this.config.startDate.toISOString()} ~ ${this.config.endDate.toISOString()}`);
-    console.log(`📊 价格数据点数: ${priceData.length}`);
-    
     // 按时间排序
     const sortedData = priceData.sort((a, b) => a.timestamp.getTime() - b.timestamp.getTime());
+    return this.runBacktestStream([sortedData]);
+  }
+
+  /**
+   * 逐块运行回测：各块内、块与块之间须已按时间排序（如 readSnapshotChunks 的输出），
+   * 处理完一块即可释放，长区间回放不需要一次性载入全部价格点
+   */
+  async runBacktestStream(
+    chunks: Iterable<HistoricalPrice[]> | AsyncIterable<HistoricalPrice[]>
+  ): Promise<BacktestResult> {
+    console.log(`🔄 开始回测: ${this.config.startDate.toISOString()} ~ ${this.config.endDate.toISOString()}`);
     
     // 处理每个时间点的数据
     let signalCount = 0;
-    for (const dataPoint of sortedData) {
-      const hasSignal = await this.processPricePoint(dataPoint);
-      if (hasSignal) signalCount++;
+    let pointCount = 0;
+    let lastTime = -Infinity;
+    for await (const chunk of chunks) {
+      for (const dataPoint of chunk) {
+        const time = dataPoint.timestamp.getTime();
+        if (time < lastTime) {
+          throw new Error(`价格数据未按时间排序: ${dataPoint.timestamp.toISOString()}`);
+        }
+        lastTime = time;
+        pointCount++;
+
+        const hasSignal = await this.processPricePoint(dataPoint);
+        if (hasSignal) signalCount++;
+      }
     }
 
+    console.log(`📊 价格数据点数: ${pointCount}`);
     console.log(`\n📊 总信号数: ${signalCount}`);
 
     // 强制平掉所有持仓
-    this.closeAllPositions(sortedData[sortedData.length - 1]);
+    this.closeAllPositions();
 
     // 生成报告
     const report = this.executor.generateReport();
@@ -136,6 +174,7 @@ export class BacktestEngine {
   private async processPricePoint(data: HistoricalPrice): Promise<boolean> {
     // 更新日期
     this.riskManager.checkDate(data.timestamp);
+    this.lastPrices.set(data.marketId, data);
 
     // 1. 检查现有持仓
     const openTrades = this.executor.getOpenTrades();
@@ -207,7 +246,8 @@ export class BacktestEngine {
         opportunity.recommendation === 'BUY_YES' ? 'YES' : 'NO',
         opportunity.recommendation === 'BUY_YES' ? data.yesPrice : data.noPrice,
         opportunity.deviation,
-        amount
+        amount,
+        data.timestamp
       );
 
       console.log(`[回测] ${data.timestamp.toISOString()} ${data.marketName}`);
@@ -221,12 +261,13 @@ export class BacktestEngine {
   }
 
   /**
-   * 平掉所有持仓
+   * 平掉所有持仓（按各市场最后一个价格点）
    */
-  private closeAllPositions(lastPrice: HistoricalPrice): void {
+  private closeAllPositions(): void {
     const openTrades = this.executor.getOpenTrades();
     
     for (const trade of openTrades) {
+      const lastPrice = this.lastPrices.get(trade.marketId)!;
       const exitPrice = trade.side === 'YES' ? lastPrice.yesPrice : lastPrice.noPrice;
       const closedTrade = this.executor.closeTrade(trade.id, exitPrice, lastPrice.timestamp, 'MANUAL');
       if (closedTrade?.pnl) {
@@ -0,0 +1,196 @@
+import { writeFileSync } from 'fs';
+import { VirtualTrade } from './virtualExecutor';
+
+/**
+ * 列式回测报告（.trades.bin）
+ *
+ * 文件布局（小端序）:
+ *   [0..4)   魔数 'PMBT'
+ *   [4..8)   uint32 头部长度 H
+ *   [8..8+H) UTF-8 JSON 头部：配置、选项、核心指标、列目录
+ *   对齐到 8 字节后依次是各列数据，列目录里记录每列相对数据区的 offset / length
+ *
+ * 数值列为 float64 / int32，字符串列做字典编码（uint32 编码 + 头部中的字典），
+ * 时间列为 epoch 毫秒的 float64，缺失值为 NaN。
+ * 读取方只需解析头部即可拿到核心指标，需要画图时再按列读取。
+ */
+
+export const COLUMNAR_MAGIC = 'PMBT';
+export const COLUMNAR_VERSION = 1;
+
+export type ColumnType = 'float64' | 'int32' | 'dict';
+
+export interface ColumnInfo {
+  name: string;
+  type: ColumnType;
+  offset: number;
+  length: number;
+  dictionary?: string[];
+}
+
+export interface ColumnarHeader {
+  version: number;
+  rows: number;
+  columns: ColumnInfo[];
+  [key: string]: unknown;
+}
+
+type TradeColumn = {
+  name: keyof VirtualTrade;
+  type: ColumnType;
+};
+
+const TRADE_COLUMNS: TradeColumn[] = [
+  { name: 'id', type: 'int32' },
+  { name: 'signalId', type: 'int32' },
+  { name: 'marketId', type: 'dict' },
+  { name: 'marketName', type: 'dict' },
+  { name: 'side', type: 'dict' },
+  { name: 'entryPrice', type: 'float64' },
+  { name: 'entryDeviation', type: 'float64' },
+  { name: 'amount', type: 'float64' },
+  { name: 'quantity', type: 'float64' },
+  { name: 'entryTime', type: 'float64' },
+  { name: 'exitPrice', type: 'float64' },
+  { name: 'exitTime', type: 'float64' },
+  { name: 'exitReason', type: 'dict' },
+  { name: 'pnl', type: 'float64' },
+  { name: 'pnlPercent', type: 'float64' },
+  { name: 'status', type: 'dict' },
+];
+
+function align8(n: number): number {
+  return Math.ceil(n / 8) * 8;
+}
+
+function toNumber(value: unknown): number {
+  if (value instanceof Date) return value.getTime();
+  if (typeof value === 'number') return value;
+  return NaN;
+}
+
+function encodeColumn(column: TradeColumn, trades: VirtualTrade[]): { data: Buffer; dictionary?: string[] } {
+  const rows = trades.length;
+
+  if (column.type === 'float64') {
+    const values = new Float64Array(rows);
+    for (let i = 0; i < rows; i++) values[i] = toNumber(trades[i][column.name]);
+    return { data: Buffer.from(values.buffer, values.byteOffset, values.byteLength) };
+  }
+
+  if (column.type === 'int32') {
+    const values = new Int32Array(rows);
+    for (let i = 0; i < rows; i++) values[i] = Number(trades[i][column.name] ?? 0);
+    return { data: Buffer.from(values.buffer, values.byteOffset, values.byteLength) };
+  }
+
+  // 字典编码，缺失值编码为 0xFFFFFFFF
+  const dictionary: string[] = [];
+  const lookup = new Map<string, number>();
+  const codes = new Uint32Array(rows);
+  for (let i = 0; i < rows; i++) {
+    const value = trades[i][column.name];
+    if (value === undefined || value === null) {
+      codes[i] = 0xffffffff;
+      continue;
+    }
+    const key = String(value);
+    let code = lookup.get(key);
+    if (code === undefined) {
+      code = dictionary.length;
+      dictionary.push(key);
+      lookup.set(key, code);
+    }
+    codes[i] = code;
+  }
+  return { data: Buffer.from(codes.buffer, codes.byteOffset, codes.byteLength), dictionary };
+}
+
+/**
+ * 编码为列式报告
+ */
+export function encodeColumnarReport(meta: Record<string, unknown>, trades: VirtualTrade[]): Buffer {
+  // Typed array 默认按平台字节序写入，这里只支持小端平台（x86 / ARM）
+  if (new Uint8Array(new Uint16Array([1]).buffer)[0] !== 1) {
+    throw new Error('列式报告仅支持小端平台');
+  }
+
+  const columns: ColumnInfo[] = [];
+  const blocks: Buffer[] = [];
+  let offset = 0;
+
+  for (const column of TRADE_COLUMNS) {
+    const { data, dictionary } = encodeColumn(column, trades);
+    columns.push({ name: column.name, type: column.type, offset, length: data.length, dictionary });
+    const padded = align8(data.length);
+    blocks.push(data);
+    if (padded > data.length) blocks.push(Buffer.alloc(padded - data.length));
+    offset += padded;
+  }
+
+  const header: ColumnarHeader = {
+    ...meta,
+    version: COLUMNAR_VERSION,
+    rows: trades.length,
+    columns,
+  };
+  const headerBytes = Buffer.from(JSON.stringify(header), 'utf-8');
+  const prefix = Buffer.alloc(8);
+  prefix.write(COLUMNAR_MAGIC, 0, 'ascii');
+  prefix.writeUInt32LE(headerBytes.length, 4);
+
+  const headerEnd = 8 + headerBytes.length;
+  const padding = Buffer.alloc(align8(headerEnd) - headerEnd);
+
+  return Buffer.concat([prefix, headerBytes, padding, ...blocks]);
+}
+
+/**
+ * 解析列式报告，columns 为空时读取全部列
+ */
+export function decodeColumnarReport(
+  buffer: Buffer,
+  columns?: string[]
+): { header: ColumnarHeader; columns: Record<string, (number | string | null)[]> } {
+  if (buffer.toString('ascii', 0, 4) !== COLUMNAR_MAGIC) {
+    throw new Error('不是列式回测报告');
+  }
+  const headerLength = buffer.readUInt32LE(4);
+  const header = JSON.parse(buffer.toString('utf-8', 8, 8 + headerLength)) as ColumnarHeader;
+  const dataStart = align8(8 + headerLength);
+
+  const result: Record<string, (number | string | null)[]> = {};
+  for (const info of header.columns) {
+    if (columns && !columns.includes(info.name)) continue;
+    const start = dataStart + info.offset;
+    const slice = buffer.subarray(start, start + info.length);
+    // 拷贝一份保证对齐
+    const bytes = new Uint8Array(slice).buffer;
+
+    if (info.type === 'float64') {
+      result[info.name] = Array.from(new Float64Array(bytes));
+    } else if (info.type === 'int32') {
+      result[info.name] = Array.from(new Int32Array(bytes));
+    } else {
+      const dictionary = info.dictionary || [];
+      result[info.name] = Array.from(new Uint32Array(bytes), code =>
+        code === 0xffffffff ? null : dictionary[code]
+      );
+    }
+  }
+
+  return { header, columns: result };
+}
+
+/**
+ * 报告 JSON 路径对应的列式文件路径: foo.json -> foo.trades.bin
+ */
+export function columnarPathFor(jsonPath: string): string {
+  return jsonPath.endsWith('.json')
+    ? jsonPath.slice(0, -'.json'.length) + '.trades.bin'
+    : jsonPath + '.trades.bin';
+}
+
+export function writeColumnarReport(path: string, meta: Record<string, unknown>, trades: VirtualTrade[]): void {
+  writeFileSync(path, encodeColumnarReport(meta, trades));
+}
@@ -0,0 +1,227 @@
+import Database from 'better-sqlite3';
+import { readFileSync } from 'fs';
+import { basename, dirname, isAbsolute, join, relative } from 'path';
+import { BacktestResult, VirtualTrade } from './virtualExecutor';
+
+/**
+ * 回测报告目录（reports/catalog.db）
+ *
+ * 每次写报告时登记一行：配置、选项、核心指标和降采样后的资金曲线，
+ * Dashboard 列表、筛选、排序和资金曲线对比都只查这个库，不用逐个打开报告文件。
+ *
+ * 参数扫描（scripts/sweep_backtest.py）的每次运行也登记在 reports 中：
+ * sweep_id 指向 sweeps 表，params 为该次运行的参数组合，没有对应的报告文件。
+ */
+
+export const CATALOG_FILE = 'catalog.db';
+
+/** 资金曲线最多保留的点数 */
+export const EQUITY_POINTS = 500;
+
+/** 目录表结构，与 scripts/sweep_backtest.py 共用 */
+export const CATALOG_SCHEMA_PATH = join(__dirname, '..', '..', '..', 'scripts', 'report-catalog.sql');
+
+export type EquityPoint = [number, number];
+
+export interface CatalogEntry {
+  name: string;
+  createdAt: string;
+  jsonPath?: string;
+  columnarPath?: string;
+  config: Record<string, any>;
+  options: Record<string, any>;
+  result: Omit<BacktestResult, 'trades'>;
+  equity: EquityPoint[];
+  sweepId?: string;
+  params?: Record<string, number>;
+}
+
+/**
+ * 报告所在目录下的 catalog.db
+ */
+export function catalogPathFor(reportPath: string): string {
+  return join(dirname(reportPath), CATALOG_FILE);
+}
+
+/**
+ * 报告名：去掉 .json / .trades.bin 后缀的文件名
+ */
+export function reportNameFor(reportPath: string): string {
+  return basename(reportPath).replace(/(\.trades\.bin|\.json)$/, '');
+}
+
+/**
+ * 按平仓时间累计的资金曲线，首点为 (startTime, initialCapital)
+ * 超过 maxPoints 时等间隔抽样，首尾两点始终保留
+ */
+export function equityCurve(
+  exitTimes: number[],
+  pnl: number[],
+  initialCapital: number,
+  startTime: number,
+  maxPoints: number = EQUITY_POINTS
+): EquityPoint[] {
+  const order = exitTimes
+    .map((_, i) => i)
+    .filter(i => Number.isFinite(exitTimes[i]) && Number.isFinite(pnl[i]))
+    .sort((a, b) => exitTimes[a] - exitTimes[b]);
+
+  const points: EquityPoint[] = [[startTime, initialCapital]];
+  let equity = initialCapital;
+  for (const i of order) {
+    equity += pnl[i];
+    points.push([exitTimes[i], equity]);
+  }
+
+  if (points.length <= maxPoints) return points;
+
+  const sampled: EquityPoint[] = [];
+  const step = (points.length - 1) / (maxPoints - 1);
+  for (let k = 0; k < maxPoints; k++) {
+    sampled.push(points[Math.round(k * step)]);
+  }
+  return sampled;
+}
+
+/**
+ * VirtualTrade 列表的资金曲线
+ */
+export function tradeEquityCurve(
+  trades: VirtualTrade[],
+  initialCapital: number,
+  startTime: number,
+  maxPoints: number = EQUITY_POINTS
+): EquityPoint[] {
+  return equityCurve(
+    trades.map(t => (t.exitTime ? t.exitTime.getTime() : NaN)),
+    trades.map(t => (t.pnl === undefined ? NaN : t.pnl)),
+    initialCapital,
+    startTime,
+    maxPoints
+  );
+}
+
+export function openCatalog(catalogPath: string, schemaPath: string = CATALOG_SCHEMA_PATH): Database.Database {
+  const schema = readFileSync(schemaPath, 'utf-8');
+  const db = new Database(catalogPath);
+  db.pragma('foreign_keys = ON');
+  addMissingColumns(db, schema);
+  db.exec(schema);
+  return db;
+}
+
+/**
+ * 早期目录缺少的列（CREATE TABLE IF NOT EXISTS 不会给已有表加列）：
+ * 在内存库里按 schema 建一份，与已有的表逐列对比后补齐
+ */
+function addMissingColumns(db: Database.Database, schema: string): void {
+  const declared = new Database(':memory:');
+  declared.exec(schema);
+  const tables = declared.prepare("SELECT name FROM sqlite_master WHERE type = 'table'").all() as { name: string }[];
+  for (const { name: table } of tables) {
+    const existing = new Set((db.pragma(`table_info(${table})`) as { name: string }[]).map(c => c.name));
+    if (existing.size === 0) continue;
+    for (const column of declared.pragma(`table_info(${table})`) as { name: string; type: string }[]) {
+      if (!existing.has(column.name)) {
+        db.exec(`ALTER TABLE ${table} ADD COLUMN ${column.name} ${column.type}`);
+      }
+    }
+  }
+  declared.close();
+}
+
+function relativeTo(catalogPath: string, filePath?: string): string | null {
+  if (!filePath) return null;
+  const rel = relative(dirname(catalogPath), filePath);
+  return rel.startsWith('..') || isAbsolute(rel) ? filePath : rel;
+}
+
+/**
+ * 登记（或覆盖）一条报告，报告路径存为相对 catalog.db 所在目录的路径
+ */
+export function upsertCatalogEntry(db: Database.Database, catalogPath: string, entry: CatalogEntry): void {
+  const upsertReport = db.prepare(`
+    INSERT INTO reports (
+      name, created_at, json_path, columnar_path, scenario, days, markets,
+      initial_capital, min_arbitrage_gap, start_date, end_date,
+      total_trades, winning_trades, losing_trades, win_rate, total_pnl, total_pnl_percent,
+      avg_return, max_drawdown, sharpe_ratio, config, options, sweep_id, params
+    ) VALUES (
+      @name, @createdAt, @jsonPath, @columnarPath, @scenario, @days, @markets,
+      @initialCapital, @minArbitrageGap, @startDate, @endDate,
+      @totalTrades, @winningTrades, @losingTrades, @winRate, @totalPnL, @totalPnLPercent,
+      @avgReturn, @maxDrawdown, @sharpeRatio, @config, @options, @sweepId, @params
+    )
+    ON CONFLICT(name) DO UPDATE SET
+      created_at = excluded.created_at,
+      json_path = excluded.json_path,
+      columnar_path = excluded.columnar_path,
+      scenario = excluded.scenario,
+      days = excluded.days,
+      markets = excluded.markets,
+      initial_capital = excluded.initial_capital,
+      min_arbitrage_gap = excluded.min_arbitrage_gap,
+      start_date = excluded.start_date,
+      end_date = excluded.end_date,
+      total_trades = excluded.total_trades,
+      winning_trades = excluded.winning_trades,
+      losing_trades = excluded.losing_trades,
+      win_rate = excluded.win_rate,
+      total_pnl = excluded.total_pnl,
+      total_pnl_percent = excluded.total_pnl_percent,
+      avg_return = excluded.avg_return,
+      max_drawdown = excluded.max_drawdown,
+      sharpe_ratio = excluded.sharpe_ratio,
+      config = excluded.config,
+      options = excluded.options,
+      sweep_id = excluded.sweep_id,
+      params = excluded.params
+  `);
+  const upsertEquity = db.prepare(`
+    INSERT INTO report_equity (name, points) VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET points = excluded.points
+  `);
+
+  const { config, options, result } = entry;
+  db.transaction(() => {
+    upsertReport.run({
+      name: entry.name,
+      createdAt: entry.createdAt,
+      jsonPath: relativeTo(catalogPath, entry.jsonPath),
+      columnarPath: relativeTo(catalogPath, entry.columnarPath),
+      scenario: options.scenario ?? null,
+      days: options.days ?? null,
+      markets: options.markets ?? null,
+      initialCapital: config.initialCapital ?? null,
+      minArbitrageGap: config.minArbitrageGap ?? null,
+      startDate: config.startDate ?? null,
+      endDate: config.endDate ?? null,
+      totalTrades: result.totalTrades,
+      winningTrades: result.winningTrades,
+      losingTrades: result.losingTrades,
+      winRate: result.winRate,
+      totalPnL: result.totalPnL,
+      totalPnLPercent: result.totalPnLPercent,
+      avgReturn: result.avgReturn,
+      maxDrawdown: result.maxDrawdown,
+      sharpeRatio: result.sharpeRatio,
+      config: JSON.stringify(config),
+      options: JSON.stringify(options),
+      sweepId: entry.sweepId ?? null,
+      params: entry.params ? JSON.stringify(entry.params) : null,
+    });
+    upsertEquity.run(entry.name, JSON.stringify(entry.equity));
+  })();
+}
+
+/**
+ * 打开目录、登记一条报告后关闭
+ */
+export function recordReport(catalogPath: string, entry: CatalogEntry): void {
+  const db = openCatalog(catalogPath);
+  try {
+    upsertCatalogEntry(db, catalogPath, entry);
+  } finally {
+    db.close();
+  }
+}
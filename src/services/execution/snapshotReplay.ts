@@ -0,0 +1,85 @@
+import Database from 'better-sqlite3';
+import { parseSqliteTime, toSqliteTime } from '../../database/statements';
+import { HistoricalPrice } from './backtestEngine';
+
+/**
+ * 价格快照分块回放
+ *
+ * 按 (timestamp, id) 键集分页从 price_snapshots 顺序读取一段时间内所有市场的快照，
+ * 每块最多 chunkSize 行，游标只依赖上一块的最后一行，读到第几块都是一次索引范围扫描
+ * （idx_price_snapshots_time），内存占用与回放区间长度无关。
+ * 查询与 dashboard/queries.py 的 BACKTEST_PRICE_CHUNK 相同，两个引擎回放的价格点和顺序一致。
+ */
+
+export const DEFAULT_CHUNK_SIZE = 50_000;
+
+export interface SnapshotReplayOptions {
+  /** 起始时间（含） */
+  startTime: Date;
+  /** 结束时间（不含） */
+  endTime: Date;
+  /** 每块最多行数 */
+  chunkSize?: number;
+}
+
+interface SnapshotRow {
+  id: number;
+  timestamp: string;
+  marketId: string;
+  marketName: string;
+  yesPrice: number;
+  noPrice: number;
+}
+
+const CHUNK_SQL = `
+  SELECT
+    ps.id as id,
+    ps.timestamp as timestamp,
+    ps.market_id as marketId,
+    m.question as marketName,
+    ps.yes_price as yesPrice,
+    ps.no_price as noPrice
+  FROM price_snapshots ps
+  JOIN markets m ON ps.market_id = m.id
+  WHERE ps.timestamp < @end
+    AND (ps.timestamp, ps.id) > (@cursorTime, @cursorId)
+  ORDER BY ps.timestamp, ps.id
+  LIMIT @rows
+`;
+
+/**
+ * 按时间顺序逐块产出 [startTime, endTime) 内的价格快照，可直接交给 BacktestEngine.runBacktestStream
+ */
+export function* readSnapshotChunks(
+  database: Database.Database,
+  options: SnapshotReplayOptions
+): Generator<HistoricalPrice[]> {
+  const rows = options.chunkSize ?? DEFAULT_CHUNK_SIZE;
+  const stmt = database.prepare(CHUNK_SQL);
+  const end = toSqliteTime(options.endTime);
+  let cursorTime = toSqliteTime(options.startTime);
+  let cursorId = 0;
+
+  while (true) {
+    const chunk = stmt.all({ end, cursorTime, cursorId, rows }) as SnapshotRow[];
+    if (chunk.length === 0) {
+      return;
+    }
+
+    const last = chunk[chunk.length - 1];
+    cursorTime = last.timestamp;
+    cursorId = last.id;
+
+    yield chunk.map(row => ({
+      timestamp: parseSqliteTime(row.timestamp),
+      marketId: row.marketId,
+      marketName: row.marketName,
+      yesPrice: row.yesPrice,
+      noPrice: row.noPrice,
+    }));
+
+    if (chunk.length < rows) {
+      return;
+    }
+  }
+}
@@ -1,4 +1,7 @@
-import { Position } from '../types';
+import { BotConfig } from '../../types';
+import { defaultConfig } from '../../config';
+
+export type TakeProfitConfig = BotConfig['strategy']['takeProfit'];
 
 export interface VirtualTrade {
   id: number;
@@ -40,11 +43,13 @@ export class VirtualExecutor {
   private initialCapital: number;
   private currentCapital: number;
   private peakCapital: number;
+  private takeProfit: TakeProfitConfig;
 
-  constructor(initialCapital: number = 1000) {
+  constructor(initialCapital: number = 1000, takeProfit: TakeProfitConfig = defaultConfig.strategy.takeProfit) {
     this.initialCapital = initialCapital;
     this.currentCapital = initialCapital;
     this.peakCapital = initialCapital;
+    this.takeProfit = takeProfit;
   }
 
   /**
@@ -57,7 +62,8 @@ export class VirtualExecutor {
     side: 'YES' | 'NO',
     price: number,
     deviation: number,
-    amount: number
+    amount: number,
+    entryTime: Date = new Date()
   ): VirtualTrade {
     const quantity = amount / price;
     
@@ -71,7 +77,7 @@ export class VirtualExecutor {
       entryDeviation: deviation,
       amount,
       quantity,
-      entryTime: new Date(),
+      entryTime,
       status: 'OPEN',
     };
 
@@ -107,20 +113,20 @@ export class VirtualExecutor {
     const pnl = priceDiff * trade.quantity;
     const pnlPercent = (pnl / trade.amount) * 100;
 
-    // 规则1：偏离度已回归50% → 减仓50%
+    // 规则1：偏离度已回归 partialCloseAt（默认50%）→ 减仓50%
     const deviationRecovered = trade.entryDeviation - currentDeviation;
     const recoveryPercent = deviationRecovered / trade.entryDeviation;
     
-    if (recoveryPercent >= 0.5 && !trade.exitReason) {
+    if (recoveryPercent >= this.takeProfit.partialCloseAt && !trade.exitReason) {
       return {
         action: 'PARTIAL_CLOSE',
-        reason: `偏离度已回归50% (${(recoveryPercent * 100).toFixed(1)}%)`,
+        reason: `偏离度已回归${(this.takeProfit.partialCloseAt * 100).toFixed(0)}% (${(recoveryPercent * 100).toFixed(1)}%)`,
         pnl: pnl * 0.5  // 50%减仓
       };
     }
 
-    // 规则2：完全回归（<0.5%）→ 全部平仓
-    if (currentDeviation < 0.005) {
+    // 规则2：完全回归（< fullCloseAt，默认0.5%）→ 全部平仓
+    if (currentDeviation < this.takeProfit.fullCloseAt) {
       return {
         action: 'FULL_CLOSE',
         reason: `偏离度已完全回归至 ${(currentDeviation * 100).toFixed(2)}%`,
@@ -128,11 +134,11 @@ export class VirtualExecutor {
       };
     }
 
-    // 规则3：持仓超过24小时 → 强制平仓
-    if (hoursHeld >= 24) {
+    // 规则3：持仓超过 maxHoldHours（默认24小时）→ 强制平仓
+    if (hoursHeld >= this.takeProfit.maxHoldHours) {
       return {
         action: 'TIMEOUT',
-        reason: `持仓超过24小时，当前盈亏: ${pnlPercent.toFixed(2)}%`,
+        reason: `持仓超过${this.takeProfit.maxHoldHours}小时，当前盈亏: ${pnlPercent.toFixed(2)}%`,
         pnl
       };
     }
@@ -8,7 +8,9 @@ const testDbPath = './data/test_trading_bot.db';
 
 describe('RiskManager', () => {
   let riskManager: RiskManager;
+  // db 模拟其他进程写入，riskDb 是 RiskManager 自己的连接
   let db: Database.Database;
+  let riskDb: Database.Database;
 
   beforeAll(() => {
     // Clean up test database
@@ -16,12 +18,14 @@ describe('RiskManager', () => {
       fs.unlinkSync(testDbPath);
     }
 
+    fs.mkdirSync(path.dirname(testDbPath), { recursive: true });
     db = new Database(testDbPath);
     
     // Create tables
     db.exec(`
       CREATE TABLE trades (
         id INTEGER PRIMARY KEY,
+        amount REAL NOT NULL DEFAULT 0,
         pnl REAL,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         status TEXT
@@ -40,9 +44,11 @@ describe('RiskManager', () => {
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP
       );
     `);
+    riskDb = new Database(testDbPath);
   });
 
   afterAll(() => {
+    riskDb.close();
     db.close();
     if (fs.existsSync(testDbPath)) {
       fs.unlinkSync(testDbPath);
@@ -53,10 +59,20 @@ describe('RiskManager', () => {
     // Clear tables
     db.exec('DELETE FROM trades');
     db.exec('DELETE FROM signals');
+    db.exec('DELETE FROM risk_logs');
     
-    riskManager = new RiskManager(1000, 0.05, 0.20, 3);
+    riskManager = new RiskManager(1000, 0.05, 0.20, 3, riskDb);
   });
 
+  afterEach(() => {
+    jest.useRealTimers();
+  });
+
+  function riskLogTypes(): string[] {
+    return (db.prepare('SELECT log_type FROM risk_logs ORDER BY id').all() as Array<{ log_type: string }>)
+      .map(row => row.log_type);
+  }
+
   test('should allow trading when within limits', () => {
     const lossCheck = riskManager.checkDailyLossLimit();
     const tradeCheck = riskManager.checkDailyTradeCount();
@@ -108,4 +124,64 @@ describe('RiskManager', () => {
     expect(summary.tradeCount).toHaveProperty('limit');
     expect(summary.tradeCount).toHaveProperty('allowed');
   });
+
+  test('should count confirmed signals in memory without reloading', () => {
+    const today = new Date().toISOString().slice(0, 19).replace('T', ' ');
+    const pending = { status: 'pending' as const, created_at: today as any };
+
+    riskManager.recordSignalStatus(pending, 'confirmed');
+    riskManager.recordSignalStatus(pending, 'confirmed');
+    riskManager.recordSignalStatus({ ...pending, status: 'confirmed' }, 'executed');
+    expect(riskManager.checkDailyTradeCount()).toEqual({ allowed: true, count: 2, limit: 3 });
+
+    // 前一天创建的信号不计入今天
+    riskManager.recordSignalStatus({ status: 'pending', created_at: '2000-01-01 23:59:00' as any }, 'confirmed');
+    expect(riskManager.checkDailyTradeCount().count).toBe(2);
+
+    riskManager.recordSignalStatus(pending, 'confirmed');
+    expect(riskManager.checkDailyTradeCount().allowed).toBe(false);
+  });
+
+  test('should pick up trades written by another connection', () => {
+    const opened = db.prepare('INSERT INTO trades (amount, created_at, status) VALUES (?, datetime("now"), ?)').run(100, 'pending');
+    expect(riskManager.getExposure()).toBe(100);
+
+    db.prepare('INSERT INTO trades (amount, created_at, status) VALUES (?, datetime("now"), ?)').run(50, 'pending');
+    expect(riskManager.getExposure()).toBe(150);
+
+    db.prepare("UPDATE trades SET pnl = ?, status = 'settled' WHERE id = ?").run(-60, opened.lastInsertRowid);
+    expect(riskManager.getExposure()).toBe(50);
+    expect(riskManager.checkDailyLossLimit()).toMatchObject({ allowed: false, currentLoss: 60 });
+  });
+
+  test('should log a risk event only when the limit state changes', () => {
+    db.prepare('INSERT INTO trades (pnl, created_at, status) VALUES (?, datetime("now"), ?)').run(-60, 'settled');
+
+    riskManager.getRiskSummary();
+    riskManager.getRiskSummary();
+    riskManager.getRiskSummary();
+    expect(riskLogTypes()).toEqual(['limit_warning']);
+
+    db.exec('DELETE FROM trades');
+    riskManager.getRiskSummary();
+    expect(riskLogTypes()).toEqual(['limit_warning', 'info']);
+  });
+
+  test('should roll the daily counters over at the UTC day boundary', () => {
+    jest.useFakeTimers({ now: new Date('2024-03-01T23:59:00Z') });
+    db.prepare('INSERT INTO trades (pnl, created_at, status) VALUES (?, ?, ?)').run(-60, '2024-03-01 10:00:00', 'settled');
+    db.prepare('INSERT INTO signals (status, created_at) VALUES (?, ?)').run('confirmed', '2024-03-01 11:00:00');
+    riskManager.reload();
+
+    expect(riskManager.getRiskSummary()).toMatchObject({
+      dailyLoss: { current: 60, allowed: false },
+      tradeCount: { current: 1 },
+    });
+
+    jest.setSystemTime(new Date('2024-03-02T00:01:00Z'));
+    expect(riskManager.getRiskSummary()).toMatchObject({
+      dailyLoss: { current: 0, allowed: true },
+      tradeCount: { current: 0 },
+    });
+  });
 });
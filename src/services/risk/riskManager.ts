@@ -1,60 +1,88 @@
+import Database from 'better-sqlite3';
 import { db } from '../../database/connection';
+import { prepared } from '../../database/statements';
 import { defaultConfig } from '../../config';
+import { Signal } from '../../types';
 
+/** 计入日交易次数的信号状态 */
+const COUNTED_SIGNAL_STATUSES: ReadonlySet<Signal['status']> = new Set(['confirmed', 'executed']);
+
+/**
+ * 风控：当日盈亏、交易次数和未结算敞口常驻内存
+ *
+ * 启动时（以及 UTC 换日、其他进程写入数据库后）从数据库重建一次，之后本进程确认 / 执行信号时
+ * 通过 recordSignalStatus 增量更新，检查本身不查库。
+ * 本进程不写 trades，盈亏和敞口只随其他进程的写入变化：通过 PRAGMA data_version 发现
+ * （本连接自己的写入不会改变它），发现后整体重建。
+ * 风控日志只在限额状态切换时写入一条，不在每次检查时重复写。
+ */
 export class RiskManager {
-  private database = db.getConnection();
-  
   private maxDailyLoss: number;
   private maxSingleTrade: number;
   private maxDailyTrades: number;
   private totalCapital: number;
 
+  /** 当前计数对应的 UTC 日期（YYYY-MM-DD） */
+  private day = '';
+  private dataVersion = -1;
+  private todayPnl = 0;
+  private todayTrades = 0;
+  private exposure = 0;
+  private lossBlocked = false;
+  private tradesBlocked = false;
+
   constructor(
     totalCapital: number = 1000,
     maxDailyLoss: number = defaultConfig.risk.maxDailyLoss,
     maxSingleTrade: number = defaultConfig.risk.maxSingleTrade,
-    maxDailyTrades: number = defaultConfig.risk.maxDailyTrades
+    maxDailyTrades: number = defaultConfig.risk.maxDailyTrades,
+    private database: Database.Database = db.getConnection()
   ) {
     this.totalCapital = totalCapital;
     this.maxDailyLoss = maxDailyLoss;
     this.maxSingleTrade = maxSingleTrade;
     this.maxDailyTrades = maxDailyTrades;
+    this.reload();
   }
 
   checkDailyLossLimit(): { allowed: boolean; currentLoss: number; limit: number } {
-    const today = new Date().toISOString().split('T')[0];
-    const stmt = this.database.prepare(`
-      SELECT COALESCE(SUM(pnl), 0) as total_pnl
-      FROM trades
-      WHERE DATE(created_at) = DATE(?)
-    `);
-    const result = stmt.get(today) as { total_pnl: number };
-    const currentLoss = Math.abs(Math.min(0, result.total_pnl));
+    this.sync();
+    const currentLoss = Math.abs(Math.min(0, this.todayPnl));
     const limit = this.totalCapital * this.maxDailyLoss;
+    const allowed = currentLoss < limit;
 
-    if (currentLoss >= limit) {
-      this.logRiskEvent('limit_warning', `日亏损已达 ${currentLoss.toFixed(2)} 元，接近限额 ${limit.toFixed(2)} 元`, currentLoss, limit);
+    if (allowed === this.lossBlocked) {
+      this.lossBlocked = !allowed;
+      if (allowed) {
+        this.logRiskEvent('info', `日亏损 ${currentLoss.toFixed(2)} 元，回到限额 ${limit.toFixed(2)} 元以内，恢复交易`, currentLoss, limit);
+      } else {
+        this.logRiskEvent('limit_warning', `日亏损已达 ${currentLoss.toFixed(2)} 元，接近限额 ${limit.toFixed(2)} 元`, currentLoss, limit);
+      }
     }
 
     return {
-      allowed: currentLoss < limit,
+      allowed,
       currentLoss,
       limit,
     };
   }
 
   checkDailyTradeCount(): { allowed: boolean; count: number; limit: number } {
-    const today = new Date().toISOString().split('T')[0];
-    const stmt = this.database.prepare(`
-      SELECT COUNT(*) as count
-      FROM signals
-      WHERE DATE(created_at) = DATE(?) AND status IN ('confirmed', 'executed')
-    `);
-    const result = stmt.get(today) as { count: number };
-    const count = result.count;
+    this.sync();
+    const count = this.todayTrades;
+    const allowed = count < this.maxDailyTrades;
+
+    if (allowed === this.tradesBlocked) {
+      this.tradesBlocked = !allowed;
+      if (allowed) {
+        this.logRiskEvent('info', `日交易次数 ${count} 次，低于限额 ${this.maxDailyTrades} 次，恢复交易`, count, this.maxDailyTrades);
+      } else {
+        this.logRiskEvent('trade_blocked', `日交易次数已达 ${count} 次，暂停新交易`, count, this.maxDailyTrades);
+      }
+    }
 
     return {
-      allowed: count < this.maxDailyTrades,
+      allowed,
       count,
       limit: this.maxDailyTrades,
     };
@@ -89,11 +117,85 @@ export class RiskManager {
     };
   }
 
+  /** 未结算交易的金额合计 */
+  getExposure(): number {
+    this.sync();
+    return this.exposure;
+  }
+
+  /**
+   * 信号状态变化（在 SignalRepository.updateStatus 之后调用）
+   * 只有当天创建的信号计入当日交易次数，与重建时的统计口径一致
+   */
+  recordSignalStatus(signal: Pick<Signal, 'status' | 'created_at'>, status: Signal['status']): void {
+    this.sync();
+    if (dayOf(signal.created_at) !== this.day) return;
+    this.todayTrades += Number(COUNTED_SIGNAL_STATUSES.has(status)) - Number(COUNTED_SIGNAL_STATUSES.has(signal.status));
+  }
+
+  /** 从数据库重建当日计数（走 created_at / status 索引） */
+  reload(): void {
+    const { start, end } = this.todayRange();
+    const pnl = prepared(this.database, `
+      SELECT COALESCE(SUM(pnl), 0) as total_pnl
+      FROM trades
+      WHERE created_at >= ? AND created_at < ?
+    `).get(start, end) as { total_pnl: number };
+    const trades = prepared(this.database, `
+      SELECT COUNT(*) as count
+      FROM signals
+      WHERE status IN ('confirmed', 'executed') AND created_at >= ? AND created_at < ?
+    `).get(start, end) as { count: number };
+    const exposure = prepared(this.database, `
+      SELECT COALESCE(SUM(amount), 0) as exposure
+      FROM trades
+      WHERE status IN ('pending', 'confirmed')
+    `).get() as { exposure: number };
+
+    this.day = start;
+    this.todayPnl = pnl.total_pnl;
+    this.todayTrades = trades.count;
+    this.exposure = exposure.exposure;
+    this.dataVersion = this.currentDataVersion();
+  }
+
+  /** UTC 换日或其他连接提交过写入时重建 */
+  private sync(): void {
+    if (this.todayRange().start !== this.day || this.currentDataVersion() !== this.dataVersion) {
+      this.reload();
+    }
+  }
+
+  private currentDataVersion(): number {
+    return this.database.pragma('data_version', { simple: true }) as number;
+  }
+
+  /**
+   * 今天（UTC）的半开区间 [start, end)，与 SQLite datetime('now') 的存储格式可直接比较
+   * 不对列套 DATE()，这样能走 created_at 索引
+   */
+  private todayRange(): { start: string; end: string } {
+    const now = new Date();
+    const start = new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate()));
+    const end = new Date(start.getTime() + 24 * 60 * 60 * 1000);
+    return {
+      start: start.toISOString().split('T')[0],
+      end: end.toISOString().split('T')[0],
+    };
+  }
+
   private logRiskEvent(type: string, message: string, exposure: number, limit: number): void {
-    const stmt = this.database.prepare(`
+    prepared(this.database, `
       INSERT INTO risk_logs (log_type, message, current_exposure, limit_value)
       VALUES (?, ?, ?, ?)
-    `);
-    stmt.run(type, message, exposure, limit);
+    `).run(type, message, exposure, limit);
+  }
+}
+
+/** 数据库读出的时间是 UTC 文本（YYYY-MM-DD HH:MM:SS），也兼容 Date；缺失按今天处理 */
+function dayOf(value: Date | string | undefined): string {
+  if (value === undefined || value === null) {
+    return new Date().toISOString().split('T')[0];
   }
+  return value instanceof Date ? value.toISOString().split('T')[0] : String(value).slice(0, 10);
 }
@@ -1,7 +1,12 @@
-import { ArbitrageOpportunity, SignalLevel } from '../types';
+import { ArbitrageOpportunity, SignalLevel } from '../../types';
+import { defaultConfig } from '../../config';
 
 export class ArbitrageStrategy {
-  private minGap: number = 0.015;
+  private minGap: number;
+
+  constructor(minGap: number = defaultConfig.strategy.thresholds.minArbitrageGap) {
+    this.minGap = minGap;
+  }
 
   detectOpportunity(
     marketId: string,
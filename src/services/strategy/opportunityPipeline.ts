@@ -0,0 +1,90 @@
+import { OpportunityRepository, SignalRepository } from '../../database/repositories/signal';
+import { RiskManager } from '../risk/riskManager';
+import { ArbitrageOpportunity, Market, PriceSnapshot, Signal } from '../../types';
+import { ArbitrageStrategy } from './arbitrage';
+import { SignalGenerator } from './signalGenerator';
+
+export interface OpportunityNotification {
+  signal: Signal;
+  opportunity: ArbitrageOpportunity;
+}
+
+export interface OpportunityPipelineDeps {
+  arbitrageStrategy: ArbitrageStrategy;
+  signalGenerator: SignalGenerator;
+  riskManager: Pick<RiskManager, 'checkSingleTradeLimit'>;
+  opportunityRepo: OpportunityRepository;
+  signalRepo: SignalRepository;
+  mode: 'SIMULATION' | 'LIVE';
+}
+
+/**
+ * 单个市场价格 → 套利检测 → 记录机会和信号
+ * 轮询（checkMarkets）和推送流（StreamIngestor）共用，两条路径产生的记录一致
+ * 同一市场发出信号后在信号有效期内不再重复发，冷却期也由两条路径共用
+ */
+export class OpportunityPipeline {
+  /** 市场 → 冷却结束时间（毫秒） */
+  private cooldownUntil = new Map<string, number>();
+
+  constructor(private deps: OpportunityPipelineDeps) {}
+
+  /**
+   * 检测并记录；产生信号时返回待推送的通知（由调用方在事务提交后发送），否则返回 null
+   */
+  evaluate(
+    market: Pick<Market, 'id' | 'question'>,
+    prices: PriceSnapshot,
+    now: number = Date.now()
+  ): OpportunityNotification | null {
+    const { arbitrageStrategy, signalGenerator, riskManager, opportunityRepo, signalRepo, mode } = this.deps;
+
+    // 冷却期内不再检测，过期的记录顺手删掉
+    const cooldownUntil = this.cooldownUntil.get(market.id);
+    if (cooldownUntil !== undefined) {
+      if (cooldownUntil > now) return null;
+      this.cooldownUntil.delete(market.id);
+    }
+
+    // 检测套利机会
+    const opportunity = arbitrageStrategy.detectOpportunity(
+      market.id,
+      market.question,
+      prices.yes_price,
+      prices.no_price
+    );
+    if (!opportunity || opportunity.recommendation === 'WAIT') {
+      return null;
+    }
+
+    console.log(`🎯 [${opportunity.level}] ${market.question}`);
+    console.log(`   偏离度: ${opportunity.deviationPercent.toFixed(2)}% | 建议: ${opportunity.recommendation} | 有效期: ${opportunity.expiryMinutes}分钟`);
+
+    // 检查单笔限额
+    const amountCheck = riskManager.checkSingleTradeLimit(
+      opportunity.expectedReturn * 1000  // 估算金额
+    );
+    if (!amountCheck.allowed) {
+      console.warn(`   ⚠️ 超过单笔限额`);
+      return null;
+    }
+
+    // 保存机会记录
+    const opportunityId = opportunityRepo.create(opportunity);
+
+    // 生成信号
+    const { signal } = signalGenerator.generateFromArbitrage(market.id, opportunity);
+    signal.opportunity_id = opportunityId;
+
+    // 保存信号
+    const signalId = signalRepo.create(signal);
+    this.cooldownUntil.set(market.id, now + opportunity.expiryMinutes * 60_000);
+
+    // 模拟模式：记录但不执行
+    if (mode === 'SIMULATION') {
+      console.log(`   [模拟] 信号 #${signalId} 已记录，等待确认`);
+    }
+
+    return { signal: { ...signal, id: signalId }, opportunity };
+  }
+}
@@ -6,6 +6,31 @@ export interface BotConfig {
   database: {
     path: string;
   };
+  polymarket: {
+    baseUrl: string;
+    /** 市场列表每页条数 */
+    pageSize: number;
+    /** 最多扫描的市场数，0 为不限 */
+    maxMarkets: number;
+    /** 同时进行的价格请求数 */
+    concurrency: number;
+    /** 单个请求超时（毫秒） */
+    timeoutMs: number;
+  };
+  snapshots: {
+    epsilon: number;
+    heartbeatMinutes: number;
+  };
+  stream: {
+    url: string;
+    flushIntervalMs: number;
+    staleMs: number;
+  };
+  retention: {
+    snapshotDays: number;
+    archivePath: string;
+    barDays: Record<string, number>;
+  };
   risk: {
     maxDailyLoss: number;
     maxSingleTrade: number;